@@ -36,8 +36,8 @@ from cli.utils import (
     select_shallow_thinking_agent,
 )
 from tradingagents.default_config import DEFAULT_CONFIG
-from tradingagents.graph.trading_graph import TradingAgentsGraph
 from tradingagents.utils.logging_manager import get_logger
+# TradingAgentsGraph 及LLM适配器较重，在开始分析时才导入，交互界面可以立即显示
 
 # 加载环境变量
 load_dotenv()
@@ -49,6 +49,8 @@ DEFAULT_MAX_CONTENT_LENGTH = 200
 DEFAULT_MAX_DISPLAY_MESSAGES = 12
 DEFAULT_REFRESH_RATE = 4
 DEFAULT_API_KEY_DISPLAY_LENGTH = 12
+DEFAULT_MAX_STREAM_PREVIEW_LENGTH = 200
+DEFAULT_STREAM_REFRESH_INTERVAL = 0.25
 
 # 初始化日志系统
 logger = get_logger("cli")
@@ -175,6 +177,9 @@ class MessageBuffer:
             "Portfolio Manager": "pending",
         }
         self.current_agent = None
+        # 当前LLM调用的流式输出（调用结束后清空）
+        self.streaming_output = None
+        self.streaming_model = None
         self.report_sections = {
             "market_report": None,
             "sentiment_report": None,
@@ -193,6 +198,15 @@ class MessageBuffer:
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         self.tool_calls.append((timestamp, tool_name, args))
 
+    def update_stream(self, event):
+        """接收LLM流式输出事件，保留当前调用已生成的文本"""
+        if event.get("done"):
+            self.streaming_output = None
+            self.streaming_model = None
+            return
+        self.streaming_output = event.get("text", "")
+        self.streaming_model = f"{event.get('provider')}/{event.get('model')}"
+
     def update_agent_status(self, agent, status):
         if agent in self.agent_status:
             self.agent_status[agent] = status
@@ -464,6 +478,15 @@ def update_display(layout, spinner_text=None):
     if spinner_text:
         messages_table.add_row("", "Spinner", spinner_text)
 
+    # Show the tail of the in-flight LLM output so long calls don't look frozen
+    if message_buffer.streaming_output:
+        preview = message_buffer.streaming_output[-DEFAULT_MAX_STREAM_PREVIEW_LENGTH:]
+        messages_table.add_row(
+            datetime.datetime.now().strftime("%H:%M:%S"),
+            "Streaming",
+            Text(f"[{message_buffer.streaming_model}] ...{preview}", overflow="fold"),
+        )
+
     # Add a footer to indicate if messages were truncated
     if len(all_messages) > max_messages:
         messages_table.footer = (
@@ -1025,10 +1048,33 @@ def check_api_keys(llm_provider: str) -> bool:
 
     return True
 
+def stream_graph_with_live_output(graph, init_agent_state, args, layout):
+    """
+    运行分析图并将LLM流式输出转发到MessageBuffer
+    Stream graph chunks while forwarding incremental LLM output to the display
+    """
+    last_refresh = [0.0]
+
+    def on_stream(event):
+        message_buffer.update_stream(event)
+        now = time.time()
+        if event.get("done") or now - last_refresh[0] >= DEFAULT_STREAM_REFRESH_INTERVAL:
+            last_refresh[0] = now
+            update_display(layout)
+
+    from tradingagents.llm_adapters.streaming import stream_progress_scope
+
+    with stream_progress_scope(on_stream):
+        yield from graph.graph.stream(init_agent_state, **args)
+
 def run_analysis():
     import time
     start_time = time.time()  # 记录开始时间
-    
+
+    # 用户选择参数期间在后台探测MongoDB/Redis
+    from tradingagents.config.database_manager import start_background_probe
+    start_background_probe()
+
     # First get all user selections
     selections = get_user_selections()
 
@@ -1074,6 +1120,8 @@ def run_analysis():
     # Initialize the graph
     ui.show_progress("正在初始化分析系统...")
     try:
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+
         graph = TradingAgentsGraph(
             [analyst.value for analyst in selections["analysts"]], config=config, debug=True
         )
@@ -1237,11 +1285,10 @@ def run_analysis():
         ui.show_step_header(3, "数据获取阶段 | Data Collection Phase")
         ui.show_progress("正在获取股票基本信息...")
 
-        # Initialize state and get graph args
-        init_agent_state = graph.propagator.create_initial_state(
+        # Initialize state and get graph args（有上次失败留下的检查点时从中断处继续）
+        init_agent_state, args = graph.prepare_run(
             selections["ticker"], selections["analysis_date"]
         )
-        args = graph.propagator.get_graph_args()
 
         ui.show_success("数据获取准备完成")
 
@@ -1264,7 +1311,7 @@ def run_analysis():
         # 跟踪已完成的分析师，避免重复提示
         completed_analysts = set()
 
-        for chunk in graph.graph.stream(init_agent_state, **args):
+        for chunk in stream_graph_with_live_output(graph, init_agent_state, args, layout):
             if len(chunk["messages"]) > 0:
                 # Get the last message from the chunk
                 last_message = chunk["messages"][-1]
@@ -1571,6 +1618,7 @@ def run_analysis():
         # Get final state and decision
         final_state = trace[-1]
         decision = graph.process_signal(final_state["final_trade_decision"], selections['ticker'])
+        graph.finish_run(args)
 
         ui.show_success("🤖 投资信号处理完成")
 
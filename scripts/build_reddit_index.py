@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reddit离线数据索引构建脚本
+
+把 data_dir/reddit_data 下各分类的版块jsonl导入为按日期分区的索引
+（data_dir/reddit_data/_index），公司新闻分类同时标注每条帖子提及的股票代码。
+未执行本脚本时首次查询也会自动构建，这里用于部署时提前完成导入。
+
+使用方法:
+    python scripts/build_reddit_index.py
+    python scripts/build_reddit_index.py --categories company_news
+    python scripts/build_reddit_index.py --data-dir /path/to/data
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 导入项目模块
+try:
+    from tradingagents.utils.logging_manager import get_logger
+    from tradingagents.dataflows.config import get_data_dir
+    from tradingagents.dataflows.reddit_utils import REDDIT_INDEX_DIR, build_reddit_index
+    logger = get_logger('reddit_index')
+except ImportError as e:
+    print(f"❌ 导入模块失败: {e}")
+    print("请确保在项目根目录运行此脚本")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reddit离线数据索引构建脚本')
+    parser.add_argument('--data-dir', help='数据目录（默认使用配置中的数据目录）')
+    parser.add_argument('--categories', help='逗号分隔的分类目录名（默认全部，如 global_news,company_news）')
+    args = parser.parse_args()
+
+    data_path = os.path.join(args.data_dir or get_data_dir(), "reddit_data")
+    if not os.path.isdir(data_path):
+        logger.warning(f"⚠️ 未找到Reddit数据目录: {data_path}")
+        return 1
+
+    if args.categories:
+        categories = args.categories.split(',')
+    else:
+        categories = sorted(name for name in os.listdir(data_path)
+                            if name != REDDIT_INDEX_DIR and os.path.isdir(os.path.join(data_path, name)))
+    missing = [c for c in categories if not os.path.isdir(os.path.join(data_path, c))]
+    if missing:
+        parser.error(f"未知的分类: {', '.join(missing)}")
+
+    logger.info(f"📦 开始构建Reddit索引: {data_path}")
+    for category in categories:
+        manifest = build_reddit_index(data_path, category)
+        logger.info(f"✅ {category}: {sum(manifest['dates'].values())}条帖子, {len(manifest['dates'])}天")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
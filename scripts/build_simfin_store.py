@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SimFin基本面数据导入脚本
+
+把 data_dir/fundamental_data/simfin_data_all 下的SimFin CSV导入为按股票分区的列式存储
+（data_dir/fundamental_data/simfin_store），之后的报表查询只读取单只股票的数据。
+未执行本脚本时首次查询也会自动导入，这里用于部署时提前完成导入。
+
+使用方法:
+    python scripts/build_simfin_store.py
+    python scripts/build_simfin_store.py --freq annual --statements balance_sheet,income_statements
+    python scripts/build_simfin_store.py --data-dir /path/to/data --force
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 导入项目模块
+try:
+    from tradingagents.utils.logging_manager import get_logger
+    from tradingagents.dataflows.config import get_data_dir
+    from tradingagents.dataflows.simfin_store import FREQUENCIES, STATEMENTS, build_simfin_stores
+    logger = get_logger('simfin_store')
+except ImportError as e:
+    print(f"❌ 导入模块失败: {e}")
+    print("请确保在项目根目录运行此脚本")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SimFin基本面数据导入脚本')
+    parser.add_argument('--data-dir', help='数据目录（默认使用配置中的数据目录）')
+    parser.add_argument('--freq', choices=FREQUENCIES, help='只导入指定频率（默认全部）')
+    parser.add_argument('--statements', help=f'逗号分隔的报表类型，可选: {",".join(STATEMENTS)}')
+    parser.add_argument('--force', action='store_true', help='源文件未变化时也重新导入')
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or get_data_dir()
+    statements = args.statements.split(',') if args.statements else list(STATEMENTS)
+    unknown = [s for s in statements if s not in STATEMENTS]
+    if unknown:
+        parser.error(f"未知的报表类型: {', '.join(unknown)}")
+    freqs = [args.freq] if args.freq else list(FREQUENCIES)
+
+    logger.info(f"📦 开始导入SimFin数据: {data_dir}")
+    results = build_simfin_stores(data_dir, statements, freqs, force=args.force)
+    for name, rows in results.items():
+        logger.info(f"✅ {name}: {rows}行")
+    if not results:
+        logger.warning("⚠️ 未找到任何SimFin数据文件")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
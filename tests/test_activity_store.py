@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+用户活动存储测试
+验证追加写入、存储端过滤分页、按天计数统计、旧日志文件增量导入以及过期清理（SQLite和MongoDB后端）
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from web.utils.activity_store import (
+        SOURCE_ACTIVITY, SOURCE_OPERATION, MongoActivityStore, SQLiteActivityStore
+    )
+    ACTIVITY_STORE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 用户活动存储不可用: {e}")
+    ACTIVITY_STORE_AVAILABLE = False
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+def _ts(day, hour=10):
+    return datetime(2025, 3, day, hour).timestamp()
+
+
+class ActivityStoreCases:
+    """两种后端共用的测试用例"""
+
+    def _seed(self):
+        self.store.append({"timestamp": _ts(1), "username": "Alice", "action_type": "auth",
+                           "action_name": "user_login", "duration_ms": 100})
+        self.store.append({"timestamp": _ts(1, 11), "username": "bob", "action_type": "analysis",
+                           "action_name": "stock_analysis", "success": False, "duration_ms": 300})
+        self.store.append({"timestamp": _ts(2), "username": "alice", "action_type": "analysis",
+                           "action_name": "stock_analysis", "details": {"stock_code": "AAPL"}})
+        self.store.append({"timestamp": _ts(3), "username": "admin", "action_type": "config",
+                           "action": "update_settings"}, SOURCE_OPERATION)
+
+    def test_query_filters_and_pagination(self):
+        """按时间、用户（不区分大小写）、类型和来源过滤，按时间倒序分页"""
+        self._seed()
+        everything = self.store.query(limit=10)
+        self.assertEqual([entry["action_name"] for entry in everything],
+                         ["update_settings", "stock_analysis", "stock_analysis", "user_login"])
+        self.assertEqual(everything[0]["action"], "update_settings")
+        self.assertEqual(everything[1]["details"], {"stock_code": "AAPL"})
+
+        alice = self.store.query(username="ALICE", source=SOURCE_ACTIVITY)
+        self.assertEqual([entry["timestamp"] for entry in alice], [_ts(2), _ts(1)])
+
+        page = self.store.query(source=SOURCE_ACTIVITY, limit=1, offset=1)
+        self.assertEqual(page[0]["username"], "bob")
+        self.assertEqual(self.store.count(start_time=_ts(1, 12), end_time=_ts(2, 23)), 1)
+        self.assertEqual(self.store.count(action_type="analysis"), 2)
+
+    def test_statistics_from_daily_counters(self):
+        """统计信息来自按天计数，字段与原 get_activity_statistics 一致"""
+        self._seed()
+        stats = self.store.statistics(start_day=date(2025, 3, 1), end_day=datetime(2025, 3, 2, 8),
+                                      source=SOURCE_ACTIVITY)
+        self.assertEqual(stats["total_activities"], 3)
+        self.assertEqual(stats["unique_users"], 2)
+        self.assertEqual(stats["activity_types"], {"auth": 1, "analysis": 2})
+        self.assertEqual(stats["daily_activities"], {"2025-03-01": 2, "2025-03-02": 1})
+        self.assertAlmostEqual(stats["success_rate"], 200 / 3)
+        self.assertEqual(stats["average_duration"], 200)
+
+        self.assertEqual(self.store.statistics(username="bob")["total_activities"], 1)
+        self.assertEqual(self.store.statistics()["total_activities"], 4)
+
+    def test_legacy_import_is_incremental(self):
+        """旧版JSONL和JSON列表日志只导入新增部分"""
+        activity_dir = Path(self.temp_dir.name) / "user_activities"
+        operation_dir = Path(self.temp_dir.name) / "operation_logs"
+        activity_dir.mkdir()
+        operation_dir.mkdir()
+        activity_file = activity_dir / "user_activities_2025-03-01.jsonl"
+        with open(activity_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"timestamp": _ts(1), "username": "alice", "action_type": "auth",
+                                "action_name": "user_login"}) + "\n")
+            f.write('{"timestamp": ')  # 未写完的行留到下次导入
+        operations = [{"timestamp": str(_ts(1)), "username": "admin", "action_type": "config", "action": "a"}]
+        with open(operation_dir / "operations_2025-03-01.json", "w", encoding="utf-8") as f:
+            json.dump(operations, f)
+
+        self.assertEqual(self.store.import_legacy_files(activity_dir, operation_dir), 2)
+        self.assertEqual(self.store.import_legacy_files(activity_dir, operation_dir), 0)
+
+        with open(activity_file, "a", encoding="utf-8") as f:
+            f.write(f'{_ts(1, 12)}, "username": "bob", "action_type": "auth", "action_name": "user_logout"}}\n')
+        operations.append({"timestamp": _ts(1, 13), "username": "admin", "action_type": "config", "action": "b"})
+        with open(operation_dir / "operations_2025-03-01.json", "w", encoding="utf-8") as f:
+            json.dump(operations, f)
+
+        self.assertEqual(self.store.import_legacy_files(activity_dir, operation_dir), 2)
+        self.assertEqual(self.store.count(), 4)
+        self.assertEqual(self.store.statistics(source=SOURCE_OPERATION)["total_activities"], 2)
+
+    def test_delete_before(self):
+        """清理过期记录并删除对应的按天计数"""
+        self._seed()
+        self.assertEqual(self.store.delete_before(_ts(2, 0)), 2)
+        self.assertEqual(self.store.count(), 2)
+        self.assertEqual(self.store.statistics()["total_activities"], 2)
+
+
+class TestSQLiteActivityStore(ActivityStoreCases, unittest.TestCase):
+    """SQLite后端测试类"""
+
+    def setUp(self):
+        if not ACTIVITY_STORE_AVAILABLE:
+            self.skipTest("用户活动存储不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = SQLiteActivityStore(Path(self.temp_dir.name) / "activities.db")
+
+    def tearDown(self):
+        if ACTIVITY_STORE_AVAILABLE:
+            self.temp_dir.cleanup()
+
+    def test_queries_use_indexes(self):
+        """用户和时间过滤走索引，不做全表扫描"""
+        with self.store._connect() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM activities WHERE user_key = ? "
+                "ORDER BY timestamp DESC LIMIT 10", ("alice",)))
+        self.assertIn("idx_activities_user", plan)
+
+    def test_connections_closed(self):
+        """每次操作结束后关闭SQLite连接"""
+        import sqlite3
+        from unittest.mock import patch
+
+        opened = []
+        real_connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            conn = real_connect(*args, **kwargs)
+            opened.append(conn)
+            return conn
+
+        with patch("web.utils.activity_store.sqlite3.connect", side_effect=tracking_connect):
+            self._seed()
+            self.store.query(username="alice")
+            self.store.statistics()
+        self.assertTrue(opened)
+        for conn in opened:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+
+class TestMongoActivityStore(ActivityStoreCases, unittest.TestCase):
+    """MongoDB后端测试类"""
+
+    def setUp(self):
+        if not ACTIVITY_STORE_AVAILABLE or not MONGOMOCK_AVAILABLE:
+            self.skipTest("用户活动存储或mongomock不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = MongoActivityStore(mongomock.MongoClient()["tradingagents"])
+
+    def tearDown(self):
+        if ACTIVITY_STORE_AVAILABLE and MONGOMOCK_AVAILABLE:
+            self.temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相同分析合并执行测试
+验证并发的相同分析只执行一次并共享进度与结果、新鲜度窗口内复用成功结果、
+失败结果不复用、异常传递给所有等待者，以及各请求拿到的结果互不影响
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from web.utils.analysis_singleflight import AnalysisSingleFlight, analysis_key
+    SINGLEFLIGHT_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 分析合并执行不可用: {e}")
+    SINGLEFLIGHT_AVAILABLE = False
+
+
+def _key(symbol="AAPL"):
+    return analysis_key(symbol, "2025-01-02", ["market", "news"], 3, "dashscope", "qwen-plus", "美股")
+
+
+class TestAnalysisSingleFlight(unittest.TestCase):
+    """相同分析合并执行测试类"""
+
+    def setUp(self):
+        if not SINGLEFLIGHT_AVAILABLE:
+            self.skipTest("分析合并执行不可用")
+        self.flight = AnalysisSingleFlight(ttl_seconds=60, max_entries=2)
+
+    def test_analysis_key_normalization(self):
+        """股票代码大小写、分析师顺序、日期时间部分不影响分析键"""
+        self.assertEqual(
+            analysis_key("aapl ", "2025-01-02 00:00:00", ["News", "market"], 3, "DashScope", "qwen-plus", "美股"),
+            _key())
+        self.assertNotEqual(_key(), analysis_key("AAPL", "2025-01-02", ["market"], 3, "dashscope", "qwen-plus", "美股"))
+
+    def test_concurrent_requests_share_one_execution(self):
+        """执行中的相同请求不重复执行，补发已有进度并收到后续进度和流式输出"""
+        started, release = threading.Event(), threading.Event()
+        executions = []
+
+        def execute(progress, stream):
+            executions.append(1)
+            progress("🚀 开始分析", 1, 10)
+            started.set()
+            release.wait(5)
+            progress("📈 市场分析完成", 2, 10)
+            stream({"type": "token", "text": "看涨"})
+            return {"success": True, "decision": {"action": "买入"}}
+
+        received = {name: [] for name in ("leader", "follower")}
+        streamed = {name: [] for name in ("leader", "follower")}
+        results = {}
+
+        def request(name):
+            results[name] = self.flight.run(
+                _key(), execute,
+                progress_callback=lambda message, step=None, total_steps=None: received[name].append(message),
+                stream_callback=streamed[name].append)
+
+        leader = threading.Thread(target=request, args=("leader",))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        follower = threading.Thread(target=request, args=("follower",))
+        follower.start()
+        while self.flight.stats["joined"] == 0:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(self.flight.stats, {"executions": 1, "joined": 1, "cache_hits": 0})
+        self.assertEqual(received["follower"], ["🚀 开始分析", "📈 市场分析完成"])
+        self.assertEqual(received["leader"], received["follower"])
+        self.assertEqual(streamed["follower"], [{"type": "token", "text": "看涨"}])
+        self.assertEqual(results["leader"], results["follower"])
+        self.assertIsNot(results["leader"], results["follower"])
+
+    def test_cached_result_reused_within_ttl(self):
+        """成功结果在新鲜度窗口内复用，过期或关闭复用后重新执行"""
+        calls = []
+
+        def execute(progress, stream):
+            calls.append(1)
+            return {"success": True, "decision": {"action": "持有"}}
+
+        first = self.flight.run(_key(), execute)
+        first["decision"]["action"] = "被调用方修改"
+        messages = []
+        second = self.flight.run(_key(), execute, progress_callback=messages.append)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second["decision"]["action"], "持有")
+        self.assertTrue(messages and messages[0].startswith("♻️"))
+
+        now = time.time()
+        with patch("web.utils.analysis_singleflight.time.time", return_value=now + 61):
+            self.flight.run(_key(), execute)
+        self.assertEqual(len(calls), 2)
+
+        no_cache = AnalysisSingleFlight(ttl_seconds=0)
+        no_cache.run(_key(), execute)
+        no_cache.run(_key(), execute)
+        self.assertEqual(len(calls), 4)
+
+    def test_failures_not_cached_and_errors_propagate(self):
+        """失败结果不复用；执行抛出的异常同时传递给等待中的请求"""
+        calls = []
+
+        def failing(progress, stream):
+            calls.append(1)
+            return {"success": False, "error": "数据获取失败"}
+
+        is_cacheable = lambda result: result.get("success")
+        self.flight.run(_key(), failing, is_cacheable=is_cacheable)
+        self.flight.run(_key(), failing, is_cacheable=is_cacheable)
+        self.assertEqual(len(calls), 2)
+
+        started, release = threading.Event(), threading.Event()
+
+        def raising(progress, stream):
+            started.set()
+            release.wait(5)
+            raise TimeoutError("Request timed out")
+
+        errors = []
+
+        def request():
+            try:
+                self.flight.run(_key("MSFT"), raising)
+            except TimeoutError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=request)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        threads.append(threading.Thread(target=request))
+        threads[1].start()
+        while self.flight.stats["joined"] == 0:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(errors), 2)
+
+        # 失败后不留下执行中的记录，下次请求重新执行
+        self.assertEqual(self.flight.run(_key("MSFT"), lambda progress, stream: {"success": True}),
+                         {"success": True})
+
+    def test_cache_size_limit_and_invalidate(self):
+        """超过条数上限时淘汰最久未使用的结果；invalidate 清除缓存"""
+        calls = []
+
+        def execute(progress, stream):
+            calls.append(1)
+            return {"success": True}
+
+        for symbol in ("AAPL", "MSFT", "AAPL", "TSLA"):
+            self.flight.run(_key(symbol), execute)
+        self.assertEqual(len(calls), 3)
+
+        self.flight.run(_key("AAPL"), execute)
+        self.assertEqual(len(calls), 3)
+        self.flight.run(_key("MSFT"), execute)
+        self.assertEqual(len(calls), 4)
+
+        self.flight.invalidate(_key("AAPL"))
+        self.flight.run(_key("AAPL"), execute)
+        self.assertEqual(len(calls), 5)
+        self.flight.invalidate()
+        self.flight.run(_key("TSLA"), execute)
+        self.assertEqual(len(calls), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析师报告缓存测试
+验证相同股票、日期、提示词版本和模型再次分析时分析师节点直接返回缓存报告并跳过工具调用，
+研究深度等下游设置不影响命中，提示词版本或模型变化使缓存失效，失败报告不缓存
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.messages import AIMessage, ToolMessage
+    from langgraph.graph import END, START, StateGraph
+    from tradingagents.agents import AgentState, create_msg_delete
+    from tradingagents.agents.utils import report_cache
+    from tradingagents.agents.utils.report_cache import (
+        AnalystReportCache, build_report_key, is_cacheable_report, with_report_cache
+    )
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+    from tradingagents.graph.propagation import Propagator
+    REPORT_CACHE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 分析师报告缓存不可用: {e}")
+    REPORT_CACHE_AVAILABLE = False
+
+
+REPORT = "AAPL 市场技术分析报告：" + "均线多头排列，成交量温和放大。" * 10
+
+
+class FakeMarketAnalyst:
+    """先请求一次工具调用，拿到工具结果后生成报告的模拟市场分析师"""
+
+    def __init__(self, report=REPORT):
+        self.report = report
+        self.calls = 0
+        self.tool_calls = 0
+
+    def node(self, state):
+        self.calls += 1
+        if not isinstance(state["messages"][-1], ToolMessage):
+            tool_call = {"name": "get_stock_market_data_unified", "args": {"ticker": "AAPL"}, "id": "call_1"}
+            return {"messages": [AIMessage(content="", tool_calls=[tool_call])], "market_report": ""}
+        return {"messages": [AIMessage(content=self.report)], "market_report": self.report}
+
+    def tools(self, state):
+        self.tool_calls += 1
+        return {"messages": [ToolMessage(content="行情数据", tool_call_id="call_1")]}
+
+
+def _run(analyst, cache, config):
+    workflow = StateGraph(AgentState)
+    workflow.add_node("Market Analyst", with_report_cache("market", analyst.node, config, cache=cache))
+    workflow.add_node("tools_market", analyst.tools)
+    workflow.add_node("Msg Clear Market", create_msg_delete())
+    workflow.add_edge(START, "Market Analyst")
+    workflow.add_conditional_edges("Market Analyst", ConditionalLogic().should_continue_market,
+                                   ["tools_market", "Msg Clear Market"])
+    workflow.add_edge("tools_market", "Market Analyst")
+    workflow.add_edge("Msg Clear Market", END)
+    state = Propagator().create_initial_state("AAPL", "2025-01-02")
+    return workflow.compile().invoke(state)
+
+
+class TestAnalystReportCache(unittest.TestCase):
+    """分析师报告缓存测试类"""
+
+    def setUp(self):
+        if not REPORT_CACHE_AVAILABLE:
+            self.skipTest("分析师报告缓存不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = AnalystReportCache(backend="file", cache_dir=self.temp_dir.name, ttl_seconds=60, max_entries=10)
+        self.config = {"llm_provider": "dashscope", "quick_think_llm": "qwen-turbo", "max_debate_rounds": 1}
+
+    def tearDown(self):
+        if REPORT_CACHE_AVAILABLE and hasattr(self, "temp_dir"):
+            self.temp_dir.cleanup()
+
+    def test_second_run_skips_tool_loop(self):
+        """再次分析时直接使用缓存报告，不调用分析师和工具；下游设置不同仍然命中"""
+        first = FakeMarketAnalyst()
+        state = _run(first, self.cache, self.config)
+        self.assertEqual((first.calls, first.tool_calls), (2, 1))
+        self.assertEqual(state["market_report"], REPORT)
+
+        second = FakeMarketAnalyst(report="不应使用")
+        state = _run(second, self.cache, dict(self.config, max_debate_rounds=3, max_risk_discuss_rounds=2))
+        self.assertEqual((second.calls, second.tool_calls), (0, 0))
+        self.assertEqual(state["market_report"], REPORT)
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+
+    def test_prompt_version_and_model_invalidate(self):
+        """提示词版本或快速模型变化时重新生成报告"""
+        _run(FakeMarketAnalyst(), self.cache, self.config)
+
+        with patch.object(report_cache, "analyst_prompt_version", return_value="999"):
+            analyst = FakeMarketAnalyst()
+            _run(analyst, self.cache, self.config)
+            self.assertEqual(analyst.calls, 2)
+
+        analyst = FakeMarketAnalyst()
+        _run(analyst, self.cache, dict(self.config, quick_think_llm="qwen-plus"))
+        self.assertEqual(analyst.calls, 2)
+
+        key = build_report_key("market", "aapl", "2025-01-02 00:00:00", "1", self.config)
+        self.assertEqual(key, build_report_key("market", "AAPL", "2025-01-02", "1", self.config))
+        self.assertNotEqual(key, build_report_key("news", "AAPL", "2025-01-02", "1", self.config))
+        self.assertNotEqual(key, build_report_key("market", "AAPL", "2025-01-03", "1", self.config))
+
+    def test_failed_reports_not_cached(self):
+        """失败信息和过短的报告不缓存"""
+        self.assertFalse(is_cacheable_report("❌ 市场分析失败: 数据获取超时" * 10))
+        self.assertFalse(is_cacheable_report("报告"))
+        self.assertFalse(is_cacheable_report(None))
+        self.assertTrue(is_cacheable_report(REPORT))
+
+        _run(FakeMarketAnalyst(report="基本面分析失败：API限流" * 20), self.cache, self.config)
+        analyst = FakeMarketAnalyst()
+        _run(analyst, self.cache, self.config)
+        self.assertEqual(analyst.calls, 2)
+
+    def test_redis_backend(self):
+        """Redis后端读写与条目上限淘汰"""
+        try:
+            import fakeredis
+        except ImportError:
+            self.skipTest("fakeredis不可用")
+        cache = AnalystReportCache(backend="file", cache_dir=self.temp_dir.name, ttl_seconds=60, max_entries=2)
+        cache.redis_client, cache.backend = fakeredis.FakeRedis(), "redis"
+
+        for key in ("k1", "k2", "k3"):
+            self.assertTrue(cache.set(key, REPORT, analyst="market"))
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(cache.get("k3")["report"], REPORT)
+        self.assertEqual(cache.clear(), 2)
+        self.assertIsNone(cache.get("k3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
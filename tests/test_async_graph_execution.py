@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步执行路径测试
+验证图节点在ainvoke/astream下走原生异步实现，以及适配器的异步生成与token统计
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from langgraph.graph import END, START, StateGraph
+    from tradingagents.agents import (
+        AgentState, create_bear_researcher, create_bull_researcher,
+        create_research_manager, create_risk_manager
+    )
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+    from tradingagents.graph.propagation import Propagator
+    ASYNC_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 异步执行路径不可用: {e}")
+    ASYNC_AVAILABLE = False
+
+
+class AsyncOnlyLLM:
+    """只允许异步调用的模拟LLM，同步调用直接失败"""
+
+    def __init__(self, replies=None):
+        self.replies = list(replies or [])
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        raise AssertionError("异步路径不应调用同步invoke")
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.calls += 1
+        content = self.replies.pop(0) if self.replies else f"第{self.calls}次回复，内容足够长"
+        return AIMessage(content=content)
+
+
+def _initial_state():
+    state = Propagator().create_initial_state("AAPL", "2025-01-02")
+    state.update({
+        "market_report": "市场报告",
+        "sentiment_report": "情绪报告",
+        "news_report": "新闻报告",
+        "fundamentals_report": "基本面报告",
+    })
+    return state
+
+
+class TestAsyncGraphExecution(unittest.TestCase):
+    """异步执行路径测试类"""
+
+    def setUp(self):
+        if not ASYNC_AVAILABLE:
+            self.skipTest("异步执行路径不可用")
+
+    def test_debate_graph_runs_on_event_loop(self):
+        """辩论子图通过astream运行时所有LLM调用都走ainvoke"""
+        llm = AsyncOnlyLLM()
+        logic = ConditionalLogic()
+
+        workflow = StateGraph(AgentState)
+        workflow.add_node("Bull Researcher", create_bull_researcher(llm, None))
+        workflow.add_node("Bear Researcher", create_bear_researcher(llm, None))
+        workflow.add_node("Research Manager", create_research_manager(llm, None))
+        workflow.add_edge(START, "Bull Researcher")
+        for node in ("Bull Researcher", "Bear Researcher"):
+            workflow.add_conditional_edges(node, logic.should_continue_debate)
+        workflow.add_edge("Research Manager", END)
+        graph = workflow.compile()
+
+        async def run():
+            final_state = None
+            async for chunk in graph.astream(_initial_state(), stream_mode="values"):
+                final_state = chunk
+            return final_state
+
+        final_state = asyncio.run(run())
+
+        self.assertEqual(llm.calls, 3)
+        self.assertEqual(final_state["investment_debate_state"]["count"], 2)
+        self.assertIn("Bull Analyst", final_state["investment_debate_state"]["history"])
+        self.assertEqual(final_state["investment_plan"], "第3次回复，内容足够长")
+
+    def test_concurrent_nodes_share_event_loop(self):
+        """多个分析可在同一事件循环上并发等待LLM响应"""
+        in_flight, peak = 0, 0
+
+        class SlowLLM(AsyncOnlyLLM):
+            async def ainvoke(self, prompt, **kwargs):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.05)
+                in_flight -= 1
+                return await super().ainvoke(prompt, **kwargs)
+
+        node = create_bull_researcher(SlowLLM(), None)
+
+        async def run():
+            return await asyncio.gather(*[node.ainvoke(_initial_state()) for _ in range(10)])
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 10)
+        self.assertEqual(peak, 10)
+
+    def test_async_risk_manager_retries(self):
+        """风险经理异步路径在响应过短时重试"""
+        llm = AsyncOnlyLLM(replies=["短", "最终交易建议: **持有**，理由充分"])
+        node = create_risk_manager(llm, None)
+
+        state = _initial_state()
+        state["investment_plan"] = "计划"
+        state["risk_debate_state"].update({
+            "risky_history": "", "safe_history": "", "neutral_history": "",
+        })
+
+        with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+            result = asyncio.run(node.ainvoke(state))
+
+        self.assertEqual(llm.calls, 2)
+        sleep.assert_awaited_once_with(2)
+        self.assertIn("持有", result["final_trade_decision"])
+
+    def test_sync_invoke_unchanged(self):
+        """同步invoke仍走原有同步实现"""
+
+        class SyncLLM:
+            def invoke(self, prompt, **kwargs):
+                return AIMessage(content="同步回复")
+
+        result = create_bull_researcher(SyncLLM(), None).invoke(_initial_state())
+        self.assertIn("同步回复", result["investment_debate_state"]["current_response"])
+
+    def test_openai_compatible_agenerate(self):
+        """OpenAI兼容适配器的ainvoke走异步客户端并支持响应缓存"""
+        from langchain_openai import ChatOpenAI
+        from tradingagents.llm_adapters.openai_compatible_base import ChatDeepSeekOpenAI
+
+        llm = ChatDeepSeekOpenAI(model="deepseek-chat", api_key="test")
+        result = ChatResult(generations=[ChatGeneration(message=AIMessage(content="持有"))])
+
+        with patch.object(ChatOpenAI, "_agenerate", new=AsyncMock(return_value=result)) as api_call, \
+             patch.object(ChatOpenAI, "_generate") as sync_call:
+            reply = asyncio.run(llm.ainvoke([HumanMessage(content="给出决策")]))
+
+        self.assertEqual(reply.content, "持有")
+        api_call.assert_awaited_once()
+        sync_call.assert_not_called()
+
+    def test_dashscope_native_agenerate(self):
+        """DashScope原生适配器使用AioGeneration而不是同步调用"""
+        from types import SimpleNamespace
+        from tradingagents.llm_adapters.dashscope_adapter import ChatDashScope
+
+        llm = ChatDashScope(model="qwen-turbo", api_key="test")
+        response = SimpleNamespace(
+            status_code=200,
+            output=SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="买入"))]),
+            usage=None,
+        )
+
+        with patch("tradingagents.llm_adapters.dashscope_adapter.AioGeneration.call",
+                   new=AsyncMock(return_value=response)) as aio_call, \
+             patch("tradingagents.llm_adapters.dashscope_adapter.Generation.call") as sync_call:
+            reply = asyncio.run(llm.ainvoke([HumanMessage(content="给出决策")]))
+
+        self.assertEqual(reply.content, "买入")
+        aio_call.assert_awaited_once()
+        sync_call.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
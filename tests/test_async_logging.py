@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步日志测试
+验证文件日志由后台线程格式化写入、队列溢出时丢弃并汇总，以及extra延迟字段只在需要时计算
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.utils import logging_manager
+    from tradingagents.utils.logging_manager import (
+        BoundedQueueHandler, LazyValue, StructuredFormatter, SummarizingQueueListener, TradingAgentsLogger
+    )
+    ASYNC_LOGGING_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 日志管理器不可用: {e}")
+    ASYNC_LOGGING_AVAILABLE = False
+
+
+class _ThreadRecordingHandler(logging.Handler):
+    """记录格式化发生在哪个线程"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.format_threads = set()
+
+    def format(self, record):
+        self.format_threads.add(threading.get_ident())
+        return super().format(record)
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+class _CountingStr:
+    """记录被字符串化次数的参数对象"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return "expensive"
+
+
+class TestAsyncLogging(unittest.TestCase):
+    """异步日志测试类"""
+
+    def setUp(self):
+        if not ASYNC_LOGGING_AVAILABLE:
+            self.skipTest("日志管理器不可用")
+        root = logging.getLogger()
+        self.saved_handlers = list(root.handlers)
+        self.saved_level = root.level
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        if ASYNC_LOGGING_AVAILABLE:
+            logging_manager._stop_active_listener()
+            root = logging.getLogger()
+            for handler in root.handlers:
+                handler.close()
+            root.handlers[:] = self.saved_handlers
+            root.setLevel(self.saved_level)
+            self.tmp_dir.cleanup()
+
+    def _config(self, async_enabled=True):
+        return {
+            'level': 'DEBUG',
+            'format': {'console': '%(message)s', 'file': '%(levelname)s | %(message)s', 'structured': 'json'},
+            'handlers': {
+                'console': {'enabled': False, 'colored': False, 'level': 'INFO'},
+                'file': {'enabled': True, 'level': 'DEBUG', 'max_size': '1MB', 'backup_count': 1,
+                         'directory': self.tmp_dir.name},
+                'structured': {'enabled': True, 'level': 'INFO', 'directory': self.tmp_dir.name},
+            },
+            'loggers': {},
+            'docker': {'enabled': False, 'stdout_only': True},
+            'async': {'enabled': async_enabled, 'queue_size': 100},
+        }
+
+    def test_file_handlers_moved_behind_queue(self):
+        """异步模式下根日志器只挂队列处理器，文件日志由后台线程写入"""
+        manager = TradingAgentsLogger(self._config())
+        root = logging.getLogger()
+        self.assertEqual([type(h) for h in root.handlers], [BoundedQueueHandler])
+
+        logging.getLogger("tradingagents.test").info("异步写入 %s", 42, extra={'stock_symbol': '000001'})
+        manager.flush()
+
+        with open(os.path.join(self.tmp_dir.name, 'tradingagents.log'), encoding='utf-8') as f:
+            self.assertIn("INFO | 异步写入 42", f.read())
+        with open(os.path.join(self.tmp_dir.name, 'tradingagents_structured.log'), encoding='utf-8') as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(entry['stock_symbol'], '000001')
+        self.assertEqual(manager.get_queue_stats()['pending'], 0)
+
+    def test_sync_mode_keeps_handlers(self):
+        """关闭异步模式时保持原有的同步处理器"""
+        manager = TradingAgentsLogger(self._config(async_enabled=False))
+        self.assertEqual(len(logging.getLogger().handlers), 2)
+        self.assertEqual(manager.get_queue_stats(), {'enabled': False})
+
+    def test_formatting_off_calling_thread(self):
+        """调用线程只入队，格式化在后台线程完成"""
+        handler = _ThreadRecordingHandler()
+        queue_handler = BoundedQueueHandler(queue_size=10)
+        listener = SummarizingQueueListener(queue_handler, handler)
+        listener.start()
+        record = logging.LogRecord("t", logging.INFO, __file__, 1, "值=%s", ({"a": 1},), None)
+        queue_handler.handle(record)
+        listener.stop()
+
+        self.assertEqual(handler.messages, ["值={'a': 1}"])
+        self.assertNotIn(threading.get_ident(), handler.format_threads)
+
+    def test_overflow_dropped_and_summarized(self):
+        """队列满时丢弃日志并按级别计数，写入线程输出汇总警告"""
+        queue_handler = BoundedQueueHandler(queue_size=2, block_timeout=0.01)
+        for i in range(4):
+            queue_handler.handle(logging.LogRecord("t", logging.INFO, __file__, 1, f"info {i}", None, None))
+        queue_handler.handle(logging.LogRecord("t", logging.ERROR, __file__, 1, "error", None, None))
+        self.assertEqual(queue_handler.dropped_total, 3)
+
+        handler = _ThreadRecordingHandler()
+        listener = SummarizingQueueListener(queue_handler, handler)
+        listener.start()
+        listener.stop()
+
+        self.assertEqual(handler.messages[:2], ["info 0", "info 1"])
+        self.assertIn("丢弃了 3 条日志", handler.messages[-1])
+        self.assertIn("INFO=2", handler.messages[-1])
+        self.assertEqual(listener.dropped_totals, {"INFO": 2, "ERROR": 1})
+
+    def test_lazy_extra_resolved_only_when_used(self):
+        """延迟字段只在格式化器输出时计算，且只计算一次"""
+        calls = []
+        cost = LazyValue(lambda: calls.append(1) or 0.5)
+        record = logging.LogRecord("t", logging.INFO, __file__, 1, "msg", None, None)
+        record.cost = cost
+        self.assertEqual(calls, [])
+
+        formatter = StructuredFormatter()
+        self.assertEqual(json.loads(formatter.format(record))['cost'], 0.5)
+        formatter.format(record)
+        self.assertEqual(calls, [1])
+
+    def test_tool_call_args_not_stringified_eagerly(self):
+        """工具调用装饰器不再在调用线程字符串化全部参数"""
+        try:
+            from tradingagents.utils.tool_logging import log_tool_call
+        except ImportError as e:
+            self.skipTest(f"工具日志模块不可用: {e}")
+
+        @log_tool_call(tool_name="demo_tool", log_args=True)
+        def demo_tool(value):
+            return "ok"
+
+        value = _CountingStr()
+        self.assertEqual(demo_tool(value), "ok")
+        self.assertEqual(value.count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
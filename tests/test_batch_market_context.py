@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量分析共享市场上下文测试
+验证批量分析期间全球新闻等市场级数据按日期只获取一次，失败结果不复用，
+并发请求只计算一次，批量结束后恢复为每次调用都获取，批量之外同时进行的分析不受影响
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import market_context
+    from tradingagents.dataflows.market_context import shared_market_context, shared_within_batch
+    MARKET_CONTEXT_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 共享市场上下文不可用: {e}")
+    MARKET_CONTEXT_AVAILABLE = False
+
+
+class CountingSource:
+    """记录调用次数的模拟市场级数据源"""
+
+    def __init__(self, result="# 全球宏观新闻\n美联储维持利率不变", delay=0.0):
+        self.result = result
+        self.delay = delay
+        self.calls = []
+        self.fetch = shared_within_batch("test_global_news")(self._fetch)
+
+    def _fetch(self, curr_date):
+        self.calls.append(curr_date)
+        time.sleep(self.delay)
+        return self.result
+
+
+class TestBatchMarketContext(unittest.TestCase):
+    """共享市场上下文测试类"""
+
+    def setUp(self):
+        if not MARKET_CONTEXT_AVAILABLE:
+            self.skipTest("共享市场上下文不可用")
+
+    def test_shared_only_within_context(self):
+        """上下文内相同日期只获取一次，不同日期分别获取；上下文外每次都获取"""
+        source = CountingSource()
+        source.fetch("2025-01-02")
+        source.fetch("2025-01-02")
+        self.assertEqual(len(source.calls), 2)
+
+        with shared_market_context() as context:
+            for _ in range(3):
+                self.assertEqual(source.fetch("2025-01-02"), source.result)
+            source.fetch(curr_date="2025-01-03")
+            with shared_market_context() as nested:
+                self.assertIs(nested, context)
+                source.fetch("2025-01-02")
+        self.assertEqual(source.calls[2:], ["2025-01-02", "2025-01-03"])
+        self.assertEqual(context.stats, {"computed": 2, "reused": 3})
+        self.assertIsNone(market_context.get_active_market_context())
+
+        source.fetch("2025-01-02")
+        self.assertEqual(len(source.calls), 5)
+
+    def test_failures_not_reused(self):
+        """获取失败的结果和异常不在批量内复用"""
+        source = CountingSource(result="获取市场概览失败: 连接超时")
+        with shared_market_context():
+            source.fetch("2025-01-02")
+            source.result = "# 中国股市概览\n上证指数 3200"
+            source.fetch("2025-01-02")
+            source.fetch("2025-01-02")
+        self.assertEqual(len(source.calls), 2)
+
+        calls = []
+
+        @shared_within_batch("test_raising")
+        def raising(curr_date):
+            calls.append(curr_date)
+            raise ConnectionError("network down")
+
+        with shared_market_context():
+            for _ in range(2):
+                with self.assertRaises(ConnectionError):
+                    raising("2025-01-02")
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_requests_compute_once(self):
+        """并发获取相同日期的数据只计算一次"""
+        source = CountingSource(delay=0.05)
+        with shared_market_context():
+            threads = [threading.Thread(target=contextvars.copy_context().run, args=(source.fetch, "2025-01-02"))
+                       for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(len(source.calls), 1)
+
+    def test_unrelated_analysis_not_shared(self):
+        """批量进行中，同一进程里批量之外的分析线程每次都重新获取"""
+        source = CountingSource()
+        with shared_market_context():
+            source.fetch("2025-01-02")
+            outside = threading.Thread(target=lambda: [source.fetch("2025-01-02") for _ in range(2)])
+            outside.start()
+            outside.join(5)
+            source.fetch("2025-01-02")
+        self.assertEqual(len(source.calls), 3)
+
+    def test_tool_node_threads_see_context(self):
+        """分析图的工具节点在线程池中执行时仍能看到批量上下文"""
+        try:
+            from langchain_core.messages import AIMessage
+            from langchain_core.tools import tool
+            from langgraph.prebuilt import ToolNode
+        except ImportError as e:
+            self.skipTest(f"LangGraph不可用: {e}")
+
+        source = CountingSource()
+
+        @tool
+        def global_news(curr_date: str) -> str:
+            """获取全球新闻"""
+            return source.fetch(curr_date)
+
+        tool_calls = [{"name": "global_news", "args": {"curr_date": "2025-01-02"}, "id": f"call_{i}"}
+                      for i in range(3)]
+        node = ToolNode([global_news])
+        with shared_market_context():
+            node.invoke({"messages": [AIMessage(content="", tool_calls=tool_calls)]})
+        self.assertEqual(len(source.calls), 1)
+
+    def test_market_level_sources_are_shared(self):
+        """全球新闻使用共享上下文；实时的A股市场概览不在批量内冻结"""
+        from tradingagents.dataflows import interface, tdx_utils
+        self.assertTrue(hasattr(interface.get_global_news_openai, "__wrapped__"))
+        self.assertFalse(hasattr(tdx_utils.get_china_market_overview, "__wrapped__"))
+
+    def test_batch_run_fetches_market_context_once(self):
+        """批量分析多只股票时市场级数据只获取一次"""
+        try:
+            from web.utils import batch_analysis_runner
+        except ImportError as e:
+            self.skipTest(f"批量分析模块不可用: {e}")
+
+        source = CountingSource()
+
+        def fake_run_stock_analysis(stock_symbol, analysis_date, **kwargs):
+            return {"success": True, "stock_symbol": stock_symbol, "news": source.fetch(analysis_date)}
+
+        with patch.object(batch_analysis_runner, "run_stock_analysis", side_effect=fake_run_stock_analysis), \
+             patch.object(batch_analysis_runner, "format_analysis_results", side_effect=dict), \
+             patch.object(batch_analysis_runner, "store_init_batch"), \
+             patch.object(batch_analysis_runner, "store_update_progress"), \
+             patch.object(batch_analysis_runner, "store_add_completed_stock"), \
+             patch.object(batch_analysis_runner, "store_complete_batch"):
+            summary = batch_analysis_runner.run_batch_stock_analysis(
+                ["AAPL", "MSFT", "TSLA"], "2025-01-02", ["news"], 1, "dashscope", "qwen-turbo",
+                analysis_interval=0)
+
+        self.assertEqual(summary["successful_count"], 3)
+        self.assertEqual(source.calls, ["2025-01-02"])
+        self.assertIsNone(market_context.get_active_market_context())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库连接注册表测试
+验证相同参数复用客户端、连接池大小配置、探测连接复用以及进度轮询不再新建连接
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    import pymongo
+    import redis
+    from tradingagents.config import connection_registry
+    from tradingagents.config.connection_registry import ConnectionRegistry
+    REGISTRY_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 数据库连接注册表不可用: {e}")
+    REGISTRY_AVAILABLE = False
+
+
+class TestConnectionRegistry(unittest.TestCase):
+    """数据库连接注册表测试类"""
+
+    def setUp(self):
+        if not REGISTRY_AVAILABLE:
+            self.skipTest("数据库连接注册表不可用")
+        # MongoClient/ConnectionPool 创建时不建立连接，无需真实服务
+        self.registry = ConnectionRegistry(mongodb_max_pool_size=7, redis_max_connections=5)
+
+    def tearDown(self):
+        if REGISTRY_AVAILABLE:
+            self.registry.close_all()
+
+    def test_mongo_client_shared_by_options(self):
+        """相同连接参数返回同一客户端，并应用配置的连接池大小"""
+        first = self.registry.get_mongo_client("mongodb://localhost:27017/", serverSelectionTimeoutMS=100)
+        second = self.registry.get_mongo_client("mongodb://localhost:27017/", serverSelectionTimeoutMS=100)
+        other = self.registry.get_mongo_client("mongodb://localhost:27017/", serverSelectionTimeoutMS=200)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.options.pool_options.max_pool_size, 7)
+
+        stats = self.registry.get_pool_stats()["mongodb"]
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(sorted(s["handouts"] for s in stats), [1, 2])
+        self.assertEqual(stats[0]["in_use"], 0)
+
+    def test_database_and_collection_handles(self):
+        """数据库和集合句柄来自共享客户端"""
+        collection = self.registry.get_mongo_collection("analysis_reports", "tradingagents",
+                                                        host="localhost", port=27017)
+        self.assertEqual(collection.full_name, "tradingagents.analysis_reports")
+        self.assertIs(collection.database.client,
+                      self.registry.get_mongo_client(host="localhost", port=27017))
+
+    def test_redis_clients_share_pool(self):
+        """Redis客户端复用同一个连接池，连接池上限来自配置"""
+        first = self.registry.get_redis_client(host="localhost", port=6379, db=0, decode_responses=True)
+        second = self.registry.get_redis_client(host="localhost", port=6379, db=0, decode_responses=True)
+        raw = self.registry.get_redis_client(host="localhost", port=6379, db=0)
+
+        self.assertIs(first.connection_pool, second.connection_pool)
+        self.assertIsNot(first.connection_pool, raw.connection_pool)
+        self.assertEqual(first.connection_pool.max_connections, 5)
+
+        stats = self.registry.get_pool_stats()["redis"]
+        self.assertEqual(sorted(s["handouts"] for s in stats), [1, 2])
+        self.assertEqual(stats[0]["created"], 0)
+
+    def test_discard_failed_client(self):
+        """探测失败的客户端可从注册表移除，下次重新创建"""
+        client = self.registry.get_mongo_client(host="localhost", port=27017)
+        self.assertTrue(self.registry.discard_mongo_client(client))
+        self.assertIsNot(self.registry.get_mongo_client(host="localhost", port=27017), client)
+
+
+class TestRegistryIntegration(unittest.TestCase):
+    """连接注册表集成测试"""
+
+    def setUp(self):
+        if not REGISTRY_AVAILABLE:
+            self.skipTest("数据库连接注册表不可用")
+        self.registry = ConnectionRegistry()
+        self.registry_patch = patch.object(connection_registry, "_connection_registry", self.registry)
+        self.registry_patch.start()
+
+    def tearDown(self):
+        if REGISTRY_AVAILABLE:
+            self.registry_patch.stop()
+            self.registry.close_all()
+
+    def test_database_manager_reuses_probe_client(self):
+        """DatabaseManager探测成功的客户端直接作为后续使用的客户端"""
+        from tradingagents.config.database_manager import DatabaseManager
+
+        env = {"MONGODB_ENABLED": "true", "REDIS_ENABLED": "false",
+               "MONGODB_HOST": "localhost", "MONGODB_PORT": "27017"}
+        with patch.dict(os.environ, env), \
+             patch("dotenv.load_dotenv"), \
+             patch.object(pymongo.MongoClient, "server_info", return_value={"version": "7.0"}):
+            manager = DatabaseManager()
+
+        self.assertTrue(manager.is_mongodb_available())
+        stats = self.registry.get_pool_stats()["mongodb"]
+        self.assertEqual(len(stats), 1)
+        self.assertIs(manager.get_mongodb_client(),
+                      self.registry.get_mongo_client(**manager._mongodb_connect_kwargs()))
+        self.assertEqual(manager.get_mongodb_database().name, "tradingagents")
+
+    def test_progress_polling_reuses_redis_pool(self):
+        """进度轮询复用同一个Redis连接池"""
+        from web.utils.async_progress_tracker import get_progress_by_id
+
+        with patch.dict(os.environ, {"REDIS_ENABLED": "true"}), \
+             patch.object(redis.Redis, "hgetall", return_value={"status": '"running"'}):
+            for _ in range(3):
+                self.assertEqual(get_progress_by_id("abc"), {"status": "running"})
+
+        stats = self.registry.get_pool_stats()["redis"]
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["handouts"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
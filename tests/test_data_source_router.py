@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源路由器测试
+验证健康度排序、熔断与半开探测、对冲请求以及DataSourceManager的结构化降级
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows.data_source_router import (
+        CircuitState, DataSourceError, DataSourceRouter, NoDataError
+    )
+    ROUTER_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 数据源路由器不可用: {e}")
+    ROUTER_AVAILABLE = False
+
+
+class TestDataSourceRouter(unittest.TestCase):
+    """数据源路由器测试类"""
+
+    def setUp(self):
+        if not ROUTER_AVAILABLE:
+            self.skipTest("数据源路由器不可用")
+
+    def test_falls_back_with_structured_result(self):
+        """首选数据源抛出DataSourceError时降级，返回结构化结果"""
+        router = DataSourceRouter()
+        calls = []
+
+        def fetcher(source):
+            calls.append(source)
+            if source == "akshare":
+                raise DataSourceError("未能获取数据")
+            return f"{source}数据"
+
+        result = router.fetch(["akshare", "tushare"], fetcher)
+        self.assertTrue(result.success)
+        self.assertEqual(result.source, "tushare")
+        self.assertEqual(result.data, "tushare数据")
+        self.assertEqual(calls, ["akshare", "tushare"])
+
+        failed = router.fetch(["akshare"], fetcher)
+        self.assertFalse(failed.success)
+        self.assertIn("未能获取数据", failed.error)
+
+    def test_circuit_opens_and_half_open_probe(self):
+        """连续失败后熔断跳过，恢复时间后只放行一次探测，成功则关闭"""
+        router = DataSourceRouter(failure_threshold=2, recovery_timeout=30)
+        broken = {"akshare": True}
+        calls = []
+
+        def fetcher(source):
+            calls.append(source)
+            if broken.get(source):
+                raise DataSourceError("超时")
+            return "ok"
+
+        for _ in range(2):
+            router.fetch(["akshare"], fetcher)
+        self.assertEqual(router.health("akshare").state, CircuitState.OPEN)
+
+        calls.clear()
+        router.fetch(["akshare", "tushare"], fetcher)
+        self.assertEqual(calls, ["tushare"])
+
+        broken["akshare"] = False
+        with patch("tradingagents.dataflows.data_source_router.time.time",
+                   return_value=time.time() + 31):
+            # 半开状态的数据源排在健康数据源之后
+            self.assertEqual(router.rank(["akshare", "tushare"]), ["tushare", "akshare"])
+            calls.clear()
+            result = router.fetch(["akshare"], fetcher)
+        self.assertEqual(result.source, "akshare")
+        self.assertEqual(calls, ["akshare"])
+        self.assertEqual(router.health("akshare").state, CircuitState.CLOSED)
+
+    def test_no_data_does_not_open_circuit(self):
+        """停牌、无效代码等无数据响应会降级到下一个数据源，但不计入熔断失败"""
+        router = DataSourceRouter(failure_threshold=2, recovery_timeout=30)
+
+        def fetcher(source):
+            if source == "akshare":
+                raise NoDataError("未能获取999999的股票数据")
+            return f"{source}数据"
+
+        for _ in range(5):
+            result = router.fetch(["akshare", "tushare"], fetcher)
+            self.assertEqual(result.source, "tushare")
+        stats = router.get_stats()["akshare"]
+        self.assertEqual(stats["state"], CircuitState.CLOSED)
+        self.assertEqual((stats["consecutive_failures"], stats["error_rate"]), (0, 0.0))
+
+        failed = router.fetch(["akshare"], fetcher)
+        self.assertFalse(failed.success)
+        self.assertIn("未能获取999999", failed.error)
+        self.assertEqual(router.rank(["akshare", "tushare"]), ["akshare", "tushare"])
+
+    def test_half_open_allows_single_probe(self):
+        """半开状态下同一时间只放行一个探测请求"""
+        router = DataSourceRouter(failure_threshold=1, recovery_timeout=0)
+        health = router.health("akshare")
+        health.record(1.0, False)
+        self.assertTrue(health.allow_request())
+        self.assertEqual(health.state, CircuitState.HALF_OPEN)
+        self.assertFalse(health.allow_request())
+        health.record(1.0, False)
+        self.assertEqual(health.state, CircuitState.OPEN)
+
+    def test_rank_by_error_rate_and_latency(self):
+        """错误率高或P95过慢的数据源排在后面，健康度相同时保持优先级"""
+        router = DataSourceRouter(failure_threshold=100, slow_threshold=5.0)
+        self.assertEqual(router.rank(["akshare", "tushare", "baostock"]),
+                         ["akshare", "tushare", "baostock"])
+
+        for _ in range(5):
+            router.health("akshare").record(0.1, False)
+            router.health("akshare").record(0.1, True)
+            router.health("tushare").record(8.0, True)
+        self.assertEqual(router.rank(["akshare", "tushare", "baostock"]),
+                         ["baostock", "tushare", "akshare"])
+
+    def test_hedged_request_after_p95(self):
+        """首选数据源超过P95延迟时对冲请求下一个数据源，先成功者胜出"""
+        router = DataSourceRouter(hedge_enabled=True, hedge_min_samples=3, hedge_min_delay=0.05)
+        for _ in range(3):
+            router.health("akshare").record(0.05, True)
+        release = threading.Event()
+
+        def fetcher(source):
+            if source == "akshare":
+                release.wait(2)
+                return "akshare数据"
+            return "tushare数据"
+
+        result = router.fetch(["akshare", "tushare"], fetcher)
+        release.set()
+        self.assertTrue(result.success)
+        self.assertTrue(result.hedged)
+        self.assertEqual(result.source, "tushare")
+
+    def test_all_circuits_open(self):
+        """全部数据源熔断时立即返回失败而不调用任何数据源"""
+        router = DataSourceRouter(failure_threshold=1, recovery_timeout=60)
+        router.health("akshare").record(1.0, False)
+        result = router.fetch(["akshare"], lambda source: self.fail("不应调用"))
+        self.assertFalse(result.success)
+        self.assertIsNone(result.source)
+
+
+class TestDataSourceManagerRouting(unittest.TestCase):
+    """DataSourceManager路由集成测试"""
+
+    def setUp(self):
+        if not ROUTER_AVAILABLE:
+            self.skipTest("数据源路由器不可用")
+        try:
+            from tradingagents.dataflows.data_source_manager import ChinaDataSource, DataSourceManager
+        except ImportError as e:
+            self.skipTest(f"数据源管理器不可用: {e}")
+        self.ChinaDataSource = ChinaDataSource
+        self.manager = DataSourceManager()
+        self.manager.router = DataSourceRouter()
+        self.manager.current_source = ChinaDataSource.AKSHARE
+        self.manager.available_sources = [ChinaDataSource.AKSHARE, ChinaDataSource.TUSHARE]
+
+    def test_get_stock_data_falls_back_without_string_sniffing(self):
+        """当前数据源失败时降级到备用数据源，数据中含"错误"字样不再被误判为失败"""
+        with patch.object(self.manager, "_get_akshare_data", side_effect=DataSourceError("空数据")), \
+             patch.object(self.manager, "_get_tushare_data", return_value="📊 错误率统计: 0%"):
+            result = self.manager.get_stock_data("000001", "2025-01-01", "2025-01-31")
+        self.assertEqual(result, "📊 错误率统计: 0%")
+        self.assertEqual(self.manager.get_source_stats()["akshare"]["consecutive_failures"], 1)
+
+    def test_no_data_symbols_keep_sources_available(self):
+        """多只无数据的股票不会让数据源对所有股票熔断"""
+        self.manager.router = DataSourceRouter(failure_threshold=2, recovery_timeout=300)
+        with patch.object(self.manager, "_get_akshare_data", side_effect=NoDataError("未能获取股票数据")), \
+             patch.object(self.manager, "_get_tushare_data", side_effect=NoDataError("未获取到有效数据")):
+            for symbol in ("999991", "999992", "999993"):
+                self.assertTrue(self.manager.get_stock_data(symbol, "2025-01-01", "2025-01-31").startswith("❌"))
+
+        with patch.object(self.manager, "_get_akshare_data", return_value="000001数据"):
+            self.assertEqual(self.manager.get_stock_data("000001", "2025-01-01", "2025-01-31"), "000001数据")
+        for stats in self.manager.get_source_stats().values():
+            self.assertEqual(stats["state"], CircuitState.CLOSED)
+
+    def test_get_stock_data_all_failed(self):
+        """所有数据源失败时返回错误说明"""
+        with patch.object(self.manager, "_get_akshare_data", side_effect=DataSourceError("空数据")), \
+             patch.object(self.manager, "_get_tushare_data", side_effect=RuntimeError("超时")):
+            result = self.manager.get_stock_data("000001", "2025-01-01", "2025-01-31")
+        self.assertTrue(result.startswith("❌"))
+        self.assertIn("超时", result)
+
+    def test_tushare_errors_wrapped_as_data_source_error(self):
+        """Tushare调用异常统一包装为DataSourceError，并保留原始异常"""
+        with patch("tradingagents.dataflows.tushare_adapter.get_tushare_adapter",
+                   side_effect=RuntimeError("接口超时")):
+            with self.assertRaises(DataSourceError) as ctx:
+                self.manager._get_tushare_data("000001", "2025-01-01", "2025-01-31")
+        self.assertNotIsInstance(ctx.exception, NoDataError)
+        self.assertIsInstance(ctx.exception.__cause__, RuntimeError)
+        self.assertIn("接口超时", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Finnhub离线数据索引测试
+验证内存映射索引的区间查询与原先整体 json.load 后逐个过滤的结果一致（包括顺序），
+以及索引复用、源文件更新后重建、删除源文件后仍可查询
+"""
+
+import json
+import mmap
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import finnhub_utils
+    from tradingagents.dataflows.finnhub_utils import (
+        FinnhubIndex, finnhub_index_path, get_data_in_range, get_finnhub_index
+    )
+    FINNHUB_INDEX_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ Finnhub索引不可用: {e}")
+    FINNHUB_INDEX_AVAILABLE = False
+
+
+def _write_dataset(path, seed=0, days=400):
+    """生成 {日期: 记录列表} 格式的数据文件，日期乱序并包含空记录和非ASCII内容"""
+    rng = random.Random(seed)
+    keys = [f"20{rng.randint(20, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(days)]
+    data = {}
+    for key in keys:
+        data[key] = [{"headline": f"新闻 {key} #{i}", "score": rng.random()}
+                     for i in range(rng.choice([0, 1, 2, 5]))]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return data
+
+
+def _reference_range(path, start_date, end_date):
+    """原先 get_data_in_range 的整体加载 + 逐个过滤实现"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {key: value for key, value in data.items() if start_date <= key <= end_date and len(value) > 0}
+
+
+class TestFinnhubIndex(unittest.TestCase):
+    """Finnhub内存映射索引测试类"""
+
+    def setUp(self):
+        if not FINNHUB_INDEX_AVAILABLE:
+            self.skipTest("Finnhub索引不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = self.temp_dir.name
+        self.data_path = os.path.join(self.data_dir, "finnhub_data", "news_data", "AAPL_data_formatted.json")
+        _write_dataset(self.data_path)
+        self.cache_patch = patch.object(finnhub_utils, "_indexes", finnhub_utils.OrderedDict())
+        self.cache_patch.start()
+
+    def tearDown(self):
+        if FINNHUB_INDEX_AVAILABLE and hasattr(self, "cache_patch"):
+            self.cache_patch.stop()
+            self.temp_dir.cleanup()
+
+    def test_matches_full_scan(self):
+        """任意日期区间的结果（包括键的顺序）与整体加载过滤一致"""
+        rng = random.Random(1)
+        bounds = ["2019-01-01", "2020-06-15", "2022-02-28", "2022-03", "2024-12-31", "2030-01-01"]
+        for _ in range(60):
+            start_date, end_date = sorted(rng.sample(bounds, 2))
+            expected = _reference_range(self.data_path, start_date, end_date)
+            actual = get_data_in_range("AAPL", start_date, end_date, "news_data", self.data_dir)
+            self.assertEqual(actual, expected, (start_date, end_date))
+            self.assertEqual(list(actual), list(expected))
+        self.assertEqual(get_data_in_range("AAPL", "2023-01-01", "2022-01-01", "news_data", self.data_dir), {})
+
+    def test_index_is_memory_mapped_and_reused(self):
+        """索引写入磁盘并以mmap方式打开，后续查询不再解析源JSON"""
+        index = get_finnhub_index(self.data_path)
+        self.assertTrue(os.path.exists(finnhub_index_path(self.data_path)))
+        self.assertIsInstance(index.buffer, mmap.mmap)
+
+        finnhub_utils._indexes.clear()
+        with patch.object(finnhub_utils.json, "load", side_effect=AssertionError("不应解析源JSON")):
+            result = get_data_in_range("AAPL", "2021-01-01", "2021-12-31", "news_data", self.data_dir)
+        self.assertEqual(result, _reference_range(self.data_path, "2021-01-01", "2021-12-31"))
+
+    def test_rebuilt_when_source_changes(self):
+        """源JSON变化后重建索引；索引建立后删除源JSON仍可查询，两者都不存在时返回空"""
+        get_finnhub_index(self.data_path)
+        time.sleep(0.01)
+        data = _write_dataset(self.data_path, seed=2, days=20)
+        self.assertEqual(get_data_in_range("AAPL", "2000-01-01", "2099-01-01", "news_data", self.data_dir),
+                         {key: value for key, value in data.items() if value})
+
+        os.remove(self.data_path)
+        finnhub_utils._indexes.clear()
+        self.assertEqual(get_data_in_range("AAPL", "2000-01-01", "2099-01-01", "news_data", self.data_dir),
+                         {key: value for key, value in data.items() if value})
+        self.assertEqual(get_data_in_range("MSFT", "2000-01-01", "2099-01-01", "news_data", self.data_dir), {})
+
+    def test_in_memory_index_and_empty_dataset(self):
+        """未落盘的索引与空数据文件同样可以查询"""
+        index = FinnhubIndex("memory", FinnhubIndex.serialize({"2024-01-02": [1], "2024-01-01": [], "b": [2]}))
+        self.assertEqual(index.range("2024-01-01", "2024-12-31"), {"2024-01-02": [1]})
+        self.assertEqual(index.range("a", "c"), {"b": [2]})
+        self.assertEqual(FinnhubIndex("memory", FinnhubIndex.serialize({})).range("2000", "2100"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析检查点测试
+验证分析在后期节点或信号处理失败后，重新执行时从最后完成的节点继续（已完成的分析师和
+研究员不再重复调用），SQLite、Redis、MongoDB三种存储后端行为一致，共享同一存储的多个进程
+不会共用同一分析的线程，以及临时性错误的判断
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.messages import AIMessage
+    from langgraph.graph import END, START, StateGraph
+    from tradingagents.agents import (
+        AgentState, create_bear_researcher, create_bull_researcher, create_research_manager
+    )
+    from tradingagents.graph.checkpointing import (
+        MongoCheckpointStore, PersistentCheckpointSaver, RedisCheckpointStore, SQLiteCheckpointStore,
+        analysis_thread_id, claim_thread, is_transient_error, release_thread
+    )
+    from tradingagents.graph.propagation import Propagator
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+    CHECKPOINT_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 分析检查点不可用: {e}")
+    CHECKPOINT_AVAILABLE = False
+
+
+class FlakyLLM:
+    """第 fail_on 次调用抛出超时错误的模拟LLM"""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls in self.fail_on:
+            raise TimeoutError("Request timed out")
+        return AIMessage(content=f"第{self.calls}次回复，内容足够长")
+
+
+def _build_analysis(saver, llm, config=None):
+    """市场分析师 → 多空研究员 → 研究经理 → 风险经理 的精简分析图，包装为 TradingAgentsGraph"""
+    counters = {"market": 0}
+
+    def market_analyst(state):
+        counters["market"] += 1
+        tool_call = {"name": "get_stock_market_data_unified", "args": {"ticker": "AAPL"}, "id": "call_1"}
+        return {"messages": [AIMessage(content="", tool_calls=[tool_call])], "market_report": "市场报告"}
+
+    def risk_judge(state):
+        return {"final_trade_decision": f"最终决策: {state['investment_plan']}"}
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("Market Analyst", market_analyst)
+    workflow.add_node("Bull Researcher", create_bull_researcher(llm, None))
+    workflow.add_node("Bear Researcher", create_bear_researcher(llm, None))
+    workflow.add_node("Research Manager", create_research_manager(llm, None))
+    workflow.add_node("Risk Judge", risk_judge)
+    workflow.add_edge(START, "Market Analyst")
+    workflow.add_edge("Market Analyst", "Bull Researcher")
+    workflow.add_edge("Bull Researcher", "Bear Researcher")
+    workflow.add_edge("Bear Researcher", "Research Manager")
+    workflow.add_edge("Research Manager", "Risk Judge")
+    workflow.add_edge("Risk Judge", END)
+
+    graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    graph.debug = False
+    graph.config = dict({"llm_provider": "test", "graph_resume_max_attempts": 3, "graph_resume_retry_delay": 0},
+                        **(config or {}))
+    graph.selected_analysts = ["market"]
+    graph.checkpointer = saver
+    graph.graph = workflow.compile(checkpointer=saver)
+    graph.propagator = Propagator()
+    graph.curr_state = None
+    graph.ticker = None
+    graph.log_states_dict = {}
+    graph._log_state = MagicMock()
+    graph.process_signal = MagicMock(return_value={"action": "持有"})
+    return graph, counters
+
+
+class TestGraphCheckpointing(unittest.TestCase):
+    """分析检查点测试类"""
+
+    def setUp(self):
+        if not CHECKPOINT_AVAILABLE:
+            self.skipTest("分析检查点不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.saver = PersistentCheckpointSaver(SQLiteCheckpointStore(os.path.join(self.temp_dir.name, "ckpt.db")))
+
+    def tearDown(self):
+        if CHECKPOINT_AVAILABLE and hasattr(self, "temp_dir"):
+            self.temp_dir.cleanup()
+
+    def _stores(self):
+        stores = [("sqlite", self.saver.store)]
+        try:
+            import fakeredis
+            stores.append(("redis", RedisCheckpointStore(fakeredis.FakeRedis(), ttl_seconds=3600)))
+        except ImportError:
+            pass
+        try:
+            import mongomock
+            stores.append(("mongodb", MongoCheckpointStore(mongomock.MongoClient()["test"])))
+        except ImportError:
+            pass
+        return stores
+
+    def _thread_id(self, graph):
+        return analysis_thread_id("AAPL", "2025-01-02", graph.selected_analysts, graph.config)
+
+    def test_resume_after_failure_on_each_backend(self):
+        """研究经理超时后重新执行：已完成的节点不再调用，结果与一次成功的执行一致，成功后清除检查点"""
+        expected_graph, _ = _build_analysis(None, FlakyLLM())
+        expected_state, _ = expected_graph.propagate("AAPL", "2025-01-02")
+
+        for name, store in self._stores():
+            with self.subTest(backend=name):
+                saver = PersistentCheckpointSaver(store)
+                llm = FlakyLLM(fail_on={3})
+                graph, counters = _build_analysis(saver, llm)
+
+                with self.assertRaises(TimeoutError):
+                    graph.propagate("AAPL", "2025-01-02")
+                thread_id = self._thread_id(graph)
+                self.assertEqual(graph.graph.get_state({"configurable": {"thread_id": thread_id}}).next,
+                                 ("Research Manager",))
+
+                state, decision = graph.propagate("AAPL", "2025-01-02")
+                self.assertEqual(counters["market"], 1)
+                self.assertEqual(llm.calls, 4)
+                self.assertEqual(decision, {"action": "持有"})
+                self.assertEqual(state["investment_debate_state"]["history"],
+                                 expected_state["investment_debate_state"]["history"])
+                self.assertEqual(state["messages"][-1].tool_calls[0]["args"], {"ticker": "AAPL"})
+                self.assertEqual(state["final_trade_decision"], "最终决策: 第4次回复，内容足够长")
+                self.assertEqual(list(store.list_checkpoints(thread_id)), [])
+
+    def test_propagate_resumable_retries_transient_errors(self):
+        """临时性错误自动重试并从检查点继续；非临时性错误直接抛出"""
+        llm = FlakyLLM(fail_on={3, 4})
+        graph, counters = _build_analysis(self.saver, llm)
+        state, _ = graph.propagate_resumable("AAPL", "2025-01-02")
+        self.assertEqual(counters["market"], 1)
+        self.assertEqual(llm.calls, 5)
+        self.assertIn("第5次回复", state["investment_plan"])
+
+        graph, _ = _build_analysis(self.saver, FlakyLLM(fail_on={1, 2, 3}))
+        with self.assertRaises(TimeoutError):
+            graph.propagate_resumable("AAPL", "2025-01-03", max_attempts=2)
+
+        graph, _ = _build_analysis(self.saver, FlakyLLM())
+        graph.process_signal.side_effect = ValueError("无效的API密钥")
+        with self.assertRaises(ValueError):
+            graph.propagate_resumable("AAPL", "2025-01-04")
+        self.assertEqual(graph.process_signal.call_count, 1)
+
+    def test_signal_processing_failure_reuses_final_state(self):
+        """图执行完成但信号处理失败时，重试直接使用保存的最终状态"""
+        llm = FlakyLLM()
+        graph, counters = _build_analysis(self.saver, llm)
+        graph.process_signal.side_effect = [TimeoutError("Request timed out"), {"action": "买入"}]
+
+        state, decision = graph.propagate_resumable("AAPL", "2025-01-02")
+        self.assertEqual(decision, {"action": "买入"})
+        self.assertEqual((counters["market"], llm.calls), (1, 3))
+        self.assertEqual(state["final_trade_decision"], "最终决策: 第3次回复，内容足够长")
+
+    def test_fresh_run_and_concurrent_runs(self):
+        """resume=False 时清除旧检查点从头开始；同一分析并发执行时使用独立线程"""
+        graph, counters = _build_analysis(self.saver, FlakyLLM(fail_on={3}))
+        with self.assertRaises(TimeoutError):
+            graph.propagate("AAPL", "2025-01-02")
+        graph.propagate("AAPL", "2025-01-02", resume=False)
+        self.assertEqual(counters["market"], 2)
+
+        thread_id = self._thread_id(graph)
+        self.assertTrue(claim_thread(thread_id))
+        try:
+            graph_input, args = graph.prepare_run("AAPL", "2025-01-02")
+            self.assertIsNotNone(graph_input)
+            self.assertNotEqual(args["config"]["configurable"]["thread_id"], thread_id)
+            graph.finish_run(args, completed=False)
+        finally:
+            release_thread(thread_id)
+
+    def test_store_claims_on_each_backend(self):
+        """线程占用：其他执行者占用期间无法占用，同一执行者可续期，过期或释放后可重新占用"""
+        for name, store in self._stores():
+            with self.subTest(backend=name):
+                self.assertTrue(store.claim_thread("t1", "worker-a", 60))
+                self.assertFalse(store.claim_thread("t1", "worker-b", 60))
+                self.assertTrue(store.claim_thread("t1", "worker-a", 60))
+                store.release_thread("t1", "worker-b")
+                self.assertFalse(store.claim_thread("t1", "worker-b", 60))
+                store.release_thread("t1", "worker-a")
+                self.assertTrue(store.claim_thread("t1", "worker-b", 60))
+                store.release_thread("t1", "worker-b")
+
+                if name != "redis":
+                    self.assertTrue(store.claim_thread("t2", "worker-a", -1))
+                    self.assertTrue(store.claim_thread("t2", "worker-b", 60))
+                    self.assertFalse(store.claim_thread("t2", "worker-a", 60))
+
+    def test_savers_sharing_store_use_separate_threads(self):
+        """两个进程（各自的保存器）共享同一存储时，后开始的相同分析使用独立线程"""
+        other_process = PersistentCheckpointSaver(self.saver.store)
+        graph, _ = _build_analysis(self.saver, FlakyLLM())
+        thread_id = self._thread_id(graph)
+
+        self.assertTrue(other_process.claim_thread(thread_id))
+        # 模拟另一进程：清除本进程内的占用标记，只保留存储中的占用
+        release_thread(thread_id)
+        try:
+            graph_input, args = graph.prepare_run("AAPL", "2025-01-02")
+            self.assertIsNotNone(graph_input)
+            self.assertNotEqual(args["config"]["configurable"]["thread_id"], thread_id)
+            graph.finish_run(args, completed=False)
+        finally:
+            other_process.release_thread(thread_id)
+
+        graph_input, args = graph.prepare_run("AAPL", "2025-01-02")
+        self.assertEqual(args["config"]["configurable"]["thread_id"], thread_id)
+        graph.finish_run(args)
+        self.assertTrue(other_process.claim_thread(thread_id))
+        other_process.release_thread(thread_id)
+
+    def test_unverifiable_claim_uses_separate_thread(self):
+        """存储无法确认占用时使用独立线程ID"""
+        graph, _ = _build_analysis(self.saver, FlakyLLM())
+        thread_id = self._thread_id(graph)
+        with patch.object(self.saver.store, "claim_thread", side_effect=OSError("database locked")):
+            graph_input, args = graph.prepare_run("AAPL", "2025-01-02")
+        self.assertNotEqual(args["config"]["configurable"]["thread_id"], thread_id)
+        graph.finish_run(args, completed=False)
+        self.assertTrue(claim_thread(thread_id))
+        release_thread(thread_id)
+
+    def test_sqlite_connections_closed(self):
+        """SQLite存储每次操作结束后关闭连接（每个图步骤都会访问存储）"""
+        import sqlite3
+        opened = []
+        real_connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            conn = real_connect(*args, **kwargs)
+            opened.append(conn)
+            return conn
+
+        graph, _ = _build_analysis(self.saver, FlakyLLM())
+        with patch("tradingagents.graph.checkpointing.sqlite3.connect", side_effect=tracking_connect):
+            graph.propagate("AAPL", "2025-01-02")
+        self.assertTrue(opened)
+        for conn in opened:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+    def test_prune_expired_threads(self):
+        """最后更新时间超过保留期的线程被清理"""
+        graph, _ = _build_analysis(self.saver, FlakyLLM(fail_on={1}))
+        with self.assertRaises(TimeoutError):
+            graph.propagate("AAPL", "2025-01-02")
+        thread_id = self._thread_id(graph)
+        for name, store in self._stores():
+            if name == "redis":
+                continue
+            with self.subTest(backend=name):
+                self.assertEqual(store.prune(time.time() - 3600), 0)
+        self.assertEqual(self.saver.store.prune(time.time() + 1), 1)
+        self.assertEqual(list(self.saver.store.list_checkpoints(thread_id)), [])
+
+    def test_transient_error_detection(self):
+        """超时、限流、5xx和连接错误视为临时性错误，参数和认证错误不重试"""
+        class RateLimitError(Exception):
+            pass
+
+        class APIStatusError(Exception):
+            def __init__(self, message, status_code):
+                super().__init__(message)
+                self.status_code = status_code
+
+        try:
+            try:
+                raise ConnectionResetError("reset")
+            except ConnectionResetError as inner:
+                raise RuntimeError("节点执行失败") from inner
+        except RuntimeError as wrapped:
+            self.assertTrue(is_transient_error(wrapped))
+
+        self.assertTrue(is_transient_error(TimeoutError()))
+        self.assertTrue(is_transient_error(RateLimitError("slow down")))
+        self.assertTrue(is_transient_error(APIStatusError("bad gateway", 502)))
+        self.assertTrue(is_transient_error(Exception("请求超时")))
+        self.assertFalse(is_transient_error(APIStatusError("unauthorized", 401)))
+        self.assertFalse(is_transient_error(ValueError("无效的API密钥")))
+        self.assertFalse(is_transient_error(KeyError("final_trade_decision")))
+
+
+if __name__ == "__main__":
+    unittest.main()
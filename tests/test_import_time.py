@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动导入耗时测试
+在独立子进程中用 python -X importtime 导入各入口模块，检查导入耗时预算以及
+重量级依赖（yfinance、OpenAI/Anthropic/Google SDK、ChromaDB等）是否被按需推迟加载
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# 启动阶段不应加载的重量级依赖
+HEAVY_MODULES = [
+    "akshare", "bs4", "chromadb", "dashscope", "finnhub", "langchain_anthropic",
+    "langchain_google_genai", "langchain_openai", "openai", "pandas", "tushare", "yfinance",
+]
+
+# 导入耗时预算（毫秒，-X importtime 统计的累计耗时，已为较慢的机器留出余量）
+IMPORT_BUDGETS_MS = {
+    "tradingagents.dataflows": 300,
+    "tradingagents.agents": 300,
+    "tradingagents.graph": 300,
+    "tradingagents.llm_adapters": 300,
+    "tradingagents.utils.tracing": 300,
+    "tradingagents.config.database_manager": 300,
+    "cli.main": 1500,
+}
+
+
+def profile_import(module: str):
+    """在子进程中导入模块，返回 (累计导入耗时毫秒, 已加载的重量级依赖)"""
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=project_root,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise AssertionError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            cumulative_us = int(line.split("|")[1])
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return cumulative_us / 1000, loaded
+
+
+class TestImportTime(unittest.TestCase):
+    """入口模块导入耗时测试类"""
+
+    def test_import_budgets(self):
+        """各入口模块的导入耗时在预算内，且不加载重量级依赖"""
+        for module, budget in IMPORT_BUDGETS_MS.items():
+            with self.subTest(module=module):
+                elapsed, loaded = profile_import(module)
+                print(f"⏱️ {module}: {elapsed:.0f}ms (预算 {budget}ms)")
+                self.assertEqual(loaded, [])
+                self.assertLessEqual(elapsed, budget)
+
+    def test_trading_graph_defers_provider_sdks(self):
+        """导入TradingAgentsGraph时不加载各LLM提供商SDK和ChromaDB"""
+        _, loaded = profile_import("tradingagents.graph.trading_graph")
+        for module in ["chromadb", "dashscope", "langchain_anthropic", "langchain_google_genai",
+                       "langchain_openai", "openai"]:
+            self.assertNotIn(module, loaded)
+
+
+class TestLazyAttributes(unittest.TestCase):
+    """按需导入属性测试类"""
+
+    def test_dataflows_attributes_resolve_on_access(self):
+        """包级名称首次访问时导入子模块，与子模块中的对象一致"""
+        import tradingagents.dataflows as dataflows
+        from tradingagents.dataflows import interface
+
+        self.assertIs(dataflows.get_YFin_data, interface.get_YFin_data)
+        self.assertIn("get_stock_data_by_market", dir(dataflows))
+        self.assertIsInstance(dataflows.YFINANCE_AVAILABLE, bool)
+        with self.assertRaises(AttributeError):
+            dataflows.not_a_real_function
+
+    def test_star_import_uses_all(self):
+        """from package import * 仍然导出 __all__ 中的全部名称"""
+        namespace = {}
+        exec("from tradingagents.graph import *", namespace)
+        self.assertIn("Propagator", namespace)
+        self.assertIn("TradingAgentsGraph", namespace)
+
+
+class TestBackgroundDatabaseProbe(unittest.TestCase):
+    """数据库后台探测测试类"""
+
+    def test_probe_runs_once_and_is_shared(self):
+        """后台探测只启动一次，get_database_manager 等待并复用探测结果"""
+        from tradingagents.config import database_manager
+
+        env = {"MONGODB_ENABLED": "false", "REDIS_ENABLED": "false"}
+        with patch.dict(os.environ, env), patch("dotenv.load_dotenv"), \
+             patch.object(database_manager, "_database_manager", None), \
+             patch.object(database_manager, "_probe_thread", None):
+            thread = database_manager.start_background_probe()
+            self.assertIsInstance(thread, threading.Thread)
+            self.assertIs(database_manager.start_background_probe(), thread)
+
+            manager = database_manager.get_database_manager()
+            thread.join(5)
+            self.assertIs(database_manager.get_database_manager(), manager)
+            self.assertEqual(manager.get_cache_backend(), "file")
+
+
+if __name__ == "__main__":
+    unittest.main()
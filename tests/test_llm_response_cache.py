@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM响应缓存测试
+验证缓存键规范化（包含全部生成参数）、文件后端读写、TTL过期、条目上限淘汰以及适配器的按调用点启用
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from tradingagents.llm_adapters.response_cache import (
+        LLMResponseCache, build_cache_key, generation_params, invoke_with_cache
+    )
+    CACHE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ LLM响应缓存不可用: {e}")
+    CACHE_AVAILABLE = False
+
+
+def _make_result(text):
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    """LLM响应缓存测试类"""
+
+    def setUp(self):
+        if not CACHE_AVAILABLE:
+            self.skipTest("LLM响应缓存不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = LLMResponseCache(backend="file", cache_dir=self.temp_dir.name,
+                                      ttl_seconds=60, max_entries=3)
+
+    def tearDown(self):
+        if CACHE_AVAILABLE:
+            self.temp_dir.cleanup()
+
+    def test_cache_key_normalization(self):
+        """相同内容（忽略首尾空白）生成相同键，模型或温度不同则键不同"""
+        messages_a = [SystemMessage(content="提取决策"), HumanMessage(content="报告内容 ")]
+        messages_b = [SystemMessage(content="提取决策"), HumanMessage(content="报告内容")]
+
+        key_a = build_cache_key("dashscope", "qwen-turbo", messages_a, 0.1)
+        key_b = build_cache_key("dashscope", "qwen-turbo", messages_b, 0.1)
+        self.assertEqual(key_a, key_b)
+        self.assertNotEqual(key_a, build_cache_key("dashscope", "qwen-plus", messages_b, 0.1))
+        self.assertNotEqual(key_a, build_cache_key("dashscope", "qwen-turbo", messages_b, 0.7))
+
+    def test_cache_key_includes_generation_params(self):
+        """max_tokens、top_p 等生成参数不同则键不同，Token统计标识和缓存开关不影响键"""
+        messages = [HumanMessage(content="提取决策")]
+        base = generation_params({"model": "qwen-turbo", "max_tokens": 2000, "top_p": 0.9}, {})
+        key = build_cache_key("dashscope", "qwen-turbo", messages, 0.1, params=base)
+
+        for override in ({"max_tokens": 50}, {"top_p": 0.5}, {"response_format": {"type": "json_object"}}):
+            params = generation_params({"model": "qwen-turbo", "max_tokens": 2000, "top_p": 0.9}, override)
+            self.assertNotEqual(key, build_cache_key("dashscope", "qwen-turbo", messages, 0.1, params=params))
+
+        params = generation_params({"model": "qwen-turbo", "max_tokens": 2000, "top_p": 0.9, "stream": True},
+                                   {"session_id": "s1", "analysis_type": "signal", "seed": None})
+        self.assertEqual(key, build_cache_key("dashscope", "qwen-turbo", messages, 0.1, params=params))
+
+    def test_file_roundtrip(self):
+        """写入后可读取，并标记为缓存命中"""
+        self.assertIsNone(self.cache.get("k1"))
+        self.assertTrue(self.cache.set("k1", _make_result('{"action": "买入"}')))
+
+        result = self.cache.get("k1")
+        self.assertIsNotNone(result)
+        self.assertEqual(result.generations[0].message.content, '{"action": "买入"}')
+        self.assertTrue(result.llm_output["cache_hit"])
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+
+    def test_ttl_expiry(self):
+        """超过TTL的条目视为未命中"""
+        self.cache.set("k1", _make_result("old"))
+        with patch("tradingagents.utils.kv_cache.time.time",
+                   return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get("k1"))
+
+    def test_size_bounded_eviction(self):
+        """超出条目上限时淘汰最久未访问的条目"""
+        for i in range(3):
+            self.cache.set(f"k{i}", _make_result(str(i)))
+            past = time.time() - 100 + i
+            os.utime(os.path.join(self.temp_dir.name, f"k{i}.json"), (past, past))
+
+        self.cache.set("k3", _make_result("3"))
+
+        self.assertIsNone(self.cache.get("k0"))
+        self.assertIsNotNone(self.cache.get("k3"))
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+
+    def test_invoke_with_cache_only_flags_supported_llms(self):
+        """仅对支持缓存的适配器传入use_cache开关"""
+
+        class PlainLLM:
+            def invoke(self, messages, **kwargs):
+                return kwargs
+
+        class CachingLLM(PlainLLM):
+            supports_response_cache = True
+
+        self.assertNotIn("use_cache", invoke_with_cache(PlainLLM(), []))
+        self.assertTrue(invoke_with_cache(CachingLLM(), [])["use_cache"])
+
+    def test_adapter_serves_cached_response(self):
+        """OpenAI兼容适配器在调用点启用缓存时第二次调用不请求API"""
+        from langchain_openai import ChatOpenAI
+        from tradingagents.llm_adapters.openai_compatible_base import ChatDeepSeekOpenAI
+
+        llm = ChatDeepSeekOpenAI(model="deepseek-chat", api_key="test")
+        messages = [HumanMessage(content="提取结构化决策")]
+
+        with patch("tradingagents.llm_adapters.response_cache.get_llm_response_cache",
+                   return_value=self.cache), \
+             patch("tradingagents.llm_adapters.response_cache.track_cache_hit") as track_hit, \
+             patch.object(ChatOpenAI, "_generate", return_value=_make_result("持有")) as api_call:
+            first = llm._generate(messages, use_cache=True)
+            second = llm._generate(messages, use_cache=True)
+            llm._generate(messages)
+
+        self.assertEqual(first.generations[0].message.content, "持有")
+        self.assertEqual(second.generations[0].message.content, "持有")
+        self.assertEqual(api_call.call_count, 2)
+        self.assertNotIn("use_cache", api_call.call_args.kwargs)
+        track_hit.assert_called_once()
+
+    def test_adapter_cache_distinguishes_bound_params(self):
+        """模型或 bind() 绑定的 max_tokens 不同时不复用缓存"""
+        from langchain_openai import ChatOpenAI
+        from tradingagents.llm_adapters.openai_compatible_base import ChatDeepSeekOpenAI
+
+        llm = ChatDeepSeekOpenAI(model="deepseek-chat", api_key="test", max_tokens=2000)
+        short_llm = ChatDeepSeekOpenAI(model="deepseek-chat", api_key="test", max_tokens=50)
+        messages = [HumanMessage(content="提取结构化决策")]
+
+        with patch("tradingagents.llm_adapters.response_cache.get_llm_response_cache",
+                   return_value=self.cache), \
+             patch("tradingagents.llm_adapters.response_cache.track_cache_hit"), \
+             patch.object(ChatOpenAI, "_generate", return_value=_make_result("持有")) as api_call:
+            llm.invoke(messages, use_cache=True)
+            short_llm.invoke(messages, use_cache=True)
+            llm.bind(top_p=0.5).invoke(messages, use_cache=True)
+            llm.invoke(messages, use_cache=True, session_id="other")
+
+        self.assertEqual(api_call.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
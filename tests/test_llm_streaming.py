@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM流式输出测试
+验证流式进度事件、首Token延迟统计、上下文隔离以及适配器在流式模式下的调用路径
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.messages import AIMessageChunk, HumanMessage
+    from langchain_core.outputs import ChatGenerationChunk
+    from tradingagents.llm_adapters.streaming import (
+        TTFTRecorder, enable_streaming, stream_progress_scope, stream_with_progress
+    )
+    STREAMING_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ LLM流式输出不可用: {e}")
+    STREAMING_AVAILABLE = False
+
+
+def _chunks(*texts):
+    return [ChatGenerationChunk(message=AIMessageChunk(content=text)) for text in texts]
+
+
+class TestLLMStreaming(unittest.TestCase):
+    """LLM流式输出测试类"""
+
+    def setUp(self):
+        if not STREAMING_AVAILABLE:
+            self.skipTest("LLM流式输出不可用")
+
+    def test_stream_emits_progress_events(self):
+        """首个分块立即转发并带TTFT，节流期间的增量合并到完成事件中"""
+        events = []
+        with stream_progress_scope(events.append):
+            output = list(stream_with_progress("test", "model-a", iter(_chunks("买", "入"))))
+
+        self.assertEqual(len(output), 2)
+        self.assertEqual([e["delta"] for e in events], ["买", "入"])
+        self.assertIn("ttft", events[0])
+        self.assertEqual(events[-1]["text"], "买入")
+        self.assertTrue(events[-1]["done"])
+
+    def test_stream_events_throttled_with_bounded_preview(self):
+        """长输出按时间间隔合并发送，事件只带末尾预览，增量拼接后与完整输出一致"""
+        from tradingagents.llm_adapters import streaming
+
+        texts = [f"第{i}段分析内容。" for i in range(2000)]
+        clock = [0.0]
+
+        def fake_monotonic():
+            clock[0] += 0.01
+            return clock[0]
+
+        events = []
+        with patch.object(streaming.time, "monotonic", side_effect=fake_monotonic), \
+             stream_progress_scope(events.append):
+            list(stream_with_progress("test", "model-a", iter(_chunks(*texts))))
+
+        full = "".join(texts)
+        self.assertLess(len(events), 100)
+        self.assertEqual("".join(e["delta"] for e in events), full)
+        self.assertTrue(all(len(e["text"]) <= streaming.STREAM_PREVIEW_CHARS for e in events))
+        self.assertEqual(events[-1]["text"], full[-streaming.STREAM_PREVIEW_CHARS:])
+        self.assertEqual(events[-1]["length"], len(full))
+
+    def test_scope_isolation(self):
+        """未注册回调时不转发事件，回调异常不影响模型输出"""
+        events = []
+        with stream_progress_scope(events.append):
+            pass
+        list(stream_with_progress("test", "model-a", iter(_chunks("x"))))
+        self.assertEqual(events, [])
+
+        def broken(event):
+            raise RuntimeError("display failed")
+
+        with stream_progress_scope(broken):
+            output = list(stream_with_progress("test", "model-a", iter(_chunks("y"))))
+        self.assertEqual(len(output), 1)
+
+    def test_ttft_recorder_stats(self):
+        """按provider/model统计TTFT"""
+        recorder = TTFTRecorder(window=3)
+        for seconds in (1.0, 2.0, 3.0, 4.0):
+            recorder.record("dashscope", "qwen-plus", seconds)
+
+        stats = recorder.get_stats()["dashscope/qwen-plus"]
+        self.assertEqual(stats["count"], 3)
+        self.assertEqual(stats["last"], 4.0)
+        self.assertEqual(stats["p50"], 3.0)
+
+    def test_enable_streaming_only_for_supported_llms(self):
+        """仅为支持流式进度的适配器开启流式输出"""
+
+        class PlainLLM:
+            streaming = False
+
+        class StreamingLLM(PlainLLM):
+            supports_streaming_progress = True
+
+        plain, supported = PlainLLM(), StreamingLLM()
+        self.assertFalse(enable_streaming(plain))
+        self.assertTrue(enable_streaming(supported))
+        self.assertFalse(plain.streaming)
+        self.assertTrue(supported.streaming)
+
+    def test_adapter_generate_routes_through_stream(self):
+        """OpenAI兼容适配器开启流式后invoke走_stream并转发增量输出"""
+        from langchain_openai import ChatOpenAI
+        from tradingagents.llm_adapters.openai_compatible_base import ChatDeepSeekOpenAI
+
+        llm = ChatDeepSeekOpenAI(model="deepseek-chat", api_key="test")
+        self.assertTrue(enable_streaming(llm))
+
+        events = []
+        with patch.object(ChatOpenAI, "_stream", return_value=iter(_chunks("持", "有"))) as api_stream, \
+             patch.object(ChatOpenAI, "_generate") as api_generate, \
+             stream_progress_scope(events.append):
+            result = llm.invoke([HumanMessage(content="给出决策")])
+
+        self.assertEqual(result.content, "持有")
+        api_stream.assert_called_once()
+        api_generate.assert_not_called()
+        self.assertTrue(events[-1]["done"])
+        self.assertEqual(events[-1]["provider"], "deepseek")
+
+
+if __name__ == "__main__":
+    unittest.main()
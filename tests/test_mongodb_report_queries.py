@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MongoDB报告列表查询测试
+验证过滤条件下推到数据库、列表投影不含报告正文、游标翻页以及按ID加载详情
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    import mongomock
+    from web.utils.mongodb_report_manager import MongoDBReportManager, build_report_query
+    QUERY_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ MongoDB报告查询测试不可用: {e}")
+    QUERY_AVAILABLE = False
+
+
+class TestMongoDBReportQueries(unittest.TestCase):
+    """MongoDB报告列表查询测试类"""
+
+    def setUp(self):
+        if not QUERY_AVAILABLE:
+            self.skipTest("mongomock或MongoDB报告管理器不可用")
+
+        with patch.object(MongoDBReportManager, "_connect"):
+            self.manager = MongoDBReportManager()
+        self.manager.collection = mongomock.MongoClient().db.analysis_reports
+        self.manager.connected = True
+        self.manager._create_indexes()
+
+        base = datetime(2025, 3, 1, 9, 0, 0)
+        for i in range(25):
+            symbol = "AAPL" if i % 2 == 0 else "000001"
+            self.manager.collection.insert_one({
+                "analysis_id": f"{symbol}_{i}",
+                "stock_symbol": symbol,
+                "analysis_date": (base + timedelta(hours=i)).strftime('%Y-%m-%d'),
+                "timestamp": base + timedelta(hours=i),
+                "analysts": ["market", "news"] if i % 3 == 0 else ["market"],
+                "research_depth": 2,
+                "status": "completed",
+                "summary": f"第{i}次分析，建议买入" if i % 5 == 0 else f"第{i}次分析，建议持有",
+                "reports": {"final_trade_decision": "很长的报告正文" * 100},
+            })
+
+    def test_list_projection_excludes_reports(self):
+        """列表结果只包含列表字段，报告正文不随列表返回"""
+        page = self.manager.query_reports(limit=5)
+        self.assertEqual(len(page["items"]), 5)
+        for item in page["items"]:
+            self.assertNotIn("reports", item)
+            self.assertIsInstance(item["timestamp"], float)
+
+    def test_cursor_pagination(self):
+        """游标翻页按时间倒序覆盖全部记录且不重复"""
+        seen, cursor = [], None
+        while True:
+            page = self.manager.query_reports(limit=10, cursor=cursor)
+            seen.extend(item["analysis_id"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen[0], "AAPL_24")
+
+    def test_filters_pushed_to_query(self):
+        """股票代码、分析师、关键词、日期和ID过滤在数据库端生效"""
+        items = self.manager.query_reports(stock_symbol="aapl", analyst_type="news", limit=50)["items"]
+        self.assertTrue(items)
+        self.assertTrue(all(i["stock_symbol"] == "AAPL" and "news" in i["analysts"] for i in items))
+
+        items = self.manager.query_reports(search_text="买入", limit=50)["items"]
+        self.assertEqual({i["analysis_id"] for i in items},
+                         {"AAPL_0", "000001_5", "AAPL_10", "000001_15", "AAPL_20"})
+
+        items = self.manager.query_reports(start_date=date(2025, 3, 2), end_date=date(2025, 3, 2), limit=50)["items"]
+        # 第15~24条落在3月2日（09:00起每小时一条）
+        self.assertEqual(len(items), 10)
+        self.assertEqual(items[-1]["analysis_id"], "000001_15")
+
+        items = self.manager.query_reports(analysis_ids={"AAPL_2", "missing"}, limit=50)["items"]
+        self.assertEqual([i["analysis_id"] for i in items], ["AAPL_2"])
+
+    def test_build_report_query_escapes_input(self):
+        """用户输入按字面匹配，不会被当作正则表达式"""
+        query = build_report_query(stock_symbol="60.", search_text="a+b")
+        self.assertEqual(query["$and"][0]["stock_symbol"]["$regex"], "^60\\.")
+        self.assertEqual(build_report_query(), {})
+
+    def test_get_report_by_id_loads_full_report(self):
+        """打开详情时按analysis_id加载完整报告"""
+        report = self.manager.get_report_by_id("AAPL_4")
+        self.assertIn("final_trade_decision", report["reports"])
+
+    def test_full_export_loads_report_bodies(self):
+        """导出完整数据时按analysis_id加载报告正文，不修改列表条目"""
+        import json
+        from web.utils.results_catalog import export_full_results
+
+        items = self.manager.query_reports(limit=3)["items"]
+        exported = json.loads(export_full_results(items, self.manager))
+        self.assertEqual([item["analysis_id"] for item in exported], [item["analysis_id"] for item in items])
+        for item in exported:
+            self.assertIn("很长的报告正文", item["reports"]["final_trade_decision"])
+        self.assertNotIn("reports", items[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
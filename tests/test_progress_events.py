@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度事件推送测试
+验证跟踪器保存进度后发布事件、等待方被立即唤醒、跨进程Redis消息与文件兜底
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from web.utils import progress_events
+    from web.utils.progress_events import PROGRESS_EVENT_CHANNEL_PREFIX, ProgressEventBus
+    from web.utils.async_progress_tracker import AsyncProgressTracker
+    PROGRESS_EVENTS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 进度事件模块不可用: {e}")
+    PROGRESS_EVENTS_AVAILABLE = False
+
+
+class TestProgressEventBus(unittest.TestCase):
+    """进度事件广播器测试类"""
+
+    def setUp(self):
+        if not PROGRESS_EVENTS_AVAILABLE:
+            self.skipTest("进度事件模块不可用")
+        self.bus = ProgressEventBus()
+        self.env_patch = patch.dict(os.environ, {"REDIS_ENABLED": "false"})
+        self.env_patch.start()
+
+    def tearDown(self):
+        if PROGRESS_EVENTS_AVAILABLE:
+            self.env_patch.stop()
+
+    def test_waiter_woken_by_publish(self):
+        """发布事件后等待方立即返回，而不是等到超时"""
+        since = self.bus.cursor("a1")
+        timer = threading.Timer(0.05, self.bus.publish, args=("a1", {"status": "running"}))
+        timer.start()
+        started = time.time()
+        self.assertTrue(self.bus.wait_for_update("a1", since, timeout=5))
+        self.assertLess(time.time() - started, 1.0)
+        self.assertEqual(self.bus.latest_event("a1"), {"status": "running"})
+
+    def test_no_event_times_out(self):
+        """没有新事件时超时返回False，其他分析的事件不会唤醒"""
+        since = self.bus.cursor("a2")
+        self.bus.publish("other", {"status": "running"})
+        self.assertFalse(self.bus.wait_for_update("a2", since, timeout=0.1))
+
+    def test_event_before_wait_not_missed(self):
+        """读取进度后、开始等待前到达的事件也能被感知"""
+        since = self.bus.cursor("a3")
+        self.bus.publish("a3", {"status": "completed"})
+        self.assertTrue(self.bus.wait_for_update("a3", since, timeout=0.1))
+
+    def test_redis_publish_and_remote_message(self):
+        """发布到Redis频道；其他进程的消息唤醒本进程，本进程的消息被忽略"""
+        redis_client = MagicMock()
+        self.bus.publish("a4", {"status": "running"}, redis_client=redis_client)
+        channel, payload = redis_client.publish.call_args[0]
+        self.assertEqual(channel, f"{PROGRESS_EVENT_CHANNEL_PREFIX}a4")
+        self.assertEqual(self.bus.version("a4"), 1)
+
+        self.bus._handle_message({"channel": channel, "data": payload})
+        self.assertEqual(self.bus.version("a4"), 1)
+
+        remote = json.dumps({"origin": "other-process", "event": {"status": "completed"}})
+        self.bus._handle_message({"channel": channel, "data": remote})
+        self.assertEqual(self.bus.version("a4"), 2)
+        self.assertEqual(self.bus.latest_event("a4"), {"status": "completed"})
+
+    def test_file_fallback(self):
+        """其他进程写入进度文件时通过修改时间感知更新"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "progress_a5.json")
+            with patch.object(progress_events, "progress_file_path", return_value=path):
+                since = self.bus.cursor("a5")
+                self.assertEqual(since, (0, 0.0))
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump({"status": "running"}, f)
+                self.assertTrue(self.bus.wait_for_update("a5", since, timeout=2))
+
+
+class TestTrackerPublishesEvents(unittest.TestCase):
+    """跟踪器事件发布测试类"""
+
+    def setUp(self):
+        if not PROGRESS_EVENTS_AVAILABLE:
+            self.skipTest("进度事件模块不可用")
+        self.bus = ProgressEventBus()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.patches = [
+            patch.dict(os.environ, {"REDIS_ENABLED": "false", "PROGRESS_SAVE_INTERVAL_SECONDS": "0"}),
+            patch.object(progress_events, "_progress_event_bus", self.bus),
+            patch("web.utils.progress_log_handler.register_analysis_tracker", create=True),
+            patch("web.utils.progress_log_handler.unregister_analysis_tracker", create=True),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        if PROGRESS_EVENTS_AVAILABLE:
+            for p in reversed(self.patches):
+                p.stop()
+            os.chdir(self.cwd)
+            self.tmp_dir.cleanup()
+
+    def test_update_and_completion_publish(self):
+        """初始化、进度更新和完成都会发布携带摘要的事件"""
+        tracker = AsyncProgressTracker("t1", ["market"], 1, "dashscope")
+        self.assertEqual(self.bus.version("t1"), 1)
+
+        tracker.update_progress("📊 开始技术分析")
+        self.assertEqual(self.bus.latest_event("t1")["last_message"], "📊 开始技术分析")
+
+        tracker.mark_completed("✅ 分析完成")
+        self.assertEqual(self.bus.latest_event("t1")["status"], "completed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度持久化测试
+验证密集进度消息按间隔合并写入、步骤切换和完成时立即写入、文件增量日志回放以及写放大统计
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from web.utils.async_progress_tracker import AsyncProgressTracker, get_progress_by_id, safe_serialize
+    PERSISTENCE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 进度跟踪器不可用: {e}")
+    PERSISTENCE_AVAILABLE = False
+
+
+class _Payload:
+    """不可直接JSON序列化的对象"""
+
+    def __init__(self):
+        self.name = "market"
+        self.values = (1, 2)
+        self._private = object()
+
+
+class TestProgressPersistence(unittest.TestCase):
+    """进度持久化测试类"""
+
+    def setUp(self):
+        if not PERSISTENCE_AVAILABLE:
+            self.skipTest("进度跟踪器不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.patches = [
+            patch.dict(os.environ, {"REDIS_ENABLED": "false", "PROGRESS_SAVE_INTERVAL_SECONDS": "60"}),
+            patch("web.utils.progress_log_handler.register_analysis_tracker", create=True),
+            patch("web.utils.progress_log_handler.unregister_analysis_tracker", create=True),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        if PERSISTENCE_AVAILABLE:
+            for p in reversed(self.patches):
+                p.stop()
+            os.chdir(self.cwd)
+            self.tmp_dir.cleanup()
+
+    def _tracker(self, analysis_id):
+        return AsyncProgressTracker(analysis_id, ["market", "fundamentals"], 1, "dashscope")
+
+    def test_chatty_messages_coalesced(self):
+        """同一步骤内的密集消息在间隔内只写入一次，调用flush后写入最新状态"""
+        tracker = self._tracker("p1")
+        for i in range(20):
+            tracker.update_progress(f"处理中 {i}", step=0)
+
+        stats = tracker.get_persist_stats()
+        self.assertEqual(stats["writes"], 1)
+        self.assertEqual(stats["coalesced"], 20)
+        self.assertEqual(get_progress_by_id("p1")["last_message"], "准备开始分析...")
+
+        tracker.flush()
+        self.assertEqual(get_progress_by_id("p1")["last_message"], "处理中 19")
+        self.assertEqual(tracker.get_persist_stats()["writes"], 2)
+
+    def test_step_transition_and_completion_written_immediately(self):
+        """步骤切换和完成状态不受合并间隔限制"""
+        tracker = self._tracker("p2")
+        tracker.update_progress("进入下一步", step=1)
+        self.assertEqual(get_progress_by_id("p2")["current_step"], 1)
+
+        tracker.mark_completed("✅ 分析完成", results={"decision": "买入"})
+        progress = get_progress_by_id("p2")
+        self.assertEqual(progress["status"], "completed")
+        self.assertEqual(progress["raw_results"], {"decision": "买入"})
+
+    def test_pending_write_flushed_by_timer(self):
+        """间隔结束后定时器补写被合并的最后状态"""
+        tracker = self._tracker("p3")
+        tracker.save_interval = 0.1
+        tracker._last_persist = time.time()
+        tracker.update_progress("最后一条消息", step=0)
+        self.assertNotEqual(get_progress_by_id("p3")["last_message"], "最后一条消息")
+        time.sleep(0.3)
+        self.assertEqual(get_progress_by_id("p3")["last_message"], "最后一条消息")
+
+    def test_timer_flush_concurrent_with_updates(self):
+        """定时写入线程与分析线程同时修改进度时不出错，最终写入最新状态"""
+        tracker = self._tracker("p6")
+        tracker.save_interval = 0.001
+        errors = []
+        stop = threading.Event()
+
+        def flusher():
+            while not stop.is_set():
+                try:
+                    tracker._dirty = True
+                    tracker._flush_pending()
+                except Exception as e:
+                    errors.append(e)
+
+        thread = threading.Thread(target=flusher)
+        thread.start()
+        try:
+            for i in range(300):
+                tracker.update_stream({"provider": "dashscope", "model": "qwen", "text": f"第{i}段"})
+                tracker.update_stream({"done": True})
+                tracker.progress_data.get("streaming")
+                tracker.update_progress(f"处理中 {i}", step=0)
+        finally:
+            stop.set()
+            thread.join(5)
+
+        self.assertEqual(errors, [])
+        tracker.flush()
+        self.assertEqual(get_progress_by_id("p6")["last_message"], "处理中 299")
+
+    def test_serialization_failure_stays_in_timer(self):
+        """序列化失败不会从定时器线程抛出，保留待写入标记供下次重试"""
+        tracker = self._tracker("p7")
+        tracker.update_progress("待写入", step=0)
+        tracker._dirty = True
+        with patch.object(tracker, "_encode_fields", side_effect=RuntimeError("dictionary changed size")):
+            tracker._flush_pending()
+        self.assertTrue(tracker._dirty)
+        tracker.flush()
+        self.assertEqual(get_progress_by_id("p7")["last_message"], "待写入")
+
+    def test_step_log_appends_only_changed_fields(self):
+        """文件存储在快照之后只追加变化字段，读取时回放日志"""
+        tracker = self._tracker("p4")
+        tracker.save_interval = 0
+        tracker.update_progress("消息一", step=0)
+        tracker.update_stream({"provider": "dashscope", "model": "qwen", "text": "生成中"})
+        tracker.update_stream({"done": True})
+
+        with open("data/progress_p4.jsonl", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 3)
+        self.assertNotIn("steps", entries[0]["set"])
+        self.assertEqual(entries[-1]["del"], ["streaming"])
+
+        progress = get_progress_by_id("p4")
+        self.assertEqual(progress["last_message"], "消息一")
+        self.assertNotIn("streaming", progress)
+        self.assertNotIn("_seq", progress)
+
+        # 步骤切换重写快照并清空日志
+        tracker.update_progress("下一步", step=1)
+        self.assertEqual(os.path.getsize("data/progress_p4.jsonl"), 0)
+        self.assertEqual(get_progress_by_id("p4")["last_message"], "下一步")
+
+        stats = tracker.get_persist_stats()
+        self.assertLess(stats["bytes_written"], stats["full_document_bytes"])
+        self.assertGreater(stats["write_amplification"], 0)
+        self.assertGreater(stats["serializations"], 0)
+
+    def test_single_pass_serialization(self):
+        """非原生对象在序列化时一次转换，私有属性被跳过"""
+        tracker = self._tracker("p5")
+        tracker.progress_data["payload"] = _Payload()
+        tracker.flush()
+        tracker._persist(snapshot=True)
+        self.assertEqual(get_progress_by_id("p5")["payload"], {"name": "market", "values": [1, 2]})
+        self.assertEqual(safe_serialize({1: (_Payload(),)}), {1: [{"name": "market", "values": [1, 2]}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis进度索引测试
+验证进度以哈希按字段写入、有序集合索引查找最新/运行中的分析，且不再扫描KEYS
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    import fakeredis
+    from web.utils import async_progress_tracker
+    from web.utils.async_progress_tracker import (
+        AsyncProgressTracker, get_latest_analysis_id, get_progress_by_id, get_running_analysis_ids
+    )
+    PROGRESS_INDEX_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ Redis进度索引测试依赖不可用: {e}")
+    PROGRESS_INDEX_AVAILABLE = False
+
+
+class TestProgressRedisIndex(unittest.TestCase):
+    """Redis进度索引测试类"""
+
+    def setUp(self):
+        if not PROGRESS_INDEX_AVAILABLE:
+            self.skipTest("Redis进度索引测试依赖不可用")
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        # KEYS扫描是O(N)且阻塞Redis，新实现不应再调用
+        self.redis.keys = lambda *args, **kwargs: self.fail("不应调用KEYS")
+        self.patches = [
+            patch.dict(os.environ, {"REDIS_ENABLED": "true", "PROGRESS_SAVE_INTERVAL_SECONDS": "0"}),
+            patch.object(async_progress_tracker, "get_progress_redis_client", return_value=self.redis),
+            patch("web.utils.progress_log_handler.register_analysis_tracker", create=True),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        if PROGRESS_INDEX_AVAILABLE:
+            for p in reversed(self.patches):
+                p.stop()
+
+    def _tracker(self, analysis_id, username=None):
+        return AsyncProgressTracker(analysis_id, ["market"], 1, "dashscope", username=username)
+
+    def test_progress_stored_as_hash(self):
+        """进度以哈希存储，每个字段单独编码，读取时还原为字典"""
+        tracker = self._tracker("a1")
+        tracker.update_progress("📊 开始技术分析")
+
+        self.assertEqual(self.redis.type("progress:a1"), "hash")
+        self.assertEqual(json.loads(self.redis.hget("progress:a1", "last_message")), "📊 开始技术分析")
+        self.assertGreater(self.redis.ttl("progress:a1"), 0)
+
+        progress = get_progress_by_id("a1")
+        self.assertEqual(progress["analysis_id"], "a1")
+        self.assertEqual(progress["steps"], tracker.analysis_steps)
+
+    def test_only_changed_fields_written(self):
+        """再次保存时只写入发生变化的字段，删除的字段同步删除"""
+        tracker = self._tracker("a2")
+        tracker.progress_data["last_message"] = "新消息"
+        self.assertEqual(tracker._save_to_redis(), 1)
+        self.assertEqual(tracker._save_to_redis(), 0)
+
+        tracker.progress_data["streaming"] = {"text": "生成中"}
+        tracker._save_to_redis()
+        tracker.progress_data.pop("streaming")
+        tracker._save_to_redis()
+        self.assertFalse(self.redis.hexists("progress:a2", "streaming"))
+
+    def test_latest_and_user_indexes(self):
+        """最新分析和用户维度的最新分析通过有序集合索引查找"""
+        with patch("web.utils.async_progress_tracker.time.time", return_value=1000.0 + 10 ** 9):
+            self._tracker("alice_old", username="alice")
+        with patch("web.utils.async_progress_tracker.time.time", return_value=2000.0 + 10 ** 9):
+            self._tracker("bob_new", username="bob")
+        with patch("web.utils.async_progress_tracker.time.time", return_value=2100.0 + 10 ** 9):
+            self.assertEqual(get_latest_analysis_id(), "bob_new")
+            self.assertEqual(get_latest_analysis_id("alice"), "alice_old")
+            self.assertIsNone(get_latest_analysis_id("carol"))
+
+    def test_running_index_follows_status(self):
+        """运行中索引在完成或失败后移除对应分析"""
+        first = self._tracker("r1", username="alice")
+        second = self._tracker("r2", username="alice")
+        self.assertEqual(set(get_running_analysis_ids("alice")), {"r1", "r2"})
+
+        with patch("web.utils.progress_log_handler.unregister_analysis_tracker", create=True):
+            first.mark_completed("✅ 分析完成")
+            second.mark_failed("网络错误")
+
+        self.assertEqual(get_running_analysis_ids("alice"), [])
+        self.assertEqual(get_running_analysis_ids(), [])
+        self.assertEqual(get_progress_by_id("r1")["status"], "completed")
+
+    def test_legacy_string_record_readable(self):
+        """兼容旧版整串JSON格式的进度记录"""
+        self.redis.setex("progress:legacy", 60, json.dumps({"status": "running"}))
+        self.assertEqual(get_progress_by_id("legacy"), {"status": "running"})
+
+
+if __name__ == "__main__":
+    unittest.main()
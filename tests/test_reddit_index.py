@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reddit离线数据索引测试
+验证按日期分区索引的查询结果与原先逐文件全量扫描一致、区间查询每个分区只读一次、源文件更新后自动重建
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import reddit_utils
+    from tradingagents.dataflows.reddit_utils import (
+        fetch_top_from_category, fetch_top_from_category_range, get_reddit_index, ticker_to_company
+    )
+    REDDIT_INDEX_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ Reddit索引不可用: {e}")
+    REDDIT_INDEX_AVAILABLE = False
+
+DATES = [f"2024-05-{day:02d}" for day in range(1, 8)]
+WORDS = ["Apple", "apple pie", "Microsoft", "TSMC", "JP Morgan", "Facebook", "nothing", "NVDA", "weather"]
+
+
+def _write_subreddits(category_dir, seed=0, subreddits=("stocks", "investing", "wallstreetbets")):
+    """生成Reddit导出格式的jsonl文件，发帖时间分布在若干天内，并混入空行和非jsonl文件"""
+    rng = random.Random(seed)
+    os.makedirs(category_dir, exist_ok=True)
+    for name in subreddits:
+        with open(os.path.join(category_dir, f"{name}.jsonl"), "w", encoding="utf-8") as f:
+            for i in range(rng.randint(30, 60)):
+                day = datetime.strptime(rng.choice(DATES), "%Y-%m-%d")
+                post = {
+                    "created_utc": int((day - datetime(1970, 1, 1)).total_seconds()) + rng.randint(0, 86399),
+                    "title": f"{name} {i} {rng.choice(WORDS)}",
+                    "selftext": rng.choice(["", rng.choice(WORDS)]),
+                    "url": f"https://reddit.com/{name}/{i}",
+                    "ups": rng.randint(0, 20),
+                }
+                f.write(json.dumps(post) + "\n")
+                if i % 10 == 0:
+                    f.write("\n")
+    with open(os.path.join(category_dir, "README.txt"), "w", encoding="utf-8") as f:
+        f.write("not a subreddit\n")
+
+
+def _reference_fetch(category, date, max_limit, query, data_path):
+    """原先 fetch_top_from_category 的逐文件全量扫描实现"""
+    base_path = data_path
+    all_content = []
+    limit_per_subreddit = max_limit // len(os.listdir(os.path.join(base_path, category)))
+    for data_file in os.listdir(os.path.join(base_path, category)):
+        if not data_file.endswith(".jsonl"):
+            continue
+        all_content_curr_subreddit = []
+        with open(os.path.join(base_path, category, data_file), "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                parsed_line = json.loads(line)
+                post_date = datetime.utcfromtimestamp(parsed_line["created_utc"]).strftime("%Y-%m-%d")
+                if post_date != date:
+                    continue
+                if "company" in category and query:
+                    if "OR" in ticker_to_company[query]:
+                        search_terms = ticker_to_company[query].split(" OR ")
+                    else:
+                        search_terms = [ticker_to_company[query]]
+                    search_terms.append(query)
+                    if not any(re.search(term, parsed_line["title"], re.IGNORECASE)
+                               or re.search(term, parsed_line["selftext"], re.IGNORECASE)
+                               for term in search_terms):
+                        continue
+                all_content_curr_subreddit.append({
+                    "title": parsed_line["title"],
+                    "content": parsed_line["selftext"],
+                    "url": parsed_line["url"],
+                    "upvotes": parsed_line["ups"],
+                    "posted_date": post_date,
+                })
+        all_content_curr_subreddit.sort(key=lambda x: x["upvotes"], reverse=True)
+        all_content.extend(all_content_curr_subreddit[:limit_per_subreddit])
+    return all_content
+
+
+class TestRedditIndex(unittest.TestCase):
+    """Reddit日期分区索引测试类"""
+
+    def setUp(self):
+        if not REDDIT_INDEX_AVAILABLE:
+            self.skipTest("Reddit索引不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_path = self.temp_dir.name
+        _write_subreddits(os.path.join(self.data_path, "global_news"), seed=1)
+        _write_subreddits(os.path.join(self.data_path, "company_news"), seed=2)
+        self.manifests_patch = patch.object(reddit_utils, "_manifests", {})
+        self.manifests_patch.start()
+
+    def tearDown(self):
+        if REDDIT_INDEX_AVAILABLE and hasattr(self, "manifests_patch"):
+            self.manifests_patch.stop()
+            self.temp_dir.cleanup()
+
+    def test_matches_full_scan(self):
+        """每天的结果（顺序、每个版块的数量上限、公司过滤）与全量扫描一致"""
+        for category, queries in [("global_news", [None]),
+                                  ("company_news", [None, "AAPL", "TSM", "JPM", "META", "NVDA"])]:
+            for query in queries:
+                for date in DATES + ["2024-06-01"]:
+                    for max_limit in (4, 9):
+                        expected = _reference_fetch(category, date, max_limit, query, self.data_path)
+                        actual = fetch_top_from_category(category, date, max_limit, query, self.data_path)
+                        self.assertEqual(actual, expected, (category, query, date, max_limit))
+
+    def test_range_reads_each_partition_once(self):
+        """区间查询等于逐日查询的拼接，且每个日期分区只打开一次、不再读取源文件"""
+        expected = []
+        for date in DATES:
+            expected.extend(_reference_fetch("company_news", date, 6, "AAPL", self.data_path))
+        get_reddit_index(self.data_path, "company_news")
+
+        opened = []
+        real_open = open
+
+        def recording_open(path, *args, **kwargs):
+            opened.append(os.path.basename(str(path)))
+            return real_open(path, *args, **kwargs)
+
+        with patch("builtins.open", recording_open):
+            actual = fetch_top_from_category_range("company_news", DATES[0], DATES[-1], 6, "AAPL", self.data_path)
+        self.assertEqual(actual, expected)
+        self.assertEqual(sorted(opened), sorted(f"{date}.jsonl" for date in DATES))
+
+    def test_unknown_ticker_matches_symbol(self):
+        """不在公司表中的代码按代码本身匹配，不再抛出KeyError"""
+        self.assertNotIn("PIE", ticker_to_company)
+        posts = fetch_top_from_category_range("company_news", DATES[0], DATES[-1], 300, "PIE", self.data_path)
+        self.assertTrue(posts)
+        self.assertTrue(all("pie" in (post["title"] + post["content"]).lower() for post in posts))
+
+    def test_rebuilt_when_source_changes(self):
+        """源文件变化或公司表变化后自动重建索引，旧分区目录被清理"""
+        first = get_reddit_index(self.data_path, "global_news")
+        with patch.object(reddit_utils, "build_reddit_index", side_effect=AssertionError("不应重建")):
+            reddit_utils._manifests.clear()
+            self.assertEqual(get_reddit_index(self.data_path, "global_news"), first)
+
+        time.sleep(0.01)
+        _write_subreddits(os.path.join(self.data_path, "global_news"), seed=3, subreddits=("stocks",))
+        second = get_reddit_index(self.data_path, "global_news")
+        self.assertNotEqual(second["partition_dir"], first["partition_dir"])
+        index_dir = os.path.join(self.data_path, reddit_utils.REDDIT_INDEX_DIR, "global_news")
+        self.assertEqual([name for name in os.listdir(index_dir) if name.startswith("partitions-")],
+                         [second["partition_dir"]])
+        self.assertEqual(fetch_top_from_category("global_news", DATES[0], 9, None, self.data_path),
+                         _reference_fetch("global_news", DATES[0], 9, None, self.data_path))
+
+        get_reddit_index(self.data_path, "company_news")
+        with patch.dict(ticker_to_company, {"ZZZZ": "Weather"}), \
+             patch.dict(reddit_utils.COMPANY_MATCHERS, {"ZZZZ": re.compile("(?:Weather)|(?:ZZZZ)", re.IGNORECASE)}):
+            posts = fetch_top_from_category_range("company_news", DATES[0], DATES[-1], 300, "ZZZZ", self.data_path)
+            self.assertTrue(posts)
+            self.assertTrue(all("weather" in (post["title"] + post["content"]).lower() for post in posts))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件系统分析结果目录索引测试
+验证写入登记、增量补录、条件过滤以及报告正文按需加载
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from web.utils.results_catalog import ResultsCatalog, extract_decision, modular_analysis_id
+    CATALOG_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 分析结果目录索引不可用: {e}")
+    CATALOG_AVAILABLE = False
+
+
+class TestResultsCatalog(unittest.TestCase):
+    """分析结果目录索引测试类"""
+
+    def setUp(self):
+        if not CATALOG_AVAILABLE:
+            self.skipTest("分析结果目录索引不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.catalog = ResultsCatalog(self.root / "catalog.db")
+
+    def tearDown(self):
+        if CATALOG_AVAILABLE:
+            self.temp_dir.cleanup()
+
+    def _write_reports(self, stock, date_str, final_text="# 最终决策\n\n建议**买入**"):
+        date_dir = self.root / "results" / stock / date_str
+        reports_dir = date_dir / "reports"
+        reports_dir.mkdir(parents=True)
+        (reports_dir / "market_report.md").write_text("# 技术分析\n\n均线多头", encoding="utf-8")
+        (reports_dir / "final_trade_decision.md").write_text(final_text, encoding="utf-8")
+        with open(date_dir / "analysis_metadata.json", "w", encoding="utf-8") as f:
+            json.dump({"research_depth": 2, "analysts": ["market", "news"]}, f)
+        return date_dir
+
+    def test_sync_indexes_json_and_report_dirs(self):
+        """增量补录Web结果JSON和分模块报告目录，已登记的文件不重复处理"""
+        json_dir = self.root / "web_results"
+        json_dir.mkdir()
+        with open(json_dir / "analysis_a1.json", "w", encoding="utf-8") as f:
+            json.dump({"analysis_id": "a1", "timestamp": datetime(2025, 3, 1, 10).timestamp(),
+                       "stock_symbol": "AAPL", "analysts": ["market"], "summary": "苹果分析",
+                       "full_data": {"decision": {"action": "持有"}}}, f)
+        (json_dir / "tags.json").write_text("{}", encoding="utf-8")
+        self._write_reports("000001", "2025-03-02")
+
+        added = self.catalog.sync_directories(json_dir, [self.root / "results"], force=True)
+        self.assertEqual(added, 2)
+        self.assertEqual(self.catalog.sync_directories(json_dir, [self.root / "results"], force=True), 0)
+
+        items = self.catalog.query()
+        self.assertEqual([item["stock_symbol"] for item in items], ["000001", "AAPL"])
+        self.assertEqual(items[0]["analysis_id"], modular_analysis_id("000001", "2025-03-02"))
+        self.assertEqual(items[0]["analysts"], ["market", "news"])
+        self.assertEqual(items[0]["decision"], "买入")
+        self.assertEqual(items[1]["decision"], "持有")
+        self.assertNotIn("reports", items[0])
+
+    def test_query_filters(self):
+        """日期、股票代码、分析师、全文搜索和ID集合过滤在SQL中完成"""
+        for i, (symbol, analysts) in enumerate([("AAPL", ["market"]), ("000001", ["news"]),
+                                                ("AAPL", ["news", "market"])]):
+            self.catalog.upsert({
+                "analysis_id": f"id{i}", "stock_symbol": symbol, "analysts": analysts,
+                "timestamp": datetime(2025, 3, 1 + i, 12).timestamp(), "summary": f"摘要{i} 100%_上涨",
+            })
+
+        self.assertEqual(len(self.catalog.query(stock_symbol="aapl")), 2)
+        self.assertEqual([r["analysis_id"] for r in self.catalog.query(analyst_type="news")], ["id2", "id1"])
+        self.assertEqual([r["analysis_id"] for r in self.catalog.query(start_date=date(2025, 3, 2),
+                                                                         end_date=date(2025, 3, 2))], ["id1"])
+        self.assertEqual([r["analysis_id"] for r in self.catalog.query(search_text="摘要0")], ["id0"])
+        self.assertEqual(len(self.catalog.query(search_text="%_")), 3)
+        self.assertEqual(self.catalog.query(search_text="a%b"), [])
+        self.assertEqual([r["analysis_id"] for r in self.catalog.query(analysis_ids={"id0"})], ["id0"])
+        self.assertEqual(self.catalog.query(analysis_ids=set()), [])
+        self.assertEqual(len(self.catalog.query(limit=1)), 1)
+
+    def test_upsert_replaces_existing_entry(self):
+        """同一分析ID再次写入时覆盖旧记录"""
+        self.catalog.upsert({"analysis_id": "x", "stock_symbol": "AAPL", "summary": "旧"})
+        self.catalog.upsert({"analysis_id": "x", "stock_symbol": "AAPL", "summary": "新"})
+        items = self.catalog.query()
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]["summary"], "新")
+
+    def test_load_details_on_demand(self):
+        """报告正文和full_data只在打开详情时读取"""
+        date_dir = self._write_reports("000001", "2025-03-02")
+        self.catalog.add_reports_dir("000001", date_dir)
+        item = self.catalog.query()[0]
+        details = ResultsCatalog.load_details(item)
+        self.assertEqual(set(details["reports"]), {"market_report", "final_trade_decision"})
+        self.assertIn("均线多头", details["reports"]["market_report"])
+
+        result_file = self.root / "analysis_b.json"
+        result = {"analysis_id": "b", "stock_symbol": "TSLA", "full_data": {"market_report": "特斯拉"}}
+        result_file.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+        self.catalog.add_result_file(result_file, result)
+        self.assertEqual(ResultsCatalog.load_details(self.catalog.get("b"))["full_data"],
+                         {"market_report": "特斯拉"})
+
+    def test_full_export_loads_report_bodies(self):
+        """导出完整数据时按analysis_id从目录取回文件路径并读取报告正文"""
+        from web.utils.results_catalog import export_full_results
+
+        date_dir = self._write_reports("000001", "2025-03-02")
+        self.catalog.add_reports_dir("000001", date_dir)
+        summary_only = {key: value for key, value in self.catalog.query()[0].items() if key != "report_files"}
+        exported = json.loads(export_full_results([summary_only], catalog=self.catalog))
+        self.assertIn("均线多头", exported[0]["reports"]["market_report"])
+        self.assertIn("买入", exported[0]["reports"]["final_trade_decision"])
+
+    def test_connections_closed(self):
+        """每次操作结束后关闭SQLite连接"""
+        import sqlite3
+        from unittest.mock import patch
+
+        opened = []
+        real_connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            conn = real_connect(*args, **kwargs)
+            opened.append(conn)
+            return conn
+
+        with patch("web.utils.results_catalog.sqlite3.connect", side_effect=tracking_connect):
+            self.catalog.upsert({"analysis_id": "c1", "stock_symbol": "AAPL"})
+            self.catalog.query()
+            self.catalog.get("c1")
+        self.assertEqual(len(opened), 3)
+        for conn in opened:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+    def test_remove_missing_and_extract_decision(self):
+        """源文件删除后可清理目录记录；决策动作可从字典或文本中提取"""
+        date_dir = self._write_reports("000002", "2025-03-03")
+        self.catalog.add_reports_dir("000002", date_dir)
+        for report_file in (date_dir / "reports").iterdir():
+            report_file.unlink()
+        (date_dir / "reports").rmdir()
+        self.assertEqual(self.catalog.remove_missing(), 1)
+        self.assertEqual(self.catalog.query(), [])
+
+        self.assertEqual(extract_decision({"action": "卖出"}), "卖出")
+        self.assertEqual(extract_decision("Final: hold the position"), "HOLD")
+        self.assertIsNone(extract_decision("无明确结论"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+证券主数据测试
+验证代码查找的各种写法、搜索排序（完全匹配/前缀/拼音首字母/包含）、按数据源刷新与快照复用，
+以及通达信和Tushare搜索改为使用主数据
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import security_master
+    from tradingagents.dataflows.security_master import (
+        SecurityMaster, SecuritySource, builtin_securities, make_security
+    )
+    SECURITY_MASTER_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 证券主数据不可用: {e}")
+    SECURITY_MASTER_AVAILABLE = False
+
+
+def _a_shares():
+    return [
+        make_security("000001", "平安银行", "china_a", "tushare", symbol="000001.SZ", pinyin="payh",
+                      industry="银行", area="深圳", board="主板", list_date="19910403"),
+        make_security("601318", "中国平安", "china_a", "tushare", symbol="601318.SH", pinyin="ZGPA"),
+        make_security("600036", "招商银行", "china_a", "tushare", pinyin="ZSYH"),
+        make_security("300750", "宁德时代", "china_a", "tushare", pinyin="NDSD"),
+    ]
+
+
+class TestSecurityMaster(unittest.TestCase):
+    """证券主数据测试类"""
+
+    def setUp(self):
+        if not SECURITY_MASTER_AVAILABLE:
+            self.skipTest("证券主数据不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.temp_dir.name, "security_master.json")
+        self.calls = {"tushare": 0, "hk": 0}
+
+        def load_tushare():
+            self.calls["tushare"] += 1
+            return _a_shares()
+
+        def load_hk():
+            self.calls["hk"] += 1
+            return [make_security("00700", "腾讯控股", "hong_kong", "akshare_hk", pinyin="TXKG"),
+                    make_security("09988", "阿里巴巴-W", "hong_kong", "akshare_hk", pinyin="ALBB")]
+
+        self.sources = [SecuritySource("tushare", load_tushare), SecuritySource("akshare_hk", load_hk),
+                        SecuritySource("broken", lambda: 1 / 0)]
+
+    def tearDown(self):
+        if SECURITY_MASTER_AVAILABLE and hasattr(self, "temp_dir"):
+            self.temp_dir.cleanup()
+
+    def make_master(self, **kwargs):
+        return SecurityMaster(sources=self.sources, snapshot_path=self.snapshot_path, **kwargs)
+
+    def test_builtin_lookup_offline(self):
+        """未载入任何数据源时内置映射也可按各种代码写法查到（含港股4/5位和美股）"""
+        master = SecurityMaster(sources=[], snapshot_path=None)
+        self.assertEqual(master.get_name("000001"), "平安银行")
+        self.assertEqual(master.get("600519.sh").symbol, "600519.SH")
+        for code in ("0700.HK", "00700", "700", "0700"):
+            self.assertEqual(master.get_name(code), "腾讯控股", code)
+        self.assertEqual(master.get("aapl").currency, "USD")
+        self.assertEqual(master.get("0700.HK").currency, "HKD")
+        self.assertIsNone(master.get("999999"))
+        self.assertGreater(len(builtin_securities()), 50)
+
+    def test_search_ordering(self):
+        """完全匹配在前，其后依次为代码前缀、名称前缀、拼音首字母前缀、名称包含"""
+        master = self.make_master()
+        master.refresh()
+        self.assertEqual([s.code for s in master.search("000001")][0], "000001")
+        self.assertEqual([s.name for s in master.search("平安银行")][0], "平安银行")
+        self.assertEqual([s.code for s in master.search("60131")], ["601318"])
+        self.assertEqual([s.name for s in master.search("ZSYH")], ["招商银行"])
+        self.assertEqual([s.name for s in master.search("payh")], ["平安银行"])
+        self.assertEqual({s.name for s in master.search("平安", market="china_a")}, {"平安银行", "中国平安"})
+        self.assertEqual([s.name for s in master.search("中国平安")][0], "中国平安")
+        self.assertEqual([s.code for s in master.search("TXKG")], ["00700"])
+        self.assertEqual(len(master.search("银行", limit=1)), 1)
+        self.assertEqual(master.search(""), [])
+
+    def test_refresh_per_source_and_snapshot(self):
+        """只刷新过期的数据源，失败的数据源不影响其他；快照使重启后无需重新载入"""
+        master = self.make_master()
+        self.assertEqual(master.refresh(), {"tushare": 4, "akshare_hk": 2})
+        self.assertEqual(master.get_name("09988.HK"), "阿里巴巴-W")
+        self.assertEqual(master.get("000001").industry, "银行")
+        self.assertEqual(master.refresh(), {})
+        self.assertEqual(self.calls, {"tushare": 1, "hk": 1})
+
+        restarted = self.make_master()
+        self.assertTrue(restarted.has_source("tushare"))
+        self.assertEqual(restarted.get("300750").pinyin, "NDSD")
+        restarted.refresh()
+        self.assertEqual(self.calls, {"tushare": 1, "hk": 1})
+
+        expired = self.make_master(refresh_hours=0)
+        expired.refresh(["akshare_hk"])
+        self.assertEqual(self.calls, {"tushare": 1, "hk": 2})
+
+    def test_background_refresh(self):
+        """后台线程只启动一次并载入过期数据源"""
+        master = self.make_master()
+        thread = master.start_background_refresh(interval_seconds=60)
+        self.assertIs(master.start_background_refresh(), thread)
+        deadline = time.time() + 5
+        while not master.has_source("akshare_hk") and time.time() < deadline:
+            time.sleep(0.01)
+        master.stop()
+        self.assertEqual(master.get_name("00700"), "腾讯控股")
+
+    def test_providers_use_master(self):
+        """通达信取名称不再查询MongoDB，Tushare搜索返回stock_basic格式且支持拼音"""
+        from tradingagents.dataflows import tdx_utils
+        from tradingagents.dataflows.tushare_utils import TushareProvider
+
+        master = self.make_master()
+        master.refresh()
+        with patch.object(security_master, "_security_master", master), \
+             patch.object(tdx_utils, "_stock_name_cache", {}), \
+             patch.object(tdx_utils, "_get_stock_name_from_mongodb", side_effect=AssertionError("不应查询MongoDB")):
+            provider = tdx_utils.TongDaXinDataProvider.__new__(tdx_utils.TongDaXinDataProvider)
+            self.assertEqual(provider._get_stock_name("300750"), "宁德时代")
+
+            tushare = TushareProvider.__new__(TushareProvider)
+            with patch.object(TushareProvider, "get_stock_list", side_effect=AssertionError("不应重新获取列表")):
+                results = tushare.search_stocks("payh")
+            self.assertEqual(results.to_dict("records"), [{
+                "ts_code": "000001.SZ", "symbol": "000001", "name": "平安银行", "area": "深圳",
+                "industry": "银行", "market": "主板", "list_date": "19910403"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
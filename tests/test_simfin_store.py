@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SimFin列式存储测试
+验证导入后的按股票查询与原先整表过滤的结果一致、Parquet只读取所需行组、源文件更新后自动重新导入
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    import pandas as pd
+    from tradingagents.dataflows import simfin_store
+    from tradingagents.dataflows.simfin_store import (
+        SimFinStore, get_simfin_store, lookup_simfin_statement, simfin_csv_path, simfin_store_path
+    )
+    SIMFIN_STORE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ SimFin存储不可用: {e}")
+    SIMFIN_STORE_AVAILABLE = False
+
+
+def _write_csv(path: Path, tickers, seed=0):
+    """生成SimFin格式的CSV：每只股票若干期报表，故意打乱顺序并包含同日发布的重复记录"""
+    rng = random.Random(seed)
+    rows = []
+    for simfin_id, ticker in enumerate(tickers):
+        for year in range(2015, 2015 + rng.randint(1, 8)):
+            publish = f"{year + 1}-0{rng.randint(1, 3)}-1{rng.randint(0, 9)}"
+            rows.append({"Ticker": ticker, "SimFinId": simfin_id, "Currency": "USD",
+                         "Report Date": f"{year}-12-31", "Publish Date": publish,
+                         "Total Assets": rng.randint(1, 10 ** 9)})
+        rows.append(dict(rows[-1], **{"Total Assets": -1}))  # 同日发布的第二份
+    rows.append({"Ticker": None, "SimFinId": -1, "Currency": "USD", "Report Date": "2020-12-31",
+                 "Publish Date": "2021-02-01", "Total Assets": 0})
+    rng.shuffle(rows)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows).to_csv(path, sep=";", index=False)
+
+
+def _reference_lookup(csv_path, ticker, curr_date):
+    """原先 interface.get_simfin_* 中的整表过滤实现"""
+    df = pd.read_csv(csv_path, sep=";")
+    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
+    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
+    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
+    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    if filtered_df.empty:
+        return None
+    return filtered_df.loc[filtered_df["Publish Date"].idxmax()]
+
+
+class SimFinStoreCases:
+    """Parquet和pickle两种格式共用的测试用例"""
+
+    use_parquet = None
+
+    def setUp(self):
+        if not SIMFIN_STORE_AVAILABLE:
+            self.skipTest("SimFin存储不可用")
+        if self.use_parquet and not simfin_store.PARQUET_AVAILABLE:
+            self.skipTest("pyarrow不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = self.temp_dir.name
+        self.csv_path = simfin_csv_path(self.data_dir, "balance_sheet", "annual")
+        self.tickers = [f"T{i:03d}" for i in range(60)]
+        _write_csv(self.csv_path, self.tickers)
+        self.patches = [patch.object(simfin_store, "ROW_GROUP_SIZE", 16),
+                        patch.object(simfin_store, "PARQUET_AVAILABLE", self.use_parquet),
+                        patch.object(simfin_store, "_stores", {})]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        if SIMFIN_STORE_AVAILABLE and hasattr(self, "patches"):
+            for p in self.patches:
+                p.stop()
+            self.temp_dir.cleanup()
+
+    def test_matches_full_scan(self):
+        """任意股票和日期的查询结果与整表过滤一致（包括同日发布取靠前一份、无数据返回None）"""
+        rng = random.Random(1)
+        for ticker in self.tickers[::3] + ["MISSING"]:
+            for curr_date in ["2014-06-01", "2017-02-15", "2019-12-31", rng.choice(["2020-03-12", "2030-01-01"])]:
+                expected = _reference_lookup(self.csv_path, ticker, curr_date)
+                actual = lookup_simfin_statement("balance_sheet", ticker, "annual", curr_date, self.data_dir)
+                if expected is None:
+                    self.assertIsNone(actual, (ticker, curr_date))
+                    continue
+                self.assertEqual(actual.drop("SimFinId").to_dict(), expected.drop("SimFinId").to_dict(),
+                                 (ticker, curr_date))
+
+    def test_store_reused_until_source_changes(self):
+        """导入结果写入磁盘并复用，源CSV变化后重新导入"""
+        store = get_simfin_store("balance_sheet", "annual", self.data_dir)
+        store_dir = simfin_store_path(self.data_dir, "balance_sheet", "annual")
+        self.assertTrue((store_dir / "index.json").exists())
+        self.assertEqual(store.meta["format"], "parquet" if self.use_parquet else "pickle")
+
+        with patch.object(SimFinStore, "ingest", side_effect=AssertionError("不应重新导入")):
+            simfin_store._stores.clear()
+            self.assertIsNotNone(get_simfin_store("balance_sheet", "annual", self.data_dir))
+
+        time.sleep(0.01)
+        _write_csv(self.csv_path, ["NEW"], seed=2)
+        self.assertEqual(list(get_simfin_store("balance_sheet", "annual", self.data_dir).tickers), ["NEW"])
+
+    def test_source_may_be_removed_after_ingest(self):
+        """导入完成后删除源CSV仍可查询，两者都不存在时抛出FileNotFoundError"""
+        get_simfin_store("balance_sheet", "annual", self.data_dir)
+        self.csv_path.unlink()
+        simfin_store._stores.clear()
+        self.assertIsNotNone(lookup_simfin_statement("balance_sheet", "T001", "annual", "2030-01-01",
+                                                     self.data_dir))
+        with self.assertRaises(FileNotFoundError):
+            get_simfin_store("cashflow", "annual", self.data_dir)
+
+
+class TestParquetSimFinStore(SimFinStoreCases, unittest.TestCase):
+    """Parquet格式测试类"""
+
+    use_parquet = True
+
+    def test_reads_only_ticker_row_groups(self):
+        """查询单只股票只读取覆盖其行区间的行组"""
+        import pyarrow.parquet as pq
+
+        store = get_simfin_store("balance_sheet", "annual", self.data_dir)
+        self.assertGreater(pq.ParquetFile(store.store_dir / store.meta["data_file"]).num_row_groups, 5)
+
+        read_groups = []
+        original = pq.ParquetFile.read_row_groups
+
+        def recording(parquet_file, row_groups, *args, **kwargs):
+            read_groups.append(list(row_groups))
+            return original(parquet_file, row_groups, *args, **kwargs)
+
+        with patch.object(pq.ParquetFile, "read_row_groups", recording):
+            for ticker in self.tickers:
+                start, stop = store.tickers[ticker]
+                rows = store.statements_for(ticker)
+                self.assertEqual(set(rows["Ticker"]), {ticker})
+                self.assertEqual(len(rows), stop - start)
+                self.assertTrue(rows["Publish Date"].is_monotonic_increasing)
+        self.assertTrue(all(len(groups) <= 2 for groups in read_groups))
+
+
+class TestPickleSimFinStore(SimFinStoreCases, unittest.TestCase):
+    """无pyarrow时的pickle格式测试类"""
+
+    use_parquet = False
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通用技术指标库测试
+验证指标与原先各处 rolling/ewm 实现一致、追加K线的增量计算与整段重算一致、
+按股票缓存复用，以及通达信接口不再为计算指标重新下载历史数据
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    import numpy as np
+    import pandas as pd
+    from tradingagents.dataflows import technical_indicators
+    from tradingagents.dataflows.technical_indicators import (
+        INDICATOR_COLUMNS, TechnicalIndicators, format_indicator_summary, get_technical_indicators
+    )
+    INDICATORS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 技术指标库不可用: {e}")
+    INDICATORS_AVAILABLE = False
+
+
+def _make_bars(days, seed=0):
+    rng = np.random.default_rng(seed)
+    close = np.round(20 * np.cumprod(1 + rng.normal(0, 0.02, days)), 2)
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": rng.integers(1000, 9000, days)},
+                        index=pd.bdate_range("2023-01-02", periods=days, name="Date"))
+
+
+def _legacy_indicators(df):
+    """原先 TongDaXinDataProvider.get_stock_technical_indicators 中的计算"""
+    indicators = {}
+    indicators['MA5'] = df['Close'].rolling(5).mean().iloc[-1] if len(df) >= 5 else None
+    indicators['MA10'] = df['Close'].rolling(10).mean().iloc[-1] if len(df) >= 10 else None
+    indicators['MA20'] = df['Close'].rolling(20).mean().iloc[-1] if len(df) >= 20 else None
+    if len(df) >= 14:
+        delta = df['Close'].diff()
+        gain = (delta.where(delta > 0, 0)).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        indicators['RSI'] = (100 - (100 / (1 + gain / loss))).iloc[-1]
+    if len(df) >= 26:
+        macd = df['Close'].ewm(span=12).mean() - df['Close'].ewm(span=26).mean()
+        signal = macd.ewm(span=9).mean()
+        indicators['MACD'] = macd.iloc[-1]
+        indicators['MACD_Signal'] = signal.iloc[-1]
+        indicators['MACD_Histogram'] = (macd - signal).iloc[-1]
+    if len(df) >= 20:
+        sma = df['Close'].rolling(20).mean()
+        std = df['Close'].rolling(20).std()
+        indicators['BB_Upper'] = (sma + 2 * std).iloc[-1]
+        indicators['BB_Middle'] = sma.iloc[-1]
+        indicators['BB_Lower'] = (sma - 2 * std).iloc[-1]
+    return {name: value for name, value in indicators.items() if value is not None and not pd.isna(value)}
+
+
+class TestTechnicalIndicators(unittest.TestCase):
+    """技术指标库测试类"""
+
+    def setUp(self):
+        if not INDICATORS_AVAILABLE:
+            self.skipTest("技术指标库不可用")
+        self.cache_patch = patch.object(technical_indicators, "_cache", technical_indicators.OrderedDict())
+        self.cache_patch.start()
+
+    def tearDown(self):
+        if INDICATORS_AVAILABLE and hasattr(self, "cache_patch"):
+            self.cache_patch.stop()
+
+    def test_matches_legacy_formulas(self):
+        """各长度数据的最新指标与原实现一致（数据不足的指标不返回）"""
+        bars = _make_bars(120)
+        for length in (1, 4, 13, 14, 19, 20, 25, 26, 60, 120):
+            expected = _legacy_indicators(bars.iloc[:length])
+            actual = TechnicalIndicators(bars.iloc[:length]).latest()
+            self.assertEqual(set(actual), set(expected), length)
+            for name, value in expected.items():
+                self.assertAlmostEqual(actual[name], value, places=9, msg=(length, name))
+
+    def test_incremental_extend_matches_full_compute(self):
+        """分多次追加K线的结果与整段一次计算一致"""
+        bars = _make_bars(300, seed=1)
+        full = TechnicalIndicators(bars).frame
+        for splits in ([3], [100, 101, 250], [26, 27, 28]):
+            indicators = TechnicalIndicators(bars.iloc[:splits[0]])
+            for start, stop in zip(splits, splits[1:] + [len(bars)]):
+                indicators.extend(bars.iloc[start:stop])
+            self.assertEqual(list(indicators.frame.columns), INDICATOR_COLUMNS)
+            pd.testing.assert_frame_equal(indicators.frame, full, check_exact=False, rtol=1e-9, check_freq=False)
+
+        gappy = bars.copy()
+        gappy.iloc[50, gappy.columns.get_loc("Close")] = np.nan
+        indicators = TechnicalIndicators(gappy.iloc[:100]).extend(gappy.iloc[100:])
+        pd.testing.assert_frame_equal(indicators.frame, TechnicalIndicators(gappy).frame,
+                                      check_exact=False, rtol=1e-9, check_freq=False, check_names=False)
+
+    def test_cache_reuses_and_extends(self):
+        """相同数据直接复用缓存；追加K线只计算新增部分；历史不同则重算"""
+        bars = _make_bars(200, seed=2)
+        first = get_technical_indicators(bars.iloc[:150], key=("us", "AAPL"))
+        with patch.object(TechnicalIndicators, "__init__", side_effect=AssertionError("不应整段重算")):
+            self.assertIs(get_technical_indicators(bars.iloc[:150], key=("us", "AAPL")), first)
+            extended = get_technical_indicators(bars, key=("us", "AAPL"))
+        self.assertIs(extended, first)
+        self.assertEqual(len(extended.frame), 200)
+
+        other = get_technical_indicators(_make_bars(200, seed=3), key=("us", "AAPL"))
+        self.assertIsNot(other, first)
+
+    def test_lowercase_columns_and_summary(self):
+        """支持Tushare风格的小写列和trade_date列，指标摘要跳过缺失项"""
+        bars = _make_bars(30).reset_index().rename(columns={"Date": "trade_date", "Close": "close"})
+        latest = get_technical_indicators(bars, key=("tushare", "000001")).latest()
+        self.assertIn("MACD", latest)
+        summary = format_indicator_summary(latest, currency="¥")
+        self.assertIn("- MA20: ¥", summary)
+        self.assertIn("布林带", summary)
+        self.assertEqual(format_indicator_summary(TechnicalIndicators(bars.iloc[:6]).latest()).count("\n"), 0)
+
+    def test_tdx_uses_fetched_history(self):
+        """通达信数据接口传入已获取的历史数据时不再重新下载"""
+        from tradingagents.dataflows.tdx_utils import TongDaXinDataProvider
+
+        provider = TongDaXinDataProvider.__new__(TongDaXinDataProvider)
+        bars = _make_bars(60)
+        with patch.object(TongDaXinDataProvider, "get_stock_history_data",
+                          side_effect=AssertionError("不应重新下载")):
+            indicators = provider.get_stock_technical_indicators("000001", history=bars)
+        self.assertEqual(set(indicators), set(_legacy_indicators(bars)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析耗时追踪测试
+验证span嵌套与JSONL写入、LangGraph回调记录节点/LLM/工具span、数据源路由span以及OTLP转换
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import uuid
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langgraph.graph import END, START, StateGraph
+    from typing_extensions import TypedDict
+
+    from tradingagents.dataflows.data_source_router import DataSourceRouter
+    from tradingagents.utils.tracing import (
+        JsonlTraceSink, SpanKind, TracingCallbackHandler, load_trace, summarize_trace,
+        to_otlp, trace_analysis, trace_span, traced
+    )
+    TRACING_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 耗时追踪测试依赖不可用: {e}")
+    TRACING_AVAILABLE = False
+
+
+class TestTracing(unittest.TestCase):
+    """分析耗时追踪测试类"""
+
+    def setUp(self):
+        if not TRACING_AVAILABLE:
+            self.skipTest("耗时追踪测试依赖不可用")
+        self.temp_dir = tempfile.mkdtemp()
+        self.sink = JsonlTraceSink(self.temp_dir)
+        self.env_patch = patch.dict(os.environ, {"TRADINGAGENTS_TRACING_ENABLED": "true"})
+        self.env_patch.start()
+
+    def tearDown(self):
+        if TRACING_AVAILABLE:
+            self.env_patch.stop()
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _by_name(self, spans):
+        return {span["name"]: span for span in spans}
+
+    def test_nested_spans_written_to_jsonl(self):
+        """span按上下文嵌套，分析结束后写入JSONL并可读回"""
+        @traced("cache:lookup", SpanKind.CACHE)
+        def lookup():
+            return None
+
+        with trace_analysis("a1", sink=self.sink, stock_symbol="AAPL"):
+            with trace_span("fetch", SpanKind.DATA_SOURCE) as span:
+                lookup()
+                span.attributes["rows"] = 10
+
+        spans = self._by_name(load_trace("a1", sink=self.sink))
+        self.assertEqual(set(spans), {"analysis", "fetch", "cache:lookup"})
+        self.assertEqual(spans["fetch"]["parentSpanId"], spans["analysis"]["spanId"])
+        self.assertEqual(spans["cache:lookup"]["parentSpanId"], spans["fetch"]["spanId"])
+        self.assertEqual(spans["fetch"]["attributes"]["rows"], 10)
+        self.assertEqual(spans["analysis"]["attributes"]["stock_symbol"], "AAPL")
+        self.assertEqual(spans["cache:lookup"]["attributes"]["analysis.id"], "a1")
+        self.assertEqual(len({span["traceId"] for span in spans.values()}), 1)
+
+    def test_error_recorded_and_reraised(self):
+        """span内抛出的异常记录为错误状态并继续抛出"""
+        with self.assertRaises(ValueError):
+            with trace_analysis("a2", sink=self.sink):
+                with trace_span("broken"):
+                    raise ValueError("boom")
+
+        spans = self._by_name(load_trace("a2", sink=self.sink))
+        self.assertEqual(spans["broken"]["status"], {"code": "ERROR", "message": "boom"})
+        self.assertEqual(spans["analysis"]["status"]["code"], "ERROR")
+
+    def test_noop_without_active_trace(self):
+        """未开启追踪时trace_span返回None且不写入任何文件"""
+        with trace_span("orphan") as span:
+            self.assertIsNone(span)
+        with patch.dict(os.environ, {"TRADINGAGENTS_TRACING_ENABLED": "false"}):
+            with trace_analysis("a3", sink=self.sink) as trace:
+                self.assertIsNone(trace)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_graph_callbacks_record_nodes_and_llm(self):
+        """LangGraph节点和节点内的LLM调用记录为嵌套span"""
+        class State(TypedDict):
+            text: str
+
+        llm = FakeListChatModel(responses=["买入"])
+
+        def analyst(state):
+            return {"text": llm.invoke(state["text"]).content}
+
+        builder = StateGraph(State)
+        builder.add_node("Market Analyst", analyst)
+        builder.add_edge(START, "Market Analyst")
+        builder.add_edge("Market Analyst", END)
+        graph = builder.compile()
+
+        with trace_analysis("a4", sink=self.sink) as trace:
+            result = graph.invoke({"text": "分析"}, config={"callbacks": [TracingCallbackHandler(trace)]})
+        self.assertEqual(result["text"], "买入")
+
+        spans = load_trace("a4", sink=self.sink)
+        node = next(span for span in spans if span["kind"] == SpanKind.NODE)
+        llm_span = next(span for span in spans if span["kind"] == SpanKind.LLM)
+        self.assertEqual(node["name"], "Market Analyst")
+        self.assertEqual(llm_span["parentSpanId"], node["spanId"])
+        # 图内部的其他运行（如整图、通道写入）不产生span
+        self.assertEqual({span["kind"] for span in spans}, {SpanKind.ANALYSIS, SpanKind.NODE, SpanKind.LLM})
+
+    def test_llm_ttft_queue_and_tool_spans(self):
+        """回调记录LLM排队/首Token耗时和token用量，工具内的数据源span挂在工具下"""
+        with trace_analysis("a5", sink=self.sink) as trace:
+            handler = TracingCallbackHandler(trace)
+            node_id, llm_id, tool_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+            handler.on_chain_start({}, {}, run_id=node_id, name="Trader",
+                                   metadata={"langgraph_node": "Trader", "langgraph_step": 3})
+            handler.on_chat_model_start({}, [[]], run_id=llm_id, parent_run_id=node_id,
+                                        metadata={"ls_provider": "dashscope", "ls_model_name": "qwen-plus"})
+            handler.mark_request_start(llm_id)
+            time.sleep(0.01)
+            handler.on_llm_new_token("买", run_id=llm_id)
+            handler.on_llm_new_token("入", run_id=llm_id)
+            response = type("Response", (), {"llm_output": {"token_usage": {"prompt_tokens": 12, "completion_tokens": 3}}})()
+            handler.on_llm_end(response, run_id=llm_id)
+
+            handler.on_tool_start({"name": "get_stock_data"}, "AAPL", run_id=tool_id, parent_run_id=node_id)
+            with trace_span("data_source:tushare", SpanKind.DATA_SOURCE):
+                pass
+            handler.on_tool_end("ok", run_id=tool_id)
+            handler.on_chain_end({}, run_id=node_id)
+
+        spans = self._by_name(load_trace("a5", sink=self.sink))
+        llm_span = spans["llm:qwen-plus"]
+        self.assertEqual(llm_span["parentSpanId"], spans["Trader"]["spanId"])
+        self.assertEqual(llm_span["attributes"]["provider"], "dashscope")
+        self.assertGreaterEqual(llm_span["attributes"]["ttft"], llm_span["attributes"]["queue"])
+        self.assertEqual(llm_span["attributes"]["input_tokens"], 12)
+        self.assertEqual(spans["tool:get_stock_data"]["parentSpanId"], spans["Trader"]["spanId"])
+        self.assertEqual(spans["data_source:tushare"]["parentSpanId"], spans["tool:get_stock_data"]["spanId"])
+
+    def test_router_spans_and_otlp_export(self):
+        """数据源路由的每次尝试记录为span，失败带错误状态，可转换为OTLP格式"""
+        router = DataSourceRouter(hedge_enabled=False)
+
+        def fetcher(source):
+            if source == "tushare":
+                raise RuntimeError("超时")
+            return "data"
+
+        with trace_analysis("a6", sink=self.sink):
+            result = router.fetch(["tushare", "akshare"], fetcher)
+        self.assertTrue(result.success)
+
+        spans = load_trace("a6", sink=self.sink)
+        by_name = self._by_name(spans)
+        self.assertEqual(by_name["data_source:tushare"]["status"]["code"], "ERROR")
+        self.assertEqual(by_name["data_source:akshare"]["status"]["code"], "OK")
+
+        summary = summarize_trace(spans)
+        self.assertEqual(summary["by_kind"][SpanKind.DATA_SOURCE]["count"], 2)
+
+        otlp = to_otlp(spans)
+        otlp_spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(len(otlp_spans), 3)
+        failed = next(span for span in otlp_spans if span["name"] == "data_source:tushare")
+        self.assertEqual(failed["status"]["code"], 2)
+        self.assertIn({"key": "analysis.id", "value": {"stringValue": "a6"}}, failed["attributes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
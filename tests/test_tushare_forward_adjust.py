@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tushare前复权价格计算测试
+验证向量化实现与原先逐行递推的结果一致，并对1年、5年、20年日线数据做耗时对比
+"""
+
+import os
+import sys
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    import numpy as np
+    import pandas as pd
+    from tradingagents.dataflows.tushare_utils import TushareProvider
+    TUSHARE_UTILS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ Tushare工具不可用: {e}")
+    TUSHARE_UTILS_AVAILABLE = False
+
+TRADING_DAYS_PER_YEAR = 250
+
+
+def _make_bars(days, seed=0):
+    """生成带除权跳空的日线数据（倒序返回，与Tushare daily接口一致）"""
+    rng = np.random.default_rng(seed)
+    pct_chg = np.round(rng.normal(0, 2, days), 2)
+    close = 20 * np.cumprod(1 + pct_chg / 100)
+    # 每年一次除权：原始价格下跳，但pct_chg按复权口径计算
+    for ex_day in range(TRADING_DAYS_PER_YEAR // 2, days, TRADING_DAYS_PER_YEAR):
+        close[ex_day:] *= 0.8
+    close = np.round(close, 2)
+    spread = np.abs(rng.normal(0, 0.01, days))
+    bars = pd.DataFrame({
+        "ts_code": "000001.SZ",
+        "trade_date": pd.bdate_range("2000-01-03", periods=days),
+        "open": np.round(close * (1 - spread / 2), 2),
+        "high": np.round(close * (1 + spread), 2),
+        "low": np.round(close * (1 - spread), 2),
+        "close": close,
+        "pct_chg": pct_chg,
+        "vol": rng.integers(1000, 100000, days).astype(float),
+    })
+    return bars.iloc[::-1].reset_index(drop=True)
+
+
+def _legacy_forward_adjust(data):
+    """原先 _calculate_forward_adjusted_prices 的逐行实现"""
+    adjusted_data = data.copy().sort_values('trade_date').reset_index(drop=True)
+    for column in ('close', 'open', 'high', 'low'):
+        adjusted_data[f'{column}_raw'] = adjusted_data[column].copy()
+    adjusted_closes = [float(adjusted_data.iloc[-1]['close'])]
+    for i in range(len(adjusted_data) - 2, -1, -1):
+        pct_change = float(adjusted_data.iloc[i + 1]['pct_chg']) / 100.0
+        adjusted_closes.insert(0, adjusted_closes[0] / (1 + pct_change))
+    adjusted_data['close'] = adjusted_closes
+    for i in range(len(adjusted_data)):
+        if adjusted_data.iloc[i]['close_raw'] != 0:
+            ratio = adjusted_data.iloc[i]['close'] / adjusted_data.iloc[i]['close_raw']
+            for column in ('open', 'high', 'low'):
+                adjusted_data.iloc[i, adjusted_data.columns.get_loc(column)] = \
+                    adjusted_data.iloc[i][f'{column}_raw'] * ratio
+    adjusted_data['price_type'] = 'forward_adjusted'
+    return adjusted_data
+
+
+class TestTushareForwardAdjust(unittest.TestCase):
+    """前复权价格计算测试类"""
+
+    def setUp(self):
+        if not TUSHARE_UTILS_AVAILABLE:
+            self.skipTest("Tushare工具不可用")
+        # 计算方法不依赖API连接，跳过token和缓存初始化
+        self.provider = TushareProvider.__new__(TushareProvider)
+
+    def assert_same_output(self, data):
+        expected = _legacy_forward_adjust(data)
+        actual = self.provider._calculate_forward_adjusted_prices(data)
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-9)
+
+    def test_matches_legacy_output(self):
+        """与原实现的输出一致（列、顺序、数值），包括单行、零收盘价和缺失涨跌幅"""
+        self.assert_same_output(_make_bars(600))
+        self.assert_same_output(_make_bars(1))
+
+        bars = _make_bars(40, seed=1)
+        bars.loc[5, "close"] = 0.0
+        bars.loc[20, "pct_chg"] = np.nan
+        self.assert_same_output(bars)
+
+    def test_adj_factor_takes_precedence(self):
+        """带有adj_factor列时按 原始价 × 复权因子 / 最新复权因子 计算"""
+        bars = _make_bars(10).sort_values("trade_date").reset_index(drop=True)
+        bars["adj_factor"] = [1.0] * 5 + [1.25] * 5
+        adjusted = self.provider._calculate_forward_adjusted_prices(bars)
+        np.testing.assert_allclose(adjusted["close"], bars["close"] * bars["adj_factor"] / 1.25)
+        np.testing.assert_allclose(adjusted["high"], bars["high"] * bars["adj_factor"] / 1.25)
+        self.assertTrue((adjusted["close_raw"] == bars["close"]).all())
+
+    def test_benchmark_against_legacy(self):
+        """1年、5年、20年日线的耗时对比，向量化实现更快且结果一致"""
+        for years in (1, 5, 20):
+            bars = _make_bars(years * TRADING_DAYS_PER_YEAR, seed=years)
+
+            start = time.perf_counter()
+            expected = _legacy_forward_adjust(bars)
+            legacy_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = self.provider._calculate_forward_adjusted_prices(bars)
+            vectorized_seconds = time.perf_counter() - start
+
+            print(f"⏱️ {years}年 ({len(bars)}条): 逐行 {legacy_seconds * 1000:.1f}ms, "
+                  f"向量化 {vectorized_seconds * 1000:.1f}ms")
+            pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-9)
+            self.assertLess(vectorized_seconds, legacy_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
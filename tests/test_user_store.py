@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+用户与点数存储测试
+验证users.json按修改时间缓存、原子写入、并发点数扣减不丢失更新，以及SQLite/MongoDB后端的条件扣减
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from web.utils.user_store import JsonUserStore, MongoUserStore, SQLiteUserStore, update_user_with_points
+    USER_STORE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 用户存储不可用: {e}")
+    USER_STORE_AVAILABLE = False
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+USERS = {
+    "admin": {"password_hash": "x", "role": "admin", "permissions": ["admin"], "points": 0},
+    "user": {"password_hash": "y", "role": "user", "permissions": ["analysis"], "points": 100},
+}
+
+
+def _deduct_in_process(users_file, times, results):
+    store = JsonUserStore(Path(users_file))
+    results.put(sum(store.try_deduct("user", 1) is not None for _ in range(times)))
+
+
+class UserStoreCases:
+    """各后端共用的测试用例"""
+
+    def test_crud(self):
+        """创建、更新、删除用户只影响目标用户"""
+        self.assertFalse(self.store.create_user("user", {"points": 1}))
+        self.assertTrue(self.store.create_user("bob", {"role": "user", "permissions": [], "points": 5}))
+        self.assertTrue(self.store.update_user("bob", {"role": "admin", "points": 7}))
+        self.assertFalse(self.store.update_user("nobody", {"role": "admin"}))
+        self.assertEqual(self.store.get_user("bob")["role"], "admin")
+        self.assertEqual(self.store.get_user("bob")["points"], 7)
+        self.assertTrue(self.store.delete_user("bob"))
+        self.assertIsNone(self.store.get_user("bob"))
+        self.assertEqual(set(self.store.list_users()), {"admin", "user"})
+
+    def test_points_operations(self):
+        """扣减为检查并扣减，点数不足或用户不存在返回None，增减结果不低于0"""
+        self.assertEqual(self.store.try_deduct("user", 30), 70)
+        self.assertIsNone(self.store.try_deduct("user", 71))
+        self.assertIsNone(self.store.try_deduct("nobody", 1))
+        self.assertEqual(self.store.add_points("user", 5), 75)
+        self.assertEqual(self.store.add_points("user", -100), 0)
+        self.assertEqual(self.store.set_points("user", -3), 0)
+        self.assertEqual(self.store.set_points("user", 9), 9)
+        self.assertEqual(self.store.get_user("user")["points"], 9)
+
+    def test_form_update_applies_points_delta(self):
+        """表单加载后点数被其他会话扣减，保存时只叠加增量，不覆盖扣减结果"""
+        loaded = self.store.get_user("user")["points"]
+        self.assertEqual(self.store.try_deduct("user", 30), 70)
+        # 管理员在加载时的100点基础上充值10点
+        self.assertTrue(update_user_with_points(self.store, "user", {"role": "user", "points": loaded + 10}, 10))
+        self.assertEqual(self.store.get_user("user")["points"], 80)
+
+        # 增量为0时不修改点数，只更新资料
+        self.assertEqual(self.store.try_deduct("user", 5), 75)
+        self.assertTrue(update_user_with_points(self.store, "user", {"permissions": ["analysis", "config"]}, 0))
+        self.assertEqual(self.store.get_user("user")["points"], 75)
+        self.assertEqual(self.store.get_user("user")["permissions"], ["analysis", "config"])
+        self.assertFalse(update_user_with_points(self.store, "nobody", {"role": "user"}, 5))
+
+
+class ConcurrentDeductionCases:
+    """本地后端的并发扣减用例（mongomock不模拟服务端原子性，MongoDB后端不适用）"""
+
+    def test_concurrent_deductions(self):
+        """多线程并发扣减不丢失更新，也不会超扣"""
+        successes = []
+
+        def worker():
+            successes.append(sum(self.store.try_deduct("user", 1) is not None for _ in range(30)))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(successes), 100)
+        self.assertEqual(self.store.get_user("user")["points"], 0)
+
+
+class TestJsonUserStore(UserStoreCases, ConcurrentDeductionCases, unittest.TestCase):
+    """users.json后端测试类"""
+
+    def setUp(self):
+        if not USER_STORE_AVAILABLE:
+            self.skipTest("用户存储不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.users_file = Path(self.temp_dir.name) / "users.json"
+        self.users_file.write_text(json.dumps(USERS), encoding="utf-8")
+        self.store = JsonUserStore(self.users_file)
+
+    def tearDown(self):
+        if USER_STORE_AVAILABLE:
+            self.temp_dir.cleanup()
+
+    def test_cache_validated_by_mtime(self):
+        """文件未变化时不重新解析，外部修改后读取到新内容"""
+        for _ in range(5):
+            self.store.get_user("user")
+        self.assertEqual(self.store.stats["parses"], 1)
+
+        users = json.loads(self.users_file.read_text(encoding="utf-8"))
+        users["user"]["points"] = 42
+        time.sleep(0.01)
+        self.users_file.write_text(json.dumps(users), encoding="utf-8")
+        self.assertEqual(self.store.get_user("user")["points"], 42)
+        self.assertEqual(self.store.stats["parses"], 2)
+
+    def test_atomic_write_keeps_file_valid(self):
+        """写入通过临时文件替换，完成后不残留临时文件，缓存与文件一致"""
+        self.store.try_deduct("user", 10)
+        self.assertEqual(json.loads(self.users_file.read_text(encoding="utf-8"))["user"]["points"], 90)
+        self.assertEqual([p.name for p in Path(self.temp_dir.name).glob(".users_*")], [])
+        parses = self.store.stats["parses"]
+        self.store.get_user("user")
+        self.assertEqual(self.store.stats["parses"], parses)
+
+    def test_returned_users_are_copies(self):
+        """调用方修改返回的字典不影响缓存"""
+        self.store.get_user("user")["points"] = 999
+        self.store.list_users()["user"]["points"] = 999
+        self.assertEqual(self.store.get_user("user")["points"], 100)
+
+    def test_ensure_defaults_only_when_missing(self):
+        """用户文件已存在时不写入默认用户"""
+        self.assertFalse(self.store.ensure_defaults({"x": {"points": 1}}))
+        self.users_file.unlink()
+        self.assertTrue(JsonUserStore(self.users_file).ensure_defaults({"x": {"points": 1}}))
+        self.assertEqual(json.loads(self.users_file.read_text(encoding="utf-8")), {"x": {"points": 1}})
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "多进程测试使用fork")
+    def test_multiprocess_deductions(self):
+        """多个进程同时扣减时文件锁保证不丢失更新"""
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [context.Process(target=_deduct_in_process, args=(str(self.users_file), 40, results))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+
+        self.assertEqual(sum(results.get(timeout=5) for _ in processes), 100)
+        self.assertEqual(json.loads(self.users_file.read_text(encoding="utf-8"))["user"]["points"], 0)
+
+
+class TestSQLiteUserStore(UserStoreCases, ConcurrentDeductionCases, unittest.TestCase):
+    """SQLite后端测试类"""
+
+    def setUp(self):
+        if not USER_STORE_AVAILABLE:
+            self.skipTest("用户存储不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        seed = Path(self.temp_dir.name) / "users.json"
+        seed.write_text(json.dumps(USERS), encoding="utf-8")
+        self.store = SQLiteUserStore(Path(self.temp_dir.name) / "users.db", seed_file=seed)
+
+    def tearDown(self):
+        if USER_STORE_AVAILABLE:
+            self.temp_dir.cleanup()
+
+    def test_seeded_from_json(self):
+        """首次创建时从users.json导入用户，字段保持不变"""
+        self.assertEqual(self.store.list_users(), USERS)
+
+    def test_connections_closed(self):
+        """每次操作（含原子点数增减）结束后关闭SQLite连接"""
+        import sqlite3
+        from unittest.mock import patch
+
+        opened = []
+        real_connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            conn = real_connect(*args, **kwargs)
+            opened.append(conn)
+            return conn
+
+        with patch("web.utils.user_store.sqlite3.connect", side_effect=tracking_connect):
+            self.assertTrue(update_user_with_points(self.store, "user", {"role": "user"}, 5))
+            self.assertEqual(self.store.try_deduct("user", 5), 100)
+        self.assertEqual(len(opened), 3)
+        for conn in opened:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+
+class TestMongoUserStore(UserStoreCases, unittest.TestCase):
+    """MongoDB后端测试类"""
+
+    def setUp(self):
+        if not USER_STORE_AVAILABLE or not MONGOMOCK_AVAILABLE:
+            self.skipTest("用户存储或mongomock不可用")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        seed = Path(self.temp_dir.name) / "users.json"
+        seed.write_text(json.dumps(USERS), encoding="utf-8")
+        self.store = MongoUserStore(mongomock.MongoClient()["tradingagents"], seed_file=seed)
+
+    def tearDown(self):
+        if USER_STORE_AVAILABLE and MONGOMOCK_AVAILABLE:
+            self.temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
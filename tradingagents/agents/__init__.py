@@ -1,27 +1,37 @@
-from .utils.agent_utils import Toolkit, create_msg_delete
-from .utils.agent_states import AgentState, InvestDebateState, RiskDebateState
-from .utils.memory import FinancialSituationMemory
+# 按需导入（PEP 562）：导入 agents.utils.agent_states 等子模块时
+# 不再连带加载全部智能体、工具集和ChromaDB记忆模块
 
-from .analysts.fundamentals_analyst import create_fundamentals_analyst
-from .analysts.market_analyst import create_market_analyst
-from .analysts.news_analyst import create_news_analyst
-from .analysts.social_media_analyst import create_social_media_analyst
+import importlib
 
-from .researchers.bear_researcher import create_bear_researcher
-from .researchers.bull_researcher import create_bull_researcher
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
 
-from .risk_mgmt.aggresive_debator import create_risky_debator
-from .risk_mgmt.conservative_debator import create_safe_debator
-from .risk_mgmt.neutral_debator import create_neutral_debator
+_LAZY_ATTRS = {
+    "Toolkit": "utils.agent_utils",
+    "create_msg_delete": "utils.agent_utils",
+    "AgentState": "utils.agent_states",
+    "InvestDebateState": "utils.agent_states",
+    "RiskDebateState": "utils.agent_states",
+    "FinancialSituationMemory": "utils.memory",
 
-from .managers.research_manager import create_research_manager
-from .managers.risk_manager import create_risk_manager
+    "create_fundamentals_analyst": "analysts.fundamentals_analyst",
+    "create_market_analyst": "analysts.market_analyst",
+    "create_news_analyst": "analysts.news_analyst",
+    "create_social_media_analyst": "analysts.social_media_analyst",
 
-from .trader.trader import create_trader
+    "create_bear_researcher": "researchers.bear_researcher",
+    "create_bull_researcher": "researchers.bull_researcher",
 
-# 导入统一日志系统
-from tradingagents.utils.logging_init import get_logger
-logger = get_logger("default")
+    "create_risky_debator": "risk_mgmt.aggresive_debator",
+    "create_safe_debator": "risk_mgmt.conservative_debator",
+    "create_neutral_debator": "risk_mgmt.neutral_debator",
+
+    "create_research_manager": "managers.research_manager",
+    "create_risk_manager": "managers.risk_manager",
+
+    "create_trader": "trader.trader",
+}
 
 __all__ = [
     "FinancialSituationMemory",
@@ -43,3 +53,15 @@ __all__ = [
     "create_social_media_analyst",
     "create_trader",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(f".{_LAZY_ATTRS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
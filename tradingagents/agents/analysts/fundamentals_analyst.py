@@ -16,6 +16,9 @@ logger = get_logger("default")
 # 导入Google工具调用处理器
 from tradingagents.agents.utils.google_tool_handler import GoogleToolCallHandler
 
+# 提示词版本：修改本分析师的提示词或工具时递增，使分析师报告缓存中的旧报告失效
+PROMPT_VERSION = "1"
+
 
 def _get_company_name_for_fundamentals(ticker: str, market_info: dict) -> str:
     """
@@ -1,6 +1,4 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain import hub
 import time
 import json
 import traceback
@@ -15,6 +13,9 @@ logger = get_logger("default")
 # 导入Google工具调用处理器
 from tradingagents.agents.utils.google_tool_handler import GoogleToolCallHandler
 
+# 提示词版本：修改本分析师的提示词或工具时递增，使分析师报告缓存中的旧报告失效
+PROMPT_VERSION = "1"
+
 
 def _get_company_name(ticker: str, market_info: dict) -> str:
     """
@@ -228,7 +229,10 @@ def create_market_analyst_react(llm, toolkit):
 ## 投资建议"""
 
             try:
-                # 创建ReAct Agent
+                # 创建ReAct Agent（langchain.agents较重，仅ReAct模式使用时导入）
+                from langchain.agents import create_react_agent, AgentExecutor
+                from langchain import hub
+
                 prompt = hub.pull("hwchase17/react")
                 agent = create_react_agent(llm, tools, prompt)
                 agent_executor = AgentExecutor(
@@ -13,6 +13,9 @@ from tradingagents.utils.stock_utils import StockUtils
 # 导入Google工具调用处理器
 from tradingagents.agents.utils.google_tool_handler import GoogleToolCallHandler
 
+# 提示词版本：修改本分析师的提示词或工具时递增，使分析师报告缓存中的旧报告失效
+PROMPT_VERSION = "1"
+
 logger = get_logger("analysts.news")
 
 
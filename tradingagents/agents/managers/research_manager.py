@@ -1,21 +1,22 @@
+import asyncio
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import create_async_node
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
 def create_research_manager(llm, memory):
-    def research_manager_node(state) -> dict:
+    def build_prompt(state) -> str:
         history = state["investment_debate_state"].get("history", "")
         market_research_report = state["market_report"]
         sentiment_report = state["sentiment_report"]
         news_report = state["news_report"]
         fundamentals_report = state["fundamentals_report"]
 
-        investment_debate_state = state["investment_debate_state"]
-
         curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
 
         # 安全检查：确保memory不为None
@@ -66,7 +67,11 @@ def create_research_manager(llm, memory):
 {history}
 
 请用中文撰写所有分析内容和建议。"""
-        response = llm.invoke(prompt)
+
+        return prompt
+
+    def build_update(state, response) -> dict:
+        investment_debate_state = state["investment_debate_state"]
 
         new_investment_debate_state = {
             "judge_decision": response.content,
@@ -82,4 +87,14 @@ def create_research_manager(llm, memory):
             "investment_plan": response.content,
         }
 
-    return research_manager_node
+    def research_manager_node(state) -> dict:
+        response = llm.invoke(build_prompt(state))
+        return build_update(state, response)
+
+    async def aresearch_manager_node(state) -> dict:
+        # 记忆检索为阻塞调用，放到线程中执行
+        prompt = await asyncio.to_thread(build_prompt, state)
+        response = await llm.ainvoke(prompt)
+        return build_update(state, response)
+
+    return create_async_node(research_manager_node, aresearch_manager_node)
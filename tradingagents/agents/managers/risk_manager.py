@@ -1,18 +1,19 @@
+import asyncio
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import create_async_node
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
 def create_risk_manager(llm, memory):
-    def risk_manager_node(state) -> dict:
-
-        company_name = state["company_of_interest"]
+    max_retries = 3
 
+    def build_prompt(state) -> str:
         history = state["risk_debate_state"]["history"]
-        risk_debate_state = state["risk_debate_state"]
         market_research_report = state["market_report"]
         news_report = state["news_report"]
         fundamentals_report = state["news_report"]
@@ -53,37 +54,24 @@ def create_risk_manager(llm, memory):
 
 专注于可操作的见解和持续改进。建立在过去经验教训的基础上，批判性地评估所有观点，确保每个决策都能带来更好的结果。请用中文撰写所有分析内容和建议。"""
 
-        # 增强的LLM调用，包含错误处理和重试机制
-        max_retries = 3
-        retry_count = 0
-        response_content = ""
-        
-        while retry_count < max_retries:
-            try:
-                logger.info(f"🔄 [Risk Manager] 调用LLM生成交易决策 (尝试 {retry_count + 1}/{max_retries})")
-                response = llm.invoke(prompt)
-                
-                if response and hasattr(response, 'content') and response.content:
-                    response_content = response.content.strip()
-                    if len(response_content) > 10:  # 确保响应有实质内容
-                        logger.info(f"✅ [Risk Manager] LLM调用成功，生成决策长度: {len(response_content)} 字符")
-                        break
-                    else:
-                        logger.warning(f"⚠️ [Risk Manager] LLM响应内容过短: {len(response_content)} 字符")
-                        response_content = ""
-                else:
-                    logger.warning(f"⚠️ [Risk Manager] LLM响应为空或无效")
-                    response_content = ""
-                    
-            except Exception as e:
-                logger.error(f"❌ [Risk Manager] LLM调用失败 (尝试 {retry_count + 1}): {str(e)}")
-                response_content = ""
-            
-            retry_count += 1
-            if retry_count < max_retries and not response_content:
-                logger.info(f"🔄 [Risk Manager] 等待2秒后重试...")
-                time.sleep(2)
-        
+        return prompt
+
+    def extract_content(response) -> str:
+        """校验LLM响应，内容无效时返回空字符串"""
+        if response and hasattr(response, 'content') and response.content:
+            response_content = response.content.strip()
+            if len(response_content) > 10:  # 确保响应有实质内容
+                logger.info(f"✅ [Risk Manager] LLM调用成功，生成决策长度: {len(response_content)} 字符")
+                return response_content
+            logger.warning(f"⚠️ [Risk Manager] LLM响应内容过短: {len(response_content)} 字符")
+        else:
+            logger.warning(f"⚠️ [Risk Manager] LLM响应为空或无效")
+        return ""
+
+    def build_update(state, response_content) -> dict:
+        company_name = state["company_of_interest"]
+        risk_debate_state = state["risk_debate_state"]
+
         # 如果所有重试都失败，生成默认决策
         if not response_content:
             logger.error(f"❌ [Risk Manager] 所有LLM调用尝试失败，使用默认决策")
@@ -123,4 +111,46 @@ def create_risk_manager(llm, memory):
             "final_trade_decision": response_content,
         }
 
-    return risk_manager_node
+    def risk_manager_node(state) -> dict:
+        prompt = build_prompt(state)
+
+        # 增强的LLM调用，包含错误处理和重试机制
+        response_content = ""
+        for retry_count in range(max_retries):
+            try:
+                logger.info(f"🔄 [Risk Manager] 调用LLM生成交易决策 (尝试 {retry_count + 1}/{max_retries})")
+                response_content = extract_content(llm.invoke(prompt))
+            except Exception as e:
+                logger.error(f"❌ [Risk Manager] LLM调用失败 (尝试 {retry_count + 1}): {str(e)}")
+                response_content = ""
+
+            if response_content:
+                break
+            if retry_count + 1 < max_retries:
+                logger.info(f"🔄 [Risk Manager] 等待2秒后重试...")
+                time.sleep(2)
+
+        return build_update(state, response_content)
+
+    async def arisk_manager_node(state) -> dict:
+        # 记忆检索为阻塞调用，放到线程中执行
+        prompt = await asyncio.to_thread(build_prompt, state)
+
+        response_content = ""
+        for retry_count in range(max_retries):
+            try:
+                logger.info(f"🔄 [Risk Manager] 调用LLM生成交易决策 (尝试 {retry_count + 1}/{max_retries})")
+                response_content = extract_content(await llm.ainvoke(prompt))
+            except Exception as e:
+                logger.error(f"❌ [Risk Manager] LLM调用失败 (尝试 {retry_count + 1}): {str(e)}")
+                response_content = ""
+
+            if response_content:
+                break
+            if retry_count + 1 < max_retries:
+                logger.info(f"🔄 [Risk Manager] 等待2秒后重试...")
+                await asyncio.sleep(2)
+
+        return build_update(state, response_content)
+
+    return create_async_node(risk_manager_node, arisk_manager_node)
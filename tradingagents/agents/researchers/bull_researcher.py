@@ -1,19 +1,21 @@
 from langchain_core.messages import AIMessage
+import asyncio
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import create_async_node
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
 def create_bull_researcher(llm, memory):
-    def bull_node(state) -> dict:
+    def build_prompt(state) -> str:
         logger.debug(f"🐂 [DEBUG] ===== 看涨研究员节点开始 =====")
 
         investment_debate_state = state["investment_debate_state"]
         history = investment_debate_state.get("history", "")
-        bull_history = investment_debate_state.get("bull_history", "")
 
         current_response = investment_debate_state.get("current_response", "")
         market_research_report = state["market_report"]
@@ -81,7 +83,12 @@ def create_bull_researcher(llm, memory):
 请确保所有回答都使用中文。
 """
 
-        response = llm.invoke(prompt)
+        return prompt
+
+    def build_update(state, response) -> dict:
+        investment_debate_state = state["investment_debate_state"]
+        history = investment_debate_state.get("history", "")
+        bull_history = investment_debate_state.get("bull_history", "")
 
         argument = f"Bull Analyst: {response.content}"
 
@@ -95,4 +102,14 @@ def create_bull_researcher(llm, memory):
 
         return {"investment_debate_state": new_investment_debate_state}
 
-    return bull_node
+    def bull_node(state) -> dict:
+        response = llm.invoke(build_prompt(state))
+        return build_update(state, response)
+
+    async def abull_node(state) -> dict:
+        # 记忆检索为阻塞调用，放到线程中执行
+        prompt = await asyncio.to_thread(build_prompt, state)
+        response = await llm.ainvoke(prompt)
+        return build_update(state, response)
+
+    return create_async_node(bull_node, abull_node)
@@ -1,16 +1,17 @@
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import create_async_node
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
 def create_risky_debator(llm):
-    def risky_node(state) -> dict:
+    def build_prompt(state) -> str:
         risk_debate_state = state["risk_debate_state"]
         history = risk_debate_state.get("history", "")
-        risky_history = risk_debate_state.get("risky_history", "")
 
         current_safe_response = risk_debate_state.get("current_safe_response", "")
         current_neutral_response = risk_debate_state.get("current_neutral_response", "")
@@ -36,7 +37,12 @@ def create_risky_debator(llm):
 
 积极参与，解决提出的任何具体担忧，反驳他们逻辑中的弱点，并断言承担风险的好处以超越市场常规。专注于辩论和说服，而不仅仅是呈现数据。挑战每个反驳点，强调为什么高风险方法是最优的。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
 
-        response = llm.invoke(prompt)
+        return prompt
+
+    def build_update(state, response) -> dict:
+        risk_debate_state = state["risk_debate_state"]
+        history = risk_debate_state.get("history", "")
+        risky_history = risk_debate_state.get("risky_history", "")
 
         argument = f"Risky Analyst: {response.content}"
 
@@ -56,4 +62,13 @@ def create_risky_debator(llm):
 
         return {"risk_debate_state": new_risk_debate_state}
 
-    return risky_node
+    def risky_node(state) -> dict:
+        response = llm.invoke(build_prompt(state))
+        return build_update(state, response)
+
+    async def arisky_node(state) -> dict:
+        prompt = build_prompt(state)
+        response = await llm.ainvoke(prompt)
+        return build_update(state, response)
+
+    return create_async_node(risky_node, arisky_node)
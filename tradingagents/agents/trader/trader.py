@@ -1,14 +1,17 @@
+import asyncio
 import functools
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import create_async_node
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
 def create_trader(llm, memory):
-    def trader_node(state, name):
+    def build_messages(state) -> list:
         company_name = state["company_of_interest"]
         investment_plan = state["investment_plan"]
         market_research_report = state["market_report"]
@@ -100,8 +103,9 @@ def create_trader(llm, memory):
         logger.debug(f"💰 [DEBUG] 准备调用LLM，系统提示包含货币: {currency}")
         logger.debug(f"💰 [DEBUG] 系统提示中的关键部分: 目标价格({currency})")
 
-        result = llm.invoke(messages)
+        return messages
 
+    def build_update(result, name) -> dict:
         logger.debug(f"💰 [DEBUG] LLM调用完成")
         logger.debug(f"💰 [DEBUG] 交易员回复长度: {len(result.content)}")
         logger.debug(f"💰 [DEBUG] 交易员回复前500字符: {result.content[:500]}...")
@@ -113,4 +117,17 @@ def create_trader(llm, memory):
             "sender": name,
         }
 
-    return functools.partial(trader_node, name="Trader")
+    def trader_node(state, name):
+        result = llm.invoke(build_messages(state))
+        return build_update(result, name)
+
+    async def atrader_node(state, name):
+        # 记忆检索为阻塞调用，放到线程中执行
+        messages = await asyncio.to_thread(build_messages, state)
+        result = await llm.ainvoke(messages)
+        return build_update(result, name)
+
+    return create_async_node(
+        functools.partial(trader_node, name="Trader"),
+        functools.partial(atrader_node, name="Trader"),
+    )
@@ -2,6 +2,7 @@ from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage, AIMe
 from typing import List
 from typing import Annotated
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 from langchain_core.messages import RemoveMessage
 from langchain_core.tools import tool
 from datetime import date, timedelta, datetime
@@ -9,7 +10,6 @@ import functools
 import pandas as pd
 import os
 from dateutil.relativedelta import relativedelta
-from langchain_openai import ChatOpenAI
 import tradingagents.dataflows.interface as interface
 from tradingagents.default_config import DEFAULT_CONFIG
 from langchain_core.messages import HumanMessage
@@ -39,6 +39,16 @@ def create_msg_delete():
     return delete_messages
 
 
+def create_async_node(func, afunc):
+    """
+    组合同步和异步两种实现的图节点
+
+    graph.invoke/stream 使用同步实现，graph.ainvoke/astream 直接await异步实现，
+    避免在事件循环之外为每个节点占用一个线程。
+    """
+    return RunnableLambda(func, afunc=afunc)
+
+
 class Toolkit:
     _config = DEFAULT_CONFIG.copy()
 
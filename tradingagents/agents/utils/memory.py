@@ -1,8 +1,3 @@
-import chromadb
-from chromadb.config import Settings
-from openai import OpenAI
-import dashscope
-from dashscope import TextEmbedding
 import os
 import threading
 import hashlib
@@ -31,6 +26,10 @@ class ChromaDBManager:
 
     def __init__(self):
         if not self._initialized:
+            # ChromaDB较重，首次创建管理器时才导入
+            import chromadb
+            from chromadb.config import Settings
+
             try:
                 # 自动检测操作系统版本并使用最优配置
                 import platform
@@ -109,6 +108,8 @@ class ChromaDBManager:
 
 class FinancialSituationMemory:
     def __init__(self, name, config):
+        from openai import OpenAI
+
         self.config = config
         self.llm_provider = config.get("llm_provider", "openai").lower()
 
@@ -0,0 +1,171 @@
+"""
+分析师报告缓存
+市场、基本面、新闻、社交媒体分析师的报告只取决于股票代码、交易日期、分析师提示词版本
+和快速思考模型，与研究深度、辩论轮数等下游设置无关。分析师节点开始工具调用循环前先查询缓存，
+命中时直接返回报告，只有变化的下游阶段重新执行。
+
+缓存键包含各分析师模块中的 PROMPT_VERSION，修改提示词或工具时递增该版本即可使旧报告失效。
+存储层为 tradingagents.utils.kv_cache（文件/Redis后端，TTL过期和条目数上限淘汰）。
+"""
+
+import importlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from tradingagents.config.env_utils import parse_bool_env, parse_int_env, parse_str_env
+from tradingagents.utils.kv_cache import TTLKeyValueCache, hash_key
+from tradingagents.utils.tracing import SpanKind, trace_span
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 缓存条目格式版本，条目结构变化时递增
+REPORT_CACHE_SCHEMA_VERSION = 1
+
+# 分析师类型 -> (模块, 报告字段)
+ANALYST_REPORTS = {
+    "market": ("tradingagents.agents.analysts.market_analyst", "market_report"),
+    "social": ("tradingagents.agents.analysts.social_media_analyst", "sentiment_report"),
+    "news": ("tradingagents.agents.analysts.news_analyst", "news_report"),
+    "fundamentals": ("tradingagents.agents.analysts.fundamentals_analyst", "fundamentals_report"),
+}
+
+# 短于该长度或以失败标记开头的报告不缓存
+MIN_REPORT_LENGTH = 100
+FAILURE_MARKERS = ("❌", "⚠️", "分析失败", "基本面分析失败", "新闻分析失败")
+
+
+def analyst_prompt_version(analyst_type: str) -> str:
+    """读取分析师模块中声明的提示词版本"""
+    module = importlib.import_module(ANALYST_REPORTS[analyst_type][0])
+    return str(getattr(module, "PROMPT_VERSION", "0"))
+
+
+def build_report_key(analyst_type: str, ticker: str, trade_date: str, prompt_version: str,
+                     config: Dict[str, Any]) -> str:
+    """计算报告缓存键"""
+    payload = {
+        "schema": REPORT_CACHE_SCHEMA_VERSION,
+        "analyst": analyst_type,
+        "ticker": str(ticker).strip().upper(),
+        "trade_date": str(trade_date).strip()[:10],
+        "prompt_version": prompt_version,
+        "provider": str(config.get("llm_provider", "")).lower(),
+        "model": config.get("quick_think_llm", ""),
+        "online_tools": bool(config.get("online_tools", False)),
+    }
+    return hash_key(payload)
+
+
+def is_cacheable_report(report: Any) -> bool:
+    """完整的报告才缓存，空报告和失败信息不缓存"""
+    if not isinstance(report, str):
+        return False
+    text = report.strip()
+    return len(text) >= MIN_REPORT_LENGTH and not text.startswith(FAILURE_MARKERS)
+
+
+class AnalystReportCache(TTLKeyValueCache):
+    """分析师报告缓存，存储层见 tradingagents.utils.kv_cache"""
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        cache_dir: Optional[str] = None,
+        ttl_seconds: int = 21600,
+        max_entries: int = 2000,
+        enabled: bool = True,
+    ):
+        super().__init__(
+            "分析师报告缓存",
+            cache_dir or os.path.join("data", "cache", "analyst_reports"),
+            "analyst_report:",
+            backend=backend,
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+            enabled=enabled,
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目（含 report 与写入时的元数据），未命中或已过期返回None"""
+        return self.get_entry(key)
+
+    def set(self, key: str, report: str, **metadata) -> bool:
+        """写入报告"""
+        return self.set_entry(key, dict(metadata, report=report))
+
+
+# ==================== 分析师节点包装 ====================
+
+def _starts_tool_loop(state) -> bool:
+    """分析师节点是否刚开始工具调用循环（上一条消息不是工具结果）"""
+    messages = state.get("messages") or []
+    return not messages or not isinstance(messages[-1], ToolMessage)
+
+
+def with_report_cache(analyst_type: str, node: Callable, config: Dict[str, Any],
+                      cache: Optional[AnalystReportCache] = None) -> Callable:
+    """
+    为分析师节点加上报告缓存
+
+    工具调用循环开始时按 (股票, 日期, 提示词版本, 模型) 查询缓存，命中则返回不带工具调用的
+    报告消息，图直接进入该分析师的消息清理节点；未命中时正常执行，报告完成后写入缓存。
+    """
+    report_field = ANALYST_REPORTS[analyst_type][1]
+    prompt_version = analyst_prompt_version(analyst_type)
+
+    def cached_analyst_node(state):
+        report_cache = cache or get_analyst_report_cache()
+        if not report_cache.enabled:
+            return node(state)
+
+        key = build_report_key(analyst_type, state["company_of_interest"], state["trade_date"],
+                               prompt_version, config)
+        if _starts_tool_loop(state):
+            with trace_span(f"cache:analyst_report:{analyst_type}", SpanKind.CACHE,
+                            backend=report_cache.backend) as span:
+                entry = report_cache.get(key)
+                if span is not None:
+                    span.attributes["hit"] = entry is not None
+            if entry is not None:
+                logger.info(f"⚡ [分析师报告缓存] {analyst_type} 命中 - "
+                            f"{state['company_of_interest']} {state['trade_date']}，跳过工具调用")
+                return {"messages": [AIMessage(content=entry["report"])], report_field: entry["report"]}
+
+        result = node(state)
+
+        messages = result.get("messages") or []
+        finished = not messages or not getattr(messages[-1], "tool_calls", None)
+        report = result.get(report_field)
+        if finished and is_cacheable_report(report):
+            report_cache.set(key, report, analyst=analyst_type, ticker=state["company_of_interest"],
+                             trade_date=str(state["trade_date"]), prompt_version=prompt_version)
+        return result
+
+    cached_analyst_node.__name__ = getattr(node, "__name__", f"{analyst_type}_analyst_node")
+    return cached_analyst_node
+
+
+_report_cache = None
+_report_cache_lock = threading.Lock()
+
+
+def get_analyst_report_cache() -> AnalystReportCache:
+    """获取全局分析师报告缓存实例"""
+    global _report_cache
+    if _report_cache is None:
+        with _report_cache_lock:
+            if _report_cache is None:
+                _report_cache = AnalystReportCache(
+                    backend=parse_str_env("ANALYST_REPORT_CACHE_BACKEND", "auto"),
+                    cache_dir=parse_str_env("ANALYST_REPORT_CACHE_DIR", "") or None,
+                    ttl_seconds=parse_int_env("ANALYST_REPORT_CACHE_TTL", 21600),
+                    max_entries=parse_int_env("ANALYST_REPORT_CACHE_MAX_ENTRIES", 2000),
+                    enabled=parse_bool_env("ANALYST_REPORT_CACHE_ENABLED", True),
+                )
+    return _report_cache
@@ -225,7 +225,7 @@ def check_service_status() -> Dict[str, Any]:
     
     # 检查MongoDB状态
     mongodb_status = 'disconnected'
-    if service.db_manager and service.db_manager.mongodb_db:
+    if service.db_manager and service.db_manager.mongodb_db is not None:
         try:
             # 尝试执行一个简单的查询来测试连接
             service.db_manager.mongodb_db.list_collection_names()
@@ -61,6 +61,7 @@ class UsageRecord:
     cost: float  # 成本
     session_id: str  # 会话ID
     analysis_type: str  # 分析类型
+    cache_hit: bool = False  # 是否命中LLM响应缓存（命中时零成本）
 
 
 class ConfigManager:
@@ -367,10 +368,11 @@ class ConfigManager:
             logger.error(f"保存使用记录失败: {e}")
     
     def add_usage_record(self, provider: str, model_name: str, input_tokens: int,
-                        output_tokens: int, session_id: str, analysis_type: str = "stock_analysis"):
+                        output_tokens: int, session_id: str, analysis_type: str = "stock_analysis",
+                        cache_hit: bool = False):
         """添加使用记录"""
-        # 计算成本
-        cost = self.calculate_cost(provider, model_name, input_tokens, output_tokens)
+        # 计算成本（缓存命中不产生费用）
+        cost = 0.0 if cache_hit else self.calculate_cost(provider, model_name, input_tokens, output_tokens)
         
         record = UsageRecord(
             timestamp=datetime.now().isoformat(),
@@ -380,7 +382,8 @@ class ConfigManager:
             output_tokens=output_tokens,
             cost=cost,
             session_id=session_id,
-            analysis_type=analysis_type
+            analysis_type=analysis_type,
+            cache_hit=cache_hit
         )
         
         # 优先使用MongoDB存储
@@ -555,6 +558,7 @@ class ConfigManager:
         total_cost = sum(record.cost for record in recent_records)
         total_input_tokens = sum(record.input_tokens for record in recent_records)
         total_output_tokens = sum(record.output_tokens for record in recent_records)
+        cache_hits = sum(1 for record in recent_records if record.cache_hit)
         
         # 按供应商统计
         provider_stats = {}
@@ -577,6 +581,7 @@ class ConfigManager:
             "total_input_tokens": total_input_tokens,
             "total_output_tokens": total_output_tokens,
             "total_requests": len(recent_records),
+            "cache_hits": cache_hits,
             "provider_stats": provider_stats,
             "records_count": len(recent_records)
         }
@@ -657,8 +662,9 @@ class TokenTracker:
         self.config_manager = config_manager
 
     def track_usage(self, provider: str, model_name: str, input_tokens: int,
-                   output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis"):
-        """跟踪Token使用"""
+                   output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis",
+                   cache_hit: bool = False):
+        """跟踪Token使用，cache_hit为True时记录为零成本的缓存命中"""
         if session_id is None:
             session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
@@ -676,7 +682,8 @@ class TokenTracker:
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             session_id=session_id,
-            analysis_type=analysis_type
+            analysis_type=analysis_type,
+            cache_hit=cache_hit
         )
 
         # 检查成本警告
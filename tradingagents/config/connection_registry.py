@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+数据库连接注册表
+进程内共享的MongoDB/Redis连接池：相同连接参数只创建一个客户端，
+按配置限制连接池大小，并提供数据库/集合句柄和连接池使用统计。
+
+各模块不再自行创建 MongoClient / redis.Redis，而是通过 get_connection_registry() 获取客户端，
+共享客户端不应被调用方 close()，统一由 close_all() 在进程退出时关闭。
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .env_utils import parse_int_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from pymongo import MongoClient, monitoring
+    MONGODB_AVAILABLE = True
+except ImportError:
+    MongoClient = None
+    monitoring = None
+    MONGODB_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+def _freeze(options: Dict[str, Any]) -> Tuple:
+    """将连接参数转换为可哈希的注册表键"""
+    return tuple(sorted((k, repr(v)) for k, v in options.items() if v is not None))
+
+
+def _mask(value: Optional[str]) -> str:
+    """隐藏连接串中的密码，用于日志和统计"""
+    if not value or "@" not in value:
+        return value or ""
+    scheme, _, rest = value.partition("://")
+    return f"{scheme}://***@{rest.rsplit('@', 1)[-1]}"
+
+
+if MONGODB_AVAILABLE:
+    class _MongoPoolListener(monitoring.ConnectionPoolListener):
+        """统计MongoDB连接池的连接创建、借出和归还次数"""
+
+        def __init__(self):
+            self.counts = {"created": 0, "closed": 0, "checked_out": 0, "checked_in": 0, "checkout_failed": 0}
+            self._lock = threading.Lock()
+
+        def _incr(self, name: str):
+            with self._lock:
+                self.counts[name] += 1
+
+        def pool_created(self, event): pass
+        def pool_ready(self, event): pass
+        def pool_cleared(self, event): pass
+        def pool_closed(self, event): pass
+        def connection_ready(self, event): pass
+        def connection_check_out_started(self, event): pass
+
+        def connection_created(self, event):
+            self._incr("created")
+
+        def connection_closed(self, event):
+            self._incr("closed")
+
+        def connection_check_out_failed(self, event):
+            self._incr("checkout_failed")
+
+        def connection_checked_out(self, event):
+            self._incr("checked_out")
+
+        def connection_checked_in(self, event):
+            self._incr("checked_in")
+
+        def snapshot(self) -> Dict[str, int]:
+            with self._lock:
+                counts = dict(self.counts)
+            counts["open"] = counts["created"] - counts["closed"]
+            counts["in_use"] = counts["checked_out"] - counts["checked_in"]
+            return counts
+
+
+def default_mongodb_options() -> Dict[str, Any]:
+    """根据MONGODB_*环境变量构建默认连接参数"""
+    options = {
+        "host": os.getenv("MONGODB_HOST", "localhost"),
+        "port": int(os.getenv("MONGODB_PORT", "27017")),
+    }
+    username, password = os.getenv("MONGODB_USERNAME"), os.getenv("MONGODB_PASSWORD")
+    if username and password:
+        options.update({
+            "username": username,
+            "password": password,
+            "authSource": os.getenv("MONGODB_AUTH_SOURCE", "admin"),
+        })
+    return options
+
+
+def default_redis_options() -> Dict[str, Any]:
+    """根据REDIS_*环境变量构建默认连接参数"""
+    options = {
+        "host": os.getenv("REDIS_HOST", "localhost"),
+        "port": int(os.getenv("REDIS_PORT", "6379")),
+        "db": int(os.getenv("REDIS_DB", "0")),
+    }
+    if os.getenv("REDIS_PASSWORD"):
+        options["password"] = os.getenv("REDIS_PASSWORD")
+    return options
+
+
+class ConnectionRegistry:
+    """进程级MongoDB/Redis连接注册表"""
+
+    def __init__(self, mongodb_max_pool_size: int = 50, mongodb_min_pool_size: int = 0,
+                 redis_max_connections: int = 50):
+        self.mongodb_max_pool_size = mongodb_max_pool_size
+        self.mongodb_min_pool_size = mongodb_min_pool_size
+        self.redis_max_connections = redis_max_connections
+        self._mongo_clients: Dict[Tuple, Dict[str, Any]] = {}
+        self._redis_pools: Dict[Tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # ==================== MongoDB ====================
+
+    def get_mongo_client(self, uri: Optional[str] = None, **options):
+        """
+        获取共享的MongoDB客户端
+
+        uri为None时使用MONGODB_*环境变量；相同的 (uri, options) 返回同一个客户端。
+        """
+        if not MONGODB_AVAILABLE:
+            raise ImportError("pymongo未安装")
+        if uri is None and "host" not in options:
+            options = {**default_mongodb_options(), **options}
+
+        key = (uri, _freeze(options))
+        with self._lock:
+            entry = self._mongo_clients.get(key)
+            if entry is None:
+                listener = _MongoPoolListener()
+                client_options = {
+                    "maxPoolSize": self.mongodb_max_pool_size,
+                    "minPoolSize": self.mongodb_min_pool_size,
+                    **options,
+                    "event_listeners": [listener],
+                }
+                client = MongoClient(uri, **client_options) if uri else MongoClient(**client_options)
+                label = _mask(uri) if uri else f"{options.get('host')}:{options.get('port')}"
+                entry = {"client": client, "listener": listener, "label": label, "handouts": 0}
+                self._mongo_clients[key] = entry
+                logger.info(f"🔌 创建共享MongoDB连接池: {label} (maxPoolSize={client_options['maxPoolSize']})")
+            entry["handouts"] += 1
+            return entry["client"]
+
+    def get_mongo_database(self, name: Optional[str] = None, uri: Optional[str] = None, **options):
+        """获取共享客户端上的数据库句柄，name默认为MONGODB_DATABASE"""
+        client = self.get_mongo_client(uri, **options)
+        return client[name or os.getenv("MONGODB_DATABASE", "tradingagents")]
+
+    def get_mongo_collection(self, collection: str, database: Optional[str] = None,
+                             uri: Optional[str] = None, **options):
+        """获取共享客户端上的集合句柄"""
+        return self.get_mongo_database(database, uri, **options)[collection]
+
+    def discard_mongo_client(self, client) -> bool:
+        """移除并关闭不可用的客户端（例如探测失败时）"""
+        with self._lock:
+            for key, entry in list(self._mongo_clients.items()):
+                if entry["client"] is client:
+                    del self._mongo_clients[key]
+                    break
+            else:
+                return False
+        try:
+            client.close()
+        except Exception:
+            pass
+        return True
+
+    # ==================== Redis ====================
+
+    def get_redis_client(self, url: Optional[str] = None, **options):
+        """
+        获取基于共享连接池的Redis客户端
+
+        url为None时使用REDIS_*环境变量；相同参数的调用共享同一个ConnectionPool，
+        redis.Redis 对象本身很轻量，每次调用返回的客户端都复用池中的连接。
+        """
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis未安装")
+        if url is None and "host" not in options:
+            options = {**default_redis_options(), **options}
+
+        key = (url, _freeze(options))
+        with self._lock:
+            entry = self._redis_pools.get(key)
+            if entry is None:
+                pool_options = {"max_connections": self.redis_max_connections, **options}
+                if url:
+                    pool = redis.ConnectionPool.from_url(url, **pool_options)
+                else:
+                    pool = redis.ConnectionPool(**pool_options)
+                label = _mask(url) if url else f"{options.get('host')}:{options.get('port')}/{options.get('db', 0)}"
+                entry = {"pool": pool, "client": redis.Redis(connection_pool=pool), "label": label, "handouts": 0}
+                self._redis_pools[key] = entry
+                logger.info(f"🔌 创建共享Redis连接池: {label} (max_connections={pool_options['max_connections']})")
+            entry["handouts"] += 1
+            return entry["client"]
+
+    # ==================== 统计与关闭 ====================
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取各连接池的使用统计"""
+        with self._lock:
+            mongo_entries = list(self._mongo_clients.values())
+            redis_entries = list(self._redis_pools.values())
+
+        mongodb = []
+        for entry in mongo_entries:
+            stats = {"target": entry["label"], "handouts": entry["handouts"],
+                     "max_pool_size": entry["client"].options.pool_options.max_pool_size}
+            stats.update(entry["listener"].snapshot())
+            mongodb.append(stats)
+
+        redis_stats = []
+        for entry in redis_entries:
+            pool = entry["pool"]
+            redis_stats.append({
+                "target": entry["label"],
+                "handouts": entry["handouts"],
+                "max_connections": pool.max_connections,
+                "created": getattr(pool, "_created_connections", 0),
+                "idle": len(getattr(pool, "_available_connections", [])),
+                "in_use": len(getattr(pool, "_in_use_connections", [])),
+            })
+
+        return {"mongodb": mongodb, "redis": redis_stats}
+
+    def close_all(self):
+        """关闭所有共享连接（进程退出或测试清理时调用）"""
+        with self._lock:
+            mongo_entries = list(self._mongo_clients.values())
+            redis_entries = list(self._redis_pools.values())
+            self._mongo_clients.clear()
+            self._redis_pools.clear()
+
+        for entry in mongo_entries:
+            try:
+                entry["client"].close()
+            except Exception as e:
+                logger.debug(f"关闭MongoDB客户端失败: {e}")
+        for entry in redis_entries:
+            try:
+                entry["pool"].disconnect()
+            except Exception as e:
+                logger.debug(f"关闭Redis连接池失败: {e}")
+
+
+_connection_registry = None
+_connection_registry_lock = threading.Lock()
+
+
+def get_connection_registry() -> ConnectionRegistry:
+    """获取全局数据库连接注册表"""
+    global _connection_registry
+    if _connection_registry is None:
+        with _connection_registry_lock:
+            if _connection_registry is None:
+                _connection_registry = ConnectionRegistry(
+                    mongodb_max_pool_size=parse_int_env("MONGODB_MAX_POOL_SIZE", 50),
+                    mongodb_min_pool_size=parse_int_env("MONGODB_MIN_POOL_SIZE", 0),
+                    redis_max_connections=parse_int_env("REDIS_MAX_CONNECTIONS", 50),
+                )
+    return _connection_registry
@@ -7,9 +7,17 @@
 
 import logging
 import os
+import threading
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 
+
+def get_connection_registry():
+    """按需导入连接注册表（会加载pymongo/redis驱动），导入本模块本身保持轻量"""
+    from .connection_registry import get_connection_registry as _get_registry
+    return _get_registry()
+
+
 class DatabaseManager:
     """智能数据库管理器"""
 
@@ -78,47 +86,66 @@ class DatabaseManager:
     
 
     
+    def _mongodb_connect_kwargs(self) -> Dict[str, Any]:
+        """构建MongoDB连接参数（探测和后续使用共用同一组参数，从而复用同一个客户端）"""
+        connect_kwargs = {
+            "host": self.mongodb_config["host"],
+            "port": self.mongodb_config["port"],
+            "serverSelectionTimeoutMS": self.mongodb_config["timeout"],
+            "connectTimeoutMS": self.mongodb_config["timeout"]
+        }
+
+        # 如果有用户名和密码，添加认证
+        if self.mongodb_config["username"] and self.mongodb_config["password"]:
+            connect_kwargs.update({
+                "username": self.mongodb_config["username"],
+                "password": self.mongodb_config["password"],
+                "authSource": self.mongodb_config["auth_source"]
+            })
+        return connect_kwargs
+
+    def _redis_connect_kwargs(self) -> Dict[str, Any]:
+        """构建Redis连接参数"""
+        connect_kwargs = {
+            "host": self.redis_config["host"],
+            "port": self.redis_config["port"],
+            "db": self.redis_config["db"],
+            "socket_timeout": self.redis_config["timeout"],
+            "socket_connect_timeout": self.redis_config["timeout"]
+        }
+
+        # 如果有密码，添加密码
+        if self.redis_config["password"]:
+            connect_kwargs["password"] = self.redis_config["password"]
+        return connect_kwargs
+
     def _detect_mongodb(self) -> Tuple[bool, str]:
-        """检测MongoDB是否可用"""
+        """检测MongoDB是否可用（探测成功的客户端保留在连接注册表中继续使用）"""
         # 首先检查是否启用
         if not self.mongodb_enabled:
             return False, "MongoDB未启用 (MONGODB_ENABLED=false)"
 
+        client = None
         try:
             import pymongo
-            from pymongo import MongoClient
-
-            # 构建连接参数
-            connect_kwargs = {
-                "host": self.mongodb_config["host"],
-                "port": self.mongodb_config["port"],
-                "serverSelectionTimeoutMS": self.mongodb_config["timeout"],
-                "connectTimeoutMS": self.mongodb_config["timeout"]
-            }
-
-            # 如果有用户名和密码，添加认证
-            if self.mongodb_config["username"] and self.mongodb_config["password"]:
-                connect_kwargs.update({
-                    "username": self.mongodb_config["username"],
-                    "password": self.mongodb_config["password"],
-                    "authSource": self.mongodb_config["auth_source"]
-                })
 
-            client = MongoClient(**connect_kwargs)
+            client = get_connection_registry().get_mongo_client(**self._mongodb_connect_kwargs())
 
             # 测试连接
             client.server_info()
-            client.close()
+            self.mongodb_client = client
 
             return True, "MongoDB连接成功"
 
         except ImportError:
             return False, "pymongo未安装"
         except Exception as e:
+            if client is not None:
+                get_connection_registry().discard_mongo_client(client)
             return False, f"MongoDB连接失败: {str(e)}"
     
     def _detect_redis(self) -> Tuple[bool, str]:
-        """检测Redis是否可用"""
+        """检测Redis是否可用（探测使用的连接归还到共享连接池）"""
         # 首先检查是否启用
         if not self.redis_enabled:
             return False, "Redis未启用 (REDIS_ENABLED=false)"
@@ -126,23 +153,11 @@ class DatabaseManager:
         try:
             import redis
 
-            # 构建连接参数
-            connect_kwargs = {
-                "host": self.redis_config["host"],
-                "port": self.redis_config["port"],
-                "db": self.redis_config["db"],
-                "socket_timeout": self.redis_config["timeout"],
-                "socket_connect_timeout": self.redis_config["timeout"]
-            }
-
-            # 如果有密码，添加密码
-            if self.redis_config["password"]:
-                connect_kwargs["password"] = self.redis_config["password"]
-
-            client = redis.Redis(**connect_kwargs)
+            client = get_connection_registry().get_redis_client(**self._redis_connect_kwargs())
 
             # 测试连接
             client.ping()
+            self.redis_client = client
 
             return True, "Redis连接成功"
 
@@ -189,55 +204,11 @@ class DatabaseManager:
         self.logger.info(f"主要缓存后端: {self.primary_backend}")
     
     def _initialize_connections(self):
-        """初始化数据库连接"""
-        # 初始化MongoDB连接
-        if self.mongodb_available:
-            try:
-                import pymongo
-
-                # 构建连接参数
-                connect_kwargs = {
-                    "host": self.mongodb_config["host"],
-                    "port": self.mongodb_config["port"],
-                    "serverSelectionTimeoutMS": self.mongodb_config["timeout"]
-                }
-
-                # 如果有用户名和密码，添加认证
-                if self.mongodb_config["username"] and self.mongodb_config["password"]:
-                    connect_kwargs.update({
-                        "username": self.mongodb_config["username"],
-                        "password": self.mongodb_config["password"],
-                        "authSource": self.mongodb_config["auth_source"]
-                    })
-
-                self.mongodb_client = pymongo.MongoClient(**connect_kwargs)
-                self.logger.info("MongoDB客户端初始化成功")
-            except Exception as e:
-                self.logger.error(f"MongoDB客户端初始化失败: {e}")
-                self.mongodb_available = False
-
-        # 初始化Redis连接
-        if self.redis_available:
-            try:
-                import redis
-
-                # 构建连接参数
-                connect_kwargs = {
-                    "host": self.redis_config["host"],
-                    "port": self.redis_config["port"],
-                    "db": self.redis_config["db"],
-                    "socket_timeout": self.redis_config["timeout"]
-                }
-
-                # 如果有密码，添加密码
-                if self.redis_config["password"]:
-                    connect_kwargs["password"] = self.redis_config["password"]
-
-                self.redis_client = redis.Redis(**connect_kwargs)
-                self.logger.info("Redis客户端初始化成功")
-            except Exception as e:
-                self.logger.error(f"Redis客户端初始化失败: {e}")
-                self.redis_available = False
+        """初始化数据库连接（复用探测阶段从连接注册表获取的客户端）"""
+        if self.mongodb_available and self.mongodb_client is not None:
+            self.logger.info("MongoDB客户端初始化成功")
+        if self.redis_available and self.redis_client is not None:
+            self.logger.info("Redis客户端初始化成功")
     
     def get_mongodb_client(self):
         """获取MongoDB客户端"""
@@ -250,6 +221,22 @@ class DatabaseManager:
         if self.redis_available and self.redis_client:
             return self.redis_client
         return None
+
+    def get_mongodb_database(self):
+        """获取配置的MongoDB数据库句柄"""
+        client = self.get_mongodb_client()
+        if client is None:
+            return None
+        return client[self.mongodb_config["database"]]
+
+    @property
+    def mongodb_db(self):
+        """配置的MongoDB数据库句柄（兼容旧调用方式）"""
+        return self.get_mongodb_database()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取共享连接池使用统计"""
+        return get_connection_registry().get_pool_stats()
     
     def is_mongodb_available(self) -> bool:
         """检查MongoDB是否可用"""
@@ -332,14 +319,33 @@ class DatabaseManager:
 
 # 全局数据库管理器实例
 _database_manager = None
+_database_manager_lock = threading.Lock()
+_probe_thread: Optional[threading.Thread] = None
 
 def get_database_manager() -> DatabaseManager:
-    """获取全局数据库管理器实例"""
+    """获取全局数据库管理器实例（后台探测进行中时等待探测完成）"""
     global _database_manager
     if _database_manager is None:
-        _database_manager = DatabaseManager()
+        with _database_manager_lock:
+            if _database_manager is None:
+                _database_manager = DatabaseManager()
     return _database_manager
 
+def start_background_probe() -> Optional[threading.Thread]:
+    """
+    在后台线程中创建全局数据库管理器
+
+    MongoDB/Redis不可达时探测要等待连接超时，CLI和Web启动时调用本函数，
+    探测与界面渲染、用户输入并行进行；之后的 get_database_manager() 直接复用结果。
+    """
+    global _probe_thread
+    with _database_manager_lock:
+        if _database_manager is not None or _probe_thread is not None:
+            return _probe_thread
+        _probe_thread = threading.Thread(target=get_database_manager, name="database-probe", daemon=True)
+        _probe_thread.start()
+        return _probe_thread
+
 def is_mongodb_available() -> bool:
     """检查MongoDB是否可用"""
     return get_database_manager().is_mongodb_available()
@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import asdict
 from .config_manager import UsageRecord
+from .connection_registry import get_connection_registry
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -54,7 +55,8 @@ class MongoDBStorage:
     def _connect(self):
         """连接到MongoDB"""
         try:
-            self.client = MongoClient(
+            # 使用进程共享的连接池
+            self.client = get_connection_registry().get_mongo_client(
                 self.connection_string,
                 serverSelectionTimeoutMS=5000  # 5秒超时
             )
@@ -184,7 +186,8 @@ class MongoDBStorage:
                         'total_cost': {'$sum': '$cost'},
                         'total_input_tokens': {'$sum': '$input_tokens'},
                         'total_output_tokens': {'$sum': '$output_tokens'},
-                        'total_requests': {'$sum': 1}
+                        'total_requests': {'$sum': 1},
+                        'cache_hits': {'$sum': {'$cond': [{'$eq': ['$cache_hit', True]}, 1, 0]}}
                     }
                 }
             ]
@@ -198,7 +201,8 @@ class MongoDBStorage:
                     'total_cost': round(stats.get('total_cost', 0), 4),
                     'total_input_tokens': stats.get('total_input_tokens', 0),
                     'total_output_tokens': stats.get('total_output_tokens', 0),
-                    'total_requests': stats.get('total_requests', 0)
+                    'total_requests': stats.get('total_requests', 0),
+                    'cache_hits': stats.get('cache_hits', 0)
                 }
             else:
                 return {
@@ -206,7 +210,8 @@ class MongoDBStorage:
                     'total_cost': 0,
                     'total_input_tokens': 0,
                     'total_output_tokens': 0,
-                    'total_requests': 0
+                    'total_requests': 0,
+                    'cache_hits': 0
                 }
                 
         except Exception as e:
@@ -283,8 +288,8 @@ class MongoDBStorage:
             return 0
     
     def close(self):
-        """关闭MongoDB连接"""
+        """释放MongoDB连接（共享客户端由连接注册表统一关闭）"""
         if self.client:
-            self.client.close()
+            self.client = None
             self._connected = False
-            logger.info(f"MongoDB连接已关闭")
\ No newline at end of file
+            logger.info(f"MongoDB连接已释放")
\ No newline at end of file
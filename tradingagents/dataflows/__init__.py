@@ -1,65 +1,22 @@
-# 导入基础模块
-from .finnhub_utils import get_data_in_range
-from .googlenews_utils import getNewsData
-from .reddit_utils import fetch_top_from_category
+# 数据流模块按需导入（PEP 562）：
+# 导入本包或其中某个子模块时不再加载 interface 及 yfinance/stockstats/finnhub 等依赖，
+# 首次访问下列名称时才导入对应子模块
+
+import importlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
-# 尝试导入yfinance相关模块，如果失败则跳过
-try:
-    from .yfin_utils import YFinanceUtils
-    YFINANCE_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ yfinance模块不可用: {e}")
-    YFinanceUtils = None
-    YFINANCE_AVAILABLE = False
-
-try:
-    from .stockstats_utils import StockstatsUtils
-    STOCKSTATS_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ stockstats模块不可用: {e}")
-    StockstatsUtils = None
-    STOCKSTATS_AVAILABLE = False
-
-from .interface import (
-
-    # News and sentiment functions
-    get_finnhub_news,
-    get_finnhub_company_insider_sentiment,
-    get_finnhub_company_insider_transactions,
-    get_google_news,
-    get_reddit_global_news,
-    get_reddit_company_news,
-    # Financial statements functions
-    get_simfin_balance_sheet,
-    get_simfin_cashflow,
-    get_simfin_income_statements,
-    # Technical analysis functions
-    get_stock_stats_indicators_window,
-    get_stockstats_indicator,
-    # Market data functions
-    get_YFin_data_window,
-    get_YFin_data,
-    # Tushare data functions
-    get_china_stock_data_tushare,
-    search_china_stocks_tushare,
-    get_china_stock_fundamentals_tushare,
-    get_china_stock_info_tushare,
-    # Unified China data functions (recommended)
-    get_china_stock_data_unified,
-    get_china_stock_info_unified,
-    switch_china_data_source,
-    get_current_china_data_source,
-    # Hong Kong stock functions
-    get_hk_stock_data_unified,
-    get_hk_stock_info_unified,
-    get_stock_data_by_market,
-)
+# 名称 -> 所在子模块
+_LAZY_ATTRS = {
+    # 基础模块
+    "get_data_in_range": "finnhub_utils",
+    "getNewsData": "googlenews_utils",
+    "fetch_top_from_category": "reddit_utils",
+}
 
-__all__ = [
+_INTERFACE_FUNCTIONS = [
     # News and sentiment functions
     "get_finnhub_news",
     "get_finnhub_company_insider_sentiment",
@@ -82,7 +39,7 @@ __all__ = [
     "search_china_stocks_tushare",
     "get_china_stock_fundamentals_tushare",
     "get_china_stock_info_tushare",
-    # Unified China data functions
+    # Unified China data functions (recommended)
     "get_china_stock_data_unified",
     "get_china_stock_info_unified",
     "switch_china_data_source",
@@ -92,3 +49,45 @@ __all__ = [
     "get_hk_stock_info_unified",
     "get_stock_data_by_market",
 ]
+_LAZY_ATTRS.update({name: "interface" for name in _INTERFACE_FUNCTIONS})
+
+# 可选依赖：名称 -> (子模块, 类名, 可用标志)
+_OPTIONAL_ATTRS = {
+    "YFinanceUtils": ("yfin_utils", "YFinanceUtils", "YFINANCE_AVAILABLE"),
+    "StockstatsUtils": ("stockstats_utils", "StockstatsUtils", "STOCKSTATS_AVAILABLE"),
+}
+_OPTIONAL_FLAGS = {flag: name for name, (_, _, flag) in _OPTIONAL_ATTRS.items()}
+
+__all__ = list(_INTERFACE_FUNCTIONS)
+
+
+def _load_optional(name):
+    """导入可选依赖模块，失败时与原先一样记录警告并把类设为None"""
+    module_name, attr, flag = _OPTIONAL_ATTRS[name]
+    try:
+        value = getattr(importlib.import_module(f".{module_name}", __name__), attr)
+        available = True
+    except ImportError as e:
+        logger.warning(f"⚠️ {module_name}模块不可用: {e}")
+        value = None
+        available = False
+    globals()[name] = value
+    globals()[flag] = available
+    return value
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(f".{_LAZY_ATTRS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    if name in _OPTIONAL_ATTRS:
+        return _load_optional(name)
+    if name in _OPTIONAL_FLAGS:
+        _load_optional(_OPTIONAL_FLAGS[name])
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | set(_OPTIONAL_ATTRS) | set(_OPTIONAL_FLAGS))
@@ -15,6 +15,7 @@ from typing import Any, Dict, Optional, Union
 import pandas as pd
 
 from ..config.database_manager import get_database_manager
+from ..utils.tracing import SpanKind, traced
 
 class AdaptiveCacheSystem:
     """自适应缓存系统"""
@@ -268,6 +269,7 @@ class AdaptiveCacheSystem:
         
         return cache_key
     
+    @traced("cache:load_data", SpanKind.CACHE)
     def load_data(self, cache_key: str) -> Optional[Any]:
         """从缓存加载数据"""
         cache_data = None
@@ -300,6 +302,7 @@ class AdaptiveCacheSystem:
         
         return cache_data['data']
     
+    @traced("cache:find_cached_data", SpanKind.CACHE)
     def find_cached_data(self, symbol: str, start_date: str = "", end_date: str = "", 
                         data_source: str = "default", data_type: str = "stock_data") -> Optional[str]:
         """查找缓存的数据"""
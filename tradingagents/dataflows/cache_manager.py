@@ -15,6 +15,7 @@ import hashlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.tracing import SpanKind, traced
 logger = get_logger('agents')
 
 
@@ -331,6 +332,7 @@ class StockDataCache:
         logger.info(f"💾 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
+    @traced("cache:load_stock_data", SpanKind.CACHE)
     def load_stock_data(self, cache_key: str) -> Optional[Union[pd.DataFrame, str]]:
         """从缓存加载股票数据"""
         metadata = self._load_metadata(cache_key)
@@ -351,6 +353,7 @@ class StockDataCache:
             logger.error(f"⚠️ 加载缓存数据失败: {e}")
             return None
     
+    @traced("cache:find_cached_stock_data", SpanKind.CACHE)
     def find_cached_stock_data(self, symbol: str, start_date: str = None,
                               end_date: str = None, data_source: str = None,
                               max_age_hours: int = None) -> Optional[str]:
@@ -491,6 +494,7 @@ class StockDataCache:
         logger.info(f"💼 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
+    @traced("cache:load_fundamentals_data", SpanKind.CACHE)
     def load_fundamentals_data(self, cache_key: str) -> Optional[str]:
         """从缓存加载基本面数据"""
         metadata = self._load_metadata(cache_key)
@@ -508,6 +512,7 @@ class StockDataCache:
             logger.error(f"⚠️ 加载基本面缓存数据失败: {e}")
             return None
     
+    @traced("cache:find_cached_fundamentals_data", SpanKind.CACHE)
     def find_cached_fundamentals_data(self, symbol: str, data_source: str = None,
                                     max_age_hours: int = None) -> Optional[str]:
         """
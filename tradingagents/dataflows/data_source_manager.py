@@ -20,6 +20,9 @@ warnings.filterwarnings('ignore')
 from tradingagents.utils.logging_init import setup_dataflow_logging
 logger = setup_dataflow_logging()
 
+from .data_source_router import DataSourceError, FetchResult, NoDataError, get_data_source_router
+from .technical_indicators import format_indicator_summary, get_technical_indicators
+
 
 class ChinaDataSource(Enum):
     """中国股票数据源枚举"""
@@ -40,6 +43,7 @@ class DataSourceManager:
         self.default_source = self._get_default_source()
         self.available_sources = self._check_available_sources()
         self.current_source = self.default_source
+        self.router = get_data_source_router()
 
         logger.info(f"📊 数据源管理器初始化完成")
         logger.info(f"   默认数据源: {self.default_source.value}")
@@ -322,76 +326,53 @@ class DataSourceManager:
         logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
         logger.info(f"🔍 [股票代码追踪] 当前数据源: {self.current_source.value}")
 
-        start_time = time.time()
-
-        try:
-            # 根据数据源调用相应的获取方法
-            if self.current_source == ChinaDataSource.TUSHARE:
-                logger.info(f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}'")
-                result = self._get_tushare_data(symbol, start_date, end_date)
-            elif self.current_source == ChinaDataSource.AKSHARE:
-                result = self._get_akshare_data(symbol, start_date, end_date)
-            elif self.current_source == ChinaDataSource.BAOSTOCK:
-                result = self._get_baostock_data(symbol, start_date, end_date)
-            elif self.current_source == ChinaDataSource.TDX:
-                result = self._get_tdx_data(symbol, start_date, end_date)
-            else:
-                result = f"❌ 不支持的数据源: {self.current_source.value}"
-
-            # 记录详细的输出结果
-            duration = time.time() - start_time
-            result_length = len(result) if result else 0
-            is_success = result and "❌" not in result and "错误" not in result
-
-            if is_success:
-                logger.info(f"✅ [数据获取] 成功获取股票数据",
-                           extra={
-                               'symbol': symbol,
-                               'start_date': start_date,
-                               'end_date': end_date,
-                               'data_source': self.current_source.value,
-                               'duration': duration,
-                               'result_length': result_length,
-                               'result_preview': result[:200] + '...' if result_length > 200 else result,
-                               'event_type': 'data_fetch_success'
-                           })
-                return result
-            else:
-                logger.warning(f"⚠️ [数据获取] 数据质量异常，尝试降级到其他数据源",
-                              extra={
-                                  'symbol': symbol,
-                                  'start_date': start_date,
-                                  'end_date': end_date,
-                                  'data_source': self.current_source.value,
-                                  'duration': duration,
-                                  'result_length': result_length,
-                                  'result_preview': result[:200] + '...' if result_length > 200 else result,
-                                  'event_type': 'data_fetch_warning'
-                              })
-
-                # 数据质量异常时也尝试降级到其他数据源
-                fallback_result = self._try_fallback_sources(symbol, start_date, end_date)
-                if fallback_result and "❌" not in fallback_result and "错误" not in fallback_result:
-                    logger.info(f"✅ [数据获取] 降级成功获取数据")
-                    return fallback_result
-                else:
-                    logger.error(f"❌ [数据获取] 所有数据源都无法获取有效数据")
-                    return result  # 返回原始结果（包含错误信息）
+        # 按健康度路由：当前数据源优先，熔断中的数据源直接跳过
+        result = self._try_fallback_sources(symbol, start_date, end_date, include_current=True)
+
+        if result.success:
+            result_length = len(result.data)
+            logger.info(f"✅ [数据获取] 成功获取股票数据",
+                       extra={
+                           'symbol': symbol,
+                           'start_date': start_date,
+                           'end_date': end_date,
+                           'data_source': result.source,
+                           'duration': result.duration,
+                           'hedged': result.hedged,
+                           'result_length': result_length,
+                           'result_preview': result.data[:200] + '...' if result_length > 200 else result.data,
+                           'event_type': 'data_fetch_success'
+                       })
+            return result.data
+
+        logger.error(f"❌ [数据获取] 所有数据源都无法获取有效数据",
+                    extra={
+                        'symbol': symbol,
+                        'start_date': start_date,
+                        'end_date': end_date,
+                        'data_source': self.current_source.value,
+                        'error': result.error,
+                        'event_type': 'data_fetch_failed'
+                    })
+        return f"❌ 所有数据源都无法获取{symbol}的数据: {result.error}"
+
+    def _fetch_source_data(self, source: ChinaDataSource, symbol: str, start_date: str, end_date: str) -> str:
+        """调用指定数据源获取格式化数据，失败时抛出DataSourceError"""
+        if source == ChinaDataSource.TUSHARE:
+            logger.info(f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}'")
+            return self._get_tushare_data(symbol, start_date, end_date)
+        elif source == ChinaDataSource.AKSHARE:
+            return self._get_akshare_data(symbol, start_date, end_date)
+        elif source == ChinaDataSource.BAOSTOCK:
+            return self._get_baostock_data(symbol, start_date, end_date)
+        elif source == ChinaDataSource.TDX:
+            return self._get_tdx_data(symbol, start_date, end_date)
+        raise DataSourceError(f"不支持的数据源: {source.value}")
+
+    def get_source_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各数据源的延迟、错误率和熔断状态"""
+        return self.router.get_stats()
 
-        except Exception as e:
-            duration = time.time() - start_time
-            logger.error(f"❌ [数据获取] 异常失败: {e}",
-                        extra={
-                            'symbol': symbol,
-                            'start_date': start_date,
-                            'end_date': end_date,
-                            'data_source': self.current_source.value,
-                            'duration': duration,
-                            'error': str(e),
-                            'event_type': 'data_fetch_exception'
-                        }, exc_info=True)
-            return self._try_fallback_sources(symbol, start_date, end_date)
-    
     def _get_tushare_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用Tushare获取数据 - 直接调用适配器，避免循环调用"""
         logger.debug(f"📊 [Tushare] 调用参数: symbol={symbol}, start_date={start_date}, end_date={end_date}")
@@ -442,19 +423,18 @@ class DataSourceManager:
                 volume_value = self._get_volume_safely(data)
                 result += f"   成交量: {volume_value:,.0f}股\n"
 
+                indicator_summary = format_indicator_summary(
+                    get_technical_indicators(data, key=("tushare", symbol)).latest(), currency="¥")
+                if indicator_summary:
+                    result += f"\n🔍 技术指标:\n{indicator_summary}\n"
+
                 return result
             else:
-                result = f"❌ 未获取到{symbol}的有效数据"
-
-            duration = time.time() - start_time
-            logger.info(f"🔍 [DataSourceManager详细日志] interface调用完成，耗时: {duration:.3f}秒")
-            logger.info(f"🔍 [股票代码追踪] get_china_stock_data_tushare 返回结果前200字符: {result[:200] if result else 'None'}")
-            logger.info(f"🔍 [DataSourceManager详细日志] 返回结果类型: {type(result)}")
-            logger.info(f"🔍 [DataSourceManager详细日志] 返回结果长度: {len(result) if result else 0}")
-
-            logger.debug(f"📊 [Tushare] 调用完成: 耗时={duration:.2f}s, 结果长度={len(result) if result else 0}")
-
-            return result
+                duration = time.time() - start_time
+                logger.warning(f"⚠️ [Tushare] 数据为空: 耗时={duration:.2f}s")
+                raise NoDataError(f"未获取到{symbol}的有效数据")
+        except DataSourceError:
+            raise
         except Exception as e:
             duration = time.time() - start_time
             logger.error(f"❌ [Tushare] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
@@ -462,7 +442,7 @@ class DataSourceManager:
             logger.error(f"❌ [DataSourceManager详细日志] 异常信息: {str(e)}")
             import traceback
             logger.error(f"❌ [DataSourceManager详细日志] 异常堆栈: {traceback.format_exc()}")
-            raise
+            raise DataSourceError(f"Tushare获取{symbol}数据失败: {e}") from e
     
     def _get_akshare_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用AKShare获取数据"""
@@ -511,14 +491,15 @@ class DataSourceManager:
                 logger.debug(f"📊 [AKShare] 调用成功: 耗时={duration:.2f}s, 数据条数={len(data)}, 结果长度={len(result)}")
                 return result
             else:
-                result = f"❌ 未能获取{symbol}的股票数据"
                 logger.warning(f"⚠️ [AKShare] 数据为空: 耗时={duration:.2f}s")
-                return result
+                raise NoDataError(f"未能获取{symbol}的股票数据")
 
+        except DataSourceError:
+            raise
         except Exception as e:
             duration = time.time() - start_time
             logger.error(f"❌ [AKShare] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
-            return f"❌ AKShare获取{symbol}数据失败: {e}"
+            raise DataSourceError(f"AKShare获取{symbol}数据失败: {e}") from e
     
     def _get_baostock_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用BaoStock获取数据"""
@@ -544,13 +525,21 @@ class DataSourceManager:
                 result += data.tail(display_rows).to_string(index=False)
             return result
         else:
-            return f"❌ 未能获取{symbol}的股票数据"
+            raise NoDataError(f"未能获取{symbol}的股票数据")
     
     def _get_tdx_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用TDX获取数据 (已弃用)"""
         logger.warning(f"⚠️ 警告: 正在使用已弃用的TDX数据源")
         from .tdx_utils import get_china_stock_data
-        return get_china_stock_data(symbol, start_date, end_date)
+        result = get_china_stock_data(symbol, start_date, end_date)
+        # 旧版TDX接口只返回字符串，错误信息以"❌"开头；"未能获取"表示该股票无数据而非接口故障
+        if not result:
+            raise NoDataError(f"未能获取{symbol}的股票数据")
+        if result.lstrip().startswith("❌"):
+            if "未能获取" in result[:50]:
+                raise NoDataError(result)
+            raise DataSourceError(result)
+        return result
     
     def _get_volume_safely(self, data) -> float:
         """安全地获取成交量数据，支持多种列名"""
@@ -571,10 +560,14 @@ class DataSourceManager:
             logger.error(f"❌ 获取成交量失败: {e}")
             return 0
 
-    def _try_fallback_sources(self, symbol: str, start_date: str, end_date: str) -> str:
-        """尝试备用数据源 - 避免递归调用"""
-        logger.error(f"🔄 {self.current_source.value}失败，尝试备用数据源...")
+    def _try_fallback_sources(self, symbol: str, start_date: str, end_date: str,
+                              include_current: bool = False) -> FetchResult:
+        """
+        按健康度在数据源之间路由，返回结构化结果
 
+        include_current为True时当前数据源作为首选一并参与路由，否则只尝试备用数据源。
+        下面的静态优先级只在健康度相同时决定顺序，熔断中的数据源不会被调用。
+        """
         # 备用数据源优先级: AKShare > Tushare > BaoStock > TDX
         fallback_order = [
             ChinaDataSource.AKSHARE,
@@ -583,36 +576,18 @@ class DataSourceManager:
             ChinaDataSource.TDX
         ]
 
-        for source in fallback_order:
-            if source != self.current_source and source in self.available_sources:
-                try:
-                    logger.info(f"🔄 尝试备用数据源: {source.value}")
-
-                    # 直接调用具体的数据源方法，避免递归
-                    if source == ChinaDataSource.TUSHARE:
-                        result = self._get_tushare_data(symbol, start_date, end_date)
-                    elif source == ChinaDataSource.AKSHARE:
-                        result = self._get_akshare_data(symbol, start_date, end_date)
-                    elif source == ChinaDataSource.BAOSTOCK:
-                        result = self._get_baostock_data(symbol, start_date, end_date)
-                    elif source == ChinaDataSource.TDX:
-                        result = self._get_tdx_data(symbol, start_date, end_date)
-                    else:
-                        logger.warning(f"⚠️ 未知数据源: {source.value}")
-                        continue
+        candidates = [self.current_source] if include_current else []
+        candidates += [source for source in fallback_order
+                       if source != self.current_source and source in self.available_sources]
 
-                    if "❌" not in result:
-                        logger.info(f"✅ 备用数据源{source.value}获取成功")
-                        return result
-                    else:
-                        logger.warning(f"⚠️ 备用数据源{source.value}返回错误结果")
+        result = self.router.fetch(
+            [source.value for source in candidates],
+            lambda source: self._fetch_source_data(ChinaDataSource(source), symbol, start_date, end_date)
+        )
+        if result.success and result.source != self.current_source.value:
+            logger.info(f"✅ 备用数据源{result.source}获取成功")
+        return result
 
-                except Exception as e:
-                    logger.error(f"❌ 备用数据源{source.value}也失败: {e}")
-                    continue
-        
-        return f"❌ 所有数据源都无法获取{symbol}的数据"
-    
     def get_stock_info(self, symbol: str) -> Dict:
         """获取股票基本信息，支持降级机制"""
         logger.info(f"📊 [股票信息] 开始获取{symbol}基本信息...")
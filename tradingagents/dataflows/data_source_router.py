@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+数据源路由器
+按各数据源的滚动延迟和错误统计排序候选数据源，连续失败后熔断，
+并可在首选数据源超过其P95延迟时向下一个数据源发送对冲请求。
+
+数据源调用结果使用结构化的 FetchResult 表示，失败通过 DataSourceError 异常传递，
+不再依赖在返回字符串中查找"❌"等标记；NoDataError 表示数据源正常但该股票无数据，不触发熔断。
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from tradingagents.config.env_utils import parse_bool_env, parse_float_env, parse_int_env
+from tradingagents.utils.tracing import SpanKind, trace_span
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class DataSourceError(Exception):
+    """数据源未返回有效数据"""
+
+
+class NoDataError(DataSourceError):
+    """数据源正常响应，但该股票在请求区间内没有数据（停牌、代码无效、尚未上市等）
+
+    路由器会继续尝试其他数据源，但不计入熔断失败：少数无数据的股票不应熔断整个数据源。
+    """
+
+
+@dataclass
+class FetchResult:
+    """一次数据源路由调用的结果"""
+    source: Optional[str]
+    success: bool
+    data: Optional[str] = None
+    error: Optional[str] = None
+    duration: float = 0.0
+    hedged: bool = False
+
+    @classmethod
+    def ok(cls, source: str, data: str, duration: float) -> "FetchResult":
+        return cls(source=source, success=True, data=data, duration=duration)
+
+    @classmethod
+    def fail(cls, source: Optional[str], error: str, duration: float = 0.0) -> "FetchResult":
+        return cls(source=source, success=False, error=error, duration=duration)
+
+
+class CircuitState:
+    """熔断器状态"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class SourceHealth:
+    """单个数据源的滚动延迟/错误统计和熔断器"""
+
+    def __init__(self, window: int = 50, failure_threshold: int = 3, recovery_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._samples = deque(maxlen=window)  # (耗时, 是否成功)
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def record(self, duration: float, success: bool):
+        """记录一次调用结果，更新熔断器状态"""
+        with self._lock:
+            self._samples.append((duration, success))
+            self._probe_in_flight = False
+            if success:
+                self.consecutive_failures = 0
+                self.state = CircuitState.CLOSED
+                return
+
+            self.consecutive_failures += 1
+            if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = CircuitState.OPEN
+                self.opened_at = time.time()
+
+    def allow_request(self) -> bool:
+        """熔断打开期间拒绝请求；超过恢复时间后进入半开状态，只放行一个探测请求"""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.OPEN:
+                if time.time() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = CircuitState.HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def is_available(self) -> bool:
+        """不改变状态地判断当前是否可能放行请求（用于排序）"""
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                return time.time() - self.opened_at >= self.recovery_timeout
+            return not (self.state == CircuitState.HALF_OPEN and self._probe_in_flight)
+
+    def _latencies(self) -> List[float]:
+        return sorted(duration for duration, success in self._samples if success)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            latencies = self._latencies()
+        if not latencies:
+            return None
+        return latencies[int(q * (len(latencies) - 1))]
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._samples)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, success in self._samples if not success) / len(self._samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "state": self.state,
+            "samples": self.sample_count,
+            "error_rate": round(self.error_rate, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class DataSourceRouter:
+    """按健康度路由数据源请求"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 60.0,
+        window: int = 50,
+        slow_threshold: float = 10.0,
+        hedge_enabled: bool = False,
+        hedge_min_samples: int = 10,
+        hedge_min_delay: float = 1.0,
+        max_workers: int = 4,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.window = window
+        self.slow_threshold = slow_threshold
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._health: Dict[str, SourceHealth] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="data-source") \
+            if hedge_enabled else None
+
+    def health(self, source: str) -> SourceHealth:
+        with self._lock:
+            if source not in self._health:
+                self._health[source] = SourceHealth(self.window, self.failure_threshold, self.recovery_timeout)
+            return self._health[source]
+
+    def rank(self, candidates: List[str]) -> List[str]:
+        """
+        按健康度排序候选数据源，熔断中的数据源被排除
+
+        排序依据：熔断状态（半开探测排在后面）、错误率（按10%分档）、P95是否超过慢阈值，
+        健康度相同时保持调用方给出的优先级顺序。
+        """
+        ranked = []
+        for priority, source in enumerate(candidates):
+            health = self.health(source)
+            if not health.is_available():
+                logger.debug(f"⛔ 数据源{source}熔断中，跳过")
+                continue
+            p95 = health.percentile(0.95)
+            slow = p95 is not None and p95 > self.slow_threshold
+            key = (health.state != CircuitState.CLOSED, round(health.error_rate, 1), slow, priority)
+            ranked.append((key, source))
+        return [source for _, source in sorted(ranked)]
+
+    def fetch(self, candidates: List[str], fetcher: Callable[[str], str]) -> FetchResult:
+        """
+        依次尝试排序后的数据源，返回第一个成功结果
+
+        fetcher(source) 返回格式化数据，失败时抛出异常（通常为 DataSourceError）。
+        """
+        ordered = self.rank(candidates)
+        if not ordered:
+            return FetchResult.fail(None, "所有数据源均处于熔断状态")
+
+        errors = []
+        index = 0
+        while index < len(ordered):
+            primary = ordered[index]
+            backup = ordered[index + 1] if index + 1 < len(ordered) else None
+            hedge_delay = self._hedge_delay(primary) if backup else None
+
+            if hedge_delay is None:
+                result = self._call(primary, fetcher)
+                index += 1
+            else:
+                result, used = self._call_hedged(primary, backup, hedge_delay, fetcher)
+                index += used
+
+            if result.success:
+                return result
+            errors.append(f"{result.source}: {result.error}")
+
+        return FetchResult.fail(None, "; ".join(errors))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各数据源的健康统计"""
+        with self._lock:
+            sources = list(self._health.items())
+        return {source: health.snapshot() for source, health in sources}
+
+    # ==================== 内部方法 ====================
+
+    def _call(self, source: str, fetcher: Callable[[str], str]) -> FetchResult:
+        health = self.health(source)
+        if not health.allow_request():
+            return FetchResult.fail(source, "熔断中")
+
+        start_time = time.time()
+        with trace_span(f"data_source:{source}", SpanKind.DATA_SOURCE, source=source) as span:
+            try:
+                data = fetcher(source)
+                if not data:
+                    raise DataSourceError("返回空结果")
+            except NoDataError as e:
+                # 数据源本身可用，记为健康响应
+                if span is not None:
+                    span.attributes["no_data"] = True
+                duration = time.time() - start_time
+                health.record(duration, True)
+                return FetchResult.fail(source, str(e), duration)
+            except Exception as e:
+                if span is not None:
+                    span.error = str(e)
+                duration = time.time() - start_time
+                health.record(duration, False)
+                if health.state == CircuitState.OPEN:
+                    logger.warning(f"⛔ 数据源{source}熔断打开，{self.recovery_timeout:.0f}秒后重新探测")
+                return FetchResult.fail(source, str(e), duration)
+
+        duration = time.time() - start_time
+        health.record(duration, True)
+        return FetchResult.ok(source, data, duration)
+
+    def _hedge_delay(self, source: str) -> Optional[float]:
+        """首选数据源样本足够时，以其P95延迟作为对冲等待时间"""
+        if not self.hedge_enabled:
+            return None
+        health = self.health(source)
+        if health.sample_count < self.hedge_min_samples:
+            return None
+        p95 = health.percentile(0.95)
+        return max(p95, self.hedge_min_delay) if p95 is not None else None
+
+    def _call_hedged(self, primary: str, backup: str, delay: float,
+                     fetcher: Callable[[str], str]):
+        """首选请求超过delay未返回时并发请求备用数据源，返回 (结果, 已消耗的候选数)"""
+        # 在调用方上下文中执行，使追踪span挂在当前分析下
+        primary_future = self._executor.submit(contextvars.copy_context().run, self._call, primary, fetcher)
+        done, _ = wait([primary_future], timeout=delay)
+        if done:
+            return primary_future.result(), 1
+
+        logger.info(f"🔀 数据源{primary}超过P95延迟({delay:.2f}s)，对冲请求{backup}")
+        backup_future = self._executor.submit(contextvars.copy_context().run, self._call, backup, fetcher)
+        pending = {primary_future, backup_future}
+        failures = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result.success:
+                    result.hedged = True
+                    return result, 2
+                failures.append(f"{result.source}: {result.error}")
+
+        return FetchResult.fail(primary, "; ".join(failures)), 2
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_data_source_router() -> DataSourceRouter:
+    """获取全局数据源路由器实例"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = DataSourceRouter(
+                    failure_threshold=parse_int_env("DATA_SOURCE_CIRCUIT_FAILURES", 3),
+                    recovery_timeout=parse_float_env("DATA_SOURCE_CIRCUIT_RECOVERY_SECONDS", 60.0),
+                    slow_threshold=parse_float_env("DATA_SOURCE_SLOW_THRESHOLD_SECONDS", 10.0),
+                    hedge_enabled=parse_bool_env("DATA_SOURCE_HEDGE_ENABLED", False),
+                    hedge_min_samples=parse_int_env("DATA_SOURCE_HEDGE_MIN_SAMPLES", 10),
+                )
+    return _router
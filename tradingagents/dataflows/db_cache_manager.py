@@ -16,23 +16,11 @@ import pandas as pd
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
-# MongoDB
-try:
-    from pymongo import MongoClient
-    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-    MONGODB_AVAILABLE = True
-except ImportError:
-    MONGODB_AVAILABLE = False
-    logger.warning(f"⚠️ pymongo 未安装，MongoDB功能不可用")
-
-# Redis
-try:
-    import redis
-    from redis.exceptions import ConnectionError as RedisConnectionError
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
-    logger.warning(f"⚠️ redis 未安装，Redis功能不可用")
+from tradingagents.config.connection_registry import (
+    MONGODB_AVAILABLE,
+    REDIS_AVAILABLE,
+    get_connection_registry,
+)
 
 
 class DatabaseCacheManager:
@@ -81,7 +69,7 @@ class DatabaseCacheManager:
             return
         
         try:
-            self.mongodb_client = MongoClient(
+            self.mongodb_client = get_connection_registry().get_mongo_client(
                 self.mongodb_url,
                 serverSelectionTimeoutMS=5000,  # 5秒超时
                 connectTimeoutMS=5000
@@ -106,7 +94,7 @@ class DatabaseCacheManager:
             return
         
         try:
-            self.redis_client = redis.from_url(
+            self.redis_client = get_connection_registry().get_redis_client(
                 self.redis_url,
                 db=self.redis_db,
                 socket_timeout=5,
@@ -512,14 +500,15 @@ class DatabaseCacheManager:
         return cleared_count
 
     def close(self):
-        """关闭数据库连接"""
+        """释放数据库连接（共享连接池由连接注册表统一关闭）"""
         if self.mongodb_client:
-            self.mongodb_client.close()
-            logger.info(f"🔒 MongoDB连接已关闭")
+            self.mongodb_client = None
+            self.mongodb_db = None
+            logger.info(f"🔒 MongoDB连接已释放")
 
         if self.redis_client:
-            self.redis_client.close()
-            logger.info(f"🔒 Redis连接已关闭")
+            self.redis_client = None
+            logger.info(f"🔒 Redis连接已释放")
 
 
 # 全局数据库缓存实例
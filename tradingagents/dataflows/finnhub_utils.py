@@ -1,11 +1,184 @@
+import bisect
 import json
+import mmap
 import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
 
+# ==================== 离线数据的内存映射索引 ====================
+# {ticker}_data_formatted.json 是 {日期: 记录列表} 的大字典，原先每次工具调用都要整体
+# json.load 再逐个比较日期。这里首次访问时转换为紧凑的二进制索引：
+#
+#   文件头      magic, 版本, 条目数, 日期宽度, 源文件大小, 源文件修改时间
+#   日期表      按日期升序的定长条目 (日期, 原文件中的顺序, 记录偏移, 记录长度)
+#   记录区      每个日期的记录列表（JSON）
+#
+# 索引文件以只读方式内存映射，区间查询只需在日期表上二分查找、再解码命中的记录；
+# 多个进程映射同一文件时共享操作系统页缓存。源JSON大小或修改时间变化后自动重建。
+
+FINNHUB_INDEX_DIR = "_index"
+FINNHUB_INDEX_MAGIC = b"FHIX"
+FINNHUB_INDEX_VERSION = 1
+FINNHUB_INDEX_CACHE_SIZE = 32
+_HEADER = struct.Struct("<4sIIIQQ")
+
+
+def finnhub_index_path(data_path: str) -> str:
+    """源JSON对应的索引文件：finnhub_data/_index/<数据类型>/<文件名>.fidx"""
+    data_type_dir, file_name = os.path.split(os.path.abspath(data_path))
+    finnhub_dir, data_type = os.path.split(data_type_dir)
+    return os.path.join(finnhub_dir, FINNHUB_INDEX_DIR, data_type, os.path.splitext(file_name)[0] + ".fidx")
+
+
+def _entry_struct(key_width: int) -> struct.Struct:
+    return struct.Struct(f"<{key_width}sIQI")
+
+
+class _KeyView:
+    """日期表中日期列的只读序列视图，供 bisect 在映射内存上直接二分查找"""
+
+    def __init__(self, index: "FinnhubIndex"):
+        self._index = index
+
+    def __len__(self):
+        return self._index.count
+
+    def __getitem__(self, position):
+        offset = self._index.table_offset + position * self._index.entry.size
+        return self._index.buffer[offset:offset + self._index.key_width]
+
+
+class FinnhubIndex:
+    """单个Finnhub数据文件的内存映射索引"""
+
+    def __init__(self, path: str, buffer):
+        self.path = path
+        self.buffer = buffer
+        magic, version, self.count, self.key_width, self.source_size, self.source_mtime_ns = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != FINNHUB_INDEX_MAGIC or version != FINNHUB_INDEX_VERSION:
+            raise ValueError(f"不支持的Finnhub索引格式: {path}")
+        self.entry = _entry_struct(self.key_width)
+        self.table_offset = _HEADER.size
+        self.blob_offset = self.table_offset + self.count * self.entry.size
+        self._keys = _KeyView(self)
+
+    @classmethod
+    def open(cls, path: str) -> Optional["FinnhubIndex"]:
+        """映射已有的索引文件，不存在或格式不符时返回None"""
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            return cls(path, buffer)
+        except (struct.error, ValueError):
+            buffer.close()
+            return None
+
+    @staticmethod
+    def serialize(data: Dict[str, Any], source_size: int = 0, source_mtime_ns: int = 0) -> bytes:
+        """把 {日期: 记录列表} 编码为索引文件内容（空记录与原先的过滤一致，直接丢弃）"""
+        items = [(key.encode("utf-8"), ordinal, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+                 for ordinal, (key, value) in enumerate(data.items()) if len(value) > 0]
+        items.sort()
+        key_width = max((len(key) for key, _, _ in items), default=0)
+        entry = _entry_struct(key_width)
+
+        parts = [_HEADER.pack(FINNHUB_INDEX_MAGIC, FINNHUB_INDEX_VERSION, len(items), key_width,
+                              source_size, source_mtime_ns)]
+        offset = 0
+        for key, ordinal, record in items:
+            # 日期以\0右补齐到定长，补齐后的字节序与原字符串比较一致
+            parts.append(entry.pack(key, ordinal, offset, len(record)))
+            offset += len(record)
+        parts.extend(record for _, _, record in items)
+        return b"".join(parts)
+
+    def is_stale(self, data_path: str) -> bool:
+        """源JSON存在且大小或修改时间与建索引时不同"""
+        try:
+            stat = os.stat(data_path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) != (self.source_size, self.source_mtime_ns)
+
+    def _bound(self, date: str) -> bytes:
+        return date.encode("utf-8").ljust(self.key_width, b"\0")
+
+    def range(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        """start_date <= 日期 <= end_date 的非空记录，保持原文件中的顺序"""
+        first = bisect.bisect_left(self._keys, self._bound(start_date))
+        last = bisect.bisect_right(self._keys, self._bound(end_date))
+        hits = []
+        for position in range(first, last):
+            key, ordinal, offset, length = self.entry.unpack_from(
+                self.buffer, self.table_offset + position * self.entry.size)
+            start = self.blob_offset + offset
+            hits.append((ordinal, key.rstrip(b"\0").decode("utf-8"), self.buffer[start:start + length]))
+        hits.sort()
+        return {key: json.loads(record) for _, key, record in hits}
+
+
+_indexes: "OrderedDict[str, FinnhubIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def build_finnhub_index(data_path: str) -> FinnhubIndex:
+    """解析源JSON并写入索引文件；索引目录不可写时返回内存中的索引"""
+    stat = os.stat(data_path)
+    with open(data_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    payload = FinnhubIndex.serialize(data, stat.st_size, stat.st_mtime_ns)
+
+    index_path = finnhub_index_path(data_path)
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".fidx.", suffix=".tmp", dir=os.path.dirname(index_path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"⚠️ Finnhub索引写入失败，本进程内使用内存索引: {e}")
+        return FinnhubIndex(data_path, payload)
+
+    logger.info(f"📇 Finnhub索引已建立: {os.path.basename(data_path)} ({len(data)}天)")
+    return FinnhubIndex.open(index_path) or FinnhubIndex(index_path, payload)
+
+
+def get_finnhub_index(data_path: str) -> FinnhubIndex:
+    """
+    获取数据文件的索引（进程内LRU缓存），尚未建立或源文件已更新时先建立
+
+    源JSON和索引都不存在时抛出 FileNotFoundError；建立索引后可以删除源JSON。
+    """
+    index_path = finnhub_index_path(data_path)
+    with _indexes_lock:
+        index = _indexes.get(index_path) or FinnhubIndex.open(index_path)
+        if index is None or index.is_stale(data_path):
+            if not os.path.exists(data_path):
+                raise FileNotFoundError(data_path)
+            index = build_finnhub_index(data_path)
+        _indexes[index_path] = index
+        _indexes.move_to_end(index_path)
+        while len(_indexes) > FINNHUB_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+        return index
+
 
 def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=None):
     """
@@ -31,15 +204,10 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
         )
 
     try:
-        if not os.path.exists(data_path):
-            logger.warning(f"⚠️ [DEBUG] 数据文件不存在: {data_path}")
-            logger.warning(f"⚠️ [DEBUG] 请确保已下载相关数据或检查数据目录配置")
-            return {}
-        
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        index = get_finnhub_index(data_path)
     except FileNotFoundError:
-        logger.error(f"❌ [ERROR] 文件未找到: {data_path}")
+        logger.warning(f"⚠️ [DEBUG] 数据文件不存在: {data_path}")
+        logger.warning(f"⚠️ [DEBUG] 请确保已下载相关数据或检查数据目录配置")
         return {}
     except json.JSONDecodeError as e:
         logger.error(f"❌ [ERROR] JSON解析错误: {e}")
@@ -49,8 +217,4 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
         return {}
 
     # filter keys (date, str in format YYYY-MM-DD) by the date range (str, str in format YYYY-MM-DD)
-    filtered_data = {}
-    for key, value in data.items():
-        if start_date <= key <= end_date and len(value) > 0:
-            filtered_data[key] = value
-    return filtered_data
+    return index.range(start_date, end_date)
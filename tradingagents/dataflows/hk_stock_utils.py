@@ -14,6 +14,7 @@ import os
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .technical_indicators import format_indicator_summary, get_technical_indicators
 
 
 class HKStockProvider:
@@ -281,9 +282,14 @@ class HKStockProvider:
 - 数据期间: {start_date} 至 {end_date}
 - 交易天数: {len(data)}天
 - 平均成交量: {avg_volume:,.0f}股
-
-最近5个交易日:
 """
+
+            indicator_summary = format_indicator_summary(
+                get_technical_indicators(data, key=("hk", symbol)).latest(), currency="HK$")
+            if indicator_summary:
+                formatted_text += f"\n技术指标:\n{indicator_summary}\n"
+
+            formatted_text += "\n最近5个交易日:\n"
             
             # 添加最近5天的数据
             recent_data = data.tail(5)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+批量分析共享的市场级上下文
+全球宏观新闻等数据只与日期有关，与具体股票无关。批量分析时每只股票的
+新闻/社交媒体分析师都会各自获取一遍，得到的结果完全相同。
+
+批量分析期间进入 shared_market_context()，被 @shared_within_batch 标记的市场级数据函数
+按 (名称, 参数) 只计算一次，之后的股票直接复用；上下文之外的调用行为不变。
+实时数据（如不带日期参数的市场概览）不应标记，否则整个批量期间都会返回第一次的结果。
+"""
+
+import contextvars
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 文本结果开头出现这些标记时视为获取失败，不在批量内复用
+FAILURE_MARKERS = ("❌", "⚠️", "失败", "无法获取", "error")
+
+
+def _is_valid(result: Any) -> bool:
+    if not result:
+        return False
+    if isinstance(result, str):
+        head = result.strip()[:40].lower()
+        return not any(marker in head for marker in FAILURE_MARKERS)
+    return True
+
+
+class MarketContext:
+    """一次批量分析内共享的市场级数据"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Hashable, Any] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self.stats = {"computed": 0, "reused": 0}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       is_valid: Callable[[Any], bool] = _is_valid) -> Any:
+        """返回已计算的值；同一键的并发请求只计算一次，失败结果不保留"""
+        with self._lock:
+            if key in self._values:
+                self.stats["reused"] += 1
+                return self._values[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    self.stats["reused"] += 1
+                    return self._values[key]
+            value = compute()
+            with self._lock:
+                self.stats["computed"] += 1
+                if is_valid(value):
+                    self._values[key] = value
+            return value
+
+
+# 上下文变量只对进入 shared_market_context() 的批量及其派生的线程可见，
+# 同一进程中并发的其他单股分析不受影响
+_active_context: contextvars.ContextVar[Optional[MarketContext]] = contextvars.ContextVar(
+    "market_context", default=None)
+
+
+def get_active_market_context() -> Optional[MarketContext]:
+    """当前生效的共享市场上下文，不在批量分析中时返回None"""
+    return _active_context.get()
+
+
+@contextmanager
+def shared_market_context():
+    """
+    在批量分析期间共享市场级数据
+
+    上下文保存在 contextvars 中，分析图的工具调用线程池（LangChain/LangGraph 执行器）
+    会复制调用方的上下文，因此批量内的工具调用可见；批量之外的分析看不到。
+    嵌套进入时复用外层上下文。缓存键包含函数参数（如日期），不同日期互不影响。
+    """
+    context = _active_context.get()
+    if context is not None:
+        yield context
+        return
+    context = MarketContext()
+    token = _active_context.set(context)
+    try:
+        yield context
+    finally:
+        _active_context.reset(token)
+        stats = context.stats
+        if stats["reused"]:
+            logger.info(f"🌐 [批量市场上下文] 市场级数据获取 {stats['computed']} 次，复用 {stats['reused']} 次")
+
+
+def shared_within_batch(name: str):
+    """装饰只与日期有关的市场级数据函数，在 shared_market_context() 内按参数只计算一次"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            context = _active_context.get()
+            if context is None:
+                return func(*args, **kwargs)
+            key: Tuple = (name, args, tuple(sorted(kwargs.items())))
+            return context.get_or_compute(key, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -13,6 +13,7 @@ import yfinance as yf
 import pandas as pd
 from .cache_manager import get_cache
 from .config import get_config
+from .technical_indicators import get_technical_indicators
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -198,17 +199,11 @@ class OptimizedUSDataProvider:
         price_change = data['Close'].iloc[-1] - data['Close'].iloc[0]
         price_change_pct = (price_change / data['Close'].iloc[0]) * 100
         
-        # 计算技术指标
-        data['MA5'] = data['Close'].rolling(window=5).mean()
-        data['MA10'] = data['Close'].rolling(window=10).mean()
-        data['MA20'] = data['Close'].rolling(window=20).mean()
-        
-        # 计算RSI
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        # 计算技术指标（均线列保留在最近5日数据表中）
+        indicators = get_technical_indicators(data, key=("us", symbol)).frame
+        for column in ('MA5', 'MA10', 'MA20'):
+            data[column] = indicators[column].to_numpy()
+        rsi = indicators['RSI']
         
         # 格式化输出
         result = f"""# {symbol} 美股数据分析
@@ -14,6 +14,7 @@ from dataclasses import dataclass
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.tracing import SpanKind, trace_span
 logger = get_logger('agents')
 
 
@@ -60,7 +61,8 @@ class RealtimeNewsAggregator:
         # 1. FinnHub实时新闻 (最高优先级)
         logger.info(f"[新闻聚合器] 尝试从 FinnHub 获取 {ticker} 的新闻")
         finnhub_start = datetime.now()
-        finnhub_news = self._get_finnhub_realtime_news(ticker, hours_back)
+        with trace_span("news:finnhub", SpanKind.DATA_SOURCE, source="finnhub"):
+            finnhub_news = self._get_finnhub_realtime_news(ticker, hours_back)
         finnhub_time = (datetime.now() - finnhub_start).total_seconds()
         
         if finnhub_news:
@@ -73,7 +75,8 @@ class RealtimeNewsAggregator:
         # 2. Alpha Vantage新闻
         logger.info(f"[新闻聚合器] 尝试从 Alpha Vantage 获取 {ticker} 的新闻")
         av_start = datetime.now()
-        av_news = self._get_alpha_vantage_news(ticker, hours_back)
+        with trace_span("news:alpha_vantage", SpanKind.DATA_SOURCE, source="alpha_vantage"):
+            av_news = self._get_alpha_vantage_news(ticker, hours_back)
         av_time = (datetime.now() - av_start).total_seconds()
         
         if av_news:
@@ -87,7 +90,8 @@ class RealtimeNewsAggregator:
         if self.newsapi_key:
             logger.info(f"[新闻聚合器] 尝试从 NewsAPI 获取 {ticker} 的新闻")
             newsapi_start = datetime.now()
-            newsapi_news = self._get_newsapi_news(ticker, hours_back)
+            with trace_span("news:newsapi", SpanKind.DATA_SOURCE, source="newsapi"):
+                newsapi_news = self._get_newsapi_news(ticker, hours_back)
             newsapi_time = (datetime.now() - newsapi_start).total_seconds()
             
             if newsapi_news:
@@ -102,7 +106,8 @@ class RealtimeNewsAggregator:
         # 4. 中文财经新闻源
         logger.info(f"[新闻聚合器] 尝试获取 {ticker} 的中文财经新闻")
         chinese_start = datetime.now()
-        chinese_news = self._get_chinese_finance_news(ticker, hours_back)
+        with trace_span("news:chinese_finance", SpanKind.DATA_SOURCE, source="chinese_finance"):
+            chinese_news = self._get_chinese_finance_news(ticker, hours_back)
         chinese_time = (datetime.now() - chinese_start).total_seconds()
         
         if chinese_news:
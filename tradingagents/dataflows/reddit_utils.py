@@ -1,12 +1,20 @@
 import requests
 import time
 import json
+import hashlib
+import shutil
+import tempfile
+import threading
 from datetime import datetime, timedelta
 from contextlib import contextmanager
-from typing import Annotated
+from typing import Annotated, Dict, List, Optional
 import os
 import re
 
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
 ticker_to_company = {
     "AAPL": "Apple",
     "MSFT": "Microsoft",
@@ -49,87 +57,215 @@ ticker_to_company = {
 }
 
 
-def fetch_top_from_category(
+def _company_search_terms(ticker: str) -> List[str]:
+    """公司检索词：公司名（" OR "分隔的多个名称）加股票代码"""
+    company = ticker_to_company[ticker]
+    search_terms = company.split(" OR ") if "OR" in company else [company]
+    return search_terms + [ticker]
+
+
+# 预编译的公司匹配器：任一检索词（按正则、忽略大小写）出现在标题或正文中即视为提及该公司
+COMPANY_MATCHERS = {
+    ticker: re.compile("|".join(f"(?:{term})" for term in _company_search_terms(ticker)), re.IGNORECASE)
+    for ticker in ticker_to_company
+}
+
+# ==================== 按日期分区的离线索引 ====================
+# 每个分类的索引位于 <data_path>/_index/<category>/：
+#   manifest.json               源文件大小/修改时间、公司匹配表签名、各日期的帖子数
+#   partitions-*/<日期>.jsonl   当天的帖子（只保留需要的字段，公司分类带有提及的股票代码）
+# 源文件或 ticker_to_company 变化后首次查询自动重建索引。
+
+REDDIT_INDEX_DIR = "_index"
+REDDIT_INDEX_VERSION = 1
+POST_FIELDS = ("title", "content", "url", "upvotes", "posted_date")
+
+_manifests: Dict[str, dict] = {}
+_index_lock = threading.Lock()
+
+
+def _index_dir(data_path: str, category: str) -> str:
+    return os.path.join(data_path, REDDIT_INDEX_DIR, category)
+
+
+def _source_signatures(category_dir: str) -> Dict[str, List[int]]:
+    signatures = {}
+    for data_file in sorted(os.listdir(category_dir)):
+        if data_file.endswith(".jsonl"):
+            stat = os.stat(os.path.join(category_dir, data_file))
+            signatures[data_file] = [stat.st_size, stat.st_mtime_ns]
+    return signatures
+
+
+def _matchers_signature() -> str:
+    return hashlib.md5(json.dumps(ticker_to_company, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_reddit_index(data_path: str, category: str) -> dict:
+    """扫描分类下的全部 .jsonl 文件一次，按发帖日期（UTC）写入分区并标注提及的公司"""
+    category_dir = os.path.join(data_path, category)
+    sources = _source_signatures(category_dir)
+    tag_companies = "company" in category
+
+    partitions: Dict[str, List[str]] = {}
+    for data_file in sources:
+        with open(os.path.join(category_dir, data_file), "rb") as f:
+            for line in f:
+                # skip empty lines
+                if not line.strip():
+                    continue
+
+                parsed_line = json.loads(line)
+                post_date = datetime.utcfromtimestamp(
+                    parsed_line["created_utc"]
+                ).strftime("%Y-%m-%d")
+                record = {
+                    "subreddit": data_file,
+                    "title": parsed_line["title"],
+                    "content": parsed_line["selftext"],
+                    "url": parsed_line["url"],
+                    "upvotes": parsed_line["ups"],
+                    "posted_date": post_date,
+                }
+                if tag_companies:
+                    record["tickers"] = [
+                        ticker for ticker, matcher in COMPANY_MATCHERS.items()
+                        if matcher.search(record["title"]) or matcher.search(record["content"])
+                    ]
+                partitions.setdefault(post_date, []).append(json.dumps(record, ensure_ascii=False))
+
+    index_dir = _index_dir(data_path, category)
+    os.makedirs(index_dir, exist_ok=True)
+    partition_dir = tempfile.mkdtemp(prefix="partitions-", dir=index_dir)
+    for post_date, lines in partitions.items():
+        with open(os.path.join(partition_dir, f"{post_date}.jsonl"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    manifest = {
+        "version": REDDIT_INDEX_VERSION,
+        "sources": sources,
+        "matchers": _matchers_signature() if tag_companies else None,
+        "partition_dir": os.path.basename(partition_dir),
+        "dates": {post_date: len(lines) for post_date, lines in sorted(partitions.items())},
+    }
+    # 清单最后替换，读取方始终看到完整的一版分区
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest.", suffix=".tmp", dir=index_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(index_dir, "manifest.json"))
+
+    for name in os.listdir(index_dir):
+        if name.startswith("partitions-") and name != manifest["partition_dir"]:
+            shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+
+    logger.info(f"📇 Reddit索引已建立: {category} ({len(sources)}个文件, "
+                f"{sum(manifest['dates'].values())}条帖子, {len(partitions)}天)")
+    return manifest
+
+
+def _read_manifest(index_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(index_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_reddit_index(data_path: str, category: str) -> dict:
+    """获取分类索引清单，索引不存在或已过期时先重建"""
+    index_dir = os.path.abspath(_index_dir(data_path, category))
+    sources = _source_signatures(os.path.join(data_path, category))
+    with _index_lock:
+        manifest = _manifests.get(index_dir) or _read_manifest(index_dir)
+        if (manifest is None
+                or manifest.get("version") != REDDIT_INDEX_VERSION
+                or manifest.get("sources") != sources
+                or ("company" in category and manifest.get("matchers") != _matchers_signature())):
+            manifest = build_reddit_index(data_path, category)
+        _manifests[index_dir] = manifest
+        return manifest
+
+
+def fetch_top_from_category_range(
     category: Annotated[
         str, "Category to fetch top post from. Collection of subreddits."
     ],
-    date: Annotated[str, "Date to fetch top posts from."],
-    max_limit: Annotated[int, "Maximum number of posts to fetch."],
+    start_date: Annotated[str, "First date (yyyy-mm-dd) to fetch top posts from."],
+    end_date: Annotated[str, "Last date (yyyy-mm-dd, inclusive) to fetch top posts from."],
+    max_limit: Annotated[int, "Maximum number of posts to fetch per day."],
     query: Annotated[str, "Optional query to search for in the subreddit."] = None,
     data_path: Annotated[
         str,
         "Path to the data folder. Default is 'reddit_data'.",
     ] = "reddit_data",
 ):
-    base_path = data_path
+    """
+    按日期区间获取热门帖子，每天的结果与 fetch_top_from_category 相同，按日期先后拼接
 
-    all_content = []
+    只读取区间内各日期的分区文件各一次；公司分类按导入时标注的股票代码过滤。
+    """
+    category_dir = os.path.join(data_path, category)
+    entries = os.listdir(category_dir)
 
-    if max_limit < len(os.listdir(os.path.join(base_path, category))):
+    if max_limit < len(entries):
         raise ValueError(
             "REDDIT FETCHING ERROR: max limit is less than the number of files in the category. Will not be able to fetch any posts"
         )
 
-    limit_per_subreddit = max_limit // len(
-        os.listdir(os.path.join(base_path, category))
-    )
+    limit_per_subreddit = max_limit // len(entries)
 
-    for data_file in os.listdir(os.path.join(base_path, category)):
-        # check if data_file is a .jsonl file
-        if not data_file.endswith(".jsonl"):
-            continue
-
-        all_content_curr_subreddit = []
+    # if is company_news, keep only posts whose title or content mentions the company (query)
+    ticker = query if "company" in category and query else None
+    # 不在公司表中的代码按代码本身在分区内匹配
+    fallback_matcher = (re.compile(re.escape(ticker), re.IGNORECASE)
+                        if ticker and ticker not in COMPANY_MATCHERS else None)
 
-        with open(os.path.join(base_path, category, data_file), "rb") as f:
-            for i, line in enumerate(f):
-                # skip empty lines
-                if not line.strip():
-                    continue
+    manifest = get_reddit_index(data_path, category)
+    partition_dir = os.path.join(_index_dir(data_path, category), manifest["partition_dir"])
+    subreddits = [data_file for data_file in entries if data_file.endswith(".jsonl")]
 
-                parsed_line = json.loads(line)
+    all_content = []
+    curr_date = datetime.strptime(start_date, "%Y-%m-%d")
+    last_date = datetime.strptime(end_date, "%Y-%m-%d")
+    while curr_date <= last_date:
+        date = curr_date.strftime("%Y-%m-%d")
+        curr_date += timedelta(days=1)
+        if date not in manifest["dates"]:
+            continue
 
-                # select only lines that are from the date
-                post_date = datetime.utcfromtimestamp(
-                    parsed_line["created_utc"]
-                ).strftime("%Y-%m-%d")
-                if post_date != date:
+        posts_by_subreddit: Dict[str, List[dict]] = {}
+        with open(os.path.join(partition_dir, f"{date}.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if fallback_matcher is not None:
+                    if not (fallback_matcher.search(record["title"]) or fallback_matcher.search(record["content"])):
+                        continue
+                elif ticker and ticker not in record["tickers"]:
                     continue
+                posts_by_subreddit.setdefault(record["subreddit"], []).append(
+                    {field: record[field] for field in POST_FIELDS})
 
-                # if is company_news, check that the title or the content has the company's name (query) mentioned
-                if "company" in category and query:
-                    search_terms = []
-                    if "OR" in ticker_to_company[query]:
-                        search_terms = ticker_to_company[query].split(" OR ")
-                    else:
-                        search_terms = [ticker_to_company[query]]
-
-                    search_terms.append(query)
-
-                    found = False
-                    for term in search_terms:
-                        if re.search(
-                            term, parsed_line["title"], re.IGNORECASE
-                        ) or re.search(term, parsed_line["selftext"], re.IGNORECASE):
-                            found = True
-                            break
-
-                    if not found:
-                        continue
+        for data_file in subreddits:
+            all_content_curr_subreddit = posts_by_subreddit.get(data_file, [])
 
-                post = {
-                    "title": parsed_line["title"],
-                    "content": parsed_line["selftext"],
-                    "url": parsed_line["url"],
-                    "upvotes": parsed_line["ups"],
-                    "posted_date": post_date,
-                }
+            # sort all_content_curr_subreddit by upvote_ratio in descending order
+            all_content_curr_subreddit.sort(key=lambda x: x["upvotes"], reverse=True)
 
-                all_content_curr_subreddit.append(post)
+            all_content.extend(all_content_curr_subreddit[:limit_per_subreddit])
 
-        # sort all_content_curr_subreddit by upvote_ratio in descending order
-        all_content_curr_subreddit.sort(key=lambda x: x["upvotes"], reverse=True)
+    return all_content
 
-        all_content.extend(all_content_curr_subreddit[:limit_per_subreddit])
 
-    return all_content
+def fetch_top_from_category(
+    category: Annotated[
+        str, "Category to fetch top post from. Collection of subreddits."
+    ],
+    date: Annotated[str, "Date to fetch top posts from."],
+    max_limit: Annotated[int, "Maximum number of posts to fetch."],
+    query: Annotated[str, "Optional query to search for in the subreddit."] = None,
+    data_path: Annotated[
+        str,
+        "Path to the data folder. Default is 'reddit_data'.",
+    ] = "reddit_data",
+):
+    return fetch_top_from_category_range(category, date, date, max_limit, query, data_path)
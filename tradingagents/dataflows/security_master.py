@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+证券主数据（代码/名称/市场/货币）
+
+股票名称和代码解析原先分散在各处：通达信按代码逐次查询MongoDB、Tushare搜索每次过滤整张
+股票列表、港股名称逐个调用AKShare/Yahoo接口。这里把各市场的证券列表一次性载入内存：
+
+- 数据来源：内置常用股票映射（离线可用）、Tushare stock_basic（A股，含拼音缩写）、
+  AKShare港股和美股列表；按数据源分别记录更新时间，过期的数据源单独刷新
+- 代码 -> 证券 为字典查找（支持 000001 / 000001.SZ / 0700.HK / 00700 等写法）
+- 搜索依次返回：代码或名称完全匹配、代码前缀、名称前缀、拼音首字母前缀、名称包含
+- 载入结果保存为快照文件，进程重启后无需重新请求接口；过期数据源在后台线程中刷新
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from pypinyin import Style, lazy_pinyin
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+SNAPSHOT_VERSION = 1
+BUILTIN_SOURCE = "builtin"
+MARKET_CURRENCIES = {"china_a": "CNY", "hong_kong": "HKD", "us": "USD"}
+TUSHARE_COLUMNS = ["ts_code", "symbol", "name", "area", "industry", "market", "list_date"]
+
+
+class Security(NamedTuple):
+    """单个证券的主数据"""
+    code: str                # A股6位代码 / 港股5位代码 / 美股代码
+    symbol: str              # 带交易所后缀的代码：000001.SZ / 0700.HK / AAPL
+    name: str
+    market: str              # china_a / hong_kong / us
+    currency: str
+    pinyin: str = ""         # 名称拼音首字母（大写）
+    industry: str = ""
+    area: str = ""
+    board: str = ""          # 板块（Tushare的market字段：主板/创业板/科创板等）
+    list_date: str = ""
+    source: str = BUILTIN_SOURCE
+
+    def as_tushare_row(self) -> Dict[str, str]:
+        """Tushare stock_basic 格式的一行"""
+        return {"ts_code": self.symbol, "symbol": self.code, "name": self.name, "area": self.area,
+                "industry": self.industry, "market": self.board, "list_date": self.list_date}
+
+
+class SecuritySource(NamedTuple):
+    """数据源：loader 返回证券列表，失败或不可用时返回None"""
+    name: str
+    loader: Callable[[], Optional[List[Security]]]
+
+
+def pinyin_initials(name: str) -> str:
+    """名称的拼音首字母（需要pypinyin；不可用时返回空字符串）"""
+    if not PYPINYIN_AVAILABLE or not name:
+        return ""
+    return "".join(lazy_pinyin(name, style=Style.FIRST_LETTER, errors="default")).upper()
+
+
+def china_a_symbol(code: str) -> str:
+    """A股6位代码 -> 带交易所后缀的代码"""
+    if code.startswith(("6", "9")):
+        return f"{code}.SH"
+    if code.startswith(("4", "8")):
+        return f"{code}.BJ"
+    return f"{code}.SZ"
+
+
+def make_security(code: str, name: str, market: str, source: str, **fields) -> Security:
+    """按市场规范化代码并补全交易所后缀、货币和拼音首字母"""
+    code = str(code).strip().upper()
+    if market == "china_a":
+        code = code.split(".")[0]
+        symbol = fields.pop("symbol", None) or china_a_symbol(code)
+    elif market == "hong_kong":
+        code = code.replace(".HK", "").zfill(5)
+        symbol = fields.pop("symbol", None) or f"{code[-4:] if code.startswith('0') else code}.HK"
+    else:
+        symbol = fields.pop("symbol", None) or code
+    name = str(name).strip()
+    fields["pinyin"] = (fields.get("pinyin") or pinyin_initials(name)).upper()
+    return Security(code=code, symbol=symbol, name=name, market=market,
+                    currency=MARKET_CURRENCIES.get(market, ""), source=source,
+                    **{key: "" if value is None else str(value) for key, value in fields.items()})
+
+
+def _aliases(security: Security) -> Iterator[str]:
+    """可以直接查到该证券的代码写法（大写）"""
+    yield security.code
+    yield security.symbol.upper()
+    if security.market == "hong_kong":
+        stripped = security.code.lstrip("0") or "0"
+        for digits in {stripped, stripped.zfill(4), security.code}:
+            yield digits
+            yield f"{digits}.HK"
+
+
+class _Index:
+    """一次构建、只读的索引；刷新时整体替换"""
+
+    def __init__(self, securities: List[Security]):
+        self.securities = securities
+        self.by_code: Dict[str, int] = {}
+        self.by_name: Dict[str, List[int]] = {}
+        for row, security in enumerate(securities):
+            for alias in _aliases(security):
+                self.by_code.setdefault(alias, row)
+            self.by_name.setdefault(security.name, []).append(row)
+        self.code_keys = sorted((security.code, row) for row, security in enumerate(securities))
+        self.name_keys = sorted((security.name, row) for row, security in enumerate(securities))
+        self.pinyin_keys = sorted((security.pinyin, row) for row, security in enumerate(securities)
+                                  if security.pinyin)
+        self.names = [security.name for security in securities]
+        self.markets = {security.market for security in securities}
+
+
+def _prefix_rows(keys: List[tuple], prefix: str) -> Iterator[int]:
+    position = bisect.bisect_left(keys, (prefix,))
+    while position < len(keys) and keys[position][0].startswith(prefix):
+        yield keys[position][1]
+        position += 1
+
+
+class SecurityMaster:
+    """内存中的证券主数据"""
+
+    def __init__(self, sources: Optional[List[SecuritySource]] = None, snapshot_path: Optional[str] = None,
+                 refresh_hours: float = 24, builtin: Optional[List[Security]] = None):
+        self.sources = default_sources() if sources is None else sources
+        self.snapshot_path = snapshot_path
+        self.refresh_seconds = refresh_hours * 3600
+        self._builtin = builtin_securities() if builtin is None else builtin
+        self._loaded: Dict[str, Dict] = self._load_snapshot()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._index = self._build_index()
+
+    # ---------- 载入与刷新 ----------
+
+    def _load_snapshot(self) -> Dict[str, Dict]:
+        if not self.snapshot_path:
+            return {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                return {}
+            return {name: {"updated_at": entry["updated_at"],
+                           "securities": [Security(**record) for record in entry["securities"]]}
+                    for name, entry in snapshot["sources"].items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ 证券主数据快照读取失败，将重新载入: {e}")
+            return {}
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        snapshot = {"version": SNAPSHOT_VERSION,
+                    "sources": {name: {"updated_at": entry["updated_at"],
+                                       "securities": [security._asdict() for security in entry["securities"]]}
+                                for name, entry in self._loaded.items()}}
+        try:
+            directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".security_master.", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"⚠️ 证券主数据快照保存失败: {e}")
+
+    def _build_index(self) -> _Index:
+        # 内置映射优先级最低，后面的数据源覆盖同一证券
+        merged: Dict[tuple, Security] = {}
+        for security in self._builtin:
+            merged[(security.market, security.code)] = security
+        # 未配置为数据源、直接通过 update_source 写入的列表排在配置的数据源之后
+        names = [source.name for source in self.sources]
+        names += [name for name in self._loaded if name not in names]
+        for name in names:
+            for security in self._loaded.get(name, {}).get("securities", []):
+                merged[(security.market, security.code)] = security
+        return _Index(list(merged.values()))
+
+    def is_stale(self, source_name: str) -> bool:
+        entry = self._loaded.get(source_name)
+        return entry is None or time.time() - entry["updated_at"] >= self.refresh_seconds
+
+    def has_source(self, source_name: str) -> bool:
+        return source_name in self._loaded
+
+    def update_source(self, source_name: str, securities: List[Security]):
+        """替换某个数据源的证券列表并重建索引（只影响该数据源）"""
+        self._loaded[source_name] = {"updated_at": time.time(), "securities": list(securities)}
+        self._index = self._build_index()
+        self._save_snapshot()
+
+    def refresh(self, source_names: Optional[Iterable[str]] = None, force: bool = False) -> Dict[str, int]:
+        """刷新过期（或指定）的数据源，返回 {数据源: 证券数}；载入失败的数据源保留旧数据"""
+        wanted = None if source_names is None else set(source_names)
+        refreshed = {}
+        with self._refresh_lock:
+            for source in self.sources:
+                if wanted is not None and source.name not in wanted:
+                    continue
+                if not force and not self.is_stale(source.name):
+                    continue
+                try:
+                    securities = source.loader()
+                except Exception as e:
+                    logger.warning(f"⚠️ 证券主数据源 {source.name} 载入失败: {e}")
+                    securities = None
+                if securities:
+                    self._loaded[source.name] = {"updated_at": time.time(), "securities": securities}
+                    refreshed[source.name] = len(securities)
+            if refreshed:
+                self._index = self._build_index()
+                self._save_snapshot()
+                logger.info(f"📇 证券主数据已刷新: {refreshed}")
+        return refreshed
+
+    def ensure_source(self, source_name: str) -> bool:
+        """数据源尚未载入时同步载入一次，返回是否可用"""
+        if not self.has_source(source_name):
+            self.refresh([source_name])
+        return self.has_source(source_name)
+
+    def start_background_refresh(self, interval_seconds: Optional[float] = None) -> threading.Thread:
+        """启动后台刷新线程（只启动一次），定期刷新过期的数据源"""
+        with self._refresh_lock:
+            if self._refresh_thread is None:
+                interval = interval_seconds or max(60.0, self.refresh_seconds / 4)
+
+                def run():
+                    while not self._stop.is_set():
+                        self.refresh()
+                        self._stop.wait(interval)
+
+                self._refresh_thread = threading.Thread(target=run, name="security-master-refresh", daemon=True)
+                self._refresh_thread.start()
+            return self._refresh_thread
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------- 查询 ----------
+
+    def __len__(self):
+        return len(self._index.securities)
+
+    def has_market(self, market: str) -> bool:
+        return market in self._index.markets
+
+    def get(self, code: str) -> Optional[Security]:
+        """按代码查找证券（O(1)，不区分大小写和交易所后缀写法）"""
+        if not code:
+            return None
+        index = self._index
+        row = index.by_code.get(str(code).strip().upper())
+        return None if row is None else index.securities[row]
+
+    def get_name(self, code: str) -> Optional[str]:
+        security = self.get(code)
+        return None if security is None else security.name
+
+    def search(self, keyword: str, market: Optional[str] = None, limit: Optional[int] = 20) -> List[Security]:
+        """按代码、名称或拼音首字母搜索，完全匹配在前，其次前缀匹配，最后名称包含"""
+        keyword = (keyword or "").strip()
+        if not keyword:
+            return []
+        upper = keyword.upper()
+        index = self._index
+
+        def candidates() -> Iterator[int]:
+            if upper in index.by_code:
+                yield index.by_code[upper]
+            yield from index.by_name.get(keyword, [])
+            yield from _prefix_rows(index.code_keys, upper)
+            yield from _prefix_rows(index.name_keys, keyword)
+            yield from _prefix_rows(index.pinyin_keys, upper)
+            for row, name in enumerate(index.names):
+                if keyword in name or upper in index.securities[row].symbol.upper():
+                    yield row
+
+        results, seen = [], set()
+        for row in candidates():
+            if row in seen:
+                continue
+            seen.add(row)
+            security = index.securities[row]
+            if market is not None and security.market != market:
+                continue
+            results.append(security)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+# ==================== 数据源 ====================
+
+def builtin_securities() -> List[Security]:
+    """代码中内置的常用股票映射（离线可用）"""
+    securities = []
+    try:
+        from .tdx_utils import _common_stock_names
+        securities += [make_security(code, name, "china_a", BUILTIN_SOURCE)
+                       for code, name in _common_stock_names.items()]
+    except Exception as e:
+        logger.debug(f"📇 内置A股映射不可用: {e}")
+    try:
+        from .improved_hk_utils import HK_STOCK_NAMES
+        securities += [make_security(code, name, "hong_kong", BUILTIN_SOURCE)
+                       for code, name in HK_STOCK_NAMES.items() if code.endswith(".HK")]
+    except Exception as e:
+        logger.debug(f"📇 内置港股映射不可用: {e}")
+    try:
+        from .reddit_utils import ticker_to_company
+        securities += [make_security(ticker, company.split(" OR ")[0], "us", BUILTIN_SOURCE)
+                       for ticker, company in ticker_to_company.items()]
+    except Exception as e:
+        logger.debug(f"📇 内置美股映射不可用: {e}")
+    return securities
+
+
+def _load_tushare_a_shares() -> Optional[List[Security]]:
+    """Tushare stock_basic（全部上市A股，含拼音缩写cnspell）"""
+    from .tushare_utils import get_tushare_provider
+
+    provider = get_tushare_provider()
+    if not provider.connected:
+        return None
+    stock_list = provider.get_stock_list()
+    if not hasattr(stock_list, "empty") or stock_list.empty:
+        return None
+    return [make_security(row["symbol"], row["name"], "china_a", "tushare", symbol=row["ts_code"],
+                          pinyin=row.get("cnspell") or "", industry=row.get("industry"),
+                          area=row.get("area"), board=row.get("market"), list_date=row.get("list_date"))
+            for row in stock_list.to_dict("records") if row.get("symbol") and row.get("name")]
+
+
+def _load_akshare_hk() -> Optional[List[Security]]:
+    """AKShare港股列表（东方财富）"""
+    import akshare as ak
+
+    spot = ak.stock_hk_spot_em()
+    if spot is None or spot.empty:
+        return None
+    return [make_security(code, name, "hong_kong", "akshare_hk")
+            for code, name in zip(spot["代码"], spot["名称"]) if code and name]
+
+
+def _load_akshare_us() -> Optional[List[Security]]:
+    """AKShare美股列表（东方财富，代码形如 105.AAPL）"""
+    import akshare as ak
+
+    spot = ak.stock_us_spot_em()
+    if spot is None or spot.empty:
+        return None
+    return [make_security(str(code).split(".")[-1], name, "us", "akshare_us")
+            for code, name in zip(spot["代码"], spot["名称"]) if code and name]
+
+
+def default_sources() -> List[SecuritySource]:
+    return [SecuritySource("tushare", _load_tushare_a_shares),
+            SecuritySource("akshare_hk", _load_akshare_hk),
+            SecuritySource("akshare_us", _load_akshare_us)]
+
+
+_security_master: Optional[SecurityMaster] = None
+_security_master_lock = threading.Lock()
+
+
+def get_security_master() -> SecurityMaster:
+    """
+    获取全局证券主数据（首次调用时从快照和内置映射载入，不等待网络）
+
+    SECURITY_MASTER_BACKGROUND_REFRESH 开启时（默认）启动后台线程刷新过期的数据源。
+    """
+    global _security_master
+    if _security_master is None:
+        with _security_master_lock:
+            if _security_master is None:
+                from tradingagents.config.env_utils import parse_bool_env, parse_int_env
+                from .config import get_data_dir
+
+                master = SecurityMaster(
+                    snapshot_path=os.path.join(get_data_dir(), "security_master.json"),
+                    refresh_hours=parse_int_env("SECURITY_MASTER_REFRESH_HOURS", 24))
+                if parse_bool_env("SECURITY_MASTER_BACKGROUND_REFRESH", True):
+                    master.start_background_refresh()
+                _security_master = master
+    return _security_master
+
+
+def lookup_security(code: str) -> Optional[Security]:
+    """按代码查找证券"""
+    return get_security_master().get(code)
+
+
+def search_securities(keyword: str, market: Optional[str] = None, limit: Optional[int] = 20) -> List[Security]:
+    """按代码、名称或拼音首字母搜索证券"""
+    return get_security_master().search(keyword, market=market, limit=limit)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+SimFin基本面数据的按股票分区列式存储
+
+SimFin导出的 us-balance/cashflow/income-{freq}.csv 包含全部美股公司，原先每次工具调用都要
+整表 read_csv 并对所有行解析日期，再过滤出单只股票。这里做一次性导入：
+
+- 解析好日期后按 (Ticker, Publish Date) 稳定排序，写成列式文件
+  （pyarrow可用时为固定行组大小的Parquet，否则为pandas pickle）
+- index.json 记录 股票 -> [起始行, 结束行) 以及源CSV的大小和修改时间
+
+查询"截至某日已发布的最新报表"时：按索引定位股票所在的行组，只读取这些行组，
+再在已排序的 Publish Date 上二分查找。源CSV变化后首次查询会自动重新导入。
+"""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pq = None
+    PARQUET_AVAILABLE = False
+
+# 报表类型 -> (SimFin目录名, 文件名中的报表名)
+STATEMENTS = {
+    "balance_sheet": ("balance_sheet", "balance"),
+    "cashflow": ("cash_flow", "cashflow"),
+    "income_statements": ("income_statements", "income"),
+}
+FREQUENCIES = ("annual", "quarterly")
+DATE_COLUMNS = ("Report Date", "Publish Date")
+ROW_GROUP_SIZE = 1024
+INDEX_FILE = "index.json"
+STORE_VERSION = 1
+
+
+def simfin_csv_path(data_dir: str, statement: str, freq: str) -> Path:
+    """SimFin原始CSV路径"""
+    folder, name = STATEMENTS[statement]
+    return (Path(data_dir) / "fundamental_data" / "simfin_data_all" / folder /
+            "companies" / "us" / f"us-{name}-{freq}.csv")
+
+
+def simfin_store_path(data_dir: str, statement: str, freq: str) -> Path:
+    """导入后的列式存储目录"""
+    return Path(data_dir) / "fundamental_data" / "simfin_store" / f"{statement}-{freq}"
+
+
+def _source_signature(csv_path: Path) -> Dict[str, int]:
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _ticker_ranges(tickers: pd.Series) -> Dict[str, List[int]]:
+    """已排序的股票列 -> {股票: [起始行, 结束行)}"""
+    values = tickers.astype(str).to_numpy()
+    if len(values) == 0:
+        return {}
+    boundaries = np.flatnonzero(values[1:] != values[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(values)]))
+    return {values[start]: [int(start), int(stop)] for start, stop in zip(starts, stops)}
+
+
+def _atomic_write(path: Path, write) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SimFinStore:
+    """单个报表（类型+频率）的列式存储"""
+
+    def __init__(self, store_dir: Path, meta: Dict[str, Any], frame: Optional[pd.DataFrame] = None):
+        self.store_dir = Path(store_dir)
+        self.meta = meta
+        self.tickers: Dict[str, List[int]] = meta["tickers"]
+        # pickle格式或写入失败时整表保存在内存中
+        self._frame = frame
+        self._group_offsets = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, store_dir: Path) -> Optional["SimFinStore"]:
+        """读取已导入的存储，不存在或版本不符时返回None"""
+        index_path = Path(store_dir) / INDEX_FILE
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != STORE_VERSION:
+            return None
+        if meta["format"] == "parquet" and not PARQUET_AVAILABLE:
+            return None
+        return cls(store_dir, meta)
+
+    @classmethod
+    def ingest(cls, csv_path: Path, store_dir: Path, use_parquet: Optional[bool] = None) -> "SimFinStore":
+        """从SimFin CSV导入：解析日期、按股票和发布日期排序，写入列式文件和索引"""
+        use_parquet = PARQUET_AVAILABLE if use_parquet is None else use_parquet
+        signature = _source_signature(csv_path)
+
+        df = pd.read_csv(csv_path, sep=";")
+        for column in DATE_COLUMNS:
+            df[column] = pd.to_datetime(df[column], utc=True).dt.normalize()
+        # 无股票代码的行永远不会被查询到
+        df = df[df["Ticker"].notna()]
+        df = df.sort_values(["Ticker", "Publish Date"], kind="mergesort").reset_index(drop=True)
+
+        data_file = "data.parquet" if use_parquet else "data.pkl"
+        meta = {
+            "version": STORE_VERSION,
+            "format": "parquet" if use_parquet else "pickle",
+            "data_file": data_file,
+            "row_group_size": ROW_GROUP_SIZE,
+            "rows": len(df),
+            "source": {"path": str(csv_path), **signature},
+            "tickers": _ticker_ranges(df["Ticker"]),
+        }
+
+        try:
+            store_dir = Path(store_dir)
+            store_dir.mkdir(parents=True, exist_ok=True)
+            if use_parquet:
+                _atomic_write(store_dir / data_file,
+                              lambda path: df.to_parquet(path, index=False, row_group_size=ROW_GROUP_SIZE))
+            else:
+                _atomic_write(store_dir / data_file, df.to_pickle)
+
+            def write_index(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(meta, f, ensure_ascii=False)
+            # 索引最后写入，索引存在即表示数据文件完整
+            _atomic_write(store_dir / INDEX_FILE, write_index)
+            logger.info(f"📦 SimFin数据已导入: {csv_path.name} -> {store_dir} "
+                        f"({len(df)}行, {len(meta['tickers'])}只股票, {meta['format']})")
+            frame = None if use_parquet else df
+        except OSError as e:
+            logger.warning(f"⚠️ SimFin存储写入失败，本进程内使用内存数据: {e}")
+            frame = df
+        return cls(store_dir, meta, frame=frame)
+
+    def is_stale(self, csv_path: Path) -> bool:
+        """源CSV存在且大小或修改时间与导入时不同"""
+        try:
+            signature = _source_signature(csv_path)
+        except OSError:
+            return False
+        source = self.meta.get("source", {})
+        return (source.get("size"), source.get("mtime_ns")) != (signature["size"], signature["mtime_ns"])
+
+    def _read_rows(self, start: int, stop: int) -> pd.DataFrame:
+        if self._frame is None and self.meta["format"] == "pickle":
+            with self._lock:
+                if self._frame is None:
+                    self._frame = pd.read_pickle(self.store_dir / self.meta["data_file"])
+        if self._frame is not None:
+            return self._frame.iloc[start:stop]
+
+        # 只读取覆盖 [start, stop) 的行组（行组起始行号取自Parquet文件元数据）
+        parquet_file = pq.ParquetFile(self.store_dir / self.meta["data_file"])
+        if self._group_offsets is None:
+            metadata = parquet_file.metadata
+            self._group_offsets = np.cumsum(
+                [0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+        first_group = int(np.searchsorted(self._group_offsets, start, side="right")) - 1
+        last_group = int(np.searchsorted(self._group_offsets, stop - 1, side="right")) - 1
+        table = parquet_file.read_row_groups(list(range(first_group, last_group + 1)))
+        offset = int(self._group_offsets[first_group])
+        return table.to_pandas().iloc[start - offset:stop - offset]
+
+    def statements_for(self, ticker: str) -> Optional[pd.DataFrame]:
+        """某只股票的全部报表（按发布日期升序），没有该股票时返回None"""
+        rows = self.tickers.get(ticker)
+        if rows is None:
+            return None
+        return self._read_rows(*rows)
+
+    def latest_as_of(self, ticker: str, curr_date: str) -> Optional[pd.Series]:
+        """截至curr_date（含）已发布的最新一期报表，没有时返回None"""
+        statements = self.statements_for(ticker)
+        if statements is None or statements.empty:
+            return None
+        curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
+        publish_dates = statements["Publish Date"]
+        position = int(publish_dates.searchsorted(curr_date_dt, side="right")) - 1
+        if position < 0:
+            return None
+        # 同一天发布多份时取原文件中靠前的一份（与原先 idxmax 的行为一致）
+        position = int(publish_dates.searchsorted(publish_dates.iloc[position], side="left"))
+        return statements.iloc[position]
+
+
+_stores: Dict[Path, SimFinStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_simfin_store(statement: str, freq: str, data_dir: str) -> SimFinStore:
+    """
+    获取报表存储，尚未导入或源CSV已更新时先导入
+
+    源CSV和存储都不存在时抛出 FileNotFoundError；导入完成后可以删除源CSV。
+    """
+    csv_path = simfin_csv_path(data_dir, statement, freq)
+    store_dir = simfin_store_path(data_dir, statement, freq)
+    with _stores_lock:
+        store = _stores.get(store_dir) or SimFinStore.load(store_dir)
+        if store is None or store.is_stale(csv_path):
+            if not csv_path.exists():
+                raise FileNotFoundError(f"SimFin数据不存在: {csv_path}")
+            store = SimFinStore.ingest(csv_path, store_dir)
+        _stores[store_dir] = store
+        return store
+
+
+def lookup_simfin_statement(statement: str, ticker: str, freq: str, curr_date: str,
+                            data_dir: str) -> Optional[pd.Series]:
+    """截至curr_date已发布的最新一期报表（interface中SimFin工具使用）"""
+    return get_simfin_store(statement, freq, data_dir).latest_as_of(ticker, curr_date)
+
+
+def build_simfin_stores(data_dir: str, statements: Iterable[str] = tuple(STATEMENTS),
+                        freqs: Iterable[str] = FREQUENCIES, force: bool = False) -> Dict[str, int]:
+    """批量导入SimFin数据，返回 {报表名: 行数}；源CSV不存在的报表跳过"""
+    results = {}
+    for statement in statements:
+        for freq in freqs:
+            csv_path = simfin_csv_path(data_dir, statement, freq)
+            if not csv_path.exists():
+                logger.warning(f"⚠️ 跳过不存在的SimFin文件: {csv_path}")
+                continue
+            store_dir = simfin_store_path(data_dir, statement, freq)
+            with _stores_lock:
+                store = None if force else SimFinStore.load(store_dir)
+                if store is None or store.is_stale(csv_path):
+                    store = SimFinStore.ingest(csv_path, store_dir)
+                _stores[store_dir] = store
+            results[f"{statement}-{freq}"] = store.meta["rows"]
+    return results
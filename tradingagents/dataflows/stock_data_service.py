@@ -116,11 +116,10 @@ class StockDataService:
     def _get_from_mongodb(self, stock_code: str = None) -> Optional[Dict[str, Any]]:
         """从MongoDB获取数据"""
         try:
-            mongodb_client = self.db_manager.get_mongodb_client()
-            if not mongodb_client:
+            db = self.db_manager.get_mongodb_database()
+            if db is None:
                 return None
 
-            db = mongodb_client[self.db_manager.mongodb_config["database"]]
             collection = db['stock_basic_info']
 
             if stock_code:
@@ -181,11 +180,12 @@ class StockDataService:
     
     def _cache_to_mongodb(self, data: Any) -> bool:
         """将数据缓存到MongoDB"""
-        if not self.db_manager or not self.db_manager.mongodb_db:
+        db = self.db_manager.get_mongodb_database() if self.db_manager else None
+        if db is None:
             return False
         
         try:
-            collection = self.db_manager.mongodb_db['stock_basic_info']
+            collection = db['stock_basic_info']
             
             if isinstance(data, list):
                 # 批量插入
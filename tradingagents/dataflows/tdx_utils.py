@@ -4,6 +4,7 @@ Tushare数据接口数据获取工具
 支持A股、港股实时数据和历史数据
 """
 
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -15,6 +16,9 @@ from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 warnings.filterwarnings('ignore')
 
+from .security_master import get_security_master
+from .technical_indicators import get_technical_indicators
+
 # 导入数据库管理器
 try:
     from tradingagents.config.database_manager import get_database_manager
@@ -24,12 +28,8 @@ except ImportError:
     logger.warning(f"⚠️ 数据库缓存管理器不可用，尝试文件缓存")
 
 # 导入MongoDB股票信息查询
-try:
-    import os
-    from pymongo import MongoClient
-    MONGODB_AVAILABLE = True
-except ImportError:
-    MONGODB_AVAILABLE = False
+from tradingagents.config.connection_registry import MONGODB_AVAILABLE, get_connection_registry
+if not MONGODB_AVAILABLE:
     logger.warning(f"⚠️ pymongo未安装，无法从MongoDB获取股票名称")
 
 try:
@@ -159,7 +159,7 @@ class TongDaXinDataProvider:
     def _get_stock_name(self, stock_code: str) -> str:
         """
         获取股票名称
-        优先级：缓存 -> MongoDB -> 常用股票映射 -> API获取（仅深圳市场） -> 默认格式
+        优先级：缓存 -> 证券主数据 -> MongoDB -> 常用股票映射 -> API获取（仅深圳市场） -> 默认格式
         Args:
             stock_code: 股票代码
         Returns:
@@ -170,8 +170,18 @@ class TongDaXinDataProvider:
         # 首先检查缓存
         if stock_code in _stock_name_cache:
             return _stock_name_cache[stock_code]
+
+        # 内存中的证券主数据（无需网络和数据库）
+        try:
+            security = get_security_master().get(stock_code)
+        except Exception as e:
+            logger.debug(f"证券主数据不可用: {e}")
+            security = None
+        if security is not None and security.market == 'china_a':
+            _stock_name_cache[stock_code] = security.name
+            return security.name
         
-        # 优先从MongoDB获取
+        # 其次从MongoDB获取
         mongodb_name = _get_stock_name_from_mongodb(stock_code)
         if mongodb_name:
             _stock_name_cache[stock_code] = mongodb_name
@@ -340,61 +350,32 @@ class TongDaXinDataProvider:
             logger.error(f"获取历史数据失败: {e}")
             return pd.DataFrame()
     
-    def get_stock_technical_indicators(self, stock_code: str, period: int = 20) -> Dict:
+    def get_stock_technical_indicators(self, stock_code: str, period: int = 20,
+                                       history: Optional[pd.DataFrame] = None) -> Dict:
         """
         计算技术指标
         Args:
             stock_code: 股票代码
             period: 计算周期
+            history: 已获取的历史数据（传入时不再重新下载）
         Returns:
             Dict: 技术指标数据
         """
         try:
-            # 获取最近的历史数据
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=period*2)).strftime('%Y-%m-%d')
-            
-            df = self.get_stock_history_data(stock_code, start_date, end_date)
-            
+            df = history
+            if df is None:
+                # 获取最近的历史数据
+                end_date = datetime.now().strftime('%Y-%m-%d')
+                start_date = (datetime.now() - timedelta(days=period*2)).strftime('%Y-%m-%d')
+
+                df = self.get_stock_history_data(stock_code, start_date, end_date)
+
             if df.empty:
                 return {}
-            
-            # 计算技术指标
-            indicators = {}
-            
-            # 移动平均线
-            indicators['MA5'] = df['Close'].rolling(5).mean().iloc[-1] if len(df) >= 5 else None
-            indicators['MA10'] = df['Close'].rolling(10).mean().iloc[-1] if len(df) >= 10 else None
-            indicators['MA20'] = df['Close'].rolling(20).mean().iloc[-1] if len(df) >= 20 else None
-            
-            # RSI
-            if len(df) >= 14:
-                delta = df['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                indicators['RSI'] = (100 - (100 / (1 + rs))).iloc[-1]
-            
-            # MACD
-            if len(df) >= 26:
-                exp1 = df['Close'].ewm(span=12).mean()
-                exp2 = df['Close'].ewm(span=26).mean()
-                macd = exp1 - exp2
-                signal = macd.ewm(span=9).mean()
-                indicators['MACD'] = macd.iloc[-1]
-                indicators['MACD_Signal'] = signal.iloc[-1]
-                indicators['MACD_Histogram'] = (macd - signal).iloc[-1]
-            
-            # 布林带
-            if len(df) >= 20:
-                sma = df['Close'].rolling(20).mean()
-                std = df['Close'].rolling(20).std()
-                indicators['BB_Upper'] = (sma + 2 * std).iloc[-1]
-                indicators['BB_Middle'] = sma.iloc[-1]
-                indicators['BB_Lower'] = (sma - 2 * std).iloc[-1]
-            
-            return indicators
-            
+
+            # 均线、RSI、MACD、布林带（数据不足的指标不返回）
+            return get_technical_indicators(df, key=("tdx", stock_code)).latest()
+
         except Exception as e:
             logger.error(f"计算技术指标失败: {e}")
             return {}
@@ -534,8 +515,8 @@ def _get_mongodb_connection():
             else:
                 connection_string = f"mongodb://{config['host']}:{config['port']}/"
             
-            # 创建客户端
-            _mongodb_client = MongoClient(
+            # 从进程共享的连接池获取客户端
+            _mongodb_client = get_connection_registry().get_mongo_client(
                 connection_string,
                 serverSelectionTimeoutMS=3000  # 3秒超时
             )
@@ -696,7 +677,7 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
         realtime_data = provider.get_real_time_data(stock_code)
 
         # 获取技术指标
-        indicators = provider.get_stock_technical_indicators(stock_code)
+        indicators = provider.get_stock_technical_indicators(stock_code, history=df)
         
         # 格式化输出
         result = f"""
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+通用技术指标库
+
+各市场的数据格式化函数原先各自用 rolling/ewm 计算均线、RSI、MACD、布林带，
+通达信接口还会为了算指标重新下载一遍刚获取过的历史数据。这里统一为：
+
+- TechnicalIndicators: 对一段OHLCV数据一次性向量化计算全部标准指标；
+  追加新K线时只用尾部窗口和保存的EWM状态计算新增行，结果与整段重算一致
+- get_technical_indicators: 按 (数据源, 股票代码) 缓存指标，新数据是已缓存数据的延续时增量更新
+
+指标口径与原先各处的实现一致：
+- MA5/MA10/MA20: 收盘价简单移动平均
+- RSI: 14日涨跌幅简单平均（首日涨跌按0计）
+- MACD: EMA12 - EMA26，信号线为MACD的EMA9，至少26根K线
+- 布林带: 20日均线 ± 2倍20日标准差
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+MA_WINDOWS = (5, 10, 20)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLL_PERIOD, BOLL_WIDTH = 20, 2
+
+INDICATOR_COLUMNS = ([f"MA{window}" for window in MA_WINDOWS] +
+                     ["RSI", "MACD", "MACD_Signal", "MACD_Histogram", "BB_Upper", "BB_Middle", "BB_Lower"])
+
+# 增量更新时参与计算的历史尾部长度（覆盖最长的滚动窗口）
+_TAIL_LENGTH = max(MA_WINDOWS + (RSI_PERIOD + 1, BOLL_PERIOD)) + 10
+_CLOSE_COLUMNS = ("Close", "close")
+_DATE_COLUMNS = ("Date", "date", "trade_date")
+INDICATOR_CACHE_SIZE = 64
+
+
+def _close_series(bars: pd.DataFrame) -> pd.Series:
+    """取收盘价序列，数据带日期列时以日期为索引"""
+    column = next((c for c in _CLOSE_COLUMNS if c in bars.columns), None)
+    if column is None:
+        raise KeyError(f"数据中没有收盘价列: {list(bars.columns)}")
+    close = bars[column].astype(float)
+    date_column = next((c for c in _DATE_COLUMNS if c in bars.columns), None)
+    if date_column is not None:
+        close = pd.Series(close.to_numpy(), index=pd.Index(bars[date_column]), name=column)
+    return close
+
+
+def _rolling_indicators(close: pd.Series) -> pd.DataFrame:
+    """均线、RSI、布林带（只依赖最近若干根K线的指标）"""
+    frame = pd.DataFrame(index=close.index)
+    for window in MA_WINDOWS:
+        frame[f"MA{window}"] = close.rolling(window).mean()
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(RSI_PERIOD).mean()
+    frame["RSI"] = 100 - (100 / (1 + gain / loss))
+
+    sma = close.rolling(BOLL_PERIOD).mean()
+    std = close.rolling(BOLL_PERIOD).std()
+    frame["BB_Upper"] = sma + BOLL_WIDTH * std
+    frame["BB_Middle"] = sma
+    frame["BB_Lower"] = sma - BOLL_WIDTH * std
+    return frame
+
+
+def _alpha(span: int) -> float:
+    return 2.0 / (span + 1)
+
+
+def _ewm_state(last_mean: float, count: int, span: int):
+    """pandas ewm(adjust=True) 的累计状态 [加权和, 权重和]，用于之后逐个追加"""
+    decay = 1 - _alpha(span)
+    weight = (1 - decay ** count) / _alpha(span)
+    return [last_mean * weight, weight]
+
+
+class TechnicalIndicators:
+    """一段K线的技术指标，frame 与K线逐行对齐，列见 INDICATOR_COLUMNS"""
+
+    def __init__(self, bars: pd.DataFrame):
+        self.close = _close_series(bars)
+        self.frame = _rolling_indicators(self.close)
+
+        fast = self.close.ewm(span=MACD_FAST).mean()
+        slow = self.close.ewm(span=MACD_SLOW).mean()
+        macd = fast - slow
+        signal = macd.ewm(span=MACD_SIGNAL).mean()
+        self._set_macd(self.frame, macd, signal, first_position=0)
+
+        # 收盘价有缺失时EWM权重不再是等比数列，之后的追加退化为整段重算
+        count = len(self.close)
+        if count and not self.close.isna().any():
+            self._ewm = {"fast": _ewm_state(fast.iloc[-1], count, MACD_FAST),
+                         "slow": _ewm_state(slow.iloc[-1], count, MACD_SLOW),
+                         "signal": _ewm_state(signal.iloc[-1], count, MACD_SIGNAL)}
+        else:
+            self._ewm = None
+        self.frame = self.frame[INDICATOR_COLUMNS]
+
+    @staticmethod
+    def _set_macd(frame: pd.DataFrame, macd: pd.Series, signal: pd.Series, first_position: int):
+        # 不足 MACD_SLOW 根K线时MACD没有意义
+        valid = np.arange(first_position, first_position + len(frame)) >= MACD_SLOW - 1
+        frame["MACD"] = macd.where(valid)
+        frame["MACD_Signal"] = signal.where(valid)
+        frame["MACD_Histogram"] = (macd - signal).where(valid)
+
+    def extend(self, new_bars: pd.DataFrame) -> "TechnicalIndicators":
+        """追加新K线并只计算新增行的指标（原地更新，返回自身）"""
+        new_close = _close_series(new_bars)
+        if new_close.empty:
+            return self
+        if self._ewm is None or new_close.isna().any():
+            close = pd.concat([self.close, new_close])
+            self.__init__(pd.DataFrame({"Close": close.to_numpy(), "Date": close.index}))
+            return self
+
+        tail = self.close.iloc[-_TAIL_LENGTH:]
+        added = _rolling_indicators(pd.concat([tail, new_close])).iloc[len(tail):]
+
+        macd_values, signal_values = [], []
+        state = self._ewm
+        for value in new_close.to_numpy():
+            means = {}
+            for name, span in (("fast", MACD_FAST), ("slow", MACD_SLOW)):
+                state[name][0] = value + (1 - _alpha(span)) * state[name][0]
+                state[name][1] = 1 + (1 - _alpha(span)) * state[name][1]
+                means[name] = state[name][0] / state[name][1]
+            macd_value = means["fast"] - means["slow"]
+            state["signal"][0] = macd_value + (1 - _alpha(MACD_SIGNAL)) * state["signal"][0]
+            state["signal"][1] = 1 + (1 - _alpha(MACD_SIGNAL)) * state["signal"][1]
+            macd_values.append(macd_value)
+            signal_values.append(state["signal"][0] / state["signal"][1])
+
+        self._set_macd(added, pd.Series(macd_values, index=added.index),
+                       pd.Series(signal_values, index=added.index), first_position=len(self.close))
+        self.close = pd.concat([self.close, new_close])
+        self.frame = pd.concat([self.frame, added[INDICATOR_COLUMNS]])
+        return self
+
+    def latest(self) -> Dict[str, float]:
+        """最后一根K线上的各项指标，数据不足无法计算的指标不包含在内"""
+        if self.frame.empty:
+            return {}
+        row = self.frame.iloc[-1]
+        return {name: float(value) for name, value in row.items() if pd.notna(value)}
+
+
+_cache: "OrderedDict[Hashable, TechnicalIndicators]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_technical_indicators(bars: pd.DataFrame, key: Optional[Hashable] = None) -> TechnicalIndicators:
+    """
+    计算（或复用）一段K线的技术指标
+
+    key（如 ("tdx", "000001")）不为空时按key缓存：新数据与缓存完全相同时直接复用，
+    是缓存数据追加若干根K线时只增量计算新增部分，否则整段重算并替换缓存。
+    """
+    if key is None:
+        return TechnicalIndicators(bars)
+
+    close = _close_series(bars)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            count = len(cached.close)
+            if (len(close) >= count and close.index[:count].equals(cached.close.index)
+                    and np.array_equal(close.to_numpy()[:count], cached.close.to_numpy(), equal_nan=True)):
+                if len(close) > count:
+                    cached.extend(bars.iloc[count:])
+                _cache.move_to_end(key)
+                return cached
+
+        indicators = TechnicalIndicators(bars)
+        _cache[key] = indicators
+        while len(_cache) > INDICATOR_CACHE_SIZE:
+            _cache.popitem(last=False)
+        return indicators
+
+
+def format_indicator_summary(latest: Dict[str, float], currency: str = "") -> str:
+    """把 latest() 的结果格式化为报告中的指标列表，缺失的指标不输出"""
+    lines = []
+    for window in MA_WINDOWS:
+        if f"MA{window}" in latest:
+            lines.append(f"- MA{window}: {currency}{latest[f'MA{window}']:.2f}")
+    if "RSI" in latest:
+        lines.append(f"- RSI: {latest['RSI']:.2f}")
+    if "MACD" in latest:
+        lines.append(f"- MACD: {latest['MACD']:.4f} (信号线 {latest['MACD_Signal']:.4f}, "
+                     f"柱 {latest['MACD_Histogram']:.4f})")
+    if "BB_Upper" in latest:
+        lines.append(f"- 布林带: 上轨 {currency}{latest['BB_Upper']:.2f}, 中轨 {currency}{latest['BB_Middle']:.2f}, "
+                     f"下轨 {currency}{latest['BB_Lower']:.2f}")
+    return "\n".join(lines)
@@ -124,7 +124,7 @@ class TushareProvider:
             stock_list = self.api.stock_basic(
                 exchange='',
                 list_status='L',  # 上市状态
-                fields='ts_code,symbol,name,area,industry,market,list_date'
+                fields='ts_code,symbol,name,area,industry,market,list_date,cnspell'
             )
             
             if stock_list is not None and not stock_list.empty:
@@ -292,6 +292,10 @@ class TushareProvider:
 
         Tushare的daily接口返回除权价格，在除权日会出现价格跳跃。
         使用pct_chg（涨跌幅）重新计算连续的前复权价格，确保价格序列的连续性。
+        数据中带有adj_factor（复权因子）列时直接按复权因子计算。
+
+        以最新收盘价为基准：第i天的前复权收盘价 = 最新收盘价 / ∏(1 + 第k天涨跌幅)，k取i之后的各天，
+        用反向累乘一次算出；开高低价按当天 前复权收盘价/原始收盘价 的比例整列调整。
 
         Args:
             data: 包含除权价格和pct_chg的DataFrame
@@ -316,34 +320,31 @@ class TushareProvider:
             adjusted_data['high_raw'] = adjusted_data['high'].copy()
             adjusted_data['low_raw'] = adjusted_data['low'].copy()
 
-            # 从最新的收盘价开始，向前计算前复权价格
-            # 使用最后一天的收盘价作为基准
-            latest_close = float(adjusted_data.iloc[-1]['close'])
-
-            # 计算前复权收盘价
-            adjusted_closes = [latest_close]
-
-            # 从倒数第二天开始向前计算
-            for i in range(len(adjusted_data) - 2, -1, -1):
-                pct_change = float(adjusted_data.iloc[i + 1]['pct_chg']) / 100.0  # 转换为小数
+            close_raw = adjusted_data['close_raw'].to_numpy(dtype=float)
 
+            if 'adj_factor' in adjusted_data.columns and adjusted_data['adj_factor'].notna().all():
+                # 前复权价 = 原始价 × 当日复权因子 / 最新复权因子
+                adj_factor = adjusted_data['adj_factor'].to_numpy(dtype=float)
+                adjusted_closes = close_raw * adj_factor / adj_factor[-1]
+            else:
+                # 从最新的收盘价开始，向前计算前复权价格
                 # 前一天的前复权收盘价 = 今天的前复权收盘价 / (1 + 今天的涨跌幅)
-                prev_close = adjusted_closes[0] / (1 + pct_change)
-                adjusted_closes.insert(0, prev_close)
+                growth = 1 + adjusted_data['pct_chg'].to_numpy(dtype=float) / 100.0
+                # growth_after[i] = ∏ growth[i+1:]（numpy累乘遇到NaN会向前传播，与逐日递推一致）
+                growth_after = np.ones(len(growth))
+                growth_after[:-1] = np.cumprod(growth[:0:-1])[::-1]
+                adjusted_closes = close_raw[-1] / growth_after
 
             # 更新收盘价
             adjusted_data['close'] = adjusted_closes
 
-            # 计算其他价格的调整比例
-            for i in range(len(adjusted_data)):
-                if adjusted_data.iloc[i]['close_raw'] != 0:  # 避免除零
-                    # 计算调整比例
-                    adjustment_ratio = adjusted_data.iloc[i]['close'] / adjusted_data.iloc[i]['close_raw']
-
-                    # 应用调整比例到其他价格
-                    adjusted_data.iloc[i, adjusted_data.columns.get_loc('open')] = adjusted_data.iloc[i]['open_raw'] * adjustment_ratio
-                    adjusted_data.iloc[i, adjusted_data.columns.get_loc('high')] = adjusted_data.iloc[i]['high_raw'] * adjustment_ratio
-                    adjusted_data.iloc[i, adjusted_data.columns.get_loc('low')] = adjusted_data.iloc[i]['low_raw'] * adjustment_ratio
+            # 按调整比例整列更新其他价格（原始收盘价为0的行保持不变，避免除零）
+            valid = close_raw != 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                adjustment_ratio = np.where(valid, adjusted_closes / close_raw, 1.0)
+            for column in ('open', 'high', 'low'):
+                raw = adjusted_data[f'{column}_raw'].to_numpy(dtype=float)
+                adjusted_data[column] = np.where(valid, raw * adjustment_ratio, raw)
 
             # 添加标记表示这是前复权价格
             adjusted_data['price_type'] = 'forward_adjusted'
@@ -524,6 +525,17 @@ class TushareProvider:
             DataFrame: 搜索结果
         """
         try:
+            # 优先使用内存中的证券主数据（支持代码/名称前缀和拼音首字母搜索）
+            from .security_master import TUSHARE_COLUMNS, get_security_master
+
+            master = get_security_master()
+            if master.ensure_source("tushare"):
+                results = pd.DataFrame(
+                    [security.as_tushare_row() for security in master.search(keyword, market="china_a", limit=None)],
+                    columns=TUSHARE_COLUMNS)
+                logger.debug(f"🔍 搜索'{keyword}'找到{len(results)}只股票")
+                return results
+
             stock_list = self.get_stock_list()
             
             if stock_list.empty:
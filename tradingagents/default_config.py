@@ -21,6 +21,14 @@ DEFAULT_CONFIG = {
     "online_tools": os.getenv("ONLINE_TOOLS_ENABLED", "false").lower() == "true",
     "online_news": os.getenv("ONLINE_NEWS_ENABLED", "true").lower() == "true", 
     "realtime_data": os.getenv("REALTIME_DATA_ENABLED", "false").lower() == "true",
+    # 流式输出：自定义适配器增量返回内容并转发到进度显示
+    "llm_streaming": os.getenv("LLM_STREAMING_ENABLED", "true").lower() == "true",
+    # 分析检查点：每个图节点完成后保存状态，临时性错误重试时从最后完成的节点继续
+    "graph_checkpoint_enabled": os.getenv("GRAPH_CHECKPOINT_ENABLED", "true").lower() == "true",
+    "graph_resume_max_attempts": int(os.getenv("GRAPH_RESUME_MAX_ATTEMPTS", "3")),
+    "graph_resume_retry_delay": float(os.getenv("GRAPH_RESUME_RETRY_DELAY", "5")),
+    # 分析师报告缓存：相同股票、日期、提示词版本和模型的分析师报告直接复用，与研究深度无关
+    "analyst_report_cache_enabled": os.getenv("ANALYST_REPORT_CACHE_ENABLED", "true").lower() == "true",
 
     # Note: Database and cache configuration is now managed by .env file and config.database_manager
     # No database/cache settings in default config to avoid configuration conflicts
@@ -1,16 +1,21 @@
 # TradingAgents/graph/__init__.py
+# 按需导入（PEP 562）：导入子模块（如 graph.propagation）时不加载 trading_graph 及其全部依赖
 
-from .trading_graph import TradingAgentsGraph
-from .conditional_logic import ConditionalLogic
-from .setup import GraphSetup
-from .propagation import Propagator
-from .reflection import Reflector
-from .signal_processing import SignalProcessor
+import importlib
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+_LAZY_ATTRS = {
+    "TradingAgentsGraph": "trading_graph",
+    "ConditionalLogic": "conditional_logic",
+    "GraphSetup": "setup",
+    "Propagator": "propagation",
+    "Reflector": "reflection",
+    "SignalProcessor": "signal_processing",
+}
+
 __all__ = [
     "TradingAgentsGraph",
     "ConditionalLogic",
@@ -19,3 +24,15 @@ __all__ = [
     "Reflector",
     "SignalProcessor",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(f".{_LAZY_ATTRS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -0,0 +1,788 @@
+# TradingAgents/graph/checkpointing.py
+"""
+分析图检查点
+
+每个图节点执行完成后把图状态持久化，分析在风险辩论、信号处理等后期步骤因LLM超时、
+限流等临时性错误失败时，重新执行同一分析会从最后完成的节点继续，而不是重新跑全部
+分析师的工具调用和LLM推理。
+
+- PersistentCheckpointSaver: LangGraph检查点保存器，存储后端为 SQLite（本地默认）、
+  Redis 或 MongoDB；通道值按 (通道, 版本) 存储，未变化的通道在各检查点之间共享
+- analysis_thread_id: 由股票、日期、分析师和模型配置计算的线程ID，同一分析重试时命中同一线程；
+  PersistentCheckpointSaver.claim_thread 在检查点存储中占用线程（带过期时间），防止同一分析
+  在本进程或共享同一存储的其他进程中并发执行时共用线程
+- is_transient_error: 判断异常是否为值得重试的临时性错误（超时、限流、连接失败、5xx）
+
+分析成功结束后删除对应线程的检查点；未完成的线程按 GRAPH_CHECKPOINT_TTL_HOURS 过期清理。
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from tradingagents.config.env_utils import parse_int_env, parse_str_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+CHECKPOINT_DB_FILENAME = "graph_checkpoints.db"
+
+# 值得重试的HTTP状态码
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+_TRANSIENT_NAME_MARKERS = ("timeout", "ratelimit", "connection", "serviceunavailable",
+                           "internalserver", "overloaded", "apiconnection")
+_TRANSIENT_MESSAGE_MARKERS = ("timed out", "timeout", "rate limit", "too many requests", "temporarily",
+                              "connection reset", "connection aborted", "overloaded", "429", "502", "503",
+                              "504", "超时", "限流", "请求过于频繁")
+
+Typed = Tuple[str, bytes]
+
+
+def analysis_thread_id(company_name: str, trade_date: Any, selected_analysts: Sequence[str],
+                       config: Dict[str, Any]) -> str:
+    """同一分析（股票、日期、分析师、模型与辩论轮数相同）得到相同的线程ID"""
+    payload = [
+        str(company_name), str(trade_date), list(selected_analysts),
+        config.get("llm_provider"), config.get("deep_think_llm"), config.get("quick_think_llm"),
+        config.get("max_debate_rounds"), config.get("max_risk_discuss_rounds"), config.get("online_tools"),
+    ]
+    digest = hashlib.sha1(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+    return f"analysis-{digest[:24]}"
+
+
+_active_threads = set()
+_active_threads_lock = threading.Lock()
+
+
+def claim_thread(thread_id: str) -> bool:
+    """标记线程正在本进程中执行；已被占用（同一分析并发执行）时返回False。跨进程占用见 PersistentCheckpointSaver.claim_thread"""
+    with _active_threads_lock:
+        if thread_id in _active_threads:
+            return False
+        _active_threads.add(thread_id)
+        return True
+
+
+def release_thread(thread_id: str):
+    with _active_threads_lock:
+        _active_threads.discard(thread_id)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """超时、限流、连接失败和5xx等临时性错误返回True（沿异常链检查）"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+            return True
+        status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and status in TRANSIENT_STATUS_CODES:
+            return True
+        name = type(error).__name__.lower()
+        if any(marker in name for marker in _TRANSIENT_NAME_MARKERS):
+            return True
+        message = str(error).lower()
+        if any(marker in message for marker in _TRANSIENT_MESSAGE_MARKERS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+# ==================== 存储后端 ====================
+
+class CheckpointStore:
+    """检查点存储接口：检查点、通道值和待写入记录按线程存储"""
+
+    backend = "base"
+
+    def put_checkpoint(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, parent_id: Optional[str],
+                       checkpoint: Typed, metadata: Typed):
+        raise NotImplementedError
+
+    def get_checkpoint(self, thread_id: str, checkpoint_ns: str,
+                       checkpoint_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """checkpoint_id为空时返回最新的检查点"""
+        raise NotImplementedError
+
+    def list_checkpoints(self, thread_id: Optional[str], checkpoint_ns: Optional[str] = None,
+                         before_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """按检查点ID从新到旧列出；thread_id为空时列出所有线程"""
+        raise NotImplementedError
+
+    def put_blobs(self, thread_id: str, checkpoint_ns: str, blobs: List[Tuple[str, str, Typed]]):
+        raise NotImplementedError
+
+    def get_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Typed]:
+        raise NotImplementedError
+
+    def put_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str,
+                   writes: List[Tuple[str, int, str, Typed, str]]):
+        """写入 (task_id, idx, channel, value, task_path)；idx>=0 的记录已存在时保留原值"""
+        raise NotImplementedError
+
+    def get_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple[str, str, Typed]]:
+        raise NotImplementedError
+
+    def delete_thread(self, thread_id: str):
+        raise NotImplementedError
+
+    def prune(self, older_than: float) -> int:
+        """删除最后更新时间早于 older_than 的线程，返回删除的线程数"""
+        return 0
+
+    def claim_thread(self, thread_id: str, owner: str, ttl_seconds: int) -> bool:
+        """占用线程，被其他执行者占用且未过期时返回False；同一执行者再次占用时刷新过期时间"""
+        raise NotImplementedError
+
+    def release_thread(self, thread_id: str, owner: str):
+        """释放本执行者对线程的占用"""
+        raise NotImplementedError
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_claims (
+    thread_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """基于SQLite的检查点存储（本地默认）"""
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 每次操作使用独立连接，图节点可能在不同线程中执行；
+        # 事务结束时提交或回滚，并关闭连接（sqlite3连接自身的上下文管理器不会关闭连接）
+        with closing(sqlite3.connect(self.db_path, timeout=10)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    @staticmethod
+    def _row(row) -> Dict[str, Any]:
+        return {"checkpoint_ns": row[0], "checkpoint_id": row[1], "parent_id": row[2],
+                "checkpoint": (row[3], row[4]), "metadata": (row[5], row[6]), "thread_id": row[7]}
+
+    _SELECT = ("SELECT checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata, "
+               "thread_id FROM checkpoints")
+
+    def put_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint, metadata):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint[0], checkpoint[1],
+                          metadata[0], metadata[1], time.time()))
+
+    def get_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id=None):
+        with self._connect() as conn:
+            if checkpoint_id:
+                row = conn.execute(f"{self._SELECT} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                                   (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            else:
+                row = conn.execute(f"{self._SELECT} WHERE thread_id = ? AND checkpoint_ns = ? "
+                                   "ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)).fetchone()
+        return self._row(row) if row else None
+
+    def list_checkpoints(self, thread_id, checkpoint_ns=None, before_id=None):
+        clauses, params = [], []
+        for column, value, operator in (("thread_id", thread_id, "="), ("checkpoint_ns", checkpoint_ns, "="),
+                                        ("checkpoint_id", before_id, "<")):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"{self._SELECT}{where} ORDER BY checkpoint_id DESC", params).fetchall()
+        for row in rows:
+            yield self._row(row)
+
+    def put_blobs(self, thread_id, checkpoint_ns, blobs):
+        if not blobs:
+            return
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?)",
+                             [(thread_id, checkpoint_ns, channel, version, value[0], value[1])
+                              for channel, version, value in blobs])
+
+    def get_blobs(self, thread_id, checkpoint_ns, versions):
+        values = {}
+        with self._connect() as conn:
+            for channel, version in versions.items():
+                row = conn.execute("SELECT type, value FROM checkpoint_blobs WHERE thread_id = ? AND "
+                                   "checkpoint_ns = ? AND channel = ? AND version = ?",
+                                   (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+                if row:
+                    values[channel] = (row[0], row[1])
+        return values
+
+    def put_writes(self, thread_id, checkpoint_ns, checkpoint_id, writes):
+        with self._lock, self._connect() as conn:
+            for task_id, idx, channel, value, task_path in writes:
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                conn.execute(f"{verb} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel,
+                              value[0], value[1], task_path))
+
+    def get_writes(self, thread_id, checkpoint_ns, checkpoint_id):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT task_id, channel, type, value FROM checkpoint_writes WHERE thread_id = ? "
+                                "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                                (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        return [(row[0], row[1], (row[2], row[3])) for row in rows]
+
+    def delete_thread(self, thread_id):
+        with self._lock, self._connect() as conn:
+            for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def prune(self, older_than):
+        with self._connect() as conn:
+            threads = [row[0] for row in conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (older_than,))]
+        for thread_id in threads:
+            self.delete_thread(thread_id)
+        return len(threads)
+
+    def claim_thread(self, thread_id, owner, ttl_seconds):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            # 单条UPSERT：不存在时插入；已存在时仅当属于本执行者或已过期才改写
+            return conn.execute(
+                "INSERT INTO checkpoint_claims VALUES (?, ?, ?) ON CONFLICT(thread_id) DO UPDATE SET "
+                "owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE checkpoint_claims.owner = excluded.owner OR checkpoint_claims.expires_at < ?",
+                (thread_id, owner, now + ttl_seconds, now)).rowcount == 1
+
+    def release_thread(self, thread_id, owner):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM checkpoint_claims WHERE thread_id = ? AND owner = ?", (thread_id, owner))
+
+
+def _pack(record: Dict[str, Any]) -> str:
+    """Redis中的记录：bytes字段转为base64后存为JSON"""
+    return json.dumps({key: {"b64": base64.b64encode(value).decode("ascii")} if isinstance(value, bytes) else value
+                       for key, value in record.items()})
+
+
+def _unpack(raw) -> Dict[str, Any]:
+    record = json.loads(raw)
+    return {key: base64.b64decode(value["b64"]) if isinstance(value, dict) and "b64" in value else value
+            for key, value in record.items()}
+
+
+class RedisCheckpointStore(CheckpointStore):
+    """
+    基于Redis的检查点存储
+
+    每个线程三个哈希（检查点、通道值、待写入记录），每次写入时刷新整个线程的过期时间。
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, ttl_seconds: int, prefix: str = "graph_checkpoint:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _keys(self, thread_id: str) -> Tuple[str, str, str]:
+        base = f"{self.prefix}{thread_id}"
+        return f"{base}:checkpoints", f"{base}:blobs", f"{base}:writes"
+
+    def _touch(self, pipe, thread_id: str):
+        for key in self._keys(thread_id):
+            pipe.expire(key, self.ttl_seconds)
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def put_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint, metadata):
+        record = {"checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id, "parent_id": parent_id,
+                  "type": checkpoint[0], "checkpoint": checkpoint[1],
+                  "metadata_type": metadata[0], "metadata": metadata[1]}
+        pipe = self.client.pipeline()
+        pipe.hset(self._keys(thread_id)[0], f"{checkpoint_ns}\x00{checkpoint_id}", _pack(record))
+        self._touch(pipe, thread_id)
+        pipe.execute()
+
+    @staticmethod
+    def _row(thread_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        return {"thread_id": thread_id, "checkpoint_ns": record["checkpoint_ns"],
+                "checkpoint_id": record["checkpoint_id"], "parent_id": record["parent_id"],
+                "checkpoint": (record["type"], record["checkpoint"]),
+                "metadata": (record["metadata_type"], record["metadata"])}
+
+    def get_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id=None):
+        key = self._keys(thread_id)[0]
+        if not checkpoint_id:
+            ids = [self._decode(field).split("\x00", 1) for field in self.client.hkeys(key)]
+            ids = [cid for ns, cid in ids if ns == checkpoint_ns]
+            if not ids:
+                return None
+            checkpoint_id = max(ids)
+        raw = self.client.hget(key, f"{checkpoint_ns}\x00{checkpoint_id}")
+        return self._row(thread_id, _unpack(raw)) if raw else None
+
+    def list_checkpoints(self, thread_id, checkpoint_ns=None, before_id=None):
+        if thread_id is None:
+            suffix = ":checkpoints"
+            thread_ids = [self._decode(key)[len(self.prefix):-len(suffix)]
+                          for key in self.client.scan_iter(match=f"{self.prefix}*{suffix}")]
+        else:
+            thread_ids = [thread_id]
+        for current in thread_ids:
+            records = [_unpack(raw) for raw in self.client.hvals(self._keys(current)[0])]
+            records = [record for record in records
+                       if (checkpoint_ns is None or record["checkpoint_ns"] == checkpoint_ns)
+                       and (before_id is None or record["checkpoint_id"] < before_id)]
+            for record in sorted(records, key=lambda item: item["checkpoint_id"], reverse=True):
+                yield self._row(current, record)
+
+    def put_blobs(self, thread_id, checkpoint_ns, blobs):
+        if not blobs:
+            return
+        pipe = self.client.pipeline()
+        key = self._keys(thread_id)[1]
+        for channel, version, value in blobs:
+            pipe.hset(key, f"{checkpoint_ns}\x00{channel}\x00{version}", _pack({"type": value[0], "value": value[1]}))
+        self._touch(pipe, thread_id)
+        pipe.execute()
+
+    def get_blobs(self, thread_id, checkpoint_ns, versions):
+        if not versions:
+            return {}
+        channels = list(versions)
+        raws = self.client.hmget(self._keys(thread_id)[1],
+                                 [f"{checkpoint_ns}\x00{channel}\x00{versions[channel]}" for channel in channels])
+        values = {}
+        for channel, raw in zip(channels, raws):
+            if raw:
+                record = _unpack(raw)
+                values[channel] = (record["type"], record["value"])
+        return values
+
+    def put_writes(self, thread_id, checkpoint_ns, checkpoint_id, writes):
+        pipe = self.client.pipeline()
+        key = self._keys(thread_id)[2]
+        for task_id, idx, channel, value, task_path in writes:
+            field = f"{checkpoint_ns}\x00{checkpoint_id}\x00{task_id}\x00{idx}"
+            record = _pack({"task_id": task_id, "idx": idx, "channel": channel, "type": value[0],
+                            "value": value[1], "task_path": task_path})
+            if idx >= 0:
+                pipe.hsetnx(key, field, record)
+            else:
+                pipe.hset(key, field, record)
+        self._touch(pipe, thread_id)
+        pipe.execute()
+
+    def get_writes(self, thread_id, checkpoint_ns, checkpoint_id):
+        prefix = f"{checkpoint_ns}\x00{checkpoint_id}\x00"
+        records = [_unpack(raw) for field, raw in self.client.hgetall(self._keys(thread_id)[2]).items()
+                   if self._decode(field).startswith(prefix)]
+        records.sort(key=lambda record: (record["task_id"], record["idx"]))
+        return [(record["task_id"], record["channel"], (record["type"], record["value"])) for record in records]
+
+    def delete_thread(self, thread_id):
+        self.client.delete(*self._keys(thread_id))
+
+    def _claim_key(self, thread_id: str) -> str:
+        return f"{self.prefix}{thread_id}:claim"
+
+    def claim_thread(self, thread_id, owner, ttl_seconds):
+        key = self._claim_key(thread_id)
+        if self.client.set(key, owner, nx=True, ex=ttl_seconds):
+            return True
+        current = self.client.get(key)
+        return current is not None and self._decode(current) == owner and bool(self.client.expire(key, ttl_seconds))
+
+    def release_thread(self, thread_id, owner):
+        from redis.exceptions import WatchError
+        key = self._claim_key(thread_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.get(key)
+                if current is not None and self._decode(current) == owner:
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+            except WatchError:
+                # 释放期间占用已过期并被其他执行者取得，保留对方的占用
+                pass
+
+
+class MongoCheckpointStore(CheckpointStore):
+    """基于MongoDB的检查点存储"""
+
+    backend = "mongodb"
+
+    def __init__(self, database):
+        self.checkpoints = database["graph_checkpoints"]
+        self.blobs = database["graph_checkpoint_blobs"]
+        self.writes = database["graph_checkpoint_writes"]
+        self.claims = database["graph_checkpoint_claims"]
+        self.checkpoints.create_index([("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)], unique=True)
+        self.checkpoints.create_index([("created_at", 1)])
+        self.blobs.create_index([("thread_id", 1), ("checkpoint_ns", 1), ("channel", 1), ("version", 1)],
+                                unique=True)
+        self.writes.create_index([("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", 1),
+                                  ("task_id", 1), ("idx", 1)], unique=True)
+
+    @staticmethod
+    def _row(doc) -> Dict[str, Any]:
+        return {"thread_id": doc["thread_id"], "checkpoint_ns": doc["checkpoint_ns"],
+                "checkpoint_id": doc["checkpoint_id"], "parent_id": doc.get("parent_id"),
+                "checkpoint": (doc["type"], bytes(doc["checkpoint"])),
+                "metadata": (doc["metadata_type"], bytes(doc["metadata"]))}
+
+    def put_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint, metadata):
+        key = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+        self.checkpoints.replace_one(key, dict(key, parent_id=parent_id, type=checkpoint[0], checkpoint=checkpoint[1],
+                                               metadata_type=metadata[0], metadata=metadata[1],
+                                               created_at=time.time()), upsert=True)
+
+    def get_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id=None):
+        query = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        if checkpoint_id:
+            query["checkpoint_id"] = checkpoint_id
+        doc = self.checkpoints.find_one(query, sort=[("checkpoint_id", -1)])
+        return self._row(doc) if doc else None
+
+    def list_checkpoints(self, thread_id, checkpoint_ns=None, before_id=None):
+        query: Dict[str, Any] = {}
+        if thread_id is not None:
+            query["thread_id"] = thread_id
+        if checkpoint_ns is not None:
+            query["checkpoint_ns"] = checkpoint_ns
+        if before_id is not None:
+            query["checkpoint_id"] = {"$lt": before_id}
+        for doc in self.checkpoints.find(query).sort("checkpoint_id", -1):
+            yield self._row(doc)
+
+    def put_blobs(self, thread_id, checkpoint_ns, blobs):
+        for channel, version, value in blobs:
+            key = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "channel": channel, "version": version}
+            self.blobs.replace_one(key, dict(key, type=value[0], value=value[1]), upsert=True)
+
+    def get_blobs(self, thread_id, checkpoint_ns, versions):
+        if not versions:
+            return {}
+        wanted = {(channel, str(version)) for channel, version in versions.items()}
+        docs = self.blobs.find({"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                "channel": {"$in": list(versions)}})
+        return {doc["channel"]: (doc["type"], bytes(doc["value"])) for doc in docs
+                if (doc["channel"], doc["version"]) in wanted}
+
+    def put_writes(self, thread_id, checkpoint_ns, checkpoint_id, writes):
+        for task_id, idx, channel, value, task_path in writes:
+            key = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+                   "task_id": task_id, "idx": idx}
+            doc = {"channel": channel, "type": value[0], "value": value[1], "task_path": task_path}
+            if idx >= 0:
+                self.writes.update_one(key, {"$setOnInsert": doc}, upsert=True)
+            else:
+                self.writes.update_one(key, {"$set": doc}, upsert=True)
+
+    def get_writes(self, thread_id, checkpoint_ns, checkpoint_id):
+        docs = self.writes.find({"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint_id}).sort([("task_id", 1), ("idx", 1)])
+        return [(doc["task_id"], doc["channel"], (doc["type"], bytes(doc["value"]))) for doc in docs]
+
+    def delete_thread(self, thread_id):
+        for collection in (self.checkpoints, self.blobs, self.writes):
+            collection.delete_many({"thread_id": thread_id})
+
+    def prune(self, older_than):
+        threads = [doc["_id"] for doc in self.checkpoints.aggregate([
+            {"$group": {"_id": "$thread_id", "updated_at": {"$max": "$created_at"}}},
+            {"$match": {"updated_at": {"$lt": older_than}}},
+        ])]
+        for thread_id in threads:
+            self.delete_thread(thread_id)
+        return len(threads)
+
+    def claim_thread(self, thread_id, owner, ttl_seconds):
+        from pymongo.errors import DuplicateKeyError
+        now = time.time()
+        try:
+            # 条件不满足时upsert会以相同_id插入而触发唯一键冲突，即已被其他执行者占用
+            self.claims.update_one({"_id": thread_id, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+                                   {"$set": {"owner": owner, "expires_at": now + ttl_seconds}}, upsert=True)
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def release_thread(self, thread_id, owner):
+        self.claims.delete_one({"_id": thread_id, "owner": owner})
+
+
+# ==================== LangGraph检查点保存器 ====================
+
+class PersistentCheckpointSaver(BaseCheckpointSaver):
+    """把LangGraph检查点写入 CheckpointStore 的保存器（同步实现，异步接口在线程中执行）"""
+
+    def __init__(self, store: CheckpointStore, serde=None, claim_ttl_seconds: int = 1800):
+        super().__init__(serde=serde)
+        self.store = store
+        self.claim_ttl_seconds = claim_ttl_seconds
+        # 执行者标识：区分共享同一存储的不同进程（及同进程内的不同保存器）
+        self.claim_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._claimed: Dict[str, float] = {}
+        self._claimed_lock = threading.Lock()
+
+    def claim_thread(self, thread_id: str) -> bool:
+        """
+        占用线程：先在本进程内标记，再在检查点存储中占用（带过期时间，进程崩溃后自动失效）
+
+        同一分析已在本进程或共享同一存储的其他进程中执行时返回False；存储不可用、无法确认占用时
+        同样返回False，调用方改用独立线程ID，宁可不续跑也不与其他执行共用线程。
+        """
+        if not claim_thread(thread_id):
+            return False
+        try:
+            claimed = self.store.claim_thread(thread_id, self.claim_owner, self.claim_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"⚠️ [检查点] 无法在存储中占用线程 {thread_id}: {e}")
+            claimed = False
+        if not claimed:
+            release_thread(thread_id)
+            return False
+        with self._claimed_lock:
+            self._claimed[thread_id] = time.time()
+        return True
+
+    def release_thread(self, thread_id: str):
+        release_thread(thread_id)
+        with self._claimed_lock:
+            claimed = self._claimed.pop(thread_id, None) is not None
+        if not claimed:
+            return
+        try:
+            self.store.release_thread(thread_id, self.claim_owner)
+        except Exception as e:
+            logger.warning(f"⚠️ [检查点] 释放线程占用失败（到期后自动失效）: {e}")
+
+    def _refresh_claim(self, thread_id: str):
+        """长时间运行的分析在写入检查点时续期占用，每过三分之一过期时间续期一次"""
+        now = time.time()
+        with self._claimed_lock:
+            last = self._claimed.get(thread_id)
+            if last is None or now - last < self.claim_ttl_seconds / 3:
+                return
+            self._claimed[thread_id] = now
+        try:
+            if not self.store.claim_thread(thread_id, self.claim_owner, self.claim_ttl_seconds):
+                logger.warning(f"⚠️ [检查点] 线程 {thread_id} 的占用已过期并被其他执行取得")
+        except Exception as e:
+            logger.warning(f"⚠️ [检查点] 续期线程占用失败: {e}")
+
+    @property
+    def backend(self) -> str:
+        return self.store.backend
+
+    def _to_tuple(self, thread_id: str, row: Dict[str, Any]) -> CheckpointTuple:
+        checkpoint_ns, checkpoint_id = row["checkpoint_ns"], row["checkpoint_id"]
+        checkpoint = self.serde.loads_typed(row["checkpoint"])
+        blobs = self.store.get_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"])
+        checkpoint["channel_values"] = {channel: self.serde.loads_typed(value)
+                                        for channel, value in blobs.items() if value[0] != "empty"}
+        writes = self.store.get_writes(thread_id, checkpoint_ns, checkpoint_id)
+        parent_id = row["parent_id"]
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(row["metadata"]),
+            parent_config=({"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                             "checkpoint_id": parent_id}} if parent_id else None),
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        row = self.store.get_checkpoint(thread_id, checkpoint_ns, get_checkpoint_id(config))
+        return self._to_tuple(thread_id, row) if row else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        configurable = (config or {}).get("configurable", {})
+        checkpoint_id = get_checkpoint_id(config) if config else None
+        rows = self.store.list_checkpoints(configurable.get("thread_id"), configurable.get("checkpoint_ns"),
+                                           get_checkpoint_id(before) if before else None)
+        for row in rows:
+            if checkpoint_id and row["checkpoint_id"] != checkpoint_id:
+                continue
+            if filter:
+                metadata = self.serde.loads_typed(row["metadata"])
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None and limit <= 0:
+                break
+            if limit is not None:
+                limit -= 1
+            yield self._to_tuple(row["thread_id"], row)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        self.store.put_blobs(thread_id, checkpoint_ns, [
+            (channel, str(version), self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b""))
+            for channel, version in new_versions.items()
+        ])
+        self.store.put_checkpoint(thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                                  self.serde.dumps_typed(stored),
+                                  self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)))
+        self._refresh_claim(thread_id)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        configurable = config["configurable"]
+        self.store.put_writes(configurable["thread_id"], configurable.get("checkpoint_ns", ""),
+                              configurable["checkpoint_id"],
+                              [(task_id, WRITES_IDX_MAP.get(channel, idx), channel, self.serde.dumps_typed(value),
+                                task_path) for idx, (channel, value) in enumerate(writes)])
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.store.delete_thread(thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+# ==================== 全局检查点保存器 ====================
+
+def _default_db_path() -> str:
+    return parse_str_env("GRAPH_CHECKPOINT_DB", os.path.join("data", "checkpoints", CHECKPOINT_DB_FILENAME))
+
+
+def create_checkpoint_store(backend: str = "auto", db_path: Optional[str] = None,
+                            ttl_seconds: int = 72 * 3600) -> CheckpointStore:
+    """创建检查点存储，auto模式下依次尝试Redis、MongoDB，都不可用时使用本地SQLite"""
+    if backend in ("auto", "redis", "mongodb"):
+        try:
+            from tradingagents.config.database_manager import get_database_manager
+            manager = get_database_manager()
+            if backend in ("auto", "redis") and manager.is_redis_available():
+                return RedisCheckpointStore(manager.get_redis_client(), ttl_seconds)
+            if backend in ("auto", "mongodb") and manager.is_mongodb_available():
+                return MongoCheckpointStore(manager.get_mongodb_database())
+        except Exception as e:
+            logger.debug(f"检查点存储获取数据库连接失败: {e}")
+        if backend != "auto":
+            logger.warning(f"⚠️ {backend}不可用，分析检查点降级为SQLite")
+    return SQLiteCheckpointStore(db_path or _default_db_path())
+
+
+_checkpointer: Optional[PersistentCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> PersistentCheckpointSaver:
+    """获取全局检查点保存器，首次创建时清理过期线程"""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                ttl_seconds = parse_int_env("GRAPH_CHECKPOINT_TTL_HOURS", 72) * 3600
+                store = create_checkpoint_store(parse_str_env("GRAPH_CHECKPOINT_BACKEND", "auto"),
+                                                ttl_seconds=ttl_seconds)
+                try:
+                    pruned = store.prune(time.time() - ttl_seconds)
+                    if pruned:
+                        logger.info(f"🧹 已清理 {pruned} 个过期的分析检查点")
+                except Exception as e:
+                    logger.warning(f"⚠️ 清理过期分析检查点失败: {e}")
+                logger.info(f"💾 分析检查点初始化 - 后端: {store.backend}")
+                _checkpointer = PersistentCheckpointSaver(
+                    store, claim_ttl_seconds=parse_int_env("GRAPH_CHECKPOINT_CLAIM_TTL_MINUTES", 30) * 60)
+    return _checkpointer
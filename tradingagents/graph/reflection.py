@@ -1,7 +1,11 @@
 # TradingAgents/graph/reflection.py
 
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Dict, Any
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+from tradingagents.llm_adapters.response_cache import invoke_with_cache
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -11,7 +15,7 @@ logger = get_logger("default")
 class Reflector:
     """Handles reflection on decisions and updating memory."""
 
-    def __init__(self, quick_thinking_llm: ChatOpenAI):
+    def __init__(self, quick_thinking_llm: "ChatOpenAI"):
         """Initialize the reflector with an LLM."""
         self.quick_thinking_llm = quick_thinking_llm
         self.reflection_system_prompt = self._get_reflection_prompt()
@@ -71,7 +75,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             ),
         ]
 
-        result = self.quick_thinking_llm.invoke(messages).content
+        result = invoke_with_cache(self.quick_thinking_llm, messages).content
         return result
 
     def reflect_bull_researcher(self, current_state, returns_losses, bull_memory):
@@ -1,16 +1,19 @@
 # TradingAgents/graph/setup.py
 
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Dict, Any
 from langgraph.graph import END, StateGraph, START
 from langgraph.prebuilt import ToolNode
 
 from tradingagents.agents import *
 from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
+from tradingagents.agents.utils.report_cache import with_report_cache
 
 from .conditional_logic import ConditionalLogic
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
@@ -21,8 +24,8 @@ class GraphSetup:
 
     def __init__(
         self,
-        quick_thinking_llm: ChatOpenAI,
-        deep_thinking_llm: ChatOpenAI,
+        quick_thinking_llm: "ChatOpenAI",
+        deep_thinking_llm: "ChatOpenAI",
         toolkit: Toolkit,
         tool_nodes: Dict[str, ToolNode],
         bull_memory,
@@ -49,7 +52,7 @@ class GraphSetup:
         self.react_llm = react_llm
 
     def setup_graph(
-        self, selected_analysts=["market", "social", "news", "fundamentals"]
+        self, selected_analysts=["market", "social", "news", "fundamentals"], checkpointer=None
     ):
         """Set up and compile the agent workflow graph.
 
@@ -59,6 +62,8 @@ class GraphSetup:
                 - "social": Social media analyst
                 - "news": News analyst
                 - "fundamentals": Fundamentals analyst
+            checkpointer: Optional LangGraph checkpoint saver; when given the graph
+                state is persisted after every node so a failed run can resume
         """
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
@@ -136,6 +141,13 @@ class GraphSetup:
             delete_nodes["fundamentals"] = create_msg_delete()
             tool_nodes["fundamentals"] = self.tool_nodes["fundamentals"]
 
+        # 分析师报告缓存：开始工具调用循环前复用相同股票、日期、提示词版本和模型的报告
+        if self.config.get("analyst_report_cache_enabled", False):
+            analyst_nodes = {
+                analyst_type: with_report_cache(analyst_type, node, self.config)
+                for analyst_type, node in analyst_nodes.items()
+            }
+
         # Create researcher and manager nodes
         bull_researcher_node = create_bull_researcher(
             self.quick_thinking_llm, self.bull_memory
@@ -250,4 +262,4 @@ class GraphSetup:
         workflow.add_edge("Risk Judge", END)
 
         # Compile and return
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
@@ -1,15 +1,18 @@
 # TradingAgents/graph/trading_graph.py
 
+import asyncio
 import os
+import time
+import uuid
 from pathlib import Path
 import json
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from tradingagents.llm_adapters import ChatDashScope, ChatDashScopeOpenAI, ChatGoogleOpenAI
+# 各LLM提供商的客户端在初始化对应提供商时才导入，避免加载全部SDK
+from tradingagents.llm_adapters.streaming import enable_streaming, stream_progress_scope
+from tradingagents.utils.tracing import get_current_trace
+from tradingagents.utils.tracing_callbacks import TracingCallbackHandler
 
 from langgraph.prebuilt import ToolNode
 
@@ -30,6 +33,11 @@ from tradingagents.agents.utils.agent_states import (
 )
 from tradingagents.dataflows.interface import set_config
 
+from .checkpointing import (
+    analysis_thread_id,
+    get_checkpointer,
+    is_transient_error,
+)
 from .conditional_logic import ConditionalLogic
 from .setup import GraphSetup
 from .propagation import Propagator
@@ -55,6 +63,7 @@ class TradingAgentsGraph:
         """
         self.debug = debug
         self.config = config or DEFAULT_CONFIG
+        self.selected_analysts = list(selected_analysts)
 
         # Update the interface's config
         set_config(self.config)
@@ -66,6 +75,9 @@ class TradingAgentsGraph:
         )
 
         # Initialize LLMs
+        if self.config["llm_provider"].lower() in ("openai", "siliconflow", "openrouter", "ollama"):
+            from langchain_openai import ChatOpenAI
+
         if self.config["llm_provider"].lower() == "openai":
             self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
             self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
@@ -113,10 +125,14 @@ class TradingAgentsGraph:
             self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
             self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
         elif self.config["llm_provider"].lower() == "anthropic":
+            from langchain_anthropic import ChatAnthropic
+
             self.deep_thinking_llm = ChatAnthropic(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
             self.quick_thinking_llm = ChatAnthropic(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
         elif self.config["llm_provider"].lower() == "google":
             # 使用 Google OpenAI 兼容适配器，解决工具调用格式不匹配问题
+            from tradingagents.llm_adapters.google_openai_adapter import ChatGoogleOpenAI
+
             logger.info(f"🔧 使用Google AI OpenAI 兼容适配器 (解决工具调用问题)")
             google_api_key = os.getenv('GOOGLE_API_KEY')
             if not google_api_key:
@@ -143,6 +159,8 @@ class TradingAgentsGraph:
               "dashscope" in self.config["llm_provider"].lower() or
               "阿里百炼" in self.config["llm_provider"]):
             # 使用 OpenAI 兼容适配器，支持原生 Function Calling
+            from tradingagents.llm_adapters.dashscope_openai_adapter import ChatDashScopeOpenAI
+
             logger.info(f"🔧 使用阿里百炼 OpenAI 兼容适配器 (支持原生工具调用)")
             self.deep_thinking_llm = ChatDashScopeOpenAI(
                 model=self.config["deep_think_llm"],
@@ -232,6 +250,14 @@ class TradingAgentsGraph:
             logger.info("✅ [千帆] 文心一言适配器已配置成功")
         else:
             raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
+
+        # 开启流式输出，长时间的深度思考调用可实时展示生成内容
+        if self.config.get("llm_streaming", False):
+            streaming_llms = [
+                llm for llm in (self.deep_thinking_llm, self.quick_thinking_llm) if enable_streaming(llm)
+            ]
+            if streaming_llms:
+                logger.info(f"📡 已为 {len(streaming_llms)} 个LLM开启流式输出")
         
         self.toolkit = Toolkit(config=self.config)
 
@@ -281,8 +307,16 @@ class TradingAgentsGraph:
         self.ticker = None
         self.log_states_dict = {}  # date to full state dict
 
+        # 分析检查点：每个节点完成后保存图状态，失败重试时从最后完成的节点继续
+        self.checkpointer = None
+        if self.config.get("graph_checkpoint_enabled", False):
+            try:
+                self.checkpointer = get_checkpointer()
+            except Exception as e:
+                logger.warning(f"⚠️ 分析检查点不可用，本次分析不保存检查点: {e}")
+
         # Set up the graph
-        self.graph = self.graph_setup.setup_graph(selected_analysts)
+        self.graph = self.graph_setup.setup_graph(selected_analysts, checkpointer=self.checkpointer)
 
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources."""
@@ -331,8 +365,77 @@ class TradingAgentsGraph:
             ),
         }
 
-    def propagate(self, company_name, trade_date):
-        """Run the trading agents graph for a company on a specific date."""
+    def _graph_args(self) -> Dict[str, Any]:
+        """图调用参数；当前上下文开启了分析追踪时挂上追踪回调"""
+        args = self.propagator.get_graph_args()
+        trace = get_current_trace()
+        if trace is not None:
+            args["config"]["callbacks"] = [TracingCallbackHandler(trace)]
+        return args
+
+    def prepare_run(self, company_name, trade_date, resume=True):
+        """创建图输入和调用参数
+
+        启用检查点时按分析计算线程ID：该线程有上次失败留下的检查点且 resume=True 时图输入为 None，
+        从最后完成的节点继续（图已执行完、在信号处理时失败的直接得到保存的最终状态）；
+        否则清除该线程的旧检查点后从初始状态开始。
+        同一分析正在本进程或共享检查点存储的其他进程中执行（或无法确认占用）时使用独立的线程ID，
+        两次执行互不干扰。
+        调用方在执行结束（成功或失败）后需调用 finish_run()。
+
+        Returns:
+            (图输入, 图调用参数)
+        """
+        init_agent_state = self.propagator.create_initial_state(
+            company_name, trade_date
+        )
+        args = self._graph_args()
+        if self.checkpointer is None:
+            return init_agent_state, args
+
+        thread_id = analysis_thread_id(company_name, trade_date, self.selected_analysts, self.config)
+        if not self.checkpointer.claim_thread(thread_id):
+            thread_id = f"{thread_id}-{uuid.uuid4().hex[:8]}"
+            self.checkpointer.claim_thread(thread_id)
+            logger.info(f"💾 [检查点] 相同分析正在执行，本次使用独立检查点: {thread_id}")
+        args["config"]["configurable"] = {"thread_id": thread_id}
+        try:
+            snapshot = self.graph.get_state(args["config"])
+        except BaseException:
+            self.checkpointer.release_thread(thread_id)
+            raise
+        if resume and snapshot.values:
+            next_step = ', '.join(snapshot.next) if snapshot.next else "信号处理"
+            logger.info(f"♻️ [检查点] 从检查点恢复分析 {company_name} {trade_date}，下一步: {next_step}")
+            return None, args
+        if snapshot.values:
+            self.checkpointer.delete_thread(thread_id)
+        return init_agent_state, args
+
+    def finish_run(self, args, completed=True):
+        """结束一次图执行：成功完成时删除对应线程的检查点，失败时保留以便重试时继续"""
+        thread_id = args["config"].get("configurable", {}).get("thread_id")
+        if self.checkpointer is None or not thread_id:
+            return
+        self.checkpointer.release_thread(thread_id)
+        if not completed:
+            return
+        try:
+            self.checkpointer.delete_thread(thread_id)
+        except Exception as e:
+            logger.warning(f"⚠️ [检查点] 删除已完成分析的检查点失败: {e}")
+
+    def propagate(self, company_name, trade_date, stream_callback=None, resume=True):
+        """Run the trading agents graph for a company on a specific date.
+
+        Args:
+            company_name: Ticker to analyse
+            trade_date: Analysis date
+            stream_callback: Optional callable receiving incremental LLM output
+                events (see tradingagents.llm_adapters.streaming)
+            resume: Continue from the last completed node when an unfinished
+                checkpoint exists for this analysis (checkpointing enabled only)
+        """
 
         # 添加详细的接收日志
         logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
@@ -344,36 +447,100 @@ class TradingAgentsGraph:
 
         # Initialize state
         logger.debug(f"🔍 [GRAPH DEBUG] 创建初始状态，传递参数: company_name='{company_name}', trade_date='{trade_date}'")
-        init_agent_state = self.propagator.create_initial_state(
-            company_name, trade_date
-        )
-        logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '{init_agent_state.get('company_of_interest', 'NOT_FOUND')}'")
-        logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
-        args = self.propagator.get_graph_args()
-
-        if self.debug:
-            # Debug mode with tracing
-            trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
-                if len(chunk["messages"]) == 0:
-                    pass
+        init_agent_state, args = self.prepare_run(company_name, trade_date, resume=resume)
+
+        try:
+            with stream_progress_scope(stream_callback):
+                if self.debug:
+                    # Debug mode with tracing
+                    trace = []
+                    for chunk in self.graph.stream(init_agent_state, **args):
+                        if len(chunk["messages"]) == 0:
+                            pass
+                        else:
+                            chunk["messages"][-1].pretty_print()
+                            trace.append(chunk)
+
+                    final_state = trace[-1]
                 else:
-                    chunk["messages"][-1].pretty_print()
-                    trace.append(chunk)
+                    # Standard mode without tracing
+                    final_state = self.graph.invoke(init_agent_state, **args)
 
-            final_state = trace[-1]
-        else:
-            # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
+            # Store current state for reflection
+            self.curr_state = final_state
 
-        # Store current state for reflection
-        self.curr_state = final_state
+            # Log state
+            self._log_state(trade_date, final_state)
 
-        # Log state
-        self._log_state(trade_date, final_state)
+            signal = self.process_signal(final_state["final_trade_decision"], company_name)
+        except BaseException:
+            self.finish_run(args, completed=False)
+            raise
+
+        self.finish_run(args)
 
         # Return decision and processed signal
-        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+        return final_state, signal
+
+    def propagate_resumable(self, company_name, trade_date, stream_callback=None, max_attempts=None):
+        """propagate()，遇到超时、限流等临时性错误时重试
+
+        启用检查点时每次重试都从最后完成的节点继续，后期步骤失败只需重新执行失败的节点。
+
+        Args:
+            max_attempts: 最多执行次数，默认取配置 graph_resume_max_attempts
+        """
+        attempts = max(1, max_attempts or self.config.get("graph_resume_max_attempts", 3))
+        delay = self.config.get("graph_resume_retry_delay", 5)
+        for attempt in range(1, attempts + 1):
+            try:
+                return self.propagate(company_name, trade_date, stream_callback=stream_callback)
+            except Exception as e:
+                if attempt >= attempts or not is_transient_error(e):
+                    raise
+                wait = delay * 2 ** (attempt - 1)
+                resume_hint = "从检查点继续" if self.checkpointer is not None else "重新执行"
+                logger.warning(f"⚠️ [检查点] 分析 {company_name} 第{attempt}次执行失败: {e}，"
+                               f"{wait:.0f}秒后{resume_hint}")
+                time.sleep(wait)
+
+    async def apropagate(self, company_name, trade_date, stream_callback=None, resume=True):
+        """Async counterpart of propagate() driven by graph.astream.
+
+        LLM-bound nodes (researchers, managers, trader, risk debators) await
+        the adapters' native async clients; analyst nodes and data tools that
+        are still synchronous run in LangGraph's executor. Many analyses can
+        therefore share one event loop. Use a separate TradingAgentsGraph
+        instance per concurrent analysis, since curr_state/ticker are per
+        instance.
+        """
+        self.ticker = company_name
+
+        init_agent_state, args = await asyncio.to_thread(self.prepare_run, company_name, trade_date, resume)
+
+        try:
+            with stream_progress_scope(stream_callback):
+                final_state = None
+                async for chunk in self.graph.astream(init_agent_state, **args):
+                    if self.debug and len(chunk["messages"]) > 0:
+                        chunk["messages"][-1].pretty_print()
+                    final_state = chunk
+
+            # Store current state for reflection
+            self.curr_state = final_state
+
+            # 文件写入和信号提取仍为同步实现，放到线程中执行避免阻塞事件循环
+            await asyncio.to_thread(self._log_state, trade_date, final_state)
+            signal = await asyncio.to_thread(
+                self.process_signal, final_state["final_trade_decision"], company_name
+            )
+        except BaseException:
+            self.finish_run(args, completed=False)
+            raise
+
+        await asyncio.to_thread(self.finish_run, args)
+
+        return final_state, signal
 
     def _log_state(self, trade_date, final_state):
         """Log the final state to a JSON file."""
@@ -1,6 +1,24 @@
 # LLM Adapters for TradingAgents
-from .dashscope_adapter import ChatDashScope
-from .dashscope_openai_adapter import ChatDashScopeOpenAI
-from .google_openai_adapter import ChatGoogleOpenAI
+# 适配器按需导入（PEP 562），只有实际使用的提供商才会加载对应SDK
+
+import importlib
+
+_LAZY_ATTRS = {
+    "ChatDashScope": "dashscope_adapter",
+    "ChatDashScopeOpenAI": "dashscope_openai_adapter",
+    "ChatGoogleOpenAI": "google_openai_adapter",
+}
 
 __all__ = ["ChatDashScope", "ChatDashScopeOpenAI", "ChatGoogleOpenAI"]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(f".{_LAZY_ATTRS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -5,17 +5,20 @@
 
 import os
 import json
-from typing import Any, Dict, List, Optional, Union, Iterator, AsyncIterator, Sequence
+from typing import Any, ClassVar, Dict, List, Optional, Union, Iterator, AsyncIterator, Sequence
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
-from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.language_models.chat_models import agenerate_from_stream, generate_from_stream
+from langchain_core.messages import BaseMessage, AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from langchain_core.callbacks.manager import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
 from langchain_core.tools import BaseTool
 from langchain_core.utils.function_calling import convert_to_openai_tool
 from pydantic import Field, SecretStr
 import dashscope
-from dashscope import Generation
+from dashscope import AioGeneration, Generation
 from ..config.config_manager import token_tracker
+from .response_cache import CACHE_FLAG, lookup_cached_response
+from .streaming import astream_with_progress, stream_with_progress
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -32,6 +35,12 @@ class ChatDashScope(BaseChatModel):
     temperature: float = Field(default=0.1, description="生成温度")
     max_tokens: int = Field(default=2000, description="最大生成token数")
     top_p: float = Field(default=0.9, description="核采样参数")
+    streaming: bool = Field(default=False, description="是否以流式方式获取输出")
+    
+    # 支持按调用点开启的响应缓存（invoke时传入use_cache=True）
+    supports_response_cache: ClassVar[bool] = True
+    # 支持将流式输出转发到进度管道（streaming=True时生效）
+    supports_streaming_progress: ClassVar[bool] = True
     
     # 内部属性
     _client: Any = None
@@ -93,15 +102,9 @@ class ChatDashScope(BaseChatModel):
         
         return dashscope_messages
     
-    def _generate(
-        self,
-        messages: List[BaseMessage],
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> ChatResult:
-        """生成聊天回复"""
-        
+    def _build_request_params(self, messages: List[BaseMessage], stop: Optional[List[str]],
+                              kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 DashScope 请求参数"""
         # 转换消息格式
         dashscope_messages = self._convert_messages_to_dashscope_format(messages)
         
@@ -121,6 +124,83 @@ class ChatDashScope(BaseChatModel):
         
         # 合并额外参数
         request_params.update(kwargs)
+        return request_params
+    
+    def _track_response_usage(self, response: Any, messages: List[BaseMessage], kwargs: Dict[str, Any]):
+        """从响应中提取token使用量并记录"""
+        # 提取token使用量信息
+        input_tokens = 0
+        output_tokens = 0
+        
+        # DashScope API响应中包含usage信息
+        if hasattr(response, 'usage') and response.usage:
+            usage = response.usage
+            # 根据API文档，usage可能包含input_tokens和output_tokens
+            if hasattr(usage, 'input_tokens'):
+                input_tokens = usage.input_tokens
+            if hasattr(usage, 'output_tokens'):
+                output_tokens = usage.output_tokens
+            # 有些情况下可能是total_tokens
+            elif hasattr(usage, 'total_tokens'):
+                # 估算输入和输出token（如果没有分别提供）
+                total_tokens = usage.total_tokens
+                # 简单估算：假设输入占30%，输出占70%
+                input_tokens = int(total_tokens * 0.3)
+                output_tokens = int(total_tokens * 0.7)
+        
+        # 记录token使用量
+        if input_tokens > 0 or output_tokens > 0:
+            try:
+                # 生成会话ID（如果没有提供）
+                session_id = kwargs.get('session_id', f"dashscope_{hash(str(messages))%10000}")
+                analysis_type = kwargs.get('analysis_type', 'stock_analysis')
+                
+                # 使用TokenTracker记录使用量
+                token_tracker.track_usage(
+                    provider="dashscope",
+                    model_name=self.model,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=session_id,
+                    analysis_type=analysis_type
+                )
+            except Exception as track_error:
+                # 记录失败不应该影响主要功能
+                logger.info(f"Token tracking failed: {track_error}")
+    
+    def _should_stream(self, *, async_api: bool, run_manager=None, **kwargs: Any) -> bool:
+        """invoke统一走_generate（缓存与token统计），仅显式stream()调用直接走_stream"""
+        if not kwargs.get("stream"):
+            return False
+        return super()._should_stream(async_api=async_api, run_manager=run_manager, **kwargs)
+    
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """生成聊天回复"""
+        
+        # 调用点显式开启时先查询响应缓存
+        cache, cache_key = None, None
+        if kwargs.pop(CACHE_FLAG, False):
+            cache, cache_key, cached = lookup_cached_response(
+                "dashscope", self.model, messages, self.temperature,
+                getattr(self, "_tools", None), stop, kwargs, self._identifying_params
+            )
+            if cached is not None:
+                return cached
+        
+        # 开启流式时通过_stream增量获取（token统计在_stream中完成）
+        if self.streaming:
+            result = generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+            if cache is not None:
+                cache.set(cache_key, result)
+            return result
+        
+        request_params = self._build_request_params(messages, stop, kwargs)
         
         try:
             # 调用 DashScope API
@@ -131,59 +211,59 @@ class ChatDashScope(BaseChatModel):
                 output = response.output
                 message_content = output.choices[0].message.content
                 
-                # 提取token使用量信息
-                input_tokens = 0
-                output_tokens = 0
-                
-                # DashScope API响应中包含usage信息
-                if hasattr(response, 'usage') and response.usage:
-                    usage = response.usage
-                    # 根据API文档，usage可能包含input_tokens和output_tokens
-                    if hasattr(usage, 'input_tokens'):
-                        input_tokens = usage.input_tokens
-                    if hasattr(usage, 'output_tokens'):
-                        output_tokens = usage.output_tokens
-                    # 有些情况下可能是total_tokens
-                    elif hasattr(usage, 'total_tokens'):
-                        # 估算输入和输出token（如果没有分别提供）
-                        total_tokens = usage.total_tokens
-                        # 简单估算：假设输入占30%，输出占70%
-                        input_tokens = int(total_tokens * 0.3)
-                        output_tokens = int(total_tokens * 0.7)
-                
                 # 记录token使用量
-                if input_tokens > 0 or output_tokens > 0:
-                    try:
-                        # 生成会话ID（如果没有提供）
-                        session_id = kwargs.get('session_id', f"dashscope_{hash(str(messages))%10000}")
-                        analysis_type = kwargs.get('analysis_type', 'stock_analysis')
-                        
-                        # 使用TokenTracker记录使用量
-                        token_tracker.track_usage(
-                            provider="dashscope",
-                            model_name=self.model,
-                            input_tokens=input_tokens,
-                            output_tokens=output_tokens,
-                            session_id=session_id,
-                            analysis_type=analysis_type
-                        )
-                    except Exception as track_error:
-                        # 记录失败不应该影响主要功能
-                        logger.info(f"Token tracking failed: {track_error}")
+                self._track_response_usage(response, messages, kwargs)
                 
                 # 创建 AI 消息
                 ai_message = AIMessage(content=message_content)
                 
                 # 创建生成结果
                 generation = ChatGeneration(message=ai_message)
+                result = ChatResult(generations=[generation])
+                
+                if cache is not None:
+                    cache.set(cache_key, result)
                 
-                return ChatResult(generations=[generation])
+                return result
             else:
                 raise Exception(f"DashScope API error: {response.code} - {response.message}")
                 
         except Exception as e:
             raise Exception(f"Error calling DashScope API: {str(e)}")
     
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """流式生成聊天回复，记录首Token延迟并转发增量输出"""
+        kwargs.pop(CACHE_FLAG, None)
+        request_params = self._build_request_params(messages, stop, kwargs)
+        request_params.update({"stream": True, "incremental_output": True})
+        
+        def _chunks() -> Iterator[ChatGenerationChunk]:
+            last_response = None
+            try:
+                for response in Generation.call(**request_params):
+                    if response.status_code != 200:
+                        raise Exception(f"DashScope API error: {response.code} - {response.message}")
+                    last_response = response
+                    delta = response.output.choices[0].message.content or ""
+                    chunk = ChatGenerationChunk(message=AIMessageChunk(content=delta))
+                    if run_manager:
+                        run_manager.on_llm_new_token(delta, chunk=chunk)
+                    yield chunk
+            except Exception as e:
+                raise Exception(f"Error calling DashScope API: {str(e)}")
+            
+            # 流式响应的usage为累计值，以最后一个响应为准
+            if last_response is not None:
+                self._track_response_usage(last_response, messages, kwargs)
+        
+        yield from stream_with_progress("dashscope", self.model, _chunks())
+    
     async def _agenerate(
         self,
         messages: List[BaseMessage],
@@ -191,9 +271,75 @@ class ChatDashScope(BaseChatModel):
         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> ChatResult:
-        """异步生成聊天回复"""
-        # 目前使用同步方法，后续可以实现真正的异步
-        return self._generate(messages, stop, run_manager, **kwargs)
+        """异步生成聊天回复（使用 DashScope 异步客户端，不占用线程）"""
+        
+        cache, cache_key = None, None
+        if kwargs.pop(CACHE_FLAG, False):
+            cache, cache_key, cached = lookup_cached_response(
+                "dashscope", self.model, messages, self.temperature,
+                getattr(self, "_tools", None), stop, kwargs, self._identifying_params
+            )
+            if cached is not None:
+                return cached
+        
+        if self.streaming:
+            result = await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+            if cache is not None:
+                cache.set(cache_key, result)
+            return result
+        
+        request_params = self._build_request_params(messages, stop, kwargs)
+        
+        try:
+            response = await AioGeneration.call(**request_params)
+        except Exception as e:
+            raise Exception(f"Error calling DashScope API: {str(e)}")
+        
+        if response.status_code != 200:
+            raise Exception(f"DashScope API error: {response.code} - {response.message}")
+        
+        self._track_response_usage(response, messages, kwargs)
+        
+        message_content = response.output.choices[0].message.content
+        result = ChatResult(generations=[ChatGeneration(message=AIMessage(content=message_content))])
+        
+        if cache is not None:
+            cache.set(cache_key, result)
+        
+        return result
+    
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """异步流式生成聊天回复，记录首Token延迟并转发增量输出"""
+        kwargs.pop(CACHE_FLAG, None)
+        request_params = self._build_request_params(messages, stop, kwargs)
+        request_params.update({"stream": True, "incremental_output": True})
+        
+        async def _chunks() -> AsyncIterator[ChatGenerationChunk]:
+            last_response = None
+            try:
+                async for response in await AioGeneration.call(**request_params):
+                    if response.status_code != 200:
+                        raise Exception(f"DashScope API error: {response.code} - {response.message}")
+                    last_response = response
+                    delta = response.output.choices[0].message.content or ""
+                    chunk = ChatGenerationChunk(message=AIMessageChunk(content=delta))
+                    if run_manager:
+                        await run_manager.on_llm_new_token(delta, chunk=chunk)
+                    yield chunk
+            except Exception as e:
+                raise Exception(f"Error calling DashScope API: {str(e)}")
+            
+            if last_response is not None:
+                self._track_response_usage(last_response, messages, kwargs)
+        
+        async for chunk in astream_with_progress("dashscope", self.model, _chunks()):
+            yield chunk
     
     def bind_tools(
         self,
@@ -228,6 +374,7 @@ class ChatDashScope(BaseChatModel):
             temperature=self.temperature,
             max_tokens=self.max_tokens,
             top_p=self.top_p,
+            streaming=self.streaming,
             **kwargs
         )
         new_instance._tools = formatted_tools
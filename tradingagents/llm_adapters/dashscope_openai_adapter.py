@@ -5,11 +5,14 @@
 """
 
 import os
-from typing import Any, Dict, List, Optional, Union, Sequence
+from typing import Any, ClassVar, Dict, List, Optional, Union, Sequence
 from langchain_openai import ChatOpenAI
+from langchain_core.language_models.chat_models import agenerate_from_stream, generate_from_stream
 from langchain_core.tools import BaseTool
 from pydantic import Field, SecretStr
 from ..config.config_manager import token_tracker
+from .response_cache import CACHE_FLAG, lookup_cached_response
+from .streaming import astream_with_progress, stream_with_progress
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -22,6 +25,11 @@ class ChatDashScopeOpenAI(ChatOpenAI):
     继承 ChatOpenAI，通过 OpenAI 兼容接口调用百炼模型
     利用百炼模型的原生 OpenAI 兼容性，支持原生 Function Calling
     """
+
+    # 支持按调用点开启的响应缓存（invoke时传入use_cache=True）
+    supports_response_cache: ClassVar[bool] = True
+    # 支持将流式输出转发到进度管道（streaming=True时生效）
+    supports_streaming_progress: ClassVar[bool] = True
     
     def __init__(self, **kwargs):
         """初始化 DashScope OpenAI 兼容客户端"""
@@ -50,41 +58,109 @@ class ChatDashScopeOpenAI(ChatOpenAI):
         api_base = getattr(self, 'base_url', None) or getattr(self, 'openai_api_base', None) or kwargs.get('base_url', 'unknown')
         logger.info(f"   API Base: {api_base}")
     
-    def _generate(self, *args, **kwargs):
+    def _should_stream(self, *, async_api: bool, run_manager=None, **kwargs: Any) -> bool:
+        """invoke统一走_generate（缓存与token统计），仅显式stream()调用直接走_stream"""
+        if not kwargs.get("stream"):
+            return False
+        return super()._should_stream(async_api=async_api, run_manager=run_manager, **kwargs)
+    
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        """流式生成，记录首Token延迟并转发增量输出"""
+        kwargs.pop(CACHE_FLAG, None)
+        chunks = super()._stream(messages, stop, run_manager, **kwargs)
+        yield from stream_with_progress("dashscope", self.model_name, chunks)
+    
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        """异步流式生成，记录首Token延迟并转发增量输出"""
+        kwargs.pop(CACHE_FLAG, None)
+        chunks = super()._astream(messages, stop, run_manager, **kwargs)
+        async for chunk in astream_with_progress("dashscope", self.model_name, chunks):
+            yield chunk
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
         """重写生成方法，添加 token 使用量追踪"""
         
-        # 调用父类的生成方法
-        result = super()._generate(*args, **kwargs)
+        # 调用点显式开启时先查询响应缓存
+        cache, cache_key = None, None
+        if kwargs.pop(CACHE_FLAG, False):
+            cache, cache_key, cached = lookup_cached_response(
+                "dashscope", self.model_name, messages, self.temperature,
+                kwargs.get("tools"), stop, kwargs, self._default_params
+            )
+            if cached is not None:
+                return cached
+        
+        # 调用父类的生成方法（开启流式时通过_stream增量获取）
+        if self.streaming:
+            result = generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+        else:
+            result = super()._generate(messages, stop, run_manager, **kwargs)
         
         # 追踪 token 使用量
+        self._track_usage(result, messages, kwargs)
+        
+        if cache is not None:
+            cache.set(cache_key, result)
+        
+        return result
+    
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        """异步生成（使用异步HTTP客户端），添加 token 使用量追踪"""
+        
+        cache, cache_key = None, None
+        if kwargs.pop(CACHE_FLAG, False):
+            cache, cache_key, cached = lookup_cached_response(
+                "dashscope", self.model_name, messages, self.temperature,
+                kwargs.get("tools"), stop, kwargs, self._default_params
+            )
+            if cached is not None:
+                return cached
+        
+        if self.streaming:
+            result = await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+        else:
+            result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        
+        self._track_usage(result, messages, kwargs)
+        
+        if cache is not None:
+            cache.set(cache_key, result)
+        
+        return result
+    
+    def _track_usage(self, result, messages, kwargs):
+        """从结果中提取 token 使用信息并记录"""
         try:
-            # 从结果中提取 token 使用信息
+            input_tokens, output_tokens = 0, 0
             if hasattr(result, 'llm_output') and result.llm_output:
                 token_usage = result.llm_output.get('token_usage', {})
                 
                 input_tokens = token_usage.get('prompt_tokens', 0)
                 output_tokens = token_usage.get('completion_tokens', 0)
+            elif result.generations and getattr(result.generations[0].message, 'usage_metadata', None):
+                # 流式结果的用量信息在合并后的消息上
+                usage = result.generations[0].message.usage_metadata
+                input_tokens = usage.get('input_tokens', 0)
+                output_tokens = usage.get('output_tokens', 0)
+            
+            if input_tokens > 0 or output_tokens > 0:
+                # 生成会话ID
+                session_id = kwargs.get('session_id', f"dashscope_openai_{hash(str(messages))%10000}")
+                analysis_type = kwargs.get('analysis_type', 'stock_analysis')
+                
+                # 使用 TokenTracker 记录使用量
+                token_tracker.track_usage(
+                    provider="dashscope",
+                    model_name=self.model_name,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=session_id,
+                    analysis_type=analysis_type
+                )
                 
-                if input_tokens > 0 or output_tokens > 0:
-                    # 生成会话ID
-                    session_id = kwargs.get('session_id', f"dashscope_openai_{hash(str(args))%10000}")
-                    analysis_type = kwargs.get('analysis_type', 'stock_analysis')
-                    
-                    # 使用 TokenTracker 记录使用量
-                    token_tracker.track_usage(
-                        provider="dashscope",
-                        model_name=self.model_name,
-                        input_tokens=input_tokens,
-                        output_tokens=output_tokens,
-                        session_id=session_id,
-                        analysis_type=analysis_type
-                    )
-                    
         except Exception as track_error:
             # token 追踪失败不应该影响主要功能
             logger.error(f"⚠️ Token 追踪失败: {track_error}")
-        
-        return result
 
 
 # 支持的模型列表
@@ -4,11 +4,14 @@ DeepSeek LLM适配器，支持Token使用统计
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
-from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.language_models.chat_models import agenerate_from_stream, generate_from_stream
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+
+from .streaming import astream_with_progress, stream_with_progress
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
@@ -34,6 +37,9 @@ class ChatDeepSeek(ChatOpenAI):
     
     继承自ChatOpenAI，添加了Token使用量统计功能
     """
+
+    # 支持将流式输出转发到进度管道（streaming=True时生效）
+    supports_streaming_progress: ClassVar[bool] = True
     
     def __init__(
         self,
@@ -74,6 +80,12 @@ class ChatDeepSeek(ChatOpenAI):
         
         self.model_name = model
         
+    def _should_stream(self, *, async_api: bool, run_manager=None, **kwargs: Any) -> bool:
+        """invoke/ainvoke统一走_generate/_agenerate（token统计），仅显式stream()调用直接走_stream"""
+        if not kwargs.get("stream"):
+            return False
+        return super()._should_stream(async_api=async_api, run_manager=run_manager, **kwargs)
+
     def _generate(
         self,
         messages: List[BaseMessage],
@@ -93,71 +105,143 @@ class ChatDeepSeek(ChatOpenAI):
         analysis_type = kwargs.pop('analysis_type', None)
 
         try:
-            # 调用父类方法生成响应
-            result = super()._generate(messages, stop, run_manager, **kwargs)
-            
-            # 提取token使用量
-            input_tokens = 0
-            output_tokens = 0
+            # 调用父类方法生成响应（开启流式时通过_stream增量获取）
+            if self.streaming:
+                result = generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+            else:
+                result = super()._generate(messages, stop, run_manager, **kwargs)
             
-            # 尝试从响应中提取token使用量
-            if hasattr(result, 'llm_output') and result.llm_output:
-                token_usage = result.llm_output.get('token_usage', {})
-                if token_usage:
-                    input_tokens = token_usage.get('prompt_tokens', 0)
-                    output_tokens = token_usage.get('completion_tokens', 0)
+            self._track_usage(result, messages, session_id, analysis_type)
             
-            # 如果没有获取到token使用量，进行估算
-            if input_tokens == 0 and output_tokens == 0:
-                input_tokens = self._estimate_input_tokens(messages)
-                output_tokens = self._estimate_output_tokens(result)
-                logger.debug(f"🔍 [DeepSeek] 使用估算token: 输入={input_tokens}, 输出={output_tokens}")
-            else:
-                logger.info(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
+            return result
             
-            # 记录token使用量
-            if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
-                try:
-                    # 使用提取的参数或生成默认值
-                    if session_id is None:
-                        session_id = f"deepseek_{hash(str(messages))%10000}"
-                    if analysis_type is None:
-                        analysis_type = 'stock_analysis'
-
-                    # 记录使用量
-                    usage_record = token_tracker.track_usage(
-                        provider="deepseek",
-                        model_name=self.model_name,
-                        input_tokens=input_tokens,
-                        output_tokens=output_tokens,
-                        session_id=session_id,
-                        analysis_type=analysis_type
-                    )
+        except Exception as e:
+            logger.error(f"❌ [DeepSeek] 调用失败: {e}", exc_info=True)
+            raise
+    
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        异步生成聊天响应（使用异步HTTP客户端），并记录token使用量
+        """
+        session_id = kwargs.pop('session_id', None)
+        analysis_type = kwargs.pop('analysis_type', None)
 
-                    if usage_record:
-                        if usage_record.cost == 0.0:
-                            logger.warning(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
-                        else:
-                            logger.info(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
+        try:
+            if self.streaming:
+                result = await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+            else:
+                result = await super()._agenerate(messages, stop, run_manager, **kwargs)
 
-                        # 使用统一日志管理器的Token记录方法
-                        logger_manager = get_logger_manager()
-                        logger_manager.log_token_usage(
-                            logger, "deepseek", self.model_name,
-                            input_tokens, output_tokens, usage_record.cost,
-                            session_id
-                        )
-                    else:
-                        logger.warning(f"⚠️ [DeepSeek] 未创建使用记录")
+            self._track_usage(result, messages, session_id, analysis_type)
 
-                except Exception as track_error:
-                    logger.error(f"⚠️ [DeepSeek] Token统计失败: {track_error}", exc_info=True)
-            
             return result
-            
+
         except Exception as e:
-            logger.error(f"❌ [DeepSeek] 调用失败: {e}", exc_info=True)
+            logger.error(f"❌ [DeepSeek] 异步调用失败: {e}", exc_info=True)
             raise
+
+    def _track_usage(
+        self,
+        result: ChatResult,
+        messages: List[BaseMessage],
+        session_id: Optional[str],
+        analysis_type: Optional[str],
+    ):
+        """从响应中提取token使用量并记录"""
+        # 提取token使用量
+        input_tokens = 0
+        output_tokens = 0
+        
+        # 尝试从响应中提取token使用量
+        if hasattr(result, 'llm_output') and result.llm_output:
+            token_usage = result.llm_output.get('token_usage', {})
+            if token_usage:
+                input_tokens = token_usage.get('prompt_tokens', 0)
+                output_tokens = token_usage.get('completion_tokens', 0)
+        elif result.generations and getattr(result.generations[0].message, 'usage_metadata', None):
+            # 流式结果的用量信息在合并后的消息上
+            usage = result.generations[0].message.usage_metadata
+            input_tokens = usage.get('input_tokens', 0)
+            output_tokens = usage.get('output_tokens', 0)
+        
+        # 如果没有获取到token使用量，进行估算
+        if input_tokens == 0 and output_tokens == 0:
+            input_tokens = self._estimate_input_tokens(messages)
+            output_tokens = self._estimate_output_tokens(result)
+            logger.debug(f"🔍 [DeepSeek] 使用估算token: 输入={input_tokens}, 输出={output_tokens}")
+        else:
+            logger.info(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
+        
+        # 记录token使用量
+        if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
+            try:
+                # 使用提取的参数或生成默认值
+                if session_id is None:
+                    session_id = f"deepseek_{hash(str(messages))%10000}"
+                if analysis_type is None:
+                    analysis_type = 'stock_analysis'
+
+                # 记录使用量
+                usage_record = token_tracker.track_usage(
+                    provider="deepseek",
+                    model_name=self.model_name,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=session_id,
+                    analysis_type=analysis_type
+                )
+
+                if usage_record:
+                    if usage_record.cost == 0.0:
+                        logger.warning(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
+                    else:
+                        logger.info(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
+
+                    # 使用统一日志管理器的Token记录方法
+                    logger_manager = get_logger_manager()
+                    logger_manager.log_token_usage(
+                        logger, "deepseek", self.model_name,
+                        input_tokens, output_tokens, usage_record.cost,
+                        session_id
+                    )
+                else:
+                    logger.warning(f"⚠️ [DeepSeek] 未创建使用记录")
+
+            except Exception as track_error:
+                logger.error(f"⚠️ [DeepSeek] Token统计失败: {track_error}", exc_info=True)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """流式生成，记录首Token延迟并转发增量输出"""
+        kwargs.pop('session_id', None)
+        kwargs.pop('analysis_type', None)
+        chunks = super()._stream(messages, stop, run_manager, **kwargs)
+        yield from stream_with_progress("deepseek", self.model_name, chunks)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """异步流式生成，记录首Token延迟并转发增量输出"""
+        kwargs.pop('session_id', None)
+        kwargs.pop('analysis_type', None)
+        chunks = super()._astream(messages, stop, run_manager, **kwargs)
+        async for chunk in astream_with_progress("deepseek", self.model_name, chunks):
+            yield chunk
     
     def _estimate_input_tokens(self, messages: List[BaseMessage]) -> int:
         """
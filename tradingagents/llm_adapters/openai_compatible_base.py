@@ -5,11 +5,16 @@ OpenAI兼容适配器基类
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage
-from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.language_models.chat_models import agenerate_from_stream, generate_from_stream
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+
+from .response_cache import CACHE_FLAG, lookup_cached_response
+from .streaming import astream_with_progress, stream_with_progress
+from tradingagents.utils.tracing import mark_llm_request_start
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
@@ -34,6 +39,11 @@ class OpenAICompatibleBase(ChatOpenAI):
     OpenAI兼容适配器基类
     为所有支持OpenAI接口的LLM提供商提供统一实现
     """
+
+    # 支持按调用点开启的响应缓存（invoke时传入use_cache=True）
+    supports_response_cache: ClassVar[bool] = True
+    # 支持将流式输出转发到进度管道（streaming=True时生效）
+    supports_streaming_progress: ClassVar[bool] = True
     
     def __init__(
         self,
@@ -113,6 +123,12 @@ class OpenAICompatibleBase(ChatOpenAI):
 
     # 移除model_name property定义，使用Pydantic字段
     # model_name字段由ChatOpenAI基类的Pydantic字段提供
+
+    def _should_stream(self, *, async_api: bool, run_manager=None, **kwargs: Any) -> bool:
+        """invoke统一走_generate（缓存与token统计），仅显式stream()调用直接走_stream"""
+        if not kwargs.get("stream"):
+            return False
+        return super()._should_stream(async_api=async_api, run_manager=run_manager, **kwargs)
     
     def _generate(
         self,
@@ -125,17 +141,95 @@ class OpenAICompatibleBase(ChatOpenAI):
         生成聊天响应，并记录token使用量
         """
         
+        # 调用点显式开启时先查询响应缓存
+        cache, cache_key = None, None
+        if kwargs.pop(CACHE_FLAG, False):
+            cache, cache_key, cached = lookup_cached_response(
+                self.provider_name, self.model_name, messages,
+                self.temperature, kwargs.get("tools"), stop, kwargs, self._default_params
+            )
+            if cached is not None:
+                return cached
+        
         # 记录开始时间
         start_time = time.time()
+        mark_llm_request_start(run_manager)
         
-        # 调用父类生成方法
-        result = super()._generate(messages, stop, run_manager, **kwargs)
+        # 调用父类生成方法（开启流式时通过_stream增量获取）
+        if self.streaming:
+            result = generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+        else:
+            result = super()._generate(messages, stop, run_manager, **kwargs)
         
         # 记录token使用
         self._track_token_usage(result, kwargs, start_time)
         
+        if cache is not None:
+            cache.set(cache_key, result)
+        
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        异步生成聊天响应（使用异步HTTP客户端），并记录token使用量
+        """
+        
+        # 调用点显式开启时先查询响应缓存
+        cache, cache_key = None, None
+        if kwargs.pop(CACHE_FLAG, False):
+            cache, cache_key, cached = lookup_cached_response(
+                self.provider_name, self.model_name, messages,
+                self.temperature, kwargs.get("tools"), stop, kwargs, self._default_params
+            )
+            if cached is not None:
+                return cached
+        
+        start_time = time.time()
+        mark_llm_request_start(run_manager)
+        
+        if self.streaming:
+            result = await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+        else:
+            result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        
+        self._track_token_usage(result, kwargs, start_time)
+        
+        if cache is not None:
+            cache.set(cache_key, result)
+        
         return result
 
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """流式生成，记录首Token延迟并转发增量输出"""
+        kwargs.pop(CACHE_FLAG, None)
+        chunks = super()._stream(messages, stop, run_manager, **kwargs)
+        yield from stream_with_progress(self.provider_name, self.model_name, chunks)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """异步流式生成，记录首Token延迟并转发增量输出"""
+        kwargs.pop(CACHE_FLAG, None)
+        chunks = super()._astream(messages, stop, run_manager, **kwargs)
+        async for chunk in astream_with_progress(self.provider_name, self.model_name, chunks):
+            yield chunk
+
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
         """记录token使用量并输出日志"""
         if not TOKEN_TRACKING_ENABLED:
@@ -143,6 +237,9 @@ class OpenAICompatibleBase(ChatOpenAI):
         try:
             # 统计token信息
             usage = getattr(result, "usage_metadata", None)
+            if not usage and result.generations:
+                # 流式结果的用量信息在合并后的消息上
+                usage = getattr(result.generations[0].message, "usage_metadata", None)
             total_tokens = usage.get("total_tokens") if usage else None
             prompt_tokens = usage.get("input_tokens") if usage else None
             completion_tokens = usage.get("output_tokens") if usage else None
@@ -292,6 +389,17 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
         # 调用父类的_generate方法
         return super()._generate(truncated_messages, stop, run_manager, **kwargs)
 
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """异步生成聊天响应，包含千帆模型的token截断逻辑"""
+        truncated_messages = self._truncate_messages(messages)
+        return await super()._agenerate(truncated_messages, stop, run_manager, **kwargs)
+
 
 class ChatCustomOpenAI(OpenAICompatibleBase):
     """自定义OpenAI端点适配器（代理/聚合平台）"""
@@ -0,0 +1,233 @@
+"""
+LLM响应缓存
+为确定性的LLM调用（信号提取、反思等）提供提示词/响应缓存，避免重复请求相同提示词
+
+缓存键由 (provider, model, 规范化消息, temperature, tools, stop, 其他生成参数) 计算得到，
+其他生成参数包括模型上的 max_tokens、top_p 等以及调用时传入或 bind() 绑定的参数，
+存储层为 tradingagents.utils.kv_cache（文件/Redis后端，TTL过期和条目数上限淘汰）。
+缓存按调用点显式启用：调用方通过 invoke_with_cache() 或传入 use_cache=True 开启。
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tradingagents.config.env_utils import parse_bool_env, parse_int_env, parse_str_env
+from tradingagents.utils.kv_cache import TTLKeyValueCache, hash_key
+from tradingagents.utils.tracing import SpanKind, trace_span
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 传给 invoke()/_generate() 的开关参数名
+CACHE_FLAG = "use_cache"
+
+# 不影响生成内容、不计入缓存键的参数（缓存开关、Token统计标识、流式开关；tools 单独计入）
+_NON_GENERATION_PARAMS = {CACHE_FLAG, "session_id", "analysis_type", "stream", "stream_options", "streaming", "tools"}
+
+
+def _normalize_content(content: Any) -> Any:
+    """规范化消息内容：统一去除首尾空白，列表内容递归处理"""
+    if isinstance(content, str):
+        return content.strip()
+    if isinstance(content, list):
+        return [_normalize_content(item) for item in content]
+    if isinstance(content, dict):
+        return {k: _normalize_content(v) for k, v in sorted(content.items())}
+    return content
+
+
+def normalize_messages(messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+    """将LangChain消息转换为与对象标识无关的规范化结构"""
+    normalized = []
+    for message in messages:
+        item = {
+            "type": getattr(message, "type", message.__class__.__name__),
+            "content": _normalize_content(getattr(message, "content", str(message))),
+        }
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            item["tool_calls"] = [
+                {"name": call.get("name"), "args": call.get("args")} for call in tool_calls
+            ]
+        tool_call_id = getattr(message, "tool_call_id", None)
+        if tool_call_id:
+            item["tool_call_id"] = tool_call_id
+        normalized.append(item)
+    return normalized
+
+
+def build_cache_key(
+    provider: str,
+    model: str,
+    messages: List[BaseMessage],
+    temperature: Optional[float] = None,
+    tools: Optional[List[Any]] = None,
+    stop: Optional[List[str]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """计算缓存键，params 为其他生成参数（见 generation_params）"""
+    payload = {
+        "provider": provider or "unknown",
+        "model": model or "unknown",
+        "messages": normalize_messages(messages),
+        "temperature": temperature,
+        "tools": tools or [],
+        "stop": stop or [],
+        "params": params or {},
+    }
+    return hash_key(payload)
+
+
+def generation_params(model_params: Optional[Dict[str, Any]], call_kwargs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并模型默认参数与调用参数（含 bind() 绑定的参数），去掉不影响生成内容的参数和空值"""
+    params = dict(model_params or {})
+    params.update(call_kwargs or {})
+    return {k: v for k, v in params.items() if k not in _NON_GENERATION_PARAMS and v is not None}
+
+
+def _serialize_result(result: ChatResult) -> Dict[str, Any]:
+    """将ChatResult序列化为可JSON存储的字典"""
+    return {
+        "messages": messages_to_dict([generation.message for generation in result.generations]),
+        "generation_info": [generation.generation_info for generation in result.generations],
+        "llm_output": result.llm_output,
+    }
+
+
+def _deserialize_result(data: Dict[str, Any]) -> ChatResult:
+    """从缓存字典恢复ChatResult"""
+    messages = messages_from_dict(data["messages"])
+    infos = data.get("generation_info") or [None] * len(messages)
+    generations = [
+        ChatGeneration(message=message, generation_info=info)
+        for message, info in zip(messages, infos)
+    ]
+    llm_output = dict(data.get("llm_output") or {})
+    llm_output["cache_hit"] = True
+    return ChatResult(generations=generations, llm_output=llm_output)
+
+
+class LLMResponseCache(TTLKeyValueCache):
+    """LLM响应缓存，存储层见 tradingagents.utils.kv_cache"""
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        cache_dir: Optional[str] = None,
+        ttl_seconds: int = 86400,
+        max_entries: int = 1000,
+        enabled: bool = True,
+    ):
+        super().__init__(
+            "LLM响应缓存",
+            cache_dir or os.path.join("data", "cache", "llm_responses"),
+            "llm_cache:",
+            backend=backend,
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+            enabled=enabled,
+        )
+
+    def get(self, key: str) -> Optional[ChatResult]:
+        """读取缓存，未命中或已过期返回None"""
+        data = self.get_entry(key)
+        return _deserialize_result(data) if data is not None else None
+
+    def set(self, key: str, result: ChatResult) -> bool:
+        """写入缓存"""
+        if not self.enabled:
+            return False
+        try:
+            data = _serialize_result(result)
+        except Exception as e:
+            logger.warning(f"⚠️ LLM响应缓存写入失败: {e}")
+            return False
+        return self.set_entry(key, data)
+
+
+# ==================== 适配器辅助函数 ====================
+
+def track_cache_hit(provider: str, model_name: str, kwargs: Dict[str, Any]):
+    """在Token统计中记录一次缓存命中（零成本）"""
+    try:
+        from tradingagents.config.config_manager import token_tracker
+        token_tracker.track_usage(
+            provider=provider,
+            model_name=model_name,
+            input_tokens=0,
+            output_tokens=0,
+            session_id=kwargs.get("session_id"),
+            analysis_type=kwargs.get("analysis_type", "stock_analysis"),
+            cache_hit=True,
+        )
+    except Exception as e:
+        logger.debug(f"缓存命中统计记录失败: {e}")
+
+
+def lookup_cached_response(
+    provider: str,
+    model: str,
+    messages: List[BaseMessage],
+    temperature: Optional[float],
+    tools: Optional[List[Any]],
+    stop: Optional[List[str]],
+    kwargs: Dict[str, Any],
+    model_params: Optional[Dict[str, Any]] = None,
+):
+    """
+    适配器_generate中使用：返回 (cache, key, result)
+
+    kwargs 为本次调用参数，model_params 为模型上的默认生成参数（max_tokens、top_p 等），
+    两者合并后计入缓存键。cache为None表示本次调用未启用缓存；result不为None表示命中。
+    """
+    cache = get_llm_response_cache()
+    if not cache.enabled:
+        return None, None, None
+
+    key = build_cache_key(provider, model, messages, temperature, tools, stop,
+                          generation_params(model_params, kwargs))
+    with trace_span("cache:llm_response", SpanKind.CACHE, backend=cache.backend) as span:
+        result = cache.get(key)
+        if span is not None:
+            span.attributes["hit"] = result is not None
+    if result is not None:
+        logger.info(f"⚡ LLM响应缓存命中 - Provider: {provider}, Model: {model}")
+        track_cache_hit(provider, model, kwargs)
+    return cache, key, result
+
+
+def invoke_with_cache(llm, messages, **kwargs):
+    """
+    以缓存方式调用LLM
+
+    仅对支持响应缓存的适配器传入use_cache开关，其他LLM保持普通调用。
+    """
+    if getattr(llm, "supports_response_cache", False):
+        kwargs[CACHE_FLAG] = True
+    return llm.invoke(messages, **kwargs)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """获取全局LLM响应缓存实例"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = LLMResponseCache(
+                    backend=parse_str_env("LLM_RESPONSE_CACHE_BACKEND", "auto"),
+                    cache_dir=parse_str_env("LLM_RESPONSE_CACHE_DIR", "") or None,
+                    ttl_seconds=parse_int_env("LLM_RESPONSE_CACHE_TTL", 86400),
+                    max_entries=parse_int_env("LLM_RESPONSE_CACHE_MAX_ENTRIES", 1000),
+                    enabled=parse_bool_env("LLM_RESPONSE_CACHE_ENABLED", True),
+                )
+    return _response_cache
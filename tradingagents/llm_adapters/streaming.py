@@ -0,0 +1,169 @@
+"""
+LLM流式输出支持
+将适配器产生的增量输出转发到进度管道（CLI MessageBuffer、Web进度存储），
+并按 provider/model 记录首Token延迟（TTFT）
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.outputs import ChatGenerationChunk
+
+from tradingagents.config.env_utils import parse_float_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 事件中 text 只携带已生成文本的末尾部分，展示端只显示预览，不需要全文
+STREAM_PREVIEW_CHARS = 600
+
+# 两次事件之间的最短间隔（秒），期间的增量合并到下一个事件；首个事件和完成事件立即发送
+STREAM_EMIT_INTERVAL = parse_float_env("LLM_STREAM_EMIT_INTERVAL", 0.5)
+
+# 当前上下文的流式输出回调（每个分析独立，LangGraph节点线程会继承上下文）
+_stream_callback: contextvars.ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = \
+    contextvars.ContextVar("llm_stream_callback", default=None)
+
+
+@contextmanager
+def stream_progress_scope(callback: Optional[Callable[[Dict[str, Any]], None]]):
+    """
+    在上下文范围内注册流式输出回调
+
+    回调接收事件字典：provider、model、delta（距上个事件新增的文本）、
+    text（本次调用已生成文本的末尾 STREAM_PREVIEW_CHARS 个字符）、length（已生成字符数）、
+    ttft（首个事件携带）、done（最后一个事件为True）。
+    事件按 STREAM_EMIT_INTERVAL 节流，各事件的 delta 依次拼接即为完整输出。
+    """
+    token = _stream_callback.set(callback)
+    try:
+        yield
+    finally:
+        _stream_callback.reset(token)
+
+
+def _emit(event: Dict[str, Any]):
+    callback = _stream_callback.get()
+    if callback is None:
+        return
+    try:
+        callback(event)
+    except Exception as e:
+        # 展示失败不能影响模型调用
+        logger.debug(f"流式输出回调失败: {e}")
+
+
+class TTFTRecorder:
+    """按 provider/model 记录首Token延迟"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, seconds: float):
+        key = f"{provider}/{model}"
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        with self._lock:
+            for key, samples in self._samples.items():
+                ordered = sorted(samples)
+                count = len(ordered)
+                stats[key] = {
+                    "count": count,
+                    "avg": round(sum(ordered) / count, 3),
+                    "p50": round(ordered[int(0.5 * (count - 1))], 3),
+                    "p95": round(ordered[int(0.95 * (count - 1))], 3),
+                    "last": round(samples[-1], 3),
+                }
+        return stats
+
+
+ttft_recorder = TTFTRecorder()
+
+
+def get_ttft_stats() -> Dict[str, Dict[str, float]]:
+    """获取各 provider/model 的首Token延迟统计"""
+    return ttft_recorder.get_stats()
+
+
+class _StreamProgress:
+    """单次流式调用的进度状态"""
+
+    def __init__(self, provider: str, model: str, emit_interval: Optional[float] = None):
+        self.provider = provider or "unknown"
+        self.model = model or "unknown"
+        self.emit_interval = STREAM_EMIT_INTERVAL if emit_interval is None else emit_interval
+        self.start_time = time.time()
+        self.ttft = None
+        self.tail = ""
+        self.length = 0
+        self._pending: List[str] = []
+        self._last_emit = 0.0
+
+    def _event(self, **extra) -> Dict[str, Any]:
+        event = {"provider": self.provider, "model": self.model, "delta": "".join(self._pending),
+                 "text": self.tail, "length": self.length}
+        event.update(extra)
+        self._pending = []
+        self._last_emit = time.monotonic()
+        return event
+
+    def on_chunk(self, chunk: ChatGenerationChunk):
+        delta = chunk.message.content if isinstance(chunk.message.content, str) else ""
+        if delta:
+            self._pending.append(delta)
+            self.length += len(delta)
+            # 只保留预览所需的末尾部分，长报告也不会反复拼接全文
+            self.tail = (self.tail + delta)[-STREAM_PREVIEW_CHARS:]
+
+        if self.ttft is None:
+            self.ttft = time.time() - self.start_time
+            ttft_recorder.record(self.provider, self.model, self.ttft)
+            logger.info(f"⏱️ 首Token延迟 - Provider: {self.provider}, Model: {self.model}, TTFT: {self.ttft:.2f}s")
+            _emit(self._event(ttft=self.ttft, done=False))
+        elif self._pending and time.monotonic() - self._last_emit >= self.emit_interval:
+            _emit(self._event(done=False))
+
+    def on_done(self):
+        _emit(self._event(done=True, elapsed=time.time() - self.start_time))
+
+
+def stream_with_progress(provider: str, model: str,
+                         chunks: Iterator[ChatGenerationChunk]) -> Iterator[ChatGenerationChunk]:
+    """包装同步流式迭代器，记录TTFT并转发增量输出"""
+    progress = _StreamProgress(provider, model)
+    for chunk in chunks:
+        progress.on_chunk(chunk)
+        yield chunk
+    progress.on_done()
+
+
+async def astream_with_progress(provider: str, model: str,
+                                chunks: AsyncIterator[ChatGenerationChunk]) -> AsyncIterator[ChatGenerationChunk]:
+    """包装异步流式迭代器，记录TTFT并转发增量输出"""
+    progress = _StreamProgress(provider, model)
+    async for chunk in chunks:
+        progress.on_chunk(chunk)
+        yield chunk
+    progress.on_done()
+
+
+def enable_streaming(llm) -> bool:
+    """为支持流式进度的适配器开启流式输出，返回是否开启"""
+    if not getattr(llm, "supports_streaming_progress", False):
+        return False
+    llm.streaming = True
+    if "stream_usage" in getattr(type(llm), "model_fields", {}):
+        # 流式模式下仍返回token用量，保证统计准确
+        llm.stream_usage = True
+    return True
@@ -0,0 +1,208 @@
+"""
+带TTL与条目上限的键值缓存
+LLM响应缓存、分析师报告缓存等共用的存储层：条目为可JSON序列化的字典，
+支持文件和Redis两种后端（Redis不可用时降级为文件），超过TTL视为未命中，
+超出条目上限时按最近访问时间淘汰最旧的条目。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+def hash_key(payload: Any) -> str:
+    """将键字段序列化后计算SHA256，字段顺序不影响结果"""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLKeyValueCache:
+    """键值缓存，支持文件和Redis后端"""
+
+    def __init__(
+        self,
+        name: str,
+        cache_dir: str,
+        redis_prefix: str,
+        backend: str = "auto",
+        ttl_seconds: int = 86400,
+        max_entries: int = 1000,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            name: 缓存名称，用于日志
+            cache_dir: 文件后端目录
+            redis_prefix: Redis键前缀，索引键为 {prefix}index
+        """
+        self.name = name
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir)
+        self.redis_prefix = redis_prefix
+        self.redis_index_key = f"{redis_prefix}index"
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self.redis_client = None
+        self.backend = self._resolve_backend(backend)
+        if self.backend == "file" and self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"🗄️ {name}初始化 - 后端: {self.backend}, TTL: {ttl_seconds}s, 上限: {max_entries}条")
+
+    def _resolve_backend(self, backend: str) -> str:
+        """确定实际使用的后端，Redis不可用时降级到文件"""
+        if backend in ("auto", "redis"):
+            try:
+                from tradingagents.config.database_manager import get_database_manager
+                self.redis_client = get_database_manager().get_redis_client()
+            except Exception as e:
+                logger.debug(f"{self.name}获取Redis客户端失败: {e}")
+                self.redis_client = None
+
+            if self.redis_client is not None:
+                return "redis"
+            if backend == "redis":
+                logger.warning(f"⚠️ Redis不可用，{self.name}降级为文件后端")
+        return "file"
+
+    # ==================== 对外接口 ====================
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目，未命中或已过期返回None"""
+        if not self.enabled:
+            return None
+        try:
+            data = self._redis_get(key) if self.backend == "redis" else self._file_get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ {self.name}读取失败: {e}")
+            data = None
+
+        self.stats["hits" if data is not None else "misses"] += 1
+        return data
+
+    def set_entry(self, key: str, data: Dict[str, Any]) -> bool:
+        """写入缓存条目，写入时间记为 created_at"""
+        if not self.enabled:
+            return False
+        data = dict(data, created_at=time.time())
+        try:
+            if self.backend == "redis":
+                self._redis_set(key, data)
+            else:
+                self._file_set(key, data)
+            self.stats["writes"] += 1
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ {self.name}写入失败: {e}")
+            return False
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        cleared = 0
+        if self.backend == "redis":
+            keys = self.redis_client.zrange(self.redis_index_key, 0, -1)
+            if keys:
+                cleared = self.redis_client.delete(*[self._redis_key(k) for k in keys])
+            self.redis_client.delete(self.redis_index_key)
+        elif self.cache_dir.exists():
+            for cache_file in self.cache_dir.glob("*.json"):
+                cache_file.unlink(missing_ok=True)
+                cleared += 1
+        return cleared
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        stats = dict(self.stats)
+        stats.update({
+            "backend": self.backend,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        })
+        return stats
+
+    # ==================== 文件后端 ====================
+
+    def _file_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _file_get(self, key: str) -> Optional[Dict[str, Any]]:
+        cache_file = self._file_path(key)
+        if not cache_file.exists():
+            return None
+
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if time.time() - data.get("created_at", 0) > self.ttl_seconds:
+            cache_file.unlink(missing_ok=True)
+            return None
+
+        # 更新访问时间，淘汰时按最近最少使用顺序
+        os.utime(cache_file, None)
+        return data
+
+    def _file_set(self, key: str, data: Dict[str, Any]):
+        cache_file = self._file_path(key)
+        tmp_file = cache_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_file, cache_file)
+        self._file_evict()
+
+    def _file_evict(self):
+        """超出条目上限时按访问时间淘汰最旧的条目"""
+        with self._lock:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")]
+            overflow = len(entries) - self.max_entries
+            if overflow <= 0:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:overflow]:
+                try:
+                    os.remove(entry.path)
+                    self.stats["evictions"] += 1
+                except OSError:
+                    pass
+
+    # ==================== Redis后端 ====================
+
+    def _redis_key(self, key) -> str:
+        if isinstance(key, bytes):
+            key = key.decode("utf-8")
+        return f"{self.redis_prefix}{key}"
+
+    def _redis_get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.redis_client.get(self._redis_key(key))
+        if raw is None:
+            self.redis_client.zrem(self.redis_index_key, key)
+            return None
+        self.redis_client.zadd(self.redis_index_key, {key: time.time()})
+        return json.loads(raw)
+
+    def _redis_set(self, key: str, data: Dict[str, Any]):
+        pipe = self.redis_client.pipeline()
+        pipe.setex(self._redis_key(key), self.ttl_seconds, json.dumps(data, ensure_ascii=False, default=str))
+        pipe.zadd(self.redis_index_key, {key: time.time()})
+        pipe.zcard(self.redis_index_key)
+        size = pipe.execute()[-1]
+
+        overflow = size - self.max_entries
+        if overflow > 0:
+            oldest = self.redis_client.zrange(self.redis_index_key, 0, overflow - 1)
+            if oldest:
+                self.redis_client.delete(*[self._redis_key(k) for k in oldest])
+                self.redis_client.zrem(self.redis_index_key, *oldest)
+                self.stats["evictions"] += len(oldest)
@@ -2,12 +2,20 @@
 """
 统一日志管理器
 提供项目级别的日志配置和管理功能
+
+异步模式下根日志器只挂一个有界队列处理器，格式化和磁盘I/O由后台线程完成，
+分析线程只负责把日志记录放入队列。
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
+import time
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Union
@@ -40,6 +48,129 @@ class ColoredFormatter(logging.Formatter):
         return super().format(record)
 
 
+class LazyValue:
+    """
+    延迟计算的日志字段
+
+    用于 extra 中开销较大的数据（如参数预览、结果摘要）：只有处理器真正输出该字段时才调用工厂函数，
+    日志级别未启用或没有处理器使用该字段时不产生任何开销。
+    """
+
+    __slots__ = ('_factory', '_value', '_resolved')
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = None
+        self._resolved = False
+
+    def resolve(self):
+        if not self._resolved:
+            try:
+                self._value = self._factory()
+            except Exception as e:
+                self._value = f"<日志字段计算失败: {e}>"
+            self._resolved = True
+            self._factory = None
+        return self._value
+
+    def __str__(self):
+        return str(self.resolve())
+
+    __repr__ = __str__
+
+
+def resolve_lazy(value):
+    """取出LazyValue的实际值，其他值原样返回"""
+    return value.resolve() if isinstance(value, LazyValue) else value
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    有界队列日志处理器
+
+    调用线程只合并消息参数后入队，不做格式化；队列满时丢弃DEBUG/INFO日志并按级别计数，
+    WARNING及以上的日志最多阻塞 block_timeout 秒等待空位，仍然满则同样丢弃计数。
+    """
+
+    def __init__(self, queue_size: int = 10000, block_timeout: float = 0.05):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.block_timeout = block_timeout
+        self._dropped = Counter()
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # 进程内队列无需pickle，也不在这里格式化；只固定消息内容，避免参数对象之后被修改
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING and self.block_timeout > 0:
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+                return
+            except queue.Full:
+                pass
+        with self._dropped_lock:
+            self._dropped[record.levelname] += 1
+
+    def take_dropped(self) -> Dict[str, int]:
+        """取出并清零丢弃计数"""
+        with self._dropped_lock:
+            dropped = dict(self._dropped)
+            self._dropped.clear()
+        return dropped
+
+    @property
+    def dropped_total(self) -> int:
+        with self._dropped_lock:
+            return sum(self._dropped.values())
+
+
+class SummarizingQueueListener(logging.handlers.QueueListener):
+    """后台日志写入线程，定期把队列溢出时丢弃的日志数量汇总成一条警告"""
+
+    def __init__(self, queue_handler: BoundedQueueHandler, *handlers, summary_interval: float = 5.0):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self.summary_interval = summary_interval
+        self.dropped_totals = Counter()
+        self._last_summary = time.time()
+
+    def handle(self, record):
+        super().handle(record)
+        if time.time() - self._last_summary >= self.summary_interval:
+            self.emit_drop_summary()
+
+    def emit_drop_summary(self):
+        """输出自上次汇总以来丢弃的日志数量"""
+        self._last_summary = time.time()
+        dropped = self.queue_handler.take_dropped()
+        if not dropped:
+            return
+        self.dropped_totals.update(dropped)
+        detail = ", ".join(f"{level}={count}" for level, count in sorted(dropped.items()))
+        summary = logging.LogRecord(
+            "tradingagents.logging_manager", logging.WARNING, __file__, 0,
+            f"⚠️ 日志队列已满，丢弃了 {sum(dropped.values())} 条日志 ({detail})", None, None
+        )
+        super().handle(summary)
+
+    def enqueue_sentinel(self):
+        # 有界队列可能已满，结束标记必须阻塞等待入队
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        super().stop()
+        self.emit_drop_summary()
+
+
 class StructuredFormatter(logging.Formatter):
     """结构化日志格式化器（JSON格式）"""
     
@@ -54,17 +185,10 @@ class StructuredFormatter(logging.Formatter):
             'line': record.lineno
         }
         
-        # 添加额外字段
-        if hasattr(record, 'session_id'):
-            log_entry['session_id'] = record.session_id
-        if hasattr(record, 'analysis_type'):
-            log_entry['analysis_type'] = record.analysis_type
-        if hasattr(record, 'stock_symbol'):
-            log_entry['stock_symbol'] = record.stock_symbol
-        if hasattr(record, 'cost'):
-            log_entry['cost'] = record.cost
-        if hasattr(record, 'tokens'):
-            log_entry['tokens'] = record.tokens
+        # 添加额外字段（延迟字段在此时才计算）
+        for field in ('session_id', 'analysis_type', 'stock_symbol', 'cost', 'tokens'):
+            if hasattr(record, field):
+                log_entry[field] = resolve_lazy(getattr(record, field))
             
         return json.dumps(log_entry, ensure_ascii=False)
 
@@ -75,6 +199,8 @@ class TradingAgentsLogger:
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or self._load_default_config()
         self.loggers: Dict[str, logging.Logger] = {}
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        self.queue_listener: Optional[SummarizingQueueListener] = None
         self._setup_logging()
     
     def _load_default_config(self) -> Dict[str, Any]:
@@ -125,7 +251,19 @@ class TradingAgentsLogger:
             'docker': {
                 'enabled': os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true',
                 'stdout_only': True  # Docker环境只输出到stdout
-            }
+            },
+            'async': self._default_async_config()
+        }
+
+    @staticmethod
+    def _default_async_config() -> Dict[str, Any]:
+        """异步日志默认配置：文件/结构化日志经队列由后台线程写入，控制台保持同步输出"""
+        return {
+            'enabled': True,
+            'queue_size': 10000,
+            'block_timeout': 0.05,
+            'summary_interval': 5.0,
+            'include_console': False
         }
 
     def _load_config_file(self) -> Optional[Dict[str, Any]]:
@@ -170,6 +308,7 @@ class TradingAgentsLogger:
                 'enabled': is_docker,
                 'stdout_only': logging_config.get('docker', {}).get('stdout_only', True)
             },
+            'async': {**self._default_async_config(), **logging_config.get('async', {})},
             'performance': logging_config.get('performance', {}),
             'security': logging_config.get('security', {}),
             'business': logging_config.get('business', {})
@@ -186,24 +325,84 @@ class TradingAgentsLogger:
         root_logger = logging.getLogger()
         root_logger.setLevel(getattr(logging, self.config['level']))
         
-        # 清除现有处理器
+        # 清除现有处理器（先停止上一次配置的后台写入线程，写完队列中的日志）
+        _stop_active_listener()
         root_logger.handlers.clear()
         
-        # 添加处理器
-        self._add_console_handler(root_logger)
+        # 创建处理器，异步模式下由队列转交后台线程
+        sync_handlers, async_handlers = [], []
+        async_config = self._async_config()
+        console_handler = self._add_console_handler(root_logger)
+        if console_handler is not None and async_config['enabled'] and async_config.get('include_console'):
+            async_handlers.append(console_handler)
+        elif console_handler is not None:
+            sync_handlers.append(console_handler)
         
         if not self.config['docker']['enabled'] or not self.config['docker']['stdout_only']:
-            self._add_file_handler(root_logger)
+            file_handlers = [self._add_file_handler(root_logger)]
             if self.config['handlers']['structured']['enabled']:
-                self._add_structured_handler(root_logger)
+                file_handlers.append(self._add_structured_handler(root_logger))
+            file_handlers = [handler for handler in file_handlers if handler is not None]
+            (async_handlers if async_config['enabled'] else sync_handlers).extend(file_handlers)
+        
+        if async_handlers:
+            self._start_queue_listener(root_logger, async_handlers, async_config)
         
         # 配置特定日志器
         self._configure_specific_loggers()
+
+    def _async_config(self) -> Dict[str, Any]:
+        """异步日志配置，TRADINGAGENTS_LOG_ASYNC / TRADINGAGENTS_LOG_QUEUE_SIZE 环境变量优先"""
+        async_config = {**self._default_async_config(), **self.config.get('async', {})}
+        env_enabled = os.getenv('TRADINGAGENTS_LOG_ASYNC')
+        if env_enabled:
+            async_config['enabled'] = env_enabled.strip().lower() in ('true', '1', 'yes', 'on')
+        env_queue_size = os.getenv('TRADINGAGENTS_LOG_QUEUE_SIZE')
+        if env_queue_size and env_queue_size.strip().isdigit():
+            async_config['queue_size'] = int(env_queue_size)
+        return async_config
+
+    def _start_queue_listener(self, root_logger: logging.Logger, handlers, async_config: Dict[str, Any]):
+        """把指定处理器从根日志器移到后台写入线程，根日志器改挂有界队列处理器"""
+        global _active_listener
+        for handler in handlers:
+            root_logger.removeHandler(handler)
+
+        self.queue_handler = BoundedQueueHandler(
+            queue_size=int(async_config['queue_size']),
+            block_timeout=float(async_config['block_timeout'])
+        )
+        self.queue_listener = SummarizingQueueListener(
+            self.queue_handler, *handlers,
+            summary_interval=float(async_config['summary_interval'])
+        )
+        self.queue_listener.start()
+        _active_listener = self.queue_listener
+        root_logger.addHandler(self.queue_handler)
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """获取异步日志队列统计：当前积压、容量和累计丢弃数量"""
+        if self.queue_handler is None:
+            return {'enabled': False}
+        dropped = dict(self.queue_listener.dropped_totals) if self.queue_listener else {}
+        return {
+            'enabled': True,
+            'pending': self.queue_handler.queue.qsize(),
+            'capacity': self.queue_handler.queue.maxsize,
+            'dropped': dropped,
+            'dropped_unreported': self.queue_handler.dropped_total
+        }
+
+    def flush(self):
+        """停止后台写入线程并写完队列中的日志，然后重新启动（用于测试或进程退出前）"""
+        if self.queue_listener is not None:
+            self.queue_listener.stop()
+            self.queue_listener.start()
     
     def _add_console_handler(self, logger: logging.Logger):
         """添加控制台处理器"""
         if not self.config['handlers']['console']['enabled']:
-            return
+            return None
             
         console_handler = logging.StreamHandler(sys.stdout)
         console_level = getattr(logging, self.config['handlers']['console']['level'])
@@ -217,11 +416,12 @@ class TradingAgentsLogger:
         
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
+        return console_handler
     
     def _add_file_handler(self, logger: logging.Logger):
         """添加文件处理器"""
         if not self.config['handlers']['file']['enabled']:
-            return
+            return None
             
         log_dir = Path(self.config['handlers']['file']['directory'])
         log_file = log_dir / 'tradingagents.log'
@@ -243,6 +443,7 @@ class TradingAgentsLogger:
         formatter = logging.Formatter(self.config['format']['file'])
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
+        return file_handler
     
     def _add_structured_handler(self, logger: logging.Logger):
         """添加结构化日志处理器"""
@@ -262,6 +463,7 @@ class TradingAgentsLogger:
         formatter = StructuredFormatter()
         structured_handler.setFormatter(formatter)
         logger.addHandler(structured_handler)
+        return structured_handler
     
     def _configure_specific_loggers(self):
         """配置特定的日志器"""
@@ -388,6 +590,22 @@ class TradingAgentsLogger:
 
 # 全局日志管理器实例
 _logger_manager: Optional[TradingAgentsLogger] = None
+# 当前运行的后台日志写入线程（重新配置或进程退出时停止）
+_active_listener: Optional[SummarizingQueueListener] = None
+
+
+def _stop_active_listener():
+    """停止后台日志写入线程，写完队列中剩余的日志"""
+    global _active_listener
+    listener, _active_listener = _active_listener, None
+    if listener is not None and listener._thread is not None:
+        try:
+            listener.stop()
+        except Exception as e:
+            _bootstrap_logger.debug(f"停止日志写入线程失败: {e}")
+
+
+atexit.register(_stop_active_listener)
 
 
 def get_logger_manager() -> TradingAgentsLogger:
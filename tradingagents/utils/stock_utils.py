@@ -11,6 +11,12 @@ from enum import Enum
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+# 预编译的代码格式（识别市场时每次调用只做匹配）
+_CHINA_A_PATTERN = re.compile(r'^\d{6}$')
+_HK_PATTERN = re.compile(r'^\d{4,5}\.HK$')
+_HK_DIGITS_PATTERN = re.compile(r'^\d{4,5}$')
+_US_PATTERN = re.compile(r'^[A-Z]{1,5}$')
+
 
 class StockMarket(Enum):
     """股票市场枚举"""
@@ -40,15 +46,15 @@ class StockUtils:
         ticker = str(ticker).strip().upper()
         
         # 中国A股：6位数字
-        if re.match(r'^\d{6}$', ticker):
+        if _CHINA_A_PATTERN.match(ticker):
             return StockMarket.CHINA_A
 
         # 港股：4-5位数字.HK（支持0700.HK和09988.HK格式）
-        if re.match(r'^\d{4,5}\.HK$', ticker):
+        if _HK_PATTERN.match(ticker):
             return StockMarket.HONG_KONG
 
         # 美股：1-5位字母
-        if re.match(r'^[A-Z]{1,5}$', ticker):
+        if _US_PATTERN.match(ticker):
             return StockMarket.US
             
         return StockMarket.UNKNOWN
@@ -153,11 +159,11 @@ class StockUtils:
         ticker = str(ticker).strip().upper()
         
         # 如果是纯4-5位数字，添加.HK后缀
-        if re.match(r'^\d{4,5}$', ticker):
+        if _HK_DIGITS_PATTERN.match(ticker):
             return f"{ticker}.HK"
 
         # 如果已经是正确格式，直接返回
-        if re.match(r'^\d{4,5}\.HK$', ticker):
+        if _HK_PATTERN.match(ticker):
             return ticker
             
         return ticker
@@ -6,19 +6,36 @@
 
 import time
 import functools
+import logging
 from typing import Any, Dict, Optional, Callable
 from datetime import datetime
 
 from tradingagents.utils.logging_init import get_logger
 
 # 导入日志模块
-from tradingagents.utils.logging_manager import get_logger, get_logger_manager
+from tradingagents.utils.logging_manager import LazyValue, get_logger, get_logger_manager
 logger = get_logger('agents')
 
 # 工具调用日志器
 tool_logger = get_logger("tools")
 
 
+def _preview(value: Any, limit: int) -> str:
+    """截断的字符串预览"""
+    text = str(value)
+    return text[:limit] + '...' if len(text) > limit else text
+
+
+def _describe_args(args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """工具参数预览（只在日志处理器实际输出 args_info 时计算）"""
+    args_info = {}
+    if args:
+        args_info['args'] = [_preview(arg, 100) for arg in args]
+    if kwargs:
+        args_info['kwargs'] = {k: _preview(v, 100) for k, v in kwargs.items()}
+    return args_info
+
+
 def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_result: bool = False):
     """
     工具调用日志装饰器
@@ -37,19 +54,10 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
             # 记录开始时间
             start_time = time.time()
             
-            # 准备参数信息
-            args_info = {}
-            if log_args:
-                # 记录位置参数
-                if args:
-                    args_info['args'] = [str(arg)[:100] + '...' if len(str(arg)) > 100 else str(arg) for arg in args]
-                
-                # 记录关键字参数
-                if kwargs:
-                    args_info['kwargs'] = {
-                        k: str(v)[:100] + '...' if len(str(v)) > 100 else str(v) 
-                        for k, v in kwargs.items()
-                    }
+            # 准备参数信息：延迟到日志处理器需要时才字符串化，不占用工具调用线程
+            args_info = None
+            if log_args and tool_logger.isEnabledFor(logging.INFO):
+                args_info = LazyValue(lambda: _describe_args(args, kwargs))
             
             # 记录工具调用开始
             tool_logger.info(
@@ -58,7 +66,7 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
                     'tool_name': name,
                     'event_type': 'tool_call_start',
                     'timestamp': datetime.now().isoformat(),
-                    'args_info': args_info if log_args else None
+                    'args_info': args_info
                 }
             )
             
@@ -72,8 +80,7 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
                 # 准备结果信息
                 result_info = None
                 if log_result and result is not None:
-                    result_str = str(result)
-                    result_info = result_str[:200] + '...' if len(result_str) > 200 else result_str
+                    result_info = LazyValue(lambda: _preview(result, 200))
                 
                 # 记录工具调用成功
                 tool_logger.info(
@@ -144,7 +151,8 @@ def log_data_source_call(source_name: str):
                 duration = time.time() - start_time
                 
                 # 检查结果是否成功
-                success = result and "❌" not in str(result) and "错误" not in str(result)
+                result_text = str(result) if result else ""
+                success = bool(result_text) and "❌" not in result_text and "错误" not in result_text
                 
                 if success:
                     tool_logger.info(
@@ -154,7 +162,7 @@ def log_data_source_call(source_name: str):
                             'symbol': symbol,
                             'event_type': 'data_source_success',
                             'duration': duration,
-                            'data_size': len(str(result)) if result else 0,
+                            'data_size': len(result_text),
                             'timestamp': datetime.now().isoformat()
                         }
                     )
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+分析流程耗时追踪
+以分析ID关联一次分析中的各阶段span：图节点、LLM调用（排队/首Token/总耗时）、
+工具调用、数据源获取和缓存查询，分析结束后写入本地JSONL文件（字段命名与OTLP一致），
+供Web界面绘制瀑布图或导出到OpenTelemetry兼容的后端。
+
+- trace_analysis(analysis_id)：在当前上下文开启一次分析追踪
+- trace_span(name, kind) / @traced：记录任意代码段，未开启追踪时几乎没有开销
+- TracingCallbackHandler：作为LangChain回调挂到图上，自动记录节点、LLM和工具span
+  （定义在 tracing_callbacks，按需导入，本模块不依赖LangChain）
+"""
+
+import functools
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from tradingagents.config.env_utils import parse_bool_env, parse_str_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class SpanKind:
+    """span类型"""
+    ANALYSIS = "analysis"
+    NODE = "node"
+    LLM = "llm"
+    TOOL = "tool"
+    DATA_SOURCE = "data_source"
+    CACHE = "cache"
+    INTERNAL = "internal"
+
+
+@dataclass
+class Span:
+    """一个计时区间"""
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    end: Optional[float] = None
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为OTLP风格的JSON记录"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int((self.end or self.start) * 1e9),
+            "durationMs": round(self.duration * 1000, 3),
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+            "attributes": self.attributes,
+        }
+
+
+def _new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class JsonlTraceSink:
+    """每个分析一个JSONL文件，每行一个span"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def path(self, analysis_id: str) -> Path:
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in analysis_id)
+        return self.directory / f"{safe_id}.jsonl"
+
+    def write(self, analysis_id: str, spans: List[Dict[str, Any]]):
+        if not spans:
+            return
+        lines = "".join(json.dumps(span, ensure_ascii=False, default=str) + "\n" for span in spans)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.path(analysis_id), "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def load(self, analysis_id: str) -> List[Dict[str, Any]]:
+        path = self.path(analysis_id)
+        if not path.exists():
+            return []
+        spans = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+        return spans
+
+
+class AnalysisTrace:
+    """一次分析的追踪上下文"""
+
+    # 缓冲的span数量达到该值时提前写入
+    FLUSH_THRESHOLD = 200
+
+    def __init__(self, analysis_id: str, sink: Optional[JsonlTraceSink] = None, **attributes):
+        self.analysis_id = analysis_id
+        self.trace_id = uuid.uuid4().hex
+        self.sink = sink
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.root = self.start_span("analysis", SpanKind.ANALYSIS, parent=None, **attributes)
+
+    def start_span(self, name: str, kind: str, parent: Optional[Span] = "current", **attributes) -> Span:
+        """开始span，parent默认取当前上下文中的span（无则挂在分析根span下）"""
+        if parent == "current":
+            current = _current_span.get()
+            parent = current if current is not None and current.trace_id == self.trace_id else self.root
+        attributes.setdefault("analysis.id", self.analysis_id)
+        return Span(name=name, kind=kind, trace_id=self.trace_id, span_id=_new_span_id(),
+                    parent_id=parent.span_id if parent else None, start=time.time(), attributes=attributes)
+
+    def end_span(self, span: Span, error: Optional[str] = None, **attributes):
+        span.end = time.time()
+        if error:
+            span.error = error
+        span.attributes.update(attributes)
+        with self._lock:
+            self._pending.append(span.to_dict())
+            flush = len(self._pending) >= self.FLUSH_THRESHOLD
+        if flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if self.sink is None or not pending:
+            return
+        try:
+            self.sink.write(self.analysis_id, pending)
+        except Exception as e:
+            logger.warning(f"⚠️ [追踪] 写入span失败: {e}")
+
+    def finish(self, error: Optional[str] = None):
+        self.end_span(self.root, error=error)
+        self.flush()
+
+
+# 当前上下文的追踪和span（LangGraph节点线程会继承上下文）
+_current_trace: ContextVar[Optional[AnalysisTrace]] = ContextVar("analysis_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("analysis_span", default=None)
+
+_default_sink: Optional[JsonlTraceSink] = None
+_default_sink_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    return parse_bool_env("TRADINGAGENTS_TRACING_ENABLED", True)
+
+
+def get_trace_sink() -> JsonlTraceSink:
+    """获取默认的JSONL追踪输出（TRADINGAGENTS_TRACE_DIR，默认 ./data/traces）"""
+    global _default_sink
+    if _default_sink is None:
+        with _default_sink_lock:
+            if _default_sink is None:
+                _default_sink = JsonlTraceSink(parse_str_env("TRADINGAGENTS_TRACE_DIR", "./data/traces"))
+    return _default_sink
+
+
+def get_current_trace() -> Optional[AnalysisTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_analysis(analysis_id: str, sink: Optional[JsonlTraceSink] = None, **attributes):
+    """在上下文范围内追踪一次分析，结束时写入全部span；追踪关闭时返回None"""
+    if not tracing_enabled():
+        yield None
+        return
+
+    trace = AnalysisTrace(analysis_id, sink or get_trace_sink(), **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    error = None
+    try:
+        yield trace
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace.finish(error=error)
+        logger.info(f"⏱️ [追踪] {analysis_id} 总耗时 {trace.root.duration:.2f}s")
+
+
+@contextmanager
+def trace_span(name: str, kind: str = SpanKind.INTERNAL, **attributes):
+    """记录一段代码的耗时；yield的span可在结束前补充属性，未开启追踪时yield None"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    span = trace.start_span(name, kind, **attributes)
+    token = _current_span.set(span)
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.end_span(span, error=error)
+
+
+def traced(name: Optional[str] = None, kind: str = SpanKind.INTERNAL):
+    """为函数记录span的装饰器"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with trace_span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mark_llm_request_start(run_manager) -> None:
+    """在LLM适配器发出请求前调用，把排队耗时记录到对应的LLM span"""
+    if run_manager is None or _current_trace.get() is None:
+        return
+    handlers = list(getattr(run_manager, "handlers", []) or []) + \
+        list(getattr(run_manager, "inheritable_handlers", []) or [])
+    from tradingagents.utils.tracing_callbacks import TracingCallbackHandler
+    for handler in handlers:
+        if isinstance(handler, TracingCallbackHandler):
+            handler.mark_request_start(run_manager.run_id)
+            return
+
+
+def load_trace(analysis_id: str, sink: Optional[JsonlTraceSink] = None) -> List[Dict[str, Any]]:
+    """读取一次分析的全部span（按开始时间排序）"""
+    spans = (sink or get_trace_sink()).load(analysis_id)
+    return sorted(spans, key=lambda span: span.get("startTimeUnixNano", 0))
+
+
+def summarize_trace(spans: List[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    """按类型汇总耗时，并列出最慢的阶段"""
+    by_kind: Dict[str, Dict[str, float]] = {}
+    for span in spans:
+        if span.get("kind") == SpanKind.ANALYSIS:
+            continue
+        stats = by_kind.setdefault(span.get("kind", SpanKind.INTERNAL), {"count": 0, "total_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += span.get("durationMs", 0.0)
+    slowest = sorted((span for span in spans if span.get("kind") != SpanKind.ANALYSIS),
+                     key=lambda span: span.get("durationMs", 0.0), reverse=True)[:top]
+    root = next((span for span in spans if span.get("kind") == SpanKind.ANALYSIS), None)
+    return {
+        "total_ms": root.get("durationMs") if root else None,
+        "by_kind": by_kind,
+        "slowest": [{"name": span["name"], "kind": span.get("kind"), "duration_ms": span.get("durationMs")}
+                    for span in slowest],
+    }
+
+
+def to_otlp(spans: List[Dict[str, Any]], service_name: str = "tradingagents") -> Dict[str, Any]:
+    """转换为OTLP/HTTP JSON格式（resourceSpans），可直接提交给OpenTelemetry Collector"""
+    def attribute(key, value):
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    otlp_spans = []
+    for span in spans:
+        attributes = {**span.get("attributes", {}), "span.kind": span.get("kind")}
+        status = span.get("status", {})
+        otlp_spans.append({
+            "traceId": span["traceId"],
+            "spanId": span["spanId"],
+            "parentSpanId": span.get("parentSpanId", ""),
+            "name": span["name"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span["startTimeUnixNano"]),
+            "endTimeUnixNano": str(span["endTimeUnixNano"]),
+            "attributes": [attribute(k, v) for k, v in attributes.items() if v is not None],
+            "status": {"code": 2, "message": status.get("message", "")} if status.get("code") == "ERROR" else {"code": 1},
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", service_name)]},
+            "scopeSpans": [{"scope": {"name": "tradingagents.tracing"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+def __getattr__(name: str):
+    # LangChain回调按需导入，缓存/数据源模块导入本模块时不加载langchain_core
+    if name == "TracingCallbackHandler":
+        from tradingagents.utils.tracing_callbacks import TracingCallbackHandler
+        return TracingCallbackHandler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+分析追踪的LangChain回调
+挂到图上自动记录图节点、LLM调用和工具调用的span
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tradingagents.utils.tracing import AnalysisTrace, Span, SpanKind, _current_span
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain回调：记录图节点、LLM调用和工具调用的span
+
+    LLM span属性：queue（开始到适配器真正发出请求的时间，含缓存查询）、
+    ttft（流式输出时首Token延迟）、input_tokens/output_tokens。
+    """
+
+    run_inline = True
+
+    def __init__(self, trace: AnalysisTrace):
+        self.trace = trace
+        self._spans: Dict[UUID, Span] = {}
+        # run_id -> 该运行所属的最近一个span，用于确定子运行的父span
+        self._owners: Dict[UUID, Span] = {}
+        self._previous_span: Dict[UUID, Optional[Span]] = {}
+        self._lock = threading.Lock()
+
+    def _parent(self, parent_run_id: Optional[UUID]) -> Span:
+        with self._lock:
+            return self._owners.get(parent_run_id, self.trace.root) if parent_run_id else self.trace.root
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str, **attributes) -> Span:
+        span = self.trace.start_span(name, kind, parent=self._parent(parent_run_id), **attributes)
+        with self._lock:
+            self._spans[run_id] = span
+            self._owners[run_id] = span
+        return span
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+            self._owners.pop(run_id, None)
+        if span is not None:
+            self.trace.end_span(span, error=str(error) if error else None, **attributes)
+
+    # ---------- 图节点 ----------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        if node and name == node:
+            self._start(run_id, parent_run_id, node, SpanKind.NODE,
+                        step=(metadata or {}).get("langgraph_step"))
+            return
+        # 非节点的内部运行继承父运行的归属span
+        with self._lock:
+            owner = self._owners.get(parent_run_id) if parent_run_id else None
+            if owner is not None:
+                self._owners[run_id] = owner
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # ---------- LLM ----------
+
+    def _start_llm(self, serialized, run_id, parent_run_id, metadata, kwargs):
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        model = (metadata.get("ls_model_name") or params.get("model") or params.get("model_name")
+                 or (serialized or {}).get("name") or "llm")
+        self._start(run_id, parent_run_id, f"llm:{model}", SpanKind.LLM,
+                    provider=metadata.get("ls_provider"), model=model)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start_llm(serialized, run_id, parent_run_id, metadata, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start_llm(serialized, run_id, parent_run_id, metadata, kwargs)
+
+    def mark_request_start(self, run_id: UUID):
+        """适配器即将发出请求时调用，记录排队耗时"""
+        with self._lock:
+            span = self._spans.get(run_id)
+        if span is not None and "queue" not in span.attributes:
+            span.attributes["queue"] = round(time.time() - span.start, 3)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.get(run_id)
+        if span is not None and "ttft" not in span.attributes:
+            span.attributes["ttft"] = round(time.time() - span.start, 3)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        attributes = {}
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        if usage:
+            attributes["input_tokens"] = usage.get("prompt_tokens") or usage.get("input_tokens")
+            attributes["output_tokens"] = usage.get("completion_tokens") or usage.get("output_tokens")
+        else:
+            try:
+                usage = response.generations[0][0].message.usage_metadata or {}
+                attributes["input_tokens"] = usage.get("input_tokens")
+                attributes["output_tokens"] = usage.get("output_tokens")
+            except (AttributeError, IndexError, TypeError):
+                pass
+        self._end(run_id, **{k: v for k, v in attributes.items() if v is not None})
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # ---------- 工具 ----------
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        span = self._start(run_id, parent_run_id, f"tool:{name}", SpanKind.TOOL)
+        # 工具内部的数据源/缓存span挂在该工具下
+        with self._lock:
+            self._previous_span[run_id] = _current_span.get()
+        _current_span.set(span)
+
+    def _end_tool(self, run_id, error=None):
+        with self._lock:
+            previous = self._previous_span.pop(run_id, None)
+        _current_span.set(previous)
+        self._end(run_id, error)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, error)
@@ -30,6 +30,10 @@ except ImportError:
 # 加载环境变量
 load_dotenv(project_root / ".env", override=True)
 
+# 在后台探测MongoDB/Redis，页面无需等待连接超时即可渲染
+from tradingagents.config.database_manager import start_background_probe
+start_background_probe()
+
 # 导入自定义组件
 from components.sidebar import render_sidebar
 from components.header import render_header
@@ -45,6 +49,7 @@ from components.async_progress_display import display_unified_progress
 from utils.smart_session_manager import get_persistent_analysis_id, set_persistent_analysis_id
 from utils.auth_manager import auth_manager
 from utils.user_activity_logger import user_activity_logger
+from tradingagents.utils.tracing import trace_analysis
 
 # 设置页面配置
 st.set_page_config(
@@ -344,7 +349,8 @@ def initialize_session_state():
             from utils.async_progress_tracker import get_latest_analysis_id, get_progress_by_id
             from utils.analysis_runner import format_analysis_results
 
-            latest_id = get_latest_analysis_id()
+            current_username = (st.session_state.get('user_info') or {}).get('username')
+            latest_id = get_latest_analysis_id(current_username)
             if latest_id:
                 progress_data = get_progress_by_id(latest_id)
                 if (progress_data and
@@ -1212,7 +1218,8 @@ def main():
                     analysis_id=analysis_id,
                     analysts=form_data['analysts'],
                     research_depth=form_data['research_depth'],
-                    llm_provider=config['llm_provider']
+                    llm_provider=config['llm_provider'],
+                    username=(st.session_state.get('user_info') or {}).get('username')
                 )
 
                 # 创建进度回调函数
@@ -1222,20 +1229,9 @@ def main():
                 # 显示启动成功消息和加载动效
                 st.success(f"🚀 分析已启动！分析ID: {analysis_id}")
 
-                # 添加加载动效
-                with st.spinner("🔄 正在初始化分析..."):
-                    time.sleep(1.5)  # 让用户看到反馈
-
                 st.info(f"📊 正在分析: {form_data.get('market_type', '美股')} {form_data['stock_symbol']}")
-                st.info("""
-                ⏱️ 页面将在6秒后自动刷新...
-
-                📋 **查看分析进度：**
-                刷新后请向下滚动到 "📊 股票分析" 部分查看实时进度
-                """)
 
-                # 确保AsyncProgressTracker已经保存初始状态
-                time.sleep(0.1)  # 等待100毫秒确保数据已写入
+                # AsyncProgressTracker初始化时已同步保存初始状态，进度页面可立即读取
 
                 # 设置分析状态
                 st.session_state.analysis_running = True
@@ -1259,16 +1255,20 @@ def main():
                 def run_analysis_in_background():
                     try:
 
-                        results = run_stock_analysis(
-                            stock_symbol=form_data['stock_symbol'],
-                            analysis_date=form_data['analysis_date'],
-                            analysts=form_data['analysts'],
-                            research_depth=form_data['research_depth'],
-                            llm_provider=config['llm_provider'],
-                            market_type=form_data.get('market_type', '美股'),
-                            llm_model=config['llm_model'],
-                            progress_callback=progress_callback
-                        )
+                        # 记录各阶段耗时，供分析报告中的耗时瀑布图使用
+                        with trace_analysis(analysis_id, stock_symbol=form_data['stock_symbol'],
+                                            llm_provider=config['llm_provider'], llm_model=config['llm_model']):
+                            results = run_stock_analysis(
+                                stock_symbol=form_data['stock_symbol'],
+                                analysis_date=form_data['analysis_date'],
+                                analysts=form_data['analysts'],
+                                research_depth=form_data['research_depth'],
+                                llm_provider=config['llm_provider'],
+                                market_type=form_data.get('market_type', '美股'),
+                                llm_model=config['llm_model'],
+                                progress_callback=progress_callback,
+                                stream_callback=async_tracker.update_stream
+                            )
 
                         # 标记分析完成并保存结果（不访问session state）
                         async_tracker.mark_completed("✅ 分析成功完成！", results=results)
@@ -1336,14 +1336,7 @@ def main():
 
                 logger.info(f"🧵 [后台分析] 分析线程已启动: {analysis_id}")
 
-                # 分析已在后台线程中启动，显示启动信息并刷新页面
-                st.success("🚀 分析已启动！正在后台运行...")
-
-                # 显示启动信息
-                st.info("⏱️ 页面将自动刷新显示分析进度...")
-
-                # 等待2秒让用户看到启动信息，然后刷新页面
-                time.sleep(2)
+                # 分析已在后台线程中启动，立即刷新页面进入进度显示（进度更新由事件推送驱动）
                 st.rerun()
 
         # 2. 股票分析区域（只有在有分析ID时才显示）
@@ -1388,7 +1381,7 @@ def main():
 
             # 如果分析正在进行，显示提示信息（不添加额外的自动刷新）
             if is_running:
-                st.info("⏱️ 分析正在进行中，可以使用下方的自动刷新功能查看进度更新...")
+                st.info("⏱️ 分析正在进行中，开启自动刷新后有新进度时页面会自动更新...")
 
             # 如果分析刚完成，尝试恢复结果
             if is_completed and not st.session_state.get('analysis_results') and progress_data:
@@ -1433,9 +1426,7 @@ def main():
                             refresh_key = f"results_refreshed_{current_analysis_id}"
                             if not st.session_state.get(refresh_key, False):
                                 st.session_state[refresh_key] = True
-                                st.success("📊 分析结果已恢复并保存，正在刷新页面...")
                                 # 使用st.rerun()代替meta refresh，保持侧边栏状态
-                                time.sleep(1)
                                 st.rerun()
                             else:
                                 # 已经刷新过，不再刷新
@@ -1446,10 +1437,7 @@ def main():
             if is_completed and st.session_state.get('analysis_running', False):
                 # 分析刚完成，更新状态
                 st.session_state.analysis_running = False
-                st.success("🎉 分析完成！正在刷新页面显示报告...")
-
                 # 使用st.rerun()代替meta refresh，保持侧边栏状态
-                time.sleep(1)
                 st.rerun()
 
 
@@ -1484,6 +1472,11 @@ def main():
             render_results(analysis_results)
             logger.info(f"✅ [布局] 分析报告已显示")
 
+            if current_analysis_id:
+                with st.expander("⏱️ 耗时分析", expanded=False):
+                    from components.trace_waterfall import render_trace_waterfall
+                    render_trace_waterfall(current_analysis_id)
+
             # 清除查看报告按钮状态，避免重复触发
             if show_results_button_clicked:
                 st.session_state.show_analysis_results = False
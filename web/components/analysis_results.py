@@ -14,16 +14,27 @@ import os
 from pathlib import Path
 import hashlib
 import logging
+import time
 
 # MongoDB相关导入
 try:
-    from web.utils.mongodb_report_manager import MongoDBReportManager
+    from web.utils.mongodb_report_manager import MongoDBReportManager, mongodb_report_manager
     MONGODB_AVAILABLE = True
     print("✅ MongoDB模块导入成功")
 except ImportError as e:
     MONGODB_AVAILABLE = False
     print(f"❌ MongoDB模块导入失败: {e}")
 
+# 文件系统分析结果目录索引
+try:
+    from web.utils.results_catalog import (
+        export_full_results, get_results_catalog, load_result_details
+    )
+    RESULTS_CATALOG_AVAILABLE = True
+except ImportError as e:
+    RESULTS_CATALOG_AVAILABLE = False
+    print(f"❌ 分析结果目录索引模块导入失败: {e}")
+
 # 设置日志
 logger = logging.getLogger(__name__)
 
@@ -49,6 +60,14 @@ def get_analysis_results_dir():
     results_dir.mkdir(parents=True, exist_ok=True)
     return results_dir
 
+def get_report_roots():
+    """获取分模块报告的根目录（历史detailed目录和TRADINGAGENTS_RESULTS_DIR配置的results目录）"""
+    project_root = Path(__file__).parent.parent.parent
+    results_dir = Path(os.getenv("TRADINGAGENTS_RESULTS_DIR") or "results")
+    if not results_dir.is_absolute():
+        results_dir = project_root / results_dir
+    return [project_root / "data" / "analysis_results" / "detailed", results_dir]
+
 def get_favorites_file():
     """获取收藏文件路径"""
     return get_analysis_results_dir() / "favorites.json"
@@ -122,42 +141,86 @@ def get_analysis_tags(analysis_id):
     tags = load_tags()
     return tags.get(analysis_id, [])
 
+# MongoDB未连接时的重连间隔（秒），避免每次页面重绘都等待连接超时
+MONGODB_RECONNECT_INTERVAL = 60
+_last_mongodb_reconnect = 0.0
+
+def get_mongodb_report_manager():
+    """获取共享的MongoDB报告管理器，未连接时返回None（避免每次页面重绘都重新建立连接）"""
+    global _last_mongodb_reconnect
+    if not MONGODB_AVAILABLE:
+        return None
+
+    if not mongodb_report_manager.connected:
+        now = time.time()
+        if now - _last_mongodb_reconnect < MONGODB_RECONNECT_INTERVAL:
+            return None
+        _last_mongodb_reconnect = now
+        mongodb_report_manager._connect()
+
+    return mongodb_report_manager if mongodb_report_manager.connected else None
+
+def _filter_analysis_ids(tags_data, favorites, tags_filter=None, favorites_only=False):
+    """将收藏和标签过滤转换为分析ID集合，None表示不限制"""
+    analysis_ids = None
+    if favorites_only:
+        analysis_ids = set(favorites)
+    if tags_filter:
+        tagged_ids = {analysis_id for analysis_id, tags in tags_data.items()
+                      if any(tag in tags for tag in tags_filter)}
+        analysis_ids = tagged_ids if analysis_ids is None else analysis_ids & tagged_ids
+    return analysis_ids
+
 def load_analysis_results(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
                          limit=100, search_text=None, tags_filter=None, favorites_only=False):
     """加载分析结果 - 优先从MongoDB加载"""
+    results, _ = load_analysis_results_page(
+        start_date=start_date, end_date=end_date, stock_symbol=stock_symbol,
+        analyst_type=analyst_type, limit=limit, search_text=search_text,
+        tags_filter=tags_filter, favorites_only=favorites_only
+    )
+    return results
+
+def load_analysis_results_page(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
+                               limit=100, search_text=None, tags_filter=None, favorites_only=False,
+                               cursor=None):
+    """
+    加载一页分析结果，返回 (results, next_cursor)
+
+    MongoDB中的过滤、排序和翻页都在数据库端完成，列表结果不含报告正文，
+    打开详情时通过 ensure_report_details() 按需加载。
+    MongoDB不可用时从文件系统目录索引查询，next_cursor 始终为None。
+    """
     all_results = []
     favorites = load_favorites() if favorites_only else []
     tags_data = load_tags()
     mongodb_loaded = False
+    next_cursor = None
 
     # 优先从MongoDB加载数据
-    if MONGODB_AVAILABLE:
+    mongodb_manager = get_mongodb_report_manager()
+    if mongodb_manager:
         try:
             print("🔍 [数据加载] 从MongoDB加载分析结果")
-            mongodb_manager = MongoDBReportManager()
-            mongodb_results = mongodb_manager.get_all_reports()
-            print(f"🔍 [数据加载] MongoDB返回 {len(mongodb_results)} 个结果")
-
-            for mongo_result in mongodb_results:
-                # 转换MongoDB结果格式
-                result = {
-                    'analysis_id': mongo_result.get('analysis_id', ''),
-                    'timestamp': mongo_result.get('timestamp', 0),
-                    'stock_symbol': mongo_result.get('stock_symbol', ''),
-                    'analysts': mongo_result.get('analysts', []),
-                    'research_depth': mongo_result.get('research_depth', 1),
-                    'status': mongo_result.get('status', 'completed'),
-                    'summary': mongo_result.get('summary', ''),
-                    'performance': mongo_result.get('performance', {}),
-                    'tags': tags_data.get(mongo_result.get('analysis_id', ''), []),
-                    'is_favorite': mongo_result.get('analysis_id', '') in favorites,
-                    'reports': mongo_result.get('reports', {}),
-                    'source': 'mongodb'  # 标记数据来源
-                }
+            page = mongodb_manager.query_reports(
+                start_date=start_date,
+                end_date=end_date,
+                stock_symbol=stock_symbol,
+                analyst_type=analyst_type,
+                search_text=search_text,
+                analysis_ids=_filter_analysis_ids(tags_data, favorites, tags_filter, favorites_only),
+                limit=limit,
+                cursor=cursor,
+            )
+            next_cursor = page["next_cursor"]
+
+            for result in page["items"]:
+                result['tags'] = tags_data.get(result['analysis_id'], [])
+                result['is_favorite'] = result['analysis_id'] in favorites
                 all_results.append(result)
 
             mongodb_loaded = True
-            print(f"✅ 从MongoDB加载了 {len(mongodb_results)} 个分析结果")
+            print(f"✅ 从MongoDB加载了 {len(all_results)} 个分析结果")
 
         except Exception as e:
             print(f"❌ MongoDB加载失败: {e}")
@@ -166,126 +229,31 @@ def load_analysis_results(start_date=None, end_date=None, stock_symbol=None, ana
     else:
         print("⚠️ MongoDB不可用，将使用文件系统数据")
 
-    # 只有在MongoDB加载失败或不可用时才从文件系统加载
-    if not mongodb_loaded:
-        print("🔄 [备用数据源] 从文件系统加载分析结果")
-
-        # 首先尝试从Web界面的保存位置读取
-        web_results_dir = get_analysis_results_dir()
-        for result_file in web_results_dir.glob("*.json"):
-            if result_file.name in ['favorites.json', 'tags.json']:
-                continue
-
-            try:
-                with open(result_file, 'r', encoding='utf-8') as f:
-                    result = json.load(f)
-
-                    # 添加标签信息
-                    result['tags'] = tags_data.get(result.get('analysis_id', ''), [])
-                    result['is_favorite'] = result.get('analysis_id', '') in favorites
-                    result['source'] = 'file_system'  # 标记数据来源
-
-                    all_results.append(result)
-            except Exception as e:
-                st.warning(f"读取分析结果文件 {result_file.name} 失败: {e}")
-
-        # 然后从实际的分析结果保存位置读取
-        project_results_dir = Path(__file__).parent.parent.parent / "data" / "analysis_results" / "detailed"
-
-        if project_results_dir.exists():
-            # 遍历股票代码目录
-            for stock_dir in project_results_dir.iterdir():
-                if not stock_dir.is_dir():
-                    continue
-
-                stock_code = stock_dir.name
-
-                # 遍历日期目录
-                for date_dir in stock_dir.iterdir():
-                    if not date_dir.is_dir():
-                        continue
-
-                    date_str = date_dir.name
-                    reports_dir = date_dir / "reports"
-
-                    if not reports_dir.exists():
-                        continue
-
-                    # 读取所有报告文件
-                    reports = {}
-                    summary_content = ""
-
-                    for report_file in reports_dir.glob("*.md"):
-                        try:
-                            with open(report_file, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                report_name = report_file.stem
-                                reports[report_name] = content
-
-                                # 如果是最终决策报告，提取摘要
-                                if report_name == "final_trade_decision":
-                                    # 提取前200个字符作为摘要
-                                    summary_content = content[:200].replace('#', '').replace('*', '').strip()
-                                    if len(content) > 200:
-                                        summary_content += "..."
-
-                        except Exception as e:
-                            continue
-
-                    if reports:
-                        # 解析日期
-                        try:
-                            analysis_date = datetime.strptime(date_str, '%Y-%m-%d')
-                            timestamp = analysis_date.timestamp()
-                        except:
-                            timestamp = datetime.now().timestamp()
-
-                        # 创建分析结果条目
-                        analysis_id = f"{stock_code}_{date_str}_{int(timestamp)}"
-
-                        # 尝试从元数据文件中读取真实的研究深度和分析师信息
-                        research_depth = 1
-                        analysts = ['market', 'fundamentals', 'trader']  # 默认值
-
-                        metadata_file = date_dir / "analysis_metadata.json"
-                        if metadata_file.exists():
-                            try:
-                                with open(metadata_file, 'r', encoding='utf-8') as f:
-                                    metadata = json.load(f)
-                                    research_depth = metadata.get('research_depth', 1)
-                                    analysts = metadata.get('analysts', analysts)
-                            except Exception as e:
-                                # 如果读取元数据失败，使用推断逻辑
-                                if len(reports) >= 5:
-                                    research_depth = 3
-                                elif len(reports) >= 3:
-                                    research_depth = 2
-                        else:
-                            # 如果没有元数据文件，使用推断逻辑
-                            if len(reports) >= 5:
-                                research_depth = 3
-                            elif len(reports) >= 3:
-                                research_depth = 2
-
-                        result = {
-                            'analysis_id': analysis_id,
-                            'timestamp': timestamp,
-                            'stock_symbol': stock_code,
-                            'analysts': analysts,
-                            'research_depth': research_depth,
-                            'status': 'completed',
-                            'summary': summary_content,
-                            'performance': {},
-                            'tags': tags_data.get(analysis_id, []),
-                            'is_favorite': analysis_id in favorites,
-                            'reports': reports,  # 保存所有报告内容
-                            'source': 'file_system'  # 标记数据来源
-                        }
-
-                        all_results.append(result)
+    # 只有在MongoDB加载失败或不可用时才从文件系统目录索引加载（文件系统数据没有后续页）
+    if not mongodb_loaded and not cursor and RESULTS_CATALOG_AVAILABLE:
+        print("🔄 [备用数据源] 从文件系统目录索引加载分析结果")
+        try:
+            catalog = get_results_catalog()
+            catalog.sync_directories(get_analysis_results_dir(), get_report_roots())
+            items = catalog.query(
+                start_date=start_date,
+                end_date=end_date,
+                stock_symbol=stock_symbol,
+                analyst_type=analyst_type,
+                search_text=search_text,
+                analysis_ids=_filter_analysis_ids(tags_data, favorites, tags_filter, favorites_only),
+                limit=limit,
+            )
+            for result in items:
+                result['tags'] = tags_data.get(result['analysis_id'], [])
+                result['is_favorite'] = result['analysis_id'] in favorites
+                all_results.append(result)
+        except Exception as e:
+            print(f"❌ 文件系统目录索引加载失败: {e}")
+            logger.error(f"文件系统目录索引加载失败: {e}")
 
         print(f"🔄 [备用数据源] 从文件系统加载了 {len(all_results)} 个分析结果")
-    
+
     # 过滤结果
     filtered_results = []
     for result in all_results:
@@ -328,7 +296,25 @@ def load_analysis_results(start_date=None, end_date=None, stock_symbol=None, ana
     filtered_results.sort(key=lambda x: safe_timestamp_to_datetime(x.get('timestamp', 0)), reverse=True)
     
     # 限制数量
-    return filtered_results[:limit]
+    return filtered_results[:limit], next_cursor
+
+def ensure_report_details(result):
+    """列表结果不含报告正文，打开详情时按analysis_id从MongoDB或文件系统按需加载（会话内缓存）"""
+    source = result.get('source')
+    if result.get('reports') or result.get('full_data') or source not in ('mongodb', 'file_system'):
+        return result
+
+    analysis_id = result.get('analysis_id')
+    details_cache = st.session_state.setdefault('report_details_cache', {})
+    if analysis_id not in details_cache:
+        if RESULTS_CATALOG_AVAILABLE:
+            mongodb_manager = get_mongodb_report_manager() if source == 'mongodb' else None
+            details_cache[analysis_id] = load_result_details(result, mongodb_manager)
+        else:
+            details_cache[analysis_id] = {}
+
+    result.update(details_cache[analysis_id])
+    return result
 
 def render_analysis_results():
     """渲染分析结果管理界面"""
@@ -401,7 +387,7 @@ def render_analysis_results():
             selected_tags = []
     
     # 加载分析结果
-    results = load_analysis_results(
+    query_kwargs = dict(
         start_date=start_date,
         end_date=end_date,
         stock_symbol=stock_filter if stock_filter else None,
@@ -411,10 +397,27 @@ def render_analysis_results():
         tags_filter=selected_tags if selected_tags else None,
         favorites_only=favorites_only
     )
+    results, next_cursor = load_analysis_results_page(**query_kwargs)
+
+    # 通过“加载更多”获取的后续页，过滤条件变化时重置
+    filter_key = repr(sorted(query_kwargs.items(), key=lambda item: item[0]))
+    more_pages = st.session_state.get('analysis_results_more')
+    if not more_pages or more_pages['key'] != filter_key:
+        more_pages = {'key': filter_key, 'results': [], 'next_cursor': None}
+        st.session_state['analysis_results_more'] = more_pages
+    if more_pages['results']:
+        results = results + more_pages['results']
+        next_cursor = more_pages['next_cursor']
     
     if not results:
         st.warning("📭 未找到符合条件的分析结果")
         return
+
+    if next_cursor and st.button("⬇️ 加载更多历史记录"):
+        page_results, page_cursor = load_analysis_results_page(cursor=next_cursor, **query_kwargs)
+        more_pages['results'].extend(page_results)
+        more_pages['next_cursor'] = page_cursor
+        st.rerun()
     
     # 显示统计概览
     col1, col2, col3, col4 = st.columns(4)
@@ -954,8 +957,14 @@ def render_results_export(results: List[Dict[str, Any]]):
                     )
             
             else:  # 完整数据
+                if export_format == "JSON" and not RESULTS_CATALOG_AVAILABLE:
+                    st.error("❌ 分析结果目录索引模块不可用，无法加载报告正文")
+                    return
                 if export_format == "JSON":
-                    json_data = json.dumps(results, ensure_ascii=False, indent=2)
+                    # 列表条目不含报告正文，导出前按analysis_id加载详情
+                    mongodb_manager = get_mongodb_report_manager() if any(
+                        result.get('source') == 'mongodb' for result in results) else None
+                    json_data = export_full_results(results, mongodb_manager)
                     
                     st.download_button(
                         label="下载完整数据 JSON 文件",
@@ -1240,6 +1249,7 @@ def render_detailed_analysis(results: List[Dict[str, Any]]):
 def render_detailed_analysis_content(selected_result):
     """渲染详细分析结果内容"""
     st.subheader("📊 完整分析数据")
+    ensure_report_details(selected_result)
 
     # 检查是否有报告数据（支持文件系统和MongoDB）
     if 'reports' in selected_result and selected_result['reports']:
@@ -1616,6 +1626,10 @@ def save_analysis_result(analysis_id: str, stock_symbol: str, analysts: List[str
         with open(result_file, 'w', encoding='utf-8') as f:
             json.dump(result_entry, f, ensure_ascii=False, indent=2)
 
+        # 同步更新目录索引，历史页面无需重新扫描结果文件
+        if RESULTS_CATALOG_AVAILABLE:
+            get_results_catalog().add_result_file(result_file, result_entry)
+
         # 2. 保存到MongoDB（如果可用）
         if MONGODB_AVAILABLE:
             try:
@@ -1693,6 +1707,7 @@ def save_analysis_result(analysis_id: str, stock_symbol: str, analysts: List[str
 
 def show_expanded_detail(result):
     """显示展开的详情内容"""
+    ensure_report_details(result)
 
     # 创建详情容器
     with st.container():
@@ -1,18 +1,56 @@
 #!/usr/bin/env python3
 """
 异步进度显示组件
-支持定时刷新，从Redis或文件获取进度状态
+从Redis或文件获取进度状态，自动刷新时等待进度事件推送，有新进度才重新渲染
 """
 
 import streamlit as st
 import time
 from typing import Optional, Dict, Any
+from tradingagents.config.env_utils import parse_float_env
 from web.utils.async_progress_tracker import get_progress_by_id, format_time
+from web.utils.progress_events import ProgressCursor, get_progress_event_bus
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('async_display')
 
+# 长时间没有新事件时的兜底刷新间隔（秒），用于更新页面状态和检测分析线程是否退出
+PROGRESS_PUSH_MAX_WAIT = parse_float_env("PROGRESS_PUSH_MAX_WAIT_SECONDS", 30.0)
+
+# 还没有进度数据（分析线程尚未写入第一条进度）时的刷新间隔（秒），与常规自动刷新间隔一致
+NO_PROGRESS_REFRESH_INTERVAL = 2.0
+
+
+def wait_for_progress_event(analysis_id: str, since: ProgressCursor, start_time: float = 0,
+                            max_wait: Optional[float] = None):
+    """
+    阻塞等待进度事件后重新运行页面
+
+    since 应在读取进度数据之前通过 get_progress_event_bus().cursor() 获取，
+    这样渲染期间到达的事件也会立即触发刷新。等待期间每秒只更新一行计时文本，
+    不重新执行整个页面脚本；该轻量更新同时让Streamlit能及时响应用户操作。
+    max_wait 为最长等待秒数，默认 PROGRESS_PUSH_MAX_WAIT。
+    """
+    bus = get_progress_event_bus()
+    ticker = st.empty()
+
+    def render_ticker():
+        if start_time > 0:
+            ticker.caption(f"⏳ 等待进度更新... 已用时间 {format_time(time.time() - start_time)}")
+        else:
+            ticker.caption("⏳ 等待分析开始...")
+
+    # 阻塞前先输出一次，页面在等待期间不会空白
+    render_ticker()
+    deadline = time.time() + (PROGRESS_PUSH_MAX_WAIT if max_wait is None else max_wait)
+    while time.time() < deadline:
+        if bus.wait_for_update(analysis_id, since, timeout=min(1.0, max(deadline - time.time(), 0.01))):
+            break
+        render_ticker()
+    st.rerun()
+
+
 class AsyncProgressDisplay:
     """异步进度显示组件"""
     
@@ -35,12 +73,12 @@ class AsyncProgressDisplay:
         
         logger.info(f"📊 [异步显示] 初始化: {analysis_id}, 刷新间隔: {refresh_interval}s")
     
-    def update_display(self) -> bool:
-        """更新显示，返回是否需要继续刷新"""
+    def update_display(self, force: bool = False) -> bool:
+        """更新显示，返回是否需要继续刷新；force为True时忽略刷新间隔（收到进度事件）"""
         current_time = time.time()
         
         # 检查是否需要刷新
-        if current_time - self.last_update < self.refresh_interval and not self.is_completed:
+        if not force and current_time - self.last_update < self.refresh_interval and not self.is_completed:
             return not self.is_completed
         
         # 获取进度数据
@@ -167,8 +205,10 @@ def auto_refresh_progress(display: AsyncProgressDisplay, max_duration: float = 1
     """自动刷新进度显示"""
     start_time = time.time()
     
-    # 使用Streamlit的自动刷新机制
+    # 在原位更新组件，收到进度事件才重新渲染
     placeholder = st.empty()
+    bus = get_progress_event_bus()
+    force = False
     
     while True:
         # 检查超时
@@ -178,14 +218,15 @@ def auto_refresh_progress(display: AsyncProgressDisplay, max_duration: float = 1
             break
         
         # 更新显示
-        should_continue = display.update_display()
+        since = bus.cursor(display.analysis_id)
+        should_continue = display.update_display(force=force)
         
         if not should_continue:
             # 分析完成或失败，停止刷新
             break
         
-        # 等待刷新间隔
-        time.sleep(display.refresh_interval)
+        # 等待下一个进度事件
+        force = bus.wait_for_update(display.analysis_id, since, timeout=PROGRESS_PUSH_MAX_WAIT)
     
     logger.info(f"📊 [异步显示] 自动刷新结束: {display.analysis_id}")
 
@@ -193,7 +234,8 @@ def auto_refresh_progress(display: AsyncProgressDisplay, max_duration: float = 1
 def streamlit_auto_refresh_progress(analysis_id: str, refresh_interval: int = 2):
     """Streamlit专用的自动刷新进度显示"""
 
-    # 获取进度数据
+    # 获取进度数据（先记录事件位置，避免漏掉读取后到达的事件）
+    since = get_progress_event_bus().cursor(analysis_id)
     progress_data = get_progress_by_id(analysis_id)
 
     if not progress_data:
@@ -293,9 +335,7 @@ def streamlit_auto_refresh_progress(analysis_id: str, refresh_interval: int = 2)
             default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
             auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
             if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                import time
-                time.sleep(3)  # 等待3秒
-                st.rerun()
+                wait_for_progress_event(analysis_id, since, start_time)
             elif auto_refresh and status in ['completed', 'failed']:
                 # 分析完成后自动关闭自动刷新
                 st.session_state[auto_refresh_key] = False
@@ -315,7 +355,8 @@ def display_static_progress(analysis_id: str) -> bool:
     if progress_key not in st.session_state:
         st.session_state[progress_key] = True
 
-    # 获取进度数据
+    # 获取进度数据（先记录事件位置，避免漏掉读取后到达的事件）
+    since = get_progress_event_bus().cursor(analysis_id)
     progress_data = get_progress_by_id(analysis_id)
 
     if not progress_data:
@@ -429,9 +470,7 @@ def display_static_progress(analysis_id: str) -> bool:
                 default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
                 auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
                 if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                    import time
-                    time.sleep(3)  # 等待3秒
-                    st.rerun()
+                    wait_for_progress_event(analysis_id, since, start_time)
                 elif auto_refresh and status in ['completed', 'failed']:
                     # 分析完成后自动关闭自动刷新
                     st.session_state[auto_refresh_key] = False
@@ -467,7 +506,8 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     import streamlit as st
     from web.utils.async_progress_tracker import get_progress_by_id
 
-    # 获取进度数据
+    # 获取进度数据（先记录事件位置，避免漏掉读取后到达的事件）
+    since = get_progress_event_bus().cursor(analysis_id)
     progress_data = get_progress_by_id(analysis_id)
 
     if not progress_data:
@@ -488,13 +528,9 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
                 # 获取默认值，如果是新分析则默认为True
                 default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
                 auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
-                if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                    import time
-                    time.sleep(3)  # 等待3秒
-                    st.rerun()
-                elif auto_refresh and status in ['completed', 'failed']:
-                    # 分析完成后自动关闭自动刷新
-                    st.session_state[auto_refresh_key] = False
+                if auto_refresh:
+                    # 等待跟踪器写入第一条进度；没有开始时间可显示，只等待常规刷新间隔
+                    wait_for_progress_event(analysis_id, since, max_wait=NO_PROGRESS_REFRESH_INTERVAL)
 
         return False  # 返回False表示还未完成
 
@@ -584,6 +620,14 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     else:
         st.info(f"{status_icon} **当前状态**: {last_message}")
 
+        # 显示模型正在生成的内容，避免长时间推理看起来像卡住
+        streaming = progress_data.get('streaming')
+        if streaming and streaming.get('text'):
+            ttft = streaming.get('ttft')
+            ttft_text = f"，首Token {ttft:.1f}秒" if ttft is not None else ""
+            st.caption(f"✍️ {streaming.get('provider')}/{streaming.get('model')} 正在生成{ttft_text}")
+            st.text(f"...{streaming['text']}")
+
     # 显示刷新控制的条件：
     # 1. 需要显示刷新控件 AND
     # 2. (分析正在运行 OR 分析刚开始还没有状态)
@@ -598,9 +642,7 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
             default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
             auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
             if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                import time
-                time.sleep(3)  # 等待3秒
-                st.rerun()
+                wait_for_progress_event(analysis_id, since, start_time)
             elif auto_refresh and status in ['completed', 'failed']:
                 # 分析完成后自动关闭自动刷新
                 st.session_state[auto_refresh_key] = False
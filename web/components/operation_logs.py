@@ -8,11 +8,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, Any
 import json
 import os
 from pathlib import Path
 
+from web.utils.activity_store import SOURCE_OPERATION, get_activity_store
+
+# 导出时最多读取的日志条数
+EXPORT_LIMIT = 10000
+
 def get_operation_logs_dir():
     """获取操作日志目录"""
     logs_dir = Path(__file__).parent.parent / "data" / "operation_logs"
@@ -24,124 +29,33 @@ def get_user_activities_dir():
     logs_dir = Path(__file__).parent.parent / "data" / "user_activities"
     return logs_dir
 
-def load_operation_logs(start_date=None, end_date=None, username=None, action_type=None, limit=1000):
-    """加载操作日志（包含用户活动日志）"""
-    all_logs = []
-    
-    # 1. 加载新的操作日志（operation_logs目录）
-    logs_dir = get_operation_logs_dir()
-    for log_file in logs_dir.glob("*.json"):
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-                if isinstance(logs, list):
-                    all_logs.extend(logs)
-                elif isinstance(logs, dict):
-                    all_logs.append(logs)
-        except Exception as e:
-            st.error(f"读取日志文件失败: {log_file.name} - {e}")
-    
-    for log_file in logs_dir.glob("*.jsonl"):
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        log_entry = json.loads(line.strip())
-                        all_logs.append(log_entry)
-        except Exception as e:
-            st.error(f"读取JSONL日志文件失败: {log_file.name} - {e}")
-    
-    # 2. 加载用户活动日志（user_activities目录）
-    user_activities_dir = get_user_activities_dir()
-    if user_activities_dir.exists():
-        for log_file in user_activities_dir.glob("*.jsonl"):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if line.strip():
-                            log_entry = json.loads(line.strip())
-                            # 转换用户活动日志格式以兼容操作日志格式
-                            converted_log = {
-                                'timestamp': log_entry.get('timestamp'),
-                                'username': log_entry.get('username'),
-                                'user_role': log_entry.get('user_role'),
-                                'action_type': log_entry.get('action_type'),
-                                'action': log_entry.get('action_name'),
-                                'details': log_entry.get('details', {}),
-                                'success': log_entry.get('success', True),
-                                'error_message': log_entry.get('error_message'),
-                                'session_id': log_entry.get('session_id'),
-                                'ip_address': log_entry.get('ip_address'),
-                                'user_agent': log_entry.get('user_agent'),
-                                'page_url': log_entry.get('page_url'),
-                                'duration_ms': log_entry.get('duration_ms'),
-                                'datetime': log_entry.get('datetime')
-                            }
-                            all_logs.append(converted_log)
-            except Exception as e:
-                st.error(f"读取用户活动日志文件失败: {log_file.name} - {e}")
-    
-    # 过滤日志
-    filtered_logs = []
-    for log in all_logs:
-        # 时间过滤
-        if start_date or end_date:
-            try:
-                # 处理时间戳，支持字符串和数字格式
-                timestamp = log.get('timestamp', 0)
-                if isinstance(timestamp, str):
-                    # 如果是字符串，尝试转换为浮点数
-                    try:
-                        timestamp = float(timestamp)
-                    except (ValueError, TypeError):
-                        # 如果转换失败，尝试解析ISO格式的日期时间
-                        try:
-                            from datetime import datetime
-                            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                            timestamp = dt.timestamp()
-                        except:
-                            timestamp = 0
-                
-                log_date = datetime.fromtimestamp(timestamp).date()
-                if start_date and log_date < start_date:
-                    continue
-                if end_date and log_date > end_date:
-                    continue
-            except Exception as e:
-                # 如果时间戳处理失败，跳过时间过滤
-                pass
-        
-        # 用户名过滤
-        if username and log.get('username', '').lower() != username.lower():
-            continue
-        
-        # 操作类型过滤
-        if action_type and log.get('action_type', '') != action_type:
-            continue
-        
-        filtered_logs.append(log)
-    
-    # 定义安全的时间戳转换函数
-    def safe_timestamp(log_entry):
-        """安全地获取时间戳，确保返回数字类型"""
-        timestamp = log_entry.get('timestamp', 0)
-        if isinstance(timestamp, str):
-            try:
-                return float(timestamp)
-            except (ValueError, TypeError):
-                try:
-                    from datetime import datetime
-                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    return dt.timestamp()
-                except:
-                    return 0
-        return timestamp if isinstance(timestamp, (int, float)) else 0
-    
-    # 按时间戳排序（最新的在前）
-    filtered_logs.sort(key=safe_timestamp, reverse=True)
-    
-    # 限制数量
-    return filtered_logs[:limit]
+def _time_range(start_date=None, end_date=None):
+    """日期范围（包含结束日期当天）转换为时间戳范围"""
+    start_time = datetime.combine(start_date, datetime.min.time()).timestamp() if start_date else None
+    end_time = datetime.combine(end_date, datetime.max.time()).timestamp() if end_date else None
+    return start_time, end_time
+
+def load_operation_logs(start_date=None, end_date=None, username=None, action_type=None, limit=1000, offset=0):
+    """加载操作日志（包含用户活动日志），在存储端过滤并按时间倒序分页"""
+    start_time, end_time = _time_range(start_date, end_date)
+    return get_activity_store().query(
+        start_time=start_time,
+        end_time=end_time,
+        username=username,
+        action_type=action_type,
+        limit=limit,
+        offset=offset
+    )
+
+def count_operation_logs(start_date=None, end_date=None, username=None, action_type=None):
+    """统计符合条件的操作日志数量"""
+    start_time, end_time = _time_range(start_date, end_date)
+    return get_activity_store().count(
+        start_time=start_time,
+        end_time=end_time,
+        username=username,
+        action_type=action_type
+    )
 
 def render_operation_logs():
     """渲染操作日志管理界面"""
@@ -195,16 +109,22 @@ def render_operation_logs():
         if action_type_filter == "全部":
             action_type_filter = None
     
-    # 加载操作日志
-    logs = load_operation_logs(
-        start_date=start_date,
-        end_date=end_date,
-        username=username_filter if username_filter else None,
-        action_type=action_type_filter,
-        limit=1000
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "username": username_filter if username_filter else None,
+        "action_type": action_type_filter,
+    }
+    
+    # 统计来自按天聚合的计数，不加载日志明细
+    stats = get_activity_store().statistics(
+        start_day=start_date,
+        end_day=end_date,
+        username=filters["username"],
+        action_type=action_type_filter
     )
     
-    if not logs:
+    if not stats["total_activities"]:
         st.warning("📭 未找到符合条件的操作日志")
         return
     
@@ -212,59 +132,40 @@ def render_operation_logs():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("📊 总操作数", len(logs))
+        st.metric("📊 总操作数", stats["total_activities"])
     
     with col2:
-        unique_users = len(set(log.get('username', 'unknown') for log in logs))
-        st.metric("👥 活跃用户", unique_users)
+        st.metric("👥 活跃用户", stats["unique_users"])
     
     with col3:
-        successful_ops = sum(1 for log in logs if log.get('success', True))
-        success_rate = (successful_ops / len(logs) * 100) if logs else 0
-        st.metric("✅ 成功率", f"{success_rate:.1f}%")
+        st.metric("✅ 成功率", f"{stats['success_rate']:.1f}%")
     
     with col4:
-        # 安全处理近1小时的日志统计
-        recent_logs = []
-        for log in logs:
-            try:
-                timestamp = log.get('timestamp', 0)
-                if isinstance(timestamp, str):
-                    try:
-                        timestamp = float(timestamp)
-                    except (ValueError, TypeError):
-                        try:
-                            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                            timestamp = dt.timestamp()
-                        except:
-                            continue
-                if datetime.fromtimestamp(timestamp) > datetime.now() - timedelta(hours=1):
-                    recent_logs.append(log)
-            except:
-                continue
-        st.metric("🕐 近1小时", len(recent_logs))
+        recent_count = get_activity_store().count(
+            start_time=(datetime.now() - timedelta(hours=1)).timestamp(),
+            username=filters["username"],
+            action_type=action_type_filter
+        )
+        st.metric("🕐 近1小时", recent_count)
     
     # 标签页
     tab1, tab2, tab3 = st.tabs(["📈 统计图表", "📋 日志列表", "📤 导出数据"])
     
     with tab1:
-        render_logs_charts(logs)
+        render_logs_charts(stats)
     
     with tab2:
-        render_logs_list(logs)
+        render_logs_list(filters)
     
     with tab3:
-        render_logs_export(logs)
+        render_logs_export(filters)
 
-def render_logs_charts(logs: List[Dict[str, Any]]):
+def render_logs_charts(stats: Dict[str, Any]):
     """渲染日志统计图表"""
     
     # 按操作类型统计
     st.subheader("📊 按操作类型统计")
-    action_types = {}
-    for log in logs:
-        action_type = log.get('action_type', 'unknown')
-        action_types[action_type] = action_types.get(action_type, 0) + 1
+    action_types = stats["activity_types"]
     
     if action_types:
         fig_pie = px.pie(
@@ -276,26 +177,7 @@ def render_logs_charts(logs: List[Dict[str, Any]]):
     
     # 按时间统计
     st.subheader("📅 按时间统计")
-    daily_logs = {}
-    for log in logs:
-        # 安全处理时间戳
-        try:
-            timestamp = log.get('timestamp', 0)
-            if isinstance(timestamp, str):
-                try:
-                    timestamp = float(timestamp)
-                except (ValueError, TypeError):
-                    try:
-                        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                        timestamp = dt.timestamp()
-                    except:
-                        timestamp = 0
-            date_str = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-        except:
-            date_str = 'unknown'
-        
-        if date_str != 'unknown':
-            daily_logs[date_str] = daily_logs.get(date_str, 0) + 1
+    daily_logs = stats["daily_activities"]
     
     if daily_logs:
         dates = sorted(daily_logs.keys())
@@ -319,10 +201,7 @@ def render_logs_charts(logs: List[Dict[str, Any]]):
     
     # 按用户统计
     st.subheader("👥 按用户统计")
-    user_logs = {}
-    for log in logs:
-        username = log.get('username', 'unknown')
-        user_logs[username] = user_logs.get(username, 0) + 1
+    user_logs = stats["user_activities"]
     
     if user_logs:
         # 只显示前10个最活跃的用户
@@ -339,14 +218,15 @@ def render_logs_charts(logs: List[Dict[str, Any]]):
         )
         st.plotly_chart(fig_bar, use_container_width=True)
 
-def render_logs_list(logs: List[Dict[str, Any]]):
-    """渲染日志列表"""
+def render_logs_list(filters: Dict[str, Any]):
+    """渲染日志列表（在存储端分页，只读取当前页）"""
     
     st.subheader("📋 操作日志列表")
     
     # 分页设置
     page_size = st.selectbox("每页显示", [10, 25, 50, 100], index=1)
-    total_pages = (len(logs) + page_size - 1) // page_size
+    total_count = count_operation_logs(**filters)
+    total_pages = (total_count + page_size - 1) // page_size
     
     if total_pages > 1:
         page = st.number_input("页码", min_value=1, max_value=total_pages, value=1) - 1
@@ -354,9 +234,7 @@ def render_logs_list(logs: List[Dict[str, Any]]):
         page = 0
     
     # 获取当前页数据
-    start_idx = page * page_size
-    end_idx = min(start_idx + page_size, len(logs))
-    page_logs = logs[start_idx:end_idx]
+    page_logs = load_operation_logs(**filters, limit=page_size, offset=page * page_size)
     
     # 转换为DataFrame显示
     if page_logs:
@@ -397,23 +275,24 @@ def render_logs_list(logs: List[Dict[str, Any]]):
         
         # 显示分页信息
         if total_pages > 1:
-            st.info(f"第 {page + 1} 页，共 {total_pages} 页，总计 {len(logs)} 条记录")
+            st.info(f"第 {page + 1} 页，共 {total_pages} 页，总计 {total_count} 条记录")
     else:
         st.info("当前页没有数据")
 
-def render_logs_export(logs: List[Dict[str, Any]]):
+def render_logs_export(filters: Dict[str, Any]):
     """渲染日志导出功能"""
     
     st.subheader("📤 导出操作日志")
     
-    if not logs:
-        st.warning("没有可导出的日志数据")
-        return
-    
     # 导出格式选择
     export_format = st.selectbox("选择导出格式", ["CSV", "JSON", "Excel"])
     
     if st.button("📥 导出日志"):
+        # 点击导出时才读取明细
+        logs = load_operation_logs(**filters, limit=EXPORT_LIMIT)
+        if not logs:
+            st.warning("没有可导出的日志数据")
+            return
         try:
             if export_format == "CSV":
                 # 转换为DataFrame
@@ -526,44 +405,14 @@ def render_logs_export(logs: List[Dict[str, Any]]):
             st.error(f"❌ 导出失败: {e}")
 
 def log_operation(username: str, action_type: str, action: str, details: Dict = None, success: bool = True):
-    """记录操作日志"""
-    try:
-        logs_dir = get_operation_logs_dir()
-        
-        # 按日期创建日志文件
-        today = datetime.now().strftime('%Y-%m-%d')
-        log_file = logs_dir / f"operations_{today}.json"
-        
-        # 创建日志条目
-        log_entry = {
-            'timestamp': datetime.now().timestamp(),
-            'username': username,
-            'action_type': action_type,
-            'action': action,
-            'details': details or {},
-            'success': success,
-            'ip_address': None,  # 可以后续添加IP地址记录
-            'user_agent': None   # 可以后续添加用户代理记录
-        }
-        
-        # 读取现有日志
-        existing_logs = []
-        if log_file.exists():
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    existing_logs = json.load(f)
-            except:
-                existing_logs = []
-        
-        # 添加新日志
-        existing_logs.append(log_entry)
-        
-        # 写入文件
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(existing_logs, f, ensure_ascii=False, indent=2)
-        
-        return True
-        
-    except Exception as e:
-        print(f"记录操作日志失败: {e}")
-        return False
\ No newline at end of file
+    """记录操作日志（追加写入活动存储）"""
+    return get_activity_store().append({
+        'timestamp': datetime.now().timestamp(),
+        'username': username,
+        'action_type': action_type,
+        'action': action,
+        'details': details or {},
+        'success': success,
+        'ip_address': None,  # 可以后续添加IP地址记录
+        'user_agent': None   # 可以后续添加用户代理记录
+    }, SOURCE_OPERATION)
@@ -0,0 +1,128 @@
+"""
+分析耗时瀑布图组件
+读取分析追踪记录的span，按开始时间绘制各阶段耗时，并列出最慢的阶段
+"""
+
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+
+from tradingagents.utils.tracing import SpanKind, load_trace, summarize_trace
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+KIND_COLORS = {
+    SpanKind.ANALYSIS: "#7f7f7f",
+    SpanKind.NODE: "#1f77b4",
+    SpanKind.LLM: "#ff7f0e",
+    SpanKind.TOOL: "#2ca02c",
+    SpanKind.DATA_SOURCE: "#9467bd",
+    SpanKind.CACHE: "#17becf",
+    SpanKind.INTERNAL: "#bcbd22",
+}
+
+KIND_LABELS = {
+    SpanKind.ANALYSIS: "整体",
+    SpanKind.NODE: "图节点",
+    SpanKind.LLM: "LLM调用",
+    SpanKind.TOOL: "工具调用",
+    SpanKind.DATA_SOURCE: "数据源",
+    SpanKind.CACHE: "缓存查询",
+    SpanKind.INTERNAL: "其他",
+}
+
+# 瀑布图最多显示的span数量
+MAX_WATERFALL_SPANS = 300
+
+
+def _ordered_with_depth(spans):
+    """按父子关系深度优先排列span，返回 [(span, depth)]"""
+    children = {}
+    ids = {span["spanId"] for span in spans}
+    for span in spans:
+        parent = span.get("parentSpanId") if span.get("parentSpanId") in ids else None
+        children.setdefault(parent, []).append(span)
+
+    ordered = []
+    stack = [(span, 0) for span in reversed(children.get(None, []))]
+    while stack:
+        span, depth = stack.pop()
+        ordered.append((span, depth))
+        stack.extend((child, depth + 1) for child in reversed(children.get(span["spanId"], [])))
+    return ordered
+
+
+def _hover_text(span):
+    attributes = span.get("attributes", {})
+    lines = [f"<b>{span['name']}</b>", f"耗时: {span.get('durationMs', 0) / 1000:.2f}s"]
+    for key, label in (("queue", "排队"), ("ttft", "首Token")):
+        if attributes.get(key) is not None:
+            lines.append(f"{label}: {attributes[key]:.2f}s")
+    for key, label in (("input_tokens", "输入Token"), ("output_tokens", "输出Token"), ("hit", "缓存命中")):
+        if attributes.get(key) is not None:
+            lines.append(f"{label}: {attributes[key]}")
+    if span.get("status", {}).get("code") == "ERROR":
+        lines.append(f"❌ {span['status'].get('message', '')}")
+    return "<br>".join(lines)
+
+
+def render_trace_waterfall(analysis_id: str):
+    """渲染一次分析的耗时瀑布图"""
+    spans = load_trace(analysis_id)
+    if not spans:
+        st.info("暂无该分析的耗时记录")
+        return
+
+    summary = summarize_trace(spans)
+    origin = min(span["startTimeUnixNano"] for span in spans)
+    ordered = _ordered_with_depth(spans)[:MAX_WATERFALL_SPANS]
+
+    # 同名span（如多次LLM调用）以序号区分，缩进表示层级
+    labels = [f"{'  ' * depth}{span['name']} #{index}" for index, (span, depth) in enumerate(ordered)]
+
+    fig = go.Figure()
+    for kind, label in KIND_LABELS.items():
+        rows = [(labels[index], span) for index, (span, _) in enumerate(ordered) if span.get("kind") == kind]
+        if not rows:
+            continue
+        fig.add_trace(go.Bar(
+            orientation="h",
+            name=label,
+            y=[row_label for row_label, _ in rows],
+            x=[span.get("durationMs", 0) / 1000 for _, span in rows],
+            base=[(span["startTimeUnixNano"] - origin) / 1e9 for _, span in rows],
+            marker_color=KIND_COLORS[kind],
+            hovertext=[_hover_text(span) for _, span in rows],
+            hoverinfo="text",
+        ))
+
+    fig.update_layout(
+        barmode="overlay",
+        height=max(300, 22 * len(ordered) + 100),
+        xaxis_title="开始后的时间 (秒)",
+        yaxis=dict(categoryorder="array", categoryarray=list(reversed(labels)), showticklabels=True),
+        margin=dict(l=10, r=10, t=30, b=10),
+        legend=dict(orientation="h"),
+    )
+
+    if summary["total_ms"] is not None:
+        st.metric("总耗时", f"{summary['total_ms'] / 1000:.1f}s")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # 按类型汇总和最慢的阶段
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**按类型汇总**")
+        st.dataframe(pd.DataFrame([
+            {"类型": KIND_LABELS.get(kind, kind), "次数": stats["count"], "总耗时(s)": round(stats["total_ms"] / 1000, 2)}
+            for kind, stats in summary["by_kind"].items()
+        ]), use_container_width=True)
+    with col2:
+        st.markdown("**最慢的阶段**")
+        st.dataframe(pd.DataFrame([
+            {"阶段": item["name"], "类型": KIND_LABELS.get(item["kind"], item["kind"]),
+             "耗时(s)": round((item["duration_ms"] or 0) / 1000, 2)}
+            for item in summary["slowest"]
+        ]), use_container_width=True)
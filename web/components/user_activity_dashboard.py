@@ -8,7 +8,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, Any
 import json
 
 # 导入用户活动记录器
@@ -19,6 +19,9 @@ except ImportError:
     user_activity_logger = None
     auth_manager = None
 
+# 导出时最多读取的活动记录条数
+EXPORT_LIMIT = 10000
+
 def render_user_activity_dashboard():
     """渲染用户活动仪表板"""
     
@@ -65,16 +68,17 @@ def render_user_activity_dashboard():
         if action_type_filter == "全部":
             action_type_filter = None
     
-    # 获取活动数据
-    activities = user_activity_logger.get_user_activities(
-        username=username_filter if username_filter else None,
-        start_date=start_date,
-        end_date=end_date,
-        action_type=action_type_filter,
-        limit=1000
-    )
+    filters = {
+        "username": username_filter if username_filter else None,
+        "start_date": start_date,
+        "end_date": end_date,
+        "action_type": action_type_filter,
+    }
+    
+    # 统计来自按天聚合的计数，不加载活动明细
+    stats = user_activity_logger.get_activity_statistics(**filters)
     
-    if not activities:
+    if not stats["total_activities"]:
         st.warning("📭 未找到符合条件的活动记录")
         return
     
@@ -82,46 +86,38 @@ def render_user_activity_dashboard():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("📊 总活动数", len(activities))
+        st.metric("📊 总活动数", stats["total_activities"])
     
     with col2:
-        unique_users = len(set(a['username'] for a in activities))
-        st.metric("👥 活跃用户", unique_users)
+        st.metric("👥 活跃用户", stats["unique_users"])
     
     with col3:
-        successful_activities = sum(1 for a in activities if a.get('success', True))
-        success_rate = (successful_activities / len(activities) * 100) if activities else 0
-        st.metric("✅ 成功率", f"{success_rate:.1f}%")
+        st.metric("✅ 成功率", f"{stats['success_rate']:.1f}%")
     
     with col4:
-        durations = [a.get('duration_ms', 0) for a in activities if a.get('duration_ms')]
-        avg_duration = sum(durations) / len(durations) if durations else 0
-        st.metric("⏱️ 平均耗时", f"{avg_duration:.0f}ms")
+        st.metric("⏱️ 平均耗时", f"{stats['average_duration']:.0f}ms")
     
     # 标签页
     tab1, tab2, tab3, tab4 = st.tabs(["📈 统计图表", "📋 活动列表", "👥 用户分析", "📤 导出数据"])
     
     with tab1:
-        render_activity_charts(activities)
+        render_activity_charts(stats)
     
     with tab2:
-        render_activity_list(activities)
+        render_activity_list(filters)
     
     with tab3:
-        render_user_analysis(activities)
+        render_user_analysis(stats, filters)
     
     with tab4:
-        render_export_options(activities)
+        render_export_options(filters)
 
-def render_activity_charts(activities: List[Dict[str, Any]]):
+def render_activity_charts(stats: Dict[str, Any]):
     """渲染活动统计图表"""
     
     # 按活动类型统计
     st.subheader("📊 按活动类型统计")
-    activity_types = {}
-    for activity in activities:
-        action_type = activity.get('action_type', 'unknown')
-        activity_types[action_type] = activity_types.get(action_type, 0) + 1
+    activity_types = stats["activity_types"]
     
     if activity_types:
         fig_pie = px.pie(
@@ -133,10 +129,7 @@ def render_activity_charts(activities: List[Dict[str, Any]]):
     
     # 按时间统计
     st.subheader("📅 按时间统计")
-    daily_activities = {}
-    for activity in activities:
-        date_str = datetime.fromtimestamp(activity['timestamp']).strftime('%Y-%m-%d')
-        daily_activities[date_str] = daily_activities.get(date_str, 0) + 1
+    daily_activities = stats["daily_activities"]
     
     if daily_activities:
         dates = sorted(daily_activities.keys())
@@ -160,10 +153,7 @@ def render_activity_charts(activities: List[Dict[str, Any]]):
     
     # 按用户统计
     st.subheader("👥 按用户统计")
-    user_activities = {}
-    for activity in activities:
-        username = activity.get('username', 'unknown')
-        user_activities[username] = user_activities.get(username, 0) + 1
+    user_activities = stats["user_activities"]
     
     if user_activities:
         # 只显示前10个最活跃的用户
@@ -180,14 +170,15 @@ def render_activity_charts(activities: List[Dict[str, Any]]):
         )
         st.plotly_chart(fig_bar, use_container_width=True)
 
-def render_activity_list(activities: List[Dict[str, Any]]):
-    """渲染活动列表"""
+def render_activity_list(filters: Dict[str, Any]):
+    """渲染活动列表（在存储端分页，只读取当前页）"""
     
     st.subheader("📋 活动记录列表")
     
     # 分页设置
     page_size = st.selectbox("每页显示", [10, 25, 50, 100], index=1)
-    total_pages = (len(activities) + page_size - 1) // page_size
+    total_count = user_activity_logger.count_user_activities(**filters)
+    total_pages = (total_count + page_size - 1) // page_size
     
     if total_pages > 1:
         page = st.number_input("页码", min_value=1, max_value=total_pages, value=1) - 1
@@ -196,8 +187,8 @@ def render_activity_list(activities: List[Dict[str, Any]]):
     
     # 获取当前页数据
     start_idx = page * page_size
-    end_idx = min(start_idx + page_size, len(activities))
-    page_activities = activities[start_idx:end_idx]
+    page_activities = user_activity_logger.get_user_activities(**filters, limit=page_size, offset=start_idx)
+    end_idx = start_idx + len(page_activities)
     
     # 转换为DataFrame显示
     df_data = []
@@ -220,31 +211,30 @@ def render_activity_list(activities: List[Dict[str, Any]]):
         
         # 显示分页信息
         if total_pages > 1:
-            st.info(f"📄 第 {page + 1} 页，共 {total_pages} 页 | 显示 {start_idx + 1}-{end_idx} 条，共 {len(activities)} 条记录")
+            st.info(f"📄 第 {page + 1} 页，共 {total_pages} 页 | 显示 {start_idx + 1}-{end_idx} 条，共 {total_count} 条记录")
     else:
         st.info("📭 当前页没有数据")
 
-def render_user_analysis(activities: List[Dict[str, Any]]):
+def render_user_analysis(stats: Dict[str, Any], filters: Dict[str, Any]):
     """渲染用户分析"""
     
     st.subheader("👥 用户行为分析")
     
     # 用户选择
-    usernames = sorted(set(a['username'] for a in activities))
+    usernames = sorted(stats["user_activities"])
     selected_user = st.selectbox("选择用户", usernames)
     
     if selected_user:
-        user_activities = [a for a in activities if a['username'] == selected_user]
+        user_filters = {**filters, "username": selected_user}
+        user_stats = user_activity_logger.get_activity_statistics(**user_filters)
+        # 最近的活动明细（用于最常用功能和时间线）
+        user_activities = user_activity_logger.get_user_activities(**user_filters, limit=200)
         
         col1, col2 = st.columns(2)
         
         with col1:
-            st.metric("📊 总活动数", len(user_activities))
-            
-            # 成功率
-            successful = sum(1 for a in user_activities if a.get('success', True))
-            success_rate = (successful / len(user_activities) * 100) if user_activities else 0
-            st.metric("✅ 成功率", f"{success_rate:.1f}%")
+            st.metric("📊 总活动数", user_stats["total_activities"])
+            st.metric("✅ 成功率", f"{user_stats['success_rate']:.1f}%")
         
         with col2:
             # 最常用功能
@@ -262,7 +252,7 @@ def render_user_analysis(activities: List[Dict[str, Any]]):
         st.subheader(f"📅 {selected_user} 的活动时间线")
         
         timeline_data = []
-        for activity in user_activities[-20:]:  # 显示最近20条
+        for activity in user_activities[:20]:  # 显示最近20条
             timestamp = datetime.fromtimestamp(activity['timestamp'])
             timeline_data.append({
                 "时间": timestamp.strftime('%m-%d %H:%M'),
@@ -274,7 +264,7 @@ def render_user_analysis(activities: List[Dict[str, Any]]):
             df_timeline = pd.DataFrame(timeline_data)
             st.dataframe(df_timeline, use_container_width=True)
 
-def render_export_options(activities: List[Dict[str, Any]]):
+def render_export_options(filters: Dict[str, Any]):
     """渲染导出选项"""
     
     st.subheader("📤 导出数据")
@@ -288,6 +278,8 @@ def render_export_options(activities: List[Dict[str, Any]]):
         include_details = st.checkbox("包含详细信息", value=True)
     
     if st.button("📥 导出数据", type="primary"):
+        # 点击导出时才读取明细
+        activities = user_activity_logger.get_user_activities(**filters, limit=EXPORT_LIMIT)
         try:
             # 准备导出数据
             export_data = []
@@ -1,4 +1,3 @@
-import json
 import time
 from pathlib import Path
 import streamlit as st
@@ -6,8 +5,10 @@ import streamlit as st
 # 认证与日志
 try:
     from web.utils.auth_manager import auth_manager
+    from web.utils.user_store import update_user_with_points
 except Exception:
     from ..utils.auth_manager import auth_manager  # type: ignore
+    from ..utils.user_store import update_user_with_points  # type: ignore
 
 
 USERS_FILE = Path(__file__).parent.parent / "config" / "users.json"
@@ -15,19 +16,16 @@ USERS_FILE = Path(__file__).parent.parent / "config" / "users.json"
 
 def _load_users() -> dict:
 	try:
-		if USERS_FILE.exists():
-			return json.loads(USERS_FILE.read_text(encoding="utf-8"))
-		return {}
+		return auth_manager.user_store.list_users()
 	except Exception as e:
 		st.error(f"❌ 读取用户数据失败: {e}")
 		return {}
 
 
-def _save_users(users: dict) -> bool:
+def _store_call(action, *args) -> bool:
+	"""按用户写入存储，只修改目标用户，不覆盖其他会话同时扣减的点数"""
 	try:
-		USERS_FILE.parent.mkdir(parents=True, exist_ok=True)
-		USERS_FILE.write_text(json.dumps(users, ensure_ascii=False, indent=2), encoding="utf-8")
-		return True
+		return bool(action(*args))
 	except Exception as e:
 		st.error(f"❌ 保存用户数据失败: {e}")
 		return False
@@ -78,16 +76,19 @@ def _create_user_form(users: dict) -> None:
 			# 使用 AuthManager 的哈希规则保持一致
 			from web.utils.auth_manager import AuthManager
 			hasher = AuthManager()
-			users[username] = {
+			new_user = {
 				"password_hash": hasher._hash_password(password),
 				"role": role,
 				"permissions": perms,
 				"points": int(points),
 				"created_at": time.time()
 			}
-			if _save_users(users):
+			# 创建时再次检查用户名，避免与其他会话同时创建同名用户
+			if _store_call(auth_manager.user_store.create_user, username, new_user):
 				st.success("✅ 创建成功")
 				st.experimental_rerun()
+			else:
+				st.error("该用户名已存在")
 
 
 def _update_user_form(users: dict) -> None:
@@ -114,18 +115,17 @@ def _update_user_form(users: dict) -> None:
 			delta = st.number_input("增减点数(可为负)", value=0, step=1)
 		submitted = st.form_submit_button("保存变更")
 		if submitted:
+			fields = {}
 			if new_password:
 				_ensure_admin_self_protection(selected)
 				from web.utils.auth_manager import AuthManager
 				hasher = AuthManager()
-				info["password_hash"] = hasher._hash_password(new_password)
-			info["role"] = new_role
-			info["permissions"] = new_perms
-			# 点数处理：优先以 new_points 为基准，再叠加 delta
-			base_points = int(new_points)
-			final_points = int(max(0, base_points + int(delta)))
-			info["points"] = final_points
-			if _save_users(users):
+				fields["password_hash"] = hasher._hash_password(new_password)
+			fields["role"] = new_role
+			fields["permissions"] = new_perms
+			# 点数只按增量原子调整：修改后的点数相对加载时的差值再叠加 delta，不写回绝对值
+			points_delta = int(new_points) - int(info.get("points", 0)) + int(delta)
+			if _store_call(update_user_with_points, auth_manager.user_store, selected, fields, points_delta):
 				st.success("✅ 已保存")
 				st.experimental_rerun()
 
@@ -144,8 +144,7 @@ def _delete_user_form(users: dict) -> None:
 		return
 	_ensure_admin_self_protection(selected)
 	if st.button("确认删除", type="secondary"):
-		users.pop(selected, None)
-		if _save_users(users):
+		if _store_call(auth_manager.user_store.delete_user, selected):
 			st.success("✅ 已删除")
 			st.experimental_rerun()
 
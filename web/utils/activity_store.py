@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+用户活动与操作日志存储
+用户活动（UserActivityLogger）和操作日志（log_operation）统一写入带索引的存储：
+- 只追加写入，不再读取并重写整个日志文件
+- 按时间/用户/类型在存储端过滤和分页，管理页面不再把所有日志加载到内存
+- 写入时同步累加按天聚合的计数，统计图表直接读取计数表
+
+MongoDB可用时使用MongoDB集合，否则使用本地SQLite（USER_ACTIVITY_STORE_BACKEND 可指定）。
+旧版按天拆分的 JSONL/JSON 日志文件由 import_legacy_files() 增量导入。
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tradingagents.config.env_utils import parse_str_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('user_activity')
+
+SOURCE_ACTIVITY = "activity"
+SOURCE_OPERATION = "operation"
+
+STORE_FILENAME = "activity_store.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    day TEXT NOT NULL,
+    username TEXT,
+    user_key TEXT,
+    user_role TEXT,
+    action_type TEXT,
+    action_name TEXT,
+    success INTEGER NOT NULL DEFAULT 1,
+    duration_ms INTEGER,
+    error_message TEXT,
+    session_id TEXT,
+    ip_address TEXT,
+    user_agent TEXT,
+    page_url TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_activities_time ON activities (timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_activities_user ON activities (user_key, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_activities_type ON activities (action_type, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_activities_source ON activities (source, timestamp DESC);
+
+CREATE TABLE IF NOT EXISTS activity_daily (
+    day TEXT NOT NULL,
+    source TEXT NOT NULL,
+    user_key TEXT NOT NULL,
+    action_type TEXT NOT NULL,
+    username TEXT,
+    total INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    duration_sum INTEGER NOT NULL DEFAULT 0,
+    duration_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, source, user_key, action_type)
+);
+
+CREATE TABLE IF NOT EXISTS legacy_imports (
+    path TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = ("source", "timestamp", "day", "username", "user_key", "user_role", "action_type", "action_name",
+            "success", "duration_ms", "error_message", "session_id", "ip_address", "user_agent", "page_url",
+            "details")
+
+
+def _to_timestamp(value: Any) -> float:
+    """兼容数字、数字字符串和ISO格式的时间戳"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+            except ValueError:
+                pass
+    return 0.0
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+
+def _day_bound(value: Any) -> Optional[str]:
+    """把日期/时间转换为计数表使用的日期字符串"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return _day(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def normalize_record(entry: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """把用户活动（action_name）和操作日志（action）两种格式转换为存储记录"""
+    timestamp = _to_timestamp(entry.get('timestamp')) or time.time()
+    username = entry.get('username') or 'unknown'
+    duration = entry.get('duration_ms')
+    return {
+        "source": source,
+        "timestamp": timestamp,
+        "day": _day(timestamp),
+        "username": username,
+        "user_key": str(username).lower(),
+        "user_role": entry.get('user_role'),
+        "action_type": entry.get('action_type') or 'unknown',
+        "action_name": entry.get('action_name') or entry.get('action') or 'unknown',
+        "success": bool(entry.get('success', True)),
+        "duration_ms": int(duration) if duration else None,
+        "error_message": entry.get('error_message'),
+        "session_id": entry.get('session_id'),
+        "ip_address": entry.get('ip_address'),
+        "user_agent": entry.get('user_agent'),
+        "page_url": entry.get('page_url'),
+        "details": entry.get('details') or {},
+    }
+
+
+def to_log_entry(record: Dict[str, Any]) -> Dict[str, Any]:
+    """存储记录转换为页面使用的字典，同时提供 action 和 action_name 两个字段"""
+    timestamp = record["timestamp"]
+    return {
+        "timestamp": timestamp,
+        "datetime": datetime.fromtimestamp(timestamp).isoformat(),
+        "username": record.get("username"),
+        "user_role": record.get("user_role"),
+        "action_type": record.get("action_type"),
+        "action_name": record.get("action_name"),
+        "action": record.get("action_name"),
+        "details": record.get("details") or {},
+        "success": bool(record.get("success", True)),
+        "error_message": record.get("error_message"),
+        "duration_ms": record.get("duration_ms"),
+        "session_id": record.get("session_id"),
+        "ip_address": record.get("ip_address"),
+        "user_agent": record.get("user_agent"),
+        "page_url": record.get("page_url"),
+        "source": record.get("source"),
+    }
+
+
+def aggregate_counters(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """把按天计数行汇总为统计信息（字段与 get_activity_statistics 一致）"""
+    stats = {
+        "total_activities": 0,
+        "unique_users": 0,
+        "activity_types": {},
+        "daily_activities": {},
+        "user_activities": {},
+        "success_rate": 0,
+        "average_duration": 0,
+    }
+    users, successes, duration_sum, duration_count = set(), 0, 0, 0
+    for row in rows:
+        total = row["total"]
+        stats["total_activities"] += total
+        stats["activity_types"][row["action_type"]] = stats["activity_types"].get(row["action_type"], 0) + total
+        stats["daily_activities"][row["day"]] = stats["daily_activities"].get(row["day"], 0) + total
+        username = row.get("username") or row["user_key"]
+        stats["user_activities"][username] = stats["user_activities"].get(username, 0) + total
+        users.add(row["user_key"])
+        successes += row["successes"]
+        duration_sum += row["duration_sum"]
+        duration_count += row["duration_count"]
+
+    stats["unique_users"] = len(users)
+    if stats["total_activities"]:
+        stats["success_rate"] = successes / stats["total_activities"] * 100
+    if duration_count:
+        stats["average_duration"] = duration_sum / duration_count
+    return stats
+
+
+class ActivityStore:
+    """活动存储基类：定义查询接口并实现旧日志文件导入"""
+
+    backend = "base"
+
+    # ==================== 写入 ====================
+
+    def append(self, entry: Dict[str, Any], source: str = SOURCE_ACTIVITY) -> bool:
+        """追加一条记录并累加当天计数"""
+        try:
+            self._insert_many([normalize_record(entry, source)])
+            return True
+        except Exception as e:
+            logger.error(f"❌ 写入活动记录失败: {e}")
+            return False
+
+    def import_legacy_files(self, activity_dir: Optional[Path] = None,
+                            operation_dir: Optional[Path] = None) -> int:
+        """
+        增量导入旧版日志文件，返回导入的记录数
+
+        JSONL文件按字节偏移、JSON列表文件按条目数记录导入位置，重复调用只导入新增部分。
+        """
+        sources: List[Tuple[Path, str]] = []
+        if activity_dir and Path(activity_dir).exists():
+            sources += [(path, SOURCE_ACTIVITY) for path in sorted(Path(activity_dir).glob("*.jsonl"))]
+        if operation_dir and Path(operation_dir).exists():
+            sources += [(path, SOURCE_OPERATION) for path in sorted(Path(operation_dir).glob("*.json*"))]
+
+        imported = 0
+        for path, source in sources:
+            try:
+                imported += self._import_file(path, source)
+            except Exception as e:
+                logger.warning(f"⚠️ 导入旧日志文件失败 {path.name}: {e}")
+        if imported:
+            logger.info(f"📥 已导入 {imported} 条旧版活动日志")
+        return imported
+
+    def _import_file(self, path: Path, source: str) -> int:
+        position = self._get_import_position(str(path))
+        records = []
+        if path.suffix == ".jsonl":
+            if path.stat().st_size <= position:
+                return 0
+            with open(path, 'rb') as f:
+                f.seek(position)
+                data = f.read()
+            # 只处理完整的行，末尾未写完的行留到下次
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if line.strip():
+                    try:
+                        records.append(normalize_record(json.loads(line), source))
+                    except ValueError:
+                        continue
+            new_position = position + end
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                entries = [entries]
+            records = [normalize_record(entry, source) for entry in entries[position:] if isinstance(entry, dict)]
+            new_position = len(entries)
+
+        if new_position != position:
+            self._insert_many(records, import_path=str(path), import_position=new_position)
+        return len(records)
+
+    # ==================== 子类实现 ====================
+
+    def _insert_many(self, records: List[Dict[str, Any]], import_path: Optional[str] = None,
+                     import_position: Optional[int] = None):
+        raise NotImplementedError
+
+    def _get_import_position(self, path: str) -> int:
+        raise NotImplementedError
+
+    def query(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+              username: Optional[str] = None, action_type: Optional[str] = None,
+              source: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """按条件查询记录，按时间倒序分页返回"""
+        raise NotImplementedError
+
+    def count(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+              username: Optional[str] = None, action_type: Optional[str] = None,
+              source: Optional[str] = None) -> int:
+        """按条件统计记录数"""
+        raise NotImplementedError
+
+    def statistics(self, start_day=None, end_day=None, username: Optional[str] = None,
+                   action_type: Optional[str] = None, source: Optional[str] = None) -> Dict[str, Any]:
+        """从按天计数汇总统计信息，start_day/end_day为包含边界的日期"""
+        raise NotImplementedError
+
+    def delete_before(self, timestamp: float) -> int:
+        """删除指定时间之前的记录和计数，返回删除的记录数"""
+        raise NotImplementedError
+
+
+class SQLiteActivityStore(ActivityStore):
+    """基于SQLite的活动存储"""
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 每次操作使用独立连接，Streamlit脚本线程之间不共享连接；
+        # 事务结束时提交或回滚，并关闭连接（sqlite3连接自身的上下文管理器不会关闭连接）
+        with closing(sqlite3.connect(self.db_path, timeout=10)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    def _insert_many(self, records, import_path=None, import_position=None):
+        rows = [tuple(json.dumps(record[column], ensure_ascii=False, default=str) if column == "details"
+                      else record[column] for column in _COLUMNS) for record in records]
+        counters = [(r["day"], r["source"], r["user_key"], r["action_type"], r["username"],
+                     int(r["success"]), r["duration_ms"] or 0, int(bool(r["duration_ms"]))) for r in records]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO activities ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", rows)
+            conn.executemany(
+                "INSERT INTO activity_daily (day, source, user_key, action_type, username, total, successes, "
+                "duration_sum, duration_count) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT (day, source, user_key, action_type) DO UPDATE SET total = total + 1, "
+                "successes = successes + excluded.successes, duration_sum = duration_sum + excluded.duration_sum, "
+                "duration_count = duration_count + excluded.duration_count", counters)
+            if import_path is not None:
+                conn.execute("INSERT OR REPLACE INTO legacy_imports (path, position) VALUES (?, ?)",
+                             (import_path, import_position))
+
+    def _get_import_position(self, path):
+        with self._connect() as conn:
+            row = conn.execute("SELECT position FROM legacy_imports WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _where(start_time=None, end_time=None, username=None, action_type=None, source=None):
+        clauses, params = [], []
+        if start_time is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end_time)
+        if username:
+            clauses.append("user_key = ?")
+            params.append(username.lower())
+        if action_type:
+            clauses.append("action_type = ?")
+            params.append(action_type)
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start_time=None, end_time=None, username=None, action_type=None,
+              source=None, limit=100, offset=0):
+        where, params = self._where(start_time, end_time, username, action_type, source)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM activities{where} ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                                params + [int(limit), int(offset)]).fetchall()
+        results = []
+        for row in rows:
+            record = dict(row)
+            record["details"] = json.loads(record["details"] or "{}")
+            results.append(to_log_entry(record))
+        return results
+
+    def count(self, start_time=None, end_time=None, username=None, action_type=None, source=None):
+        where, params = self._where(start_time, end_time, username, action_type, source)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM activities{where}", params).fetchone()[0]
+
+    def statistics(self, start_day=None, end_day=None, username=None, action_type=None, source=None):
+        clauses, params = [], []
+        for clause, value in (("day >= ?", _day_bound(start_day)), ("day <= ?", _day_bound(end_day)),
+                              ("user_key = ?", username.lower() if username else None),
+                              ("action_type = ?", action_type), ("source = ?", source)):
+            if value:
+                clauses.append(clause)
+                params.append(value)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM activity_daily{where}", params).fetchall()
+        return aggregate_counters(dict(row) for row in rows)
+
+    def delete_before(self, timestamp):
+        with self._lock, self._connect() as conn:
+            deleted = conn.execute("DELETE FROM activities WHERE timestamp < ?", (timestamp,)).rowcount
+            conn.execute("DELETE FROM activity_daily WHERE day < ?", (_day(timestamp),))
+        return deleted
+
+
+class MongoActivityStore(ActivityStore):
+    """基于MongoDB的活动存储"""
+
+    backend = "mongodb"
+
+    def __init__(self, database):
+        self.activities = database["user_activities"]
+        self.daily = database["user_activity_daily"]
+        self.imports = database["user_activity_imports"]
+        self.activities.create_index([("timestamp", -1)])
+        self.activities.create_index([("user_key", 1), ("timestamp", -1)])
+        self.activities.create_index([("action_type", 1), ("timestamp", -1)])
+        self.activities.create_index([("source", 1), ("timestamp", -1)])
+        self.daily.create_index([("day", 1), ("source", 1), ("user_key", 1), ("action_type", 1)], unique=True)
+
+    def _insert_many(self, records, import_path=None, import_position=None):
+        if records:
+            self.activities.insert_many([dict(record) for record in records])
+        for record in records:
+            self.daily.update_one(
+                {"day": record["day"], "source": record["source"],
+                 "user_key": record["user_key"], "action_type": record["action_type"]},
+                {"$inc": {"total": 1, "successes": int(record["success"]),
+                          "duration_sum": record["duration_ms"] or 0,
+                          "duration_count": int(bool(record["duration_ms"]))},
+                 "$setOnInsert": {"username": record["username"]}},
+                upsert=True,
+            )
+        if import_path is not None:
+            self.imports.update_one({"_id": import_path}, {"$set": {"position": import_position}}, upsert=True)
+
+    def _get_import_position(self, path):
+        doc = self.imports.find_one({"_id": path})
+        return doc["position"] if doc else 0
+
+    @staticmethod
+    def _filter(start_time=None, end_time=None, username=None, action_type=None, source=None):
+        query: Dict[str, Any] = {}
+        if start_time is not None or end_time is not None:
+            query["timestamp"] = {}
+            if start_time is not None:
+                query["timestamp"]["$gte"] = start_time
+            if end_time is not None:
+                query["timestamp"]["$lte"] = end_time
+        if username:
+            query["user_key"] = username.lower()
+        if action_type:
+            query["action_type"] = action_type
+        if source:
+            query["source"] = source
+        return query
+
+    def query(self, start_time=None, end_time=None, username=None, action_type=None,
+              source=None, limit=100, offset=0):
+        cursor = self.activities.find(self._filter(start_time, end_time, username, action_type, source),
+                                      {"_id": 0}).sort("timestamp", -1).skip(int(offset)).limit(int(limit))
+        return [to_log_entry(record) for record in cursor]
+
+    def count(self, start_time=None, end_time=None, username=None, action_type=None, source=None):
+        return self.activities.count_documents(self._filter(start_time, end_time, username, action_type, source))
+
+    def statistics(self, start_day=None, end_day=None, username=None, action_type=None, source=None):
+        query: Dict[str, Any] = {}
+        if start_day or end_day:
+            query["day"] = {}
+            if start_day:
+                query["day"]["$gte"] = _day_bound(start_day)
+            if end_day:
+                query["day"]["$lte"] = _day_bound(end_day)
+        if username:
+            query["user_key"] = username.lower()
+        if action_type:
+            query["action_type"] = action_type
+        if source:
+            query["source"] = source
+        return aggregate_counters(self.daily.find(query, {"_id": 0}))
+
+    def delete_before(self, timestamp):
+        deleted = self.activities.delete_many({"timestamp": {"$lt": timestamp}}).deleted_count
+        self.daily.delete_many({"day": {"$lt": _day(timestamp)}})
+        return deleted
+
+
+def _default_db_path() -> Path:
+    return Path(__file__).parent.parent / "data" / "user_activities" / STORE_FILENAME
+
+
+def create_activity_store(backend: str = "auto", db_path: Optional[str] = None) -> ActivityStore:
+    """创建活动存储，auto模式下MongoDB可用时使用MongoDB，否则使用SQLite"""
+    if backend in ("auto", "mongodb"):
+        try:
+            from tradingagents.config.database_manager import get_database_manager
+            manager = get_database_manager()
+            if manager.is_mongodb_available():
+                return MongoActivityStore(manager.get_mongodb_database())
+        except Exception as e:
+            logger.debug(f"活动存储获取MongoDB失败: {e}")
+        if backend == "mongodb":
+            logger.warning("⚠️ MongoDB不可用，用户活动存储降级为SQLite")
+    return SQLiteActivityStore(db_path or _default_db_path())
+
+
+_activity_store = None
+_activity_store_lock = threading.Lock()
+
+
+def get_activity_store() -> ActivityStore:
+    """获取全局活动存储，首次创建时导入旧版日志文件"""
+    global _activity_store
+    if _activity_store is None:
+        with _activity_store_lock:
+            if _activity_store is None:
+                store = create_activity_store(parse_str_env("USER_ACTIVITY_STORE_BACKEND", "auto"))
+                web_data_dir = Path(__file__).parent.parent / "data"
+                store.import_legacy_files(web_data_dir / "user_activities", web_data_dir / "operation_logs")
+                logger.info(f"🗃️ 用户活动存储初始化 - 后端: {store.backend}")
+                _activity_store = store
+    return _activity_store
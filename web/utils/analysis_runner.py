@@ -24,6 +24,8 @@ load_dotenv(project_root / ".env", override=True)
 from tradingagents.utils.logging_init import setup_web_logging
 logger = setup_web_logging()
 
+from .analysis_singleflight import analysis_key, get_analysis_singleflight
+
 # 添加配置管理器
 try:
     from tradingagents.config.config_manager import token_tracker
@@ -97,9 +99,12 @@ def extract_risk_assessment(state):
         logger.info(f"提取风险评估数据时出错: {e}")
         return None
 
-def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, llm_provider, llm_model, market_type="美股", progress_callback=None):
+def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, llm_provider, llm_model, market_type="美股", progress_callback=None, stream_callback=None, use_cache=True):
     """执行股票分析
 
+    参数相同的分析正在执行时不再重复执行，而是共享其进度和结果；
+    成功的结果在 ANALYSIS_RESULT_CACHE_TTL 秒内直接复用（见 analysis_singleflight）。
+
     Args:
         stock_symbol: 股票代码
         analysis_date: 分析日期
@@ -108,7 +113,26 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
         llm_provider: LLM提供商 (dashscope/deepseek/google)
         llm_model: 大模型名称
         progress_callback: 进度回调函数，用于更新UI状态
+        stream_callback: LLM流式输出回调函数，用于实时展示模型生成内容
+        use_cache: 为False时总是重新执行完整分析
     """
+    if not use_cache:
+        return _run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, llm_provider,
+                                   llm_model, market_type, progress_callback, stream_callback)
+
+    key = analysis_key(stock_symbol, analysis_date, analysts, research_depth, llm_provider, llm_model, market_type)
+    return get_analysis_singleflight().run(
+        key,
+        lambda progress, stream: _run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth,
+                                                     llm_provider, llm_model, market_type, progress, stream),
+        progress_callback=progress_callback,
+        stream_callback=stream_callback,
+        is_cacheable=lambda result: bool(result and result.get('success')),
+    )
+
+
+def _run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, llm_provider, llm_model, market_type="美股", progress_callback=None, stream_callback=None):
+    """执行一次完整的股票分析（参数说明见 run_stock_analysis）"""
 
     def update_progress(message, step=None, total_steps=None):
         """更新进度"""
@@ -459,7 +483,8 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
         logger.debug(f"🔍 [RUNNER DEBUG]   symbol: '{formatted_symbol}'")
         logger.debug(f"🔍 [RUNNER DEBUG]   date: '{analysis_date}'")
 
-        state, decision = graph.propagate(formatted_symbol, analysis_date)
+        # 超时、限流等临时性错误自动重试，启用检查点时从最后完成的节点继续
+        state, decision = graph.propagate_resumable(formatted_symbol, analysis_date, stream_callback=stream_callback)
 
         # 调试信息
         logger.debug(f"🔍 [DEBUG] 分析完成，decision类型: {type(decision)}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+相同分析请求的合并执行与结果复用
+
+多个用户（或用户与批量任务）同时请求相同股票、日期、分析师、研究深度和模型的分析时，
+只执行一次完整的分析图：
+- 执行中：后到的请求挂到正在执行的分析上，共享其进度消息和LLM流式输出（先补发已产生的进度），
+  分析结束后得到同一份结果
+- 已完成：成功的结果在新鲜度窗口（ANALYSIS_RESULT_CACHE_TTL 秒）内直接复用，0 表示不复用
+
+进程内实现：Web界面、单股分析和批量分析都在同一个Streamlit进程中执行。
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from tradingagents.config.env_utils import parse_int_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+# 补发给后加入请求的进度消息条数上限
+PROGRESS_REPLAY_LIMIT = 200
+
+ProgressCallback = Callable[..., None]
+StreamCallback = Callable[[Dict[str, Any]], None]
+
+
+def analysis_key(stock_symbol: str, analysis_date: Any, analysts: Iterable[str], research_depth: Any,
+                 llm_provider: str, llm_model: str, market_type: str) -> Tuple:
+    """规范化的分析参数，参数相同的请求视为同一个分析"""
+    return (
+        str(stock_symbol).strip().upper(),
+        str(analysis_date).strip()[:10],
+        tuple(sorted(str(analyst).strip().lower() for analyst in analysts)),
+        str(research_depth),
+        str(llm_provider).strip().lower(),
+        str(llm_model).strip(),
+        str(market_type).strip(),
+    )
+
+
+class _Flight:
+    """一次正在执行的分析及其订阅者"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.progress_subscribers: List[ProgressCallback] = []
+        self.stream_subscribers: List[StreamCallback] = []
+        self.progress_history: List[Tuple[tuple, dict]] = []
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def subscribe(self, progress_callback: Optional[ProgressCallback], stream_callback: Optional[StreamCallback]):
+        with self.lock:
+            history = list(self.progress_history)
+            if progress_callback:
+                self.progress_subscribers.append(progress_callback)
+            if stream_callback:
+                self.stream_subscribers.append(stream_callback)
+        if progress_callback:
+            for args, kwargs in history:
+                _safe_call(progress_callback, *args, **kwargs)
+
+    def publish_progress(self, *args, **kwargs):
+        with self.lock:
+            self.progress_history.append((args, kwargs))
+            if len(self.progress_history) > PROGRESS_REPLAY_LIMIT:
+                del self.progress_history[0]
+            subscribers = list(self.progress_subscribers)
+        for callback in subscribers:
+            _safe_call(callback, *args, **kwargs)
+
+    def publish_stream(self, event: Dict[str, Any]):
+        with self.lock:
+            subscribers = list(self.stream_subscribers)
+        for callback in subscribers:
+            _safe_call(callback, event)
+
+
+def _copy(result: Any) -> Any:
+    try:
+        return copy.deepcopy(result)
+    except Exception:
+        return result
+
+
+def _safe_call(callback, *args, **kwargs):
+    # 某个订阅者的回调出错不影响分析本身和其他订阅者
+    try:
+        callback(*args, **kwargs)
+    except Exception as e:
+        logger.debug(f"分析进度回调出错: {e}")
+
+
+class AnalysisSingleFlight:
+    """按分析参数合并正在执行的请求，并在新鲜度窗口内复用已完成的结果"""
+
+    def __init__(self, ttl_seconds: int = 1800, max_entries: int = 100):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"executions": 0, "joined": 0, "cache_hits": 0}
+
+    def _cached(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.ttl_seconds:
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return entry
+
+    def run(self, key: Hashable, execute: Callable[[ProgressCallback, StreamCallback], Any],
+            progress_callback: Optional[ProgressCallback] = None,
+            stream_callback: Optional[StreamCallback] = None,
+            is_cacheable: Callable[[Any], bool] = lambda result: True) -> Any:
+        """
+        执行（或共享、复用）一次分析
+
+        Args:
+            key: 规范化的分析参数（见 analysis_key）
+            execute: 实际执行分析的函数，参数为合并后的进度回调和流式输出回调
+            is_cacheable: 结果是否可以在新鲜度窗口内复用（失败的结果不复用）
+
+        Returns:
+            分析结果的副本，各请求之间互不影响
+        """
+        with self._lock:
+            cached = self._cached(key) if self.ttl_seconds > 0 else None
+            if cached is None:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                    self.stats["executions"] += 1
+                else:
+                    self.stats["joined"] += 1
+            else:
+                self.stats["cache_hits"] += 1
+
+        if cached is not None:
+            age_minutes = (time.time() - cached[0]) / 60
+            logger.info(f"♻️ [分析复用] {key[0]} 使用 {age_minutes:.1f} 分钟前完成的相同分析结果")
+            if progress_callback:
+                _safe_call(progress_callback, f"♻️ 使用 {age_minutes:.0f} 分钟前完成的相同分析结果")
+            return _copy(cached[1])
+
+        flight.subscribe(progress_callback, stream_callback)
+        if not leader:
+            logger.info(f"🔗 [分析合并] {key[0]} 相同参数的分析正在执行，等待其结果")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _copy(flight.result)
+
+        try:
+            flight.result = execute(flight.publish_progress, flight.publish_stream)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None and self.ttl_seconds > 0 and is_cacheable(flight.result):
+                    self._results[key] = (time.time(), _copy(flight.result))
+                    while len(self._results) > self.max_entries:
+                        self._results.popitem(last=False)
+                del self._flights[key]
+            flight.done.set()
+        return _copy(flight.result)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """清除某个分析（或全部）的缓存结果"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+
+_singleflight: Optional[AnalysisSingleFlight] = None
+_singleflight_lock = threading.Lock()
+
+
+def get_analysis_singleflight() -> AnalysisSingleFlight:
+    """获取全局分析合并执行器"""
+    global _singleflight
+    if _singleflight is None:
+        with _singleflight_lock:
+            if _singleflight is None:
+                _singleflight = AnalysisSingleFlight(
+                    ttl_seconds=parse_int_env("ANALYSIS_RESULT_CACHE_TTL", 1800),
+                    max_entries=parse_int_env("ANALYSIS_RESULT_CACHE_MAX_ENTRIES", 100),
+                )
+    return _singleflight
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 异步进度跟踪器
-支持Redis和文件两种存储方式，前端定时轮询获取进度
+支持Redis和文件两种存储方式，每次保存后发布进度事件，前端收到事件后刷新。
+密集的进度消息按间隔合并写入，步骤切换和结束状态立即写入；只写入变化的字段。
 """
 
 import json
@@ -16,8 +17,85 @@ from pathlib import Path
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('async_progress')
 
+from tradingagents.config.env_utils import parse_float_env
+from web.utils.progress_events import progress_file_path, progress_log_path
+
+# Redis进度记录：progress:<analysis_id> 为哈希（每个字段单独JSON编码），
+# 按最后更新时间维护有序集合索引，查找最新/运行中的分析不再扫描全部键
+PROGRESS_KEY_PREFIX = "progress:"
+PROGRESS_INDEX_KEY = "progress_index:all"
+PROGRESS_RUNNING_KEY = "progress_index:running"
+PROGRESS_TTL = 3600  # 1小时过期
+
+# 文件存储：progress_<id>.json 为快照，progress_<id>.jsonl 为快照之后的增量日志，
+# 每行只包含变化的字段；步骤切换、结束或日志过长时重写快照并清空日志
+PROGRESS_LOG_COMPACT_LINES = 200
+
+def get_progress_redis_client():
+    """获取进度存储使用的Redis客户端（REDIS_*环境变量配置，进程内共享连接池）"""
+    from tradingagents.config.connection_registry import get_connection_registry
+    return get_connection_registry().get_redis_client(decode_responses=True)
+
+def _user_index_key(username: str) -> str:
+    return f"progress_index:user:{username}"
+
+def _user_running_key(username: str) -> str:
+    return f"progress_index:user:{username}:running"
+
+def _load_progress_from_redis(redis_client, analysis_id: str) -> Optional[Dict[str, Any]]:
+    """读取Redis中的进度哈希（兼容旧版整串JSON格式）"""
+    key = f"{PROGRESS_KEY_PREFIX}{analysis_id}"
+    try:
+        fields = redis_client.hgetall(key)
+    except Exception as e:
+        if "WRONGTYPE" not in str(e):
+            raise
+        data = redis_client.get(key)
+        return json.loads(data) if data else None
+
+    if not fields:
+        return None
+    return {field: json.loads(value) for field, value in fields.items()}
+
+def _load_progress_from_file(analysis_id: str) -> Optional[Dict[str, Any]]:
+    """读取进度快照并回放其后的增量日志（兼容旧版完整JSON文件）"""
+    progress_file = progress_file_path(analysis_id)
+    if not os.path.exists(progress_file):
+        return None
+    with open(progress_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    snapshot_seq = data.pop('_seq', 0)
+    log_file = progress_log_path(analysis_id)
+    if os.path.exists(log_file):
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # 正在写入的最后一行
+                if entry.get('seq', 0) <= snapshot_seq:
+                    continue
+                data.update(entry.get('set', {}))
+                for field in entry.get('del', []):
+                    data.pop(field, None)
+    return data
+
+def _latest_indexed_ids(redis_client, index_key: str, limit: int) -> List[str]:
+    """按更新时间倒序读取索引中未过期的分析ID"""
+    min_score = time.time() - PROGRESS_TTL
+    return redis_client.zrevrangebyscore(index_key, "+inf", min_score, start=0, num=limit)
+
 def safe_serialize(obj):
-    """安全序列化对象，处理不可序列化的类型"""
+    """安全序列化对象，处理不可序列化的类型（单遍递归，不再逐值试探json.dumps）"""
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, dict):
+        return {key if isinstance(key, (str, int, float, bool)) else str(key): safe_serialize(value)
+                for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [safe_serialize(item) for item in obj]
+
     # 特殊处理LangChain消息对象
     if hasattr(obj, '__class__') and 'Message' in obj.__class__.__name__:
         try:
@@ -44,39 +122,33 @@ def safe_serialize(obj):
     if hasattr(obj, 'dict'):
         # Pydantic对象
         try:
-            return obj.dict()
+            return safe_serialize(obj.dict())
         except Exception:
             return str(obj)
     elif hasattr(obj, '__dict__'):
-        # 普通对象，转换为字典
-        result = {}
-        for key, value in obj.__dict__.items():
-            if not key.startswith('_'):  # 跳过私有属性
-                try:
-                    json.dumps(value)  # 测试是否可序列化
-                    result[key] = value
-                except (TypeError, ValueError):
-                    result[key] = safe_serialize(value)  # 递归处理
-        return result
-    elif isinstance(obj, (list, tuple)):
-        return [safe_serialize(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: safe_serialize(value) for key, value in obj.items()}
+        # 普通对象，转换为字典（跳过私有属性）
+        return {key: safe_serialize(value) for key, value in obj.__dict__.items()
+                if not key.startswith('_')}
     else:
-        try:
-            json.dumps(obj)  # 测试是否可序列化
-            return obj
-        except (TypeError, ValueError):
-            return str(obj)  # 转换为字符串
+        return str(obj)  # 转换为字符串
+
+def _encode_json(value: Any) -> str:
+    """紧凑编码单个值：原生类型由json直接编码，其余对象在同一遍中交给safe_serialize转换"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=safe_serialize)
 
 class AsyncProgressTracker:
     """异步进度跟踪器"""
+
+    # 流式输出预览保留的字符数
+    STREAM_PREVIEW_LENGTH = 600
     
-    def __init__(self, analysis_id: str, analysts: List[str], research_depth: int, llm_provider: str):
+    def __init__(self, analysis_id: str, analysts: List[str], research_depth: int, llm_provider: str,
+                 username: Optional[str] = None):
         self.analysis_id = analysis_id
         self.analysts = analysts
         self.research_depth = research_depth
         self.llm_provider = llm_provider
+        self.username = username
         self.start_time = time.time()
         
         # 生成分析步骤
@@ -101,25 +173,51 @@ class AsyncProgressTracker:
             'start_time': self.start_time,
             'steps': self.analysis_steps
         }
+        if username:
+            self.progress_data['username'] = username
+
+        # 已写入存储的字段编码，只写入发生变化的字段
+        self._persisted_fields: Dict[str, str] = {}
+        self._persisted_step: Optional[int] = None
+        self._last_persist = 0.0
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        self._persist_lock = threading.RLock()
+        self._log_seq = 0
+        self._log_lines = 0
+
+        # 合并写入间隔（秒）：间隔内的进度消息只在内存中更新，由定时器补写最后状态
+        self.save_interval = parse_float_env("PROGRESS_SAVE_INTERVAL_SECONDS", 1.0)
+        self.persist_stats = {
+            'requests': 0,             # 保存请求次数
+            'writes': 0,               # 实际写入次数
+            'coalesced': 0,            # 被合并跳过的请求
+            'snapshots': 0,            # 完整快照写入次数（文件存储）
+            'changed_bytes': 0,        # 变化字段的字节数
+            'bytes_written': 0,        # 实际写入的字节数
+            'full_document_bytes': 0,  # 每次都重写完整文档时需要写入的字节数
+            'serializations': 0,
+            'serialize_seconds': 0.0,
+        }
         
         # 尝试初始化Redis，失败则使用文件
         self.redis_client = None
         self.use_redis = self._init_redis()
+        self.progress_file = progress_file_path(analysis_id)
+        self.progress_log_file = progress_log_path(analysis_id)
         
         if not self.use_redis:
             # 使用文件存储
-            self.progress_file = f"./data/progress_{analysis_id}.json"
             os.makedirs(os.path.dirname(self.progress_file), exist_ok=True)
         
         # 保存初始状态
-        self._save_progress()
+        self._save_progress(force=True)
         
         logger.info(f"📊 [异步进度] 初始化完成: {analysis_id}, 存储方式: {'Redis' if self.use_redis else '文件'}")
 
         # 注册到日志系统进行自动进度更新
         try:
             from .progress_log_handler import register_analysis_tracker
-            import threading
 
             # 使用超时机制避免死锁
             def register_with_timeout():
@@ -154,34 +252,12 @@ class AsyncProgressTracker:
                 logger.info(f"📊 [异步进度] Redis已禁用，使用文件存储")
                 return False
 
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-
-            # 创建Redis连接
-            if redis_password:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    password=redis_password,
-                    db=redis_db,
-                    decode_responses=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True
-                )
+            # 从进程共享的连接池获取Redis客户端
+            self.redis_client = get_progress_redis_client()
 
             # 测试连接
             self.redis_client.ping()
-            logger.info(f"📊 [异步进度] Redis连接成功: {redis_host}:{redis_port}")
+            logger.info(f"📊 [异步进度] Redis连接成功: {os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}")
             return True
         except Exception as e:
             logger.warning(f"📊 [异步进度] Redis连接失败，使用文件存储: {e}")
@@ -366,26 +442,47 @@ class AsyncProgressTracker:
         elif "模块完成" in message:
             step_description = f"{current_step_info['name']}已完成"
 
-        self.progress_data.update({
-            'current_step': self.current_step,
-            'progress_percentage': progress_percentage,
-            'current_step_name': current_step_info['name'],
-            'current_step_description': step_description,
-            'elapsed_time': elapsed_time,
-            'remaining_time': remaining_time,
-            'last_message': message,
-            'last_update': current_time,
-            'status': 'completed' if progress_percentage >= 100 else 'running'
-        })
+        # 与定时写入线程共用写入锁，避免其遍历进度数据时字典被修改
+        with self._persist_lock:
+            self.progress_data.update({
+                'current_step': self.current_step,
+                'progress_percentage': progress_percentage,
+                'current_step_name': current_step_info['name'],
+                'current_step_description': step_description,
+                'elapsed_time': elapsed_time,
+                'remaining_time': remaining_time,
+                'last_message': message,
+                'last_update': current_time,
+                'status': 'completed' if progress_percentage >= 100 else 'running'
+            })
 
-        # 保存到存储
-        self._save_progress()
+            # 保存到存储
+            self._save_progress()
 
         # 详细的更新日志
         step_name = current_step_info.get('name', '未知')
         logger.info(f"📊 [进度更新] {self.analysis_id}: {message[:50]}...")
         logger.debug(f"📊 [进度详情] 步骤{self.current_step + 1}/{len(self.analysis_steps)} ({step_name}), 进度{progress_percentage:.1f}%, 耗时{elapsed_time:.1f}s")
     
+    def update_stream(self, event: Dict[str, Any]):
+        """接收LLM流式输出事件，保存当前调用生成内容的末尾部分"""
+        with self._persist_lock:
+            if event.get('done'):
+                self.progress_data.pop('streaming', None)
+                self._save_progress()
+                return
+
+            self.progress_data['streaming'] = {
+                'provider': event.get('provider'),
+                'model': event.get('model'),
+                'text': event.get('text', '')[-self.STREAM_PREVIEW_LENGTH:],
+                'ttft': event.get('ttft', self.progress_data.get('streaming', {}).get('ttft')),
+            }
+            self.progress_data['last_update'] = time.time()
+
+            # 流式事件很密集，由 _save_progress 按间隔合并写入
+            self._save_progress()
+
     def _detect_step_from_message(self, message: str) -> Optional[int]:
         """根据消息内容智能检测当前步骤"""
         message_lower = message.lower()
@@ -500,83 +597,250 @@ class AsyncProgressTracker:
 
         return remaining
     
-    def _save_progress(self):
-        """保存进度到存储"""
-        try:
-            current_step_name = self.progress_data.get('current_step_name', '未知')
-            progress_pct = self.progress_data.get('progress_percentage', 0)
+    def _save_progress(self, force: bool = False):
+        """
+        保存进度到存储
+
+        距上次写入不足 save_interval 的请求只标记为待写入，由定时器在间隔结束时补写最新状态；
+        首次保存、步骤切换和结束状态（completed/failed）总是立即写入。
+        """
+        with self._persist_lock:
+            self.persist_stats['requests'] += 1
             status = self.progress_data.get('status', 'running')
+            step_changed = self.progress_data.get('current_step') != self._persisted_step
+            wait = self._last_persist + self.save_interval - time.time()
+
+            if not (force or step_changed or status != 'running') and wait > 0:
+                self.persist_stats['coalesced'] += 1
+                self._dirty = True
+                self._schedule_flush(wait)
+                return
+
+            self._persist(snapshot=force or step_changed or status != 'running')
+
+    def _schedule_flush(self, delay: float):
+        """安排一次延迟写入，间隔内多次请求共用同一个定时器"""
+        if self._flush_timer is not None and self._flush_timer.is_alive():
+            return
+        self._flush_timer = threading.Timer(delay, self._flush_pending)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _flush_pending(self):
+        """定时器回调：写入被合并的最新状态"""
+        with self._persist_lock:
+            self._flush_timer = None
+            if self._dirty:
+                self._persist(snapshot=False)
+
+    def flush(self):
+        """立即写入尚未保存的进度"""
+        with self._persist_lock:
+            if self._dirty:
+                self._persist(snapshot=False)
+
+    def _persist(self, snapshot: bool):
+        """执行一次写入，snapshot为True时文件存储重写完整快照"""
+        current_step_name = self.progress_data.get('current_step_name', '未知')
+        progress_pct = self.progress_data.get('progress_percentage', 0)
+        status = self.progress_data.get('status', 'running')
+
+        self._dirty = False
+        self._last_persist = time.time()
+        self._persisted_step = self.progress_data.get('current_step')
+        encoded = None
 
+        try:
+            encoded = self._encode_fields()
             if self.use_redis:
-                # 保存到Redis（安全序列化）
-                key = f"progress:{self.analysis_id}"
-                safe_data = safe_serialize(self.progress_data)
-                data_json = json.dumps(safe_data, ensure_ascii=False)
-                self.redis_client.setex(key, 3600, data_json)  # 1小时过期
+                # 保存到Redis哈希，只写入变化的字段并更新索引
+                written = self._save_to_redis(encoded)
 
                 logger.info(f"📊 [Redis写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
-                logger.debug(f"📊 [Redis详情] 键: {key}, 数据大小: {len(data_json)} 字节")
+                logger.debug(f"📊 [Redis详情] 键: {PROGRESS_KEY_PREFIX}{self.analysis_id}, 写入字段: {written}")
             else:
-                # 保存到文件（安全序列化）
-                safe_data = safe_serialize(self.progress_data)
-                with open(self.progress_file, 'w', encoding='utf-8') as f:
-                    json.dump(safe_data, f, ensure_ascii=False, indent=2)
+                # 保存到文件：步骤切换时写快照，其余追加增量日志
+                written = self._save_to_file(encoded, snapshot)
 
                 logger.info(f"📊 [文件写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
-                logger.debug(f"📊 [文件详情] 路径: {self.progress_file}")
+                logger.debug(f"📊 [文件详情] 路径: {self.progress_file}, 写入字段: {written}")
 
         except Exception as e:
             logger.error(f"📊 [异步进度] 保存失败: {e}")
-            # 尝试备用存储方式
+            if encoded is None:
+                # 序列化失败，保留待写入标记，下次保存时重试
+                self._dirty = True
+                return
+            if not self.use_redis:
+                return
+            # Redis失败，尝试文件存储
             try:
-                if self.use_redis:
-                    # Redis失败，尝试文件存储
-                    logger.warning(f"📊 [异步进度] Redis保存失败，尝试文件存储")
-                    backup_file = f"./data/progress_{self.analysis_id}.json"
-                    os.makedirs(os.path.dirname(backup_file), exist_ok=True)
-                    safe_data = safe_serialize(self.progress_data)
-                    with open(backup_file, 'w', encoding='utf-8') as f:
-                        json.dump(safe_data, f, ensure_ascii=False, indent=2)
-                    logger.info(f"📊 [备用存储] 文件保存成功: {backup_file}")
-                else:
-                    # 文件存储失败，尝试简化数据
-                    logger.warning(f"📊 [异步进度] 文件保存失败，尝试简化数据")
-                    simplified_data = {
-                        'analysis_id': self.analysis_id,
-                        'status': self.progress_data.get('status', 'unknown'),
-                        'progress_percentage': self.progress_data.get('progress_percentage', 0),
-                        'last_message': str(self.progress_data.get('last_message', '')),
-                        'last_update': self.progress_data.get('last_update', time.time())
-                    }
-                    backup_file = f"./data/progress_{self.analysis_id}.json"
-                    with open(backup_file, 'w', encoding='utf-8') as f:
-                        json.dump(simplified_data, f, ensure_ascii=False, indent=2)
-                    logger.info(f"📊 [备用存储] 简化数据保存成功: {backup_file}")
+                logger.warning(f"📊 [异步进度] Redis保存失败，尝试文件存储")
+                os.makedirs(os.path.dirname(self.progress_file), exist_ok=True)
+                self._write_snapshot(encoded)
+                logger.info(f"📊 [备用存储] 文件保存成功: {self.progress_file}")
             except Exception as backup_e:
                 logger.error(f"📊 [异步进度] 备用存储也失败: {backup_e}")
-    
+                return
+
+        self._publish_event()
+
+    def _encode_fields(self) -> Dict[str, str]:
+        """逐字段单遍序列化进度数据，并累计序列化耗时"""
+        start = time.perf_counter()
+        with self._persist_lock:
+            fields = dict(self.progress_data)
+        encoded = {field: _encode_json(value) for field, value in fields.items()}
+        self.persist_stats['serialize_seconds'] += time.perf_counter() - start
+        self.persist_stats['serializations'] += 1
+        return encoded
+
+    def _diff(self, encoded: Dict[str, str]):
+        """与上次写入的字段编码比较，返回 (变化的字段, 删除的字段)"""
+        changed = {field: value for field, value in encoded.items()
+                   if self._persisted_fields.get(field) != value}
+        removed = [field for field in self._persisted_fields if field not in encoded]
+        return changed, removed
+
+    def _record_write(self, encoded: Dict[str, str], changed: Dict[str, str], bytes_written: int):
+        stats = self.persist_stats
+        stats['writes'] += 1
+        stats['bytes_written'] += bytes_written
+        stats['changed_bytes'] += sum(len(field) + len(value.encode('utf-8')) for field, value in changed.items())
+        stats['full_document_bytes'] += sum(len(field) + len(value.encode('utf-8')) for field, value in encoded.items())
+        self._persisted_fields = encoded
+
+    def _save_to_file(self, encoded: Optional[Dict[str, str]] = None, snapshot: bool = False) -> int:
+        """写入快照或追加一行增量日志，返回变化的字段数"""
+        encoded = encoded if encoded is not None else self._encode_fields()
+        changed, removed = self._diff(encoded)
+
+        if snapshot or self._log_lines >= PROGRESS_LOG_COMPACT_LINES or not os.path.exists(self.progress_file):
+            bytes_written = self._write_snapshot(encoded)
+        elif changed or removed:
+            self._log_seq += 1
+            line = '{"seq":%d,"set":{%s},"del":%s}\n' % (
+                self._log_seq,
+                ','.join(f"{json.dumps(field, ensure_ascii=False)}:{value}" for field, value in changed.items()),
+                json.dumps(removed, ensure_ascii=False),
+            )
+            with open(self.progress_log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self._log_lines += 1
+            bytes_written = len(line.encode('utf-8'))
+        else:
+            bytes_written = 0
+
+        self._record_write(encoded, changed, bytes_written)
+        return len(changed)
+
+    def _write_snapshot(self, encoded: Dict[str, str]) -> int:
+        """由已编码字段拼出完整文档（不再重复序列化），原子替换快照并清空增量日志"""
+        self._log_seq += 1
+        document = '{%s,"_seq":%d}' % (
+            ','.join(f"{json.dumps(field, ensure_ascii=False)}:{value}" for field, value in encoded.items()),
+            self._log_seq,
+        )
+        tmp_file = f"{self.progress_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(document)
+        os.replace(tmp_file, self.progress_file)
+        if self._log_lines or os.path.exists(self.progress_log_file):
+            open(self.progress_log_file, 'w').close()
+        self._log_lines = 0
+        self.persist_stats['snapshots'] += 1
+        return len(document.encode('utf-8'))
+
+    def get_persist_stats(self) -> Dict[str, Any]:
+        """获取持久化统计：写入合并情况、写放大和序列化耗时"""
+        with self._persist_lock:
+            stats = dict(self.persist_stats)
+        stats['write_amplification'] = round(stats['bytes_written'] / stats['changed_bytes'], 2) \
+            if stats['changed_bytes'] else 0.0
+        stats['avg_serialize_ms'] = round(stats['serialize_seconds'] * 1000 / stats['serializations'], 3) \
+            if stats['serializations'] else 0.0
+        return stats
+
+    def _log_persist_stats(self):
+        stats = self.get_persist_stats()
+        logger.info(f"📊 [持久化统计] {self.analysis_id}: 请求{stats['requests']}次, 写入{stats['writes']}次, "
+                    f"合并{stats['coalesced']}次, 写入{stats['bytes_written']}字节 "
+                    f"(完整重写需{stats['full_document_bytes']}字节), 写放大{stats['write_amplification']}, "
+                    f"平均序列化{stats['avg_serialize_ms']}ms")
+
+    def _publish_event(self):
+        """通知等待中的前端有新进度（只携带摘要，完整数据仍从存储读取）"""
+        try:
+            # 使用绝对路径导入：app.py 以 utils.* 导入本模块，前端组件以 web.utils.* 导入，
+            # 两者必须共享同一个事件广播器实例
+            from web.utils.progress_events import get_progress_event_bus
+            event = {field: self.progress_data.get(field) for field in
+                     ('status', 'current_step', 'progress_percentage', 'last_message', 'last_update')}
+            get_progress_event_bus().publish(self.analysis_id, safe_serialize(event),
+                                             redis_client=self.redis_client if self.use_redis else None)
+        except Exception as e:
+            logger.debug(f"📡 [进度事件] 发布失败: {e}")
+
+    def _save_to_redis(self, encoded: Optional[Dict[str, str]] = None) -> int:
+        """将进度写入Redis哈希并更新有序集合索引，返回写入的字段数"""
+        key = f"{PROGRESS_KEY_PREFIX}{self.analysis_id}"
+        encoded = encoded if encoded is not None else self._encode_fields()
+        changed, removed = self._diff(encoded)
+
+        score = self.progress_data.get('last_update') or time.time()
+        running = self.progress_data.get('status') == 'running'
+        index_keys = [(PROGRESS_INDEX_KEY, PROGRESS_RUNNING_KEY)]
+        if self.username:
+            index_keys.append((_user_index_key(self.username), _user_running_key(self.username)))
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        if changed:
+            pipe.hset(key, mapping=changed)
+        if removed:
+            pipe.hdel(key, *removed)
+        pipe.expire(key, PROGRESS_TTL)
+        for index_key, running_key in index_keys:
+            pipe.zadd(index_key, {self.analysis_id: score})
+            # 顺带清理已过期记录的索引项
+            pipe.zremrangebyscore(index_key, "-inf", score - PROGRESS_TTL)
+            if running:
+                pipe.zadd(running_key, {self.analysis_id: score})
+            else:
+                pipe.zrem(running_key, self.analysis_id)
+        pipe.execute()
+
+        self._record_write(encoded, changed, sum(len(field) + len(value.encode('utf-8'))
+                                                 for field, value in changed.items()))
+        return len(changed)
+
     def get_progress(self) -> Dict[str, Any]:
         """获取当前进度"""
-        return self.progress_data.copy()
+        with self._persist_lock:
+            return self.progress_data.copy()
     
     def mark_completed(self, message: str = "分析完成", results: Any = None):
         """标记分析完成"""
         self.update_progress(message)
-        self.progress_data['status'] = 'completed'
-        self.progress_data['progress_percentage'] = 100.0
-        self.progress_data['remaining_time'] = 0.0
 
         # 保存分析结果（安全序列化）
+        raw_results = None
         if results is not None:
             try:
-                self.progress_data['raw_results'] = safe_serialize(results)
+                raw_results = safe_serialize(results)
                 logger.info(f"📊 [异步进度] 保存分析结果: {self.analysis_id}")
             except Exception as e:
                 logger.warning(f"📊 [异步进度] 结果序列化失败: {e}")
-                self.progress_data['raw_results'] = str(results)  # 最后的fallback
-
-        self._save_progress()
+                raw_results = str(results)  # 最后的fallback
+
+        with self._persist_lock:
+            self.progress_data['status'] = 'completed'
+            self.progress_data['progress_percentage'] = 100.0
+            self.progress_data['remaining_time'] = 0.0
+            if raw_results is not None:
+                self.progress_data['raw_results'] = raw_results
+            self._save_progress()
         logger.info(f"📊 [异步进度] 分析完成: {self.analysis_id}")
+        self._log_persist_stats()
 
         # 从日志系统注销
         try:
@@ -587,11 +851,13 @@ class AsyncProgressTracker:
     
     def mark_failed(self, error_message: str):
         """标记分析失败"""
-        self.progress_data['status'] = 'failed'
-        self.progress_data['last_message'] = f"分析失败: {error_message}"
-        self.progress_data['last_update'] = time.time()
-        self._save_progress()
+        with self._persist_lock:
+            self.progress_data['status'] = 'failed'
+            self.progress_data['last_message'] = f"分析失败: {error_message}"
+            self.progress_data['last_update'] = time.time()
+            self._save_progress()
         logger.error(f"📊 [异步进度] 分析失败: {self.analysis_id}, 错误: {error_message}")
+        self._log_persist_stats()
 
         # 从日志系统注销
         try:
@@ -609,45 +875,17 @@ def get_progress_by_id(analysis_id: str) -> Optional[Dict[str, Any]]:
         # 如果Redis启用，先尝试Redis
         if redis_enabled:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                key = f"progress:{analysis_id}"
-                data = redis_client.get(key)
+                # 复用共享连接池，轮询时不再每次新建连接
+                redis_client = get_progress_redis_client()
+
+                data = _load_progress_from_redis(redis_client, analysis_id)
                 if data:
-                    return json.loads(data)
+                    return data
             except Exception as e:
                 logger.debug(f"📊 [异步进度] Redis读取失败: {e}")
 
-        # 尝试文件
-        progress_file = f"./data/progress_{analysis_id}.json"
-        if os.path.exists(progress_file):
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-
-        return None
+        # 尝试文件（快照 + 增量日志）
+        return _load_progress_from_file(analysis_id)
     except Exception as e:
         logger.error(f"📊 [异步进度] 获取进度失败: {analysis_id}, 错误: {e}")
         return None
@@ -664,66 +902,26 @@ def format_time(seconds: float) -> str:
         return f"{hours:.1f}小时"
 
 
-def get_latest_analysis_id() -> Optional[str]:
-    """获取最新的分析ID"""
+def get_latest_analysis_id(username: Optional[str] = None) -> Optional[str]:
+    """获取最新的分析ID（指定username时只查找该用户的分析）"""
     try:
         # 检查REDIS_ENABLED环境变量
         redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
 
-        # 如果Redis启用，先尝试从Redis获取
+        # 如果Redis启用，先从有序集合索引获取（O(log N)，不再扫描progress:*键）
         if redis_enabled:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                # 获取所有progress键
-                keys = redis_client.keys("progress:*")
-                if not keys:
+                # 复用共享连接池，轮询时不再每次新建连接
+                redis_client = get_progress_redis_client()
+
+                index_key = _user_index_key(username) if username else PROGRESS_INDEX_KEY
+                latest_ids = _latest_indexed_ids(redis_client, index_key, 1)
+                if latest_ids:
+                    logger.info(f"📊 [恢复分析] 找到最新分析ID: {latest_ids[0]}")
+                    return latest_ids[0]
+                if username:
                     return None
 
-                # 获取每个键的数据，找到最新的
-                latest_time = 0
-                latest_id = None
-
-                for key in keys:
-                    try:
-                        data = redis_client.get(key)
-                        if data:
-                            progress_data = json.loads(data)
-                            last_update = progress_data.get('last_update', 0)
-                            if last_update > latest_time:
-                                latest_time = last_update
-                                # 从键名中提取analysis_id (去掉"progress:"前缀)
-                                latest_id = key.replace('progress:', '')
-                    except Exception:
-                        continue
-
-                if latest_id:
-                    logger.info(f"📊 [恢复分析] 找到最新分析ID: {latest_id}")
-                    return latest_id
-
             except Exception as e:
                 logger.debug(f"📊 [恢复分析] Redis查找失败: {e}")
 
@@ -745,3 +943,16 @@ def get_latest_analysis_id() -> Optional[str]:
     except Exception as e:
         logger.error(f"📊 [恢复分析] 获取最新分析ID失败: {e}")
         return None
+
+
+def get_running_analysis_ids(username: Optional[str] = None, limit: int = 20) -> List[str]:
+    """获取运行中的分析ID（按更新时间倒序），仅Redis存储支持"""
+    if os.getenv('REDIS_ENABLED', 'false').lower() != 'true':
+        return []
+    try:
+        redis_client = get_progress_redis_client()
+        running_key = _user_running_key(username) if username else PROGRESS_RUNNING_KEY
+        return _latest_indexed_ids(redis_client, running_key, limit)
+    except Exception as e:
+        logger.debug(f"📊 [异步进度] 读取运行中分析失败: {e}")
+        return []
@@ -23,6 +23,8 @@ except ImportError:
     user_activity_logger = None
     logger.warning("⚠️ 用户活动记录器导入失败")
 
+from web.utils.user_store import UserStore, get_user_store
+
 class AuthManager:
     """用户认证管理器"""
     
@@ -31,11 +33,16 @@ class AuthManager:
         self.session_timeout = 600  # 10分钟超时
         self._ensure_users_file()
     
+    @property
+    def user_store(self) -> UserStore:
+        """用户存储（带缓存、原子写入和原子点数扣减）"""
+        return get_user_store(self.users_file)
+    
     def _ensure_users_file(self):
-        """确保用户配置文件存在"""
+        """确保用户存储中存在默认用户"""
         self.users_file.parent.mkdir(exist_ok=True)
         
-        if not self.users_file.exists():
+        if not self.users_file.exists() or self.user_store.backend != "file":
             # 创建默认用户配置
             default_users = {
                 "admin": {
@@ -54,11 +61,9 @@ class AuthManager:
                 }
             }
             
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(default_users, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"✅ 用户认证系统初始化完成")
-            logger.info(f"📁 用户配置文件: {self.users_file}")
+            if self.user_store.ensure_defaults(default_users):
+                logger.info(f"✅ 用户认证系统初始化完成")
+                logger.info(f"📁 用户配置文件: {self.users_file} (存储后端: {self.user_store.backend})")
     
     def _inject_auth_cache_js(self):
         """注入前端认证缓存JavaScript代码"""
@@ -155,23 +160,12 @@ class AuthManager:
         return hashlib.sha256(password.encode()).hexdigest()
     
     def _load_users(self) -> Dict:
-        """加载用户配置"""
+        """加载全部用户配置（来自存储的内存缓存）"""
         try:
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.user_store.list_users()
         except Exception as e:
             logger.error(f"❌ 加载用户配置失败: {e}")
             return {}
-
-    def _save_users(self, users: Dict) -> bool:
-        """保存用户配置"""
-        try:
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(users, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            logger.error(f"❌ 保存用户配置失败: {e}")
-            return False
     
     def authenticate(self, username: str, password: str) -> Tuple[bool, Optional[Dict]]:
         """
@@ -184,16 +178,15 @@ class AuthManager:
         Returns:
             (认证成功, 用户信息)
         """
-        users = self._load_users()
+        user_info = self.user_store.get_user(username)
         
-        if username not in users:
+        if user_info is None:
             logger.warning(f"⚠️ 用户不存在: {username}")
             # 记录登录失败
             if user_activity_logger:
                 user_activity_logger.log_login(username, False, "用户不存在")
             return False, None
         
-        user_info = users[username]
         password_hash = self._hash_password(password)
         
         if password_hash == user_info["password_hash"]:
@@ -352,8 +345,7 @@ class AuthManager:
                 return False
             
             # 检查用户是否仍然存在
-            users = self._load_users()
-            if username not in users:
+            if self.user_store.get_user(username) is None:
                 logger.warning(f"⚠️ 尝试恢复不存在的用户: {username}")
                 return False
             
@@ -380,51 +372,43 @@ class AuthManager:
 
     # ===== 会员点数相关API =====
     def get_user_points(self, username: str) -> int:
-        users = self._load_users()
-        return int(users.get(username, {}).get("points", 0))
+        info = self.user_store.get_user(username)
+        return int(info.get("points", 0)) if info else 0
+
+    def _sync_session_points(self, username: str, points: int):
+        """同步当前会话中显示的点数"""
+        current_user = self.get_current_user()
+        if current_user and current_user.get("username") == username:
+            st.session_state.user_info["points"] = int(points)
+            # 强制刷新用户信息显示
+            st.session_state.user_info_updated = True
 
     def set_user_points(self, username: str, points: int) -> bool:
-        users = self._load_users()
-        if username not in users:
+        new_points = self.user_store.set_points(username, points)
+        if new_points is None:
             return False
-        users[username]["points"] = int(max(0, points))
-        ok = self._save_users(users)
-        # 同步到当前会话
-        if ok and self.get_current_user() and self.get_current_user().get("username") == username:
-            st.session_state.user_info["points"] = int(max(0, points))
-        return ok
+        self._sync_session_points(username, new_points)
+        return True
 
     def add_user_points(self, username: str, delta: int) -> bool:
-        users = self._load_users()
-        if username not in users:
+        new_points = self.user_store.add_points(username, delta)
+        if new_points is None:
             return False
-        users[username]["points"] = int(max(0, int(users[username].get("points", 0)) + int(delta)))
-        ok = self._save_users(users)
-        if ok and self.get_current_user() and self.get_current_user().get("username") == username:
-            st.session_state.user_info["points"] = int(users[username]["points"])
-        return ok
+        self._sync_session_points(username, new_points)
+        return True
 
     def try_deduct_points(self, username: str, amount: int) -> bool:
-        """尝试扣减点数，成功返回True；管理员账户不扣减直接True"""
-        users = self._load_users()
-        info = users.get(username)
+        """尝试扣减点数（原子的检查并扣减），成功返回True；管理员账户不扣减直接True"""
+        info = self.user_store.get_user(username)
         if not info:
             return False
-        if info.get("role") == "admin":
+        if info.get("role") == "admin" or amount <= 0:
             return True
-        current = int(info.get("points", 0))
-        if amount <= 0:
-            return True
-        if current < amount:
+        remaining = self.user_store.try_deduct(username, int(amount))
+        if remaining is None:
             return False
-        info["points"] = current - amount
-        ok = self._save_users(users)
-        if ok and self.get_current_user() and self.get_current_user().get("username") == username:
-            # 更新session state中的用户信息
-            st.session_state.user_info["points"] = int(info["points"])
-            # 强制刷新用户信息显示
-            st.session_state.user_info_updated = True
-        return ok
+        self._sync_session_points(username, remaining)
+        return True
     
     def require_permission(self, permission: str) -> bool:
         """
@@ -49,6 +49,8 @@ except Exception:
         get_snapshot as store_get_snapshot,
     )
 
+from tradingagents.dataflows.market_context import shared_market_context
+
 # 导入单个股票分析函数和格式化函数
 try:
     from utils.analysis_runner import run_stock_analysis, format_analysis_results, validate_analysis_params
@@ -70,6 +72,38 @@ def run_batch_stock_analysis(stock_symbols: List[str],
                            progress_callback=None,
                            batch_id: Optional[str] = None) -> Dict[str, Any]:
     """执行批量股票分析 - 完全复用单个股票分析逻辑
+
+    全球宏观新闻等只与日期有关的市场级数据在整个批量内共享，
+    第一只股票获取后其余股票直接复用（见 tradingagents.dataflows.market_context）。
+    参数和返回值见 _run_batch_stock_analysis。
+    """
+    with shared_market_context():
+        return _run_batch_stock_analysis(
+            stock_symbols, analysis_date, analysts, research_depth, llm_provider, llm_model,
+            market_type=market_type,
+            analysis_interval=analysis_interval,
+            include_sentiment=include_sentiment,
+            include_risk_assessment=include_risk_assessment,
+            custom_prompt=custom_prompt,
+            progress_callback=progress_callback,
+            batch_id=batch_id,
+        )
+
+
+def _run_batch_stock_analysis(stock_symbols: List[str],
+                              analysis_date: str,
+                              analysts: List[str],
+                              research_depth: int,
+                              llm_provider: str,
+                              llm_model: str,
+                              market_type: str = "美股",
+                              analysis_interval: int = 30,
+                              include_sentiment: bool = True,
+                              include_risk_assessment: bool = True,
+                              custom_prompt: str = "",
+                              progress_callback=None,
+                              batch_id: Optional[str] = None) -> Dict[str, Any]:
+    """执行批量股票分析
     
     Args:
         stock_symbols: 股票代码列表
@@ -184,6 +218,7 @@ def run_batch_stock_analysis(stock_symbols: List[str],
                 return stock_progress_callback
             
             # 执行单个股票分析 - 完全复用原有逻辑
+            # （超时、限流等临时性错误在其中自动从分析检查点继续；失败保留的检查点在重新分析时复用）
             stock_start_time = time.time()
             stock_result = run_stock_analysis(
                 stock_symbol=stock_symbol,
@@ -5,22 +5,121 @@ MongoDB报告管理器
 """
 
 import os
+import re
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Any, Iterable, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 try:
-    from pymongo import MongoClient
-    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+    from bson import ObjectId
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
     logger.warning("pymongo未安装，MongoDB功能不可用")
 
 
+# 列表视图需要的字段，不包含体积较大的报告正文
+LIST_PROJECTION = {
+    "analysis_id": 1,
+    "stock_symbol": 1,
+    "analysis_date": 1,
+    "timestamp": 1,
+    "analysts": 1,
+    "research_depth": 1,
+    "status": 1,
+    "summary": 1,
+}
+
+
+def _to_epoch(timestamp_value) -> float:
+    """将文档中的timestamp统一转换为秒级时间戳"""
+    if hasattr(timestamp_value, 'timestamp'):
+        return timestamp_value.timestamp()
+    if isinstance(timestamp_value, (int, float)):
+        return float(timestamp_value)
+    return datetime.now().timestamp()
+
+
+def _as_datetime(value, end_of_day: bool = False) -> datetime:
+    """日期参数转换为datetime，结束日期取次日零点作为开区间上界"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value
+    day = datetime.combine(value, time.min)
+    return day + timedelta(days=1) if end_of_day else day
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """用最后一条记录的 (timestamp, _id) 生成翻页游标"""
+    return f"{doc['timestamp'].isoformat()}|{doc['_id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """解析翻页游标"""
+    timestamp, object_id = cursor.split("|", 1)
+    return datetime.fromisoformat(timestamp), ObjectId(object_id)
+
+
+def build_report_query(start_date=None, end_date=None, stock_symbol: str = None,
+                       analyst_type: str = None, search_text: str = None,
+                       analysis_ids: Optional[Iterable[str]] = None,
+                       cursor: str = None) -> Dict[str, Any]:
+    """
+    构建报告查询条件，所有过滤都在MongoDB端完成
+
+    Args:
+        start_date/end_date: 日期范围（date、datetime或YYYY-MM-DD字符串，包含两端）
+        stock_symbol: 股票代码前缀（前缀匹配可使用索引）
+        analyst_type: 分析师类型
+        search_text: 关键词，匹配股票代码、摘要和分析师（不区分大小写）
+        analysis_ids: 限定的分析ID集合（收藏、标签过滤）
+        cursor: 上一页返回的游标
+    """
+    conditions = []
+
+    if start_date or end_date:
+        time_range = {}
+        if start_date:
+            time_range["$gte"] = _as_datetime(start_date)
+        if end_date:
+            time_range["$lt"] = _as_datetime(end_date, end_of_day=True)
+        conditions.append({"timestamp": time_range})
+
+    if stock_symbol:
+        conditions.append({"stock_symbol": {"$regex": f"^{re.escape(stock_symbol.strip().upper())}"}})
+
+    if analyst_type:
+        conditions.append({"analysts": analyst_type})
+
+    if analysis_ids is not None:
+        conditions.append({"analysis_id": {"$in": list(analysis_ids)}})
+
+    if search_text:
+        pattern = {"$regex": re.escape(search_text.strip()), "$options": "i"}
+        conditions.append({"$or": [
+            {"stock_symbol": pattern},
+            {"summary": pattern},
+            {"analysts": pattern},
+        ]})
+
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor)
+        conditions.append({"$or": [
+            {"timestamp": {"$lt": last_timestamp}},
+            {"timestamp": last_timestamp, "_id": {"$lt": last_id}},
+        ]})
+
+    if not conditions:
+        return {}
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
 class MongoDBReportManager:
     """MongoDB报告管理器"""
     
@@ -67,8 +166,9 @@ class MongoDBReportManager:
                     "authSource": mongodb_auth_source
                 })
 
-            # 连接MongoDB
-            self.client = MongoClient(**connect_kwargs)
+            # 从进程共享的连接池获取MongoDB客户端
+            from tradingagents.config.connection_registry import get_connection_registry
+            self.client = get_connection_registry().get_mongo_client(**connect_kwargs)
             
             # 测试连接
             self.client.admin.command('ping')
@@ -101,6 +201,11 @@ class MongoDBReportManager:
             self.collection.create_index("analysis_id")
             self.collection.create_index("status")
             
+            # 列表查询索引：按时间倒序翻页，以及按股票、分析师过滤后翻页
+            self.collection.create_index([("timestamp", -1), ("_id", -1)])
+            self.collection.create_index([("stock_symbol", 1), ("timestamp", -1), ("_id", -1)])
+            self.collection.create_index([("analysts", 1), ("timestamp", -1), ("_id", -1)])
+            
             logger.info("✅ MongoDB索引创建成功")
             
         except Exception as e:
@@ -217,6 +322,60 @@ class MongoDBReportManager:
             logger.error(f"❌ 从MongoDB获取分析报告失败: {e}")
             return []
     
+    def query_reports(self, start_date=None, end_date=None, stock_symbol: str = None,
+                      analyst_type: str = None, search_text: str = None,
+                      analysis_ids: Optional[Iterable[str]] = None,
+                      limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """
+        分页查询报告列表（只返回列表字段，不含报告正文）
+
+        Returns:
+            {"items": 列表项, "next_cursor": 下一页游标（没有更多时为None）}
+        """
+        if not self.connected:
+            return {"items": [], "next_cursor": None}
+
+        try:
+            query = build_report_query(
+                start_date=start_date, end_date=end_date, stock_symbol=stock_symbol,
+                analyst_type=analyst_type, search_text=search_text,
+                analysis_ids=analysis_ids, cursor=cursor
+            )
+
+            # 多取一条用于判断是否还有下一页
+            docs = list(
+                self.collection.find(query, LIST_PROJECTION)
+                .sort([("timestamp", -1), ("_id", -1)])
+                .limit(limit + 1)
+            )
+
+            next_cursor = None
+            if len(docs) > limit:
+                docs = docs[:limit]
+                next_cursor = encode_cursor(docs[-1])
+
+            items = [self._to_list_item(doc) for doc in docs]
+            logger.info(f"✅ 从MongoDB查询到 {len(items)} 个报告（{'有' if next_cursor else '无'}下一页）")
+            return {"items": items, "next_cursor": next_cursor}
+
+        except Exception as e:
+            logger.error(f"❌ 从MongoDB查询报告列表失败: {e}")
+            return {"items": [], "next_cursor": None}
+
+    def _to_list_item(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """将文档转换为Web列表视图格式，报告正文在打开详情时按需加载"""
+        return {
+            "analysis_id": doc.get("analysis_id", ""),
+            "timestamp": _to_epoch(doc.get("timestamp")),
+            "stock_symbol": doc.get("stock_symbol", ""),
+            "analysts": doc.get("analysts", []),
+            "research_depth": doc.get("research_depth", 1),
+            "status": doc.get("status", "completed"),
+            "summary": doc.get("summary", ""),
+            "performance": {},
+            "source": "mongodb",
+        }
+
     def get_report_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
         """根据ID获取单个分析报告"""
         if not self.connected:
@@ -229,7 +388,7 @@ class MongoDBReportManager:
                 # 转换为Web应用期望的格式
                 result = {
                     "analysis_id": doc["analysis_id"],
-                    "timestamp": doc["timestamp"].timestamp(),
+                    "timestamp": _to_epoch(doc.get("timestamp")),
                     "stock_symbol": doc["stock_symbol"],
                     "analysts": doc.get("analysts", []),
                     "research_depth": doc.get("research_depth", 0),
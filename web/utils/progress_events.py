@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+进度事件通道
+AsyncProgressTracker 每次保存进度后发布事件，前端阻塞等待新事件再重新渲染，
+取代 time.sleep + st.rerun 的定时轮询。
+
+- 进程内：按分析ID维护版本号，通过 threading.Condition 唤醒等待方
+- 跨进程：启用Redis时同时发布到 progress_events:<analysis_id> 频道，
+  订阅线程收到其他进程的事件后唤醒本进程的等待方
+- 文件兜底：分析在其他进程运行且未启用Redis时，比较进度文件的修改时间
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from tradingagents.config.env_utils import parse_bool_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('async_progress')
+
+PROGRESS_EVENT_CHANNEL_PREFIX = "progress_events:"
+
+# (事件版本号, 进度文件修改时间)
+ProgressCursor = Tuple[int, float]
+
+
+def progress_file_path(analysis_id: str) -> str:
+    """文件存储模式下的进度文件路径"""
+    return f"./data/progress_{analysis_id}.json"
+
+
+def progress_log_path(analysis_id: str) -> str:
+    """文件存储模式下快照之后的增量日志路径"""
+    return f"./data/progress_{analysis_id}.jsonl"
+
+
+def _file_mtime(analysis_id: str) -> float:
+    """进度快照和增量日志中较新的修改时间"""
+    mtime = 0.0
+    for path in (progress_file_path(analysis_id), progress_log_path(analysis_id)):
+        try:
+            mtime = max(mtime, os.path.getmtime(path))
+        except OSError:
+            pass
+    return mtime
+
+
+class ProgressEventBus:
+    """进度事件广播器"""
+
+    # 保留最近事件的分析数量上限
+    MAX_TRACKED = 500
+    # Redis订阅断开后的重连间隔（秒）
+    LISTENER_RETRY_INTERVAL = 10.0
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._events: Dict[str, Dict[str, Any]] = {}
+        # 标识本进程发布的Redis消息，订阅线程收到后忽略，避免重复唤醒
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[threading.Thread] = None
+        self._listener_failed_at = 0.0
+        self._listener_lock = threading.Lock()
+
+    def publish(self, analysis_id: str, event: Dict[str, Any], redis_client=None):
+        """发布进度事件；传入redis_client时同时发布到Redis频道供其他进程订阅"""
+        self._notify(analysis_id, event)
+        if redis_client is None:
+            return
+        try:
+            payload = json.dumps({"origin": self._origin, "event": event}, ensure_ascii=False)
+            redis_client.publish(f"{PROGRESS_EVENT_CHANNEL_PREFIX}{analysis_id}", payload)
+        except Exception as e:
+            logger.debug(f"📡 [进度事件] Redis发布失败: {e}")
+
+    def version(self, analysis_id: str) -> int:
+        with self._cond:
+            return self._versions.get(analysis_id, 0)
+
+    def latest_event(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            return self._events.get(analysis_id)
+
+    def cursor(self, analysis_id: str) -> ProgressCursor:
+        """记录当前位置，应在读取进度数据之前调用，之后发布的事件都会被wait_for_update感知"""
+        return self.version(analysis_id), _file_mtime(analysis_id)
+
+    def wait_for_update(self, analysis_id: str, since: ProgressCursor, timeout: float) -> bool:
+        """
+        阻塞等待since之后的新事件，超时返回False
+
+        进程内事件立即唤醒；文件兜底以较低频率检查进度文件修改时间，
+        只做一次stat，不读取或解析文件。
+        """
+        self._ensure_redis_listener()
+        since_version, since_mtime = since
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            with self._cond:
+                if self._cond.wait_for(lambda: self._versions.get(analysis_id, 0) > since_version,
+                                       timeout=min(remaining, 0.5)):
+                    return True
+            if _file_mtime(analysis_id) > since_mtime:
+                return True
+
+    # ==================== 内部方法 ====================
+
+    def _notify(self, analysis_id: str, event: Dict[str, Any]):
+        with self._cond:
+            self._versions[analysis_id] = self._versions.get(analysis_id, 0) + 1
+            self._versions.move_to_end(analysis_id)
+            self._events[analysis_id] = event
+            while len(self._versions) > self.MAX_TRACKED:
+                stale_id, _ = self._versions.popitem(last=False)
+                self._events.pop(stale_id, None)
+            self._cond.notify_all()
+
+    def _ensure_redis_listener(self):
+        """启用Redis时启动订阅线程（每个进程一个），接收其他进程发布的事件"""
+        if not parse_bool_env("REDIS_ENABLED", False):
+            return
+        with self._listener_lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            if time.time() - self._listener_failed_at < self.LISTENER_RETRY_INTERVAL:
+                return
+            self._listener = threading.Thread(target=self._listen, name="progress-events", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        try:
+            from tradingagents.config.connection_registry import get_connection_registry
+            client = get_connection_registry().get_redis_client(decode_responses=True)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f"{PROGRESS_EVENT_CHANNEL_PREFIX}*")
+            logger.info("📡 [进度事件] Redis订阅已启动")
+            for message in pubsub.listen():
+                self._handle_message(message)
+        except Exception as e:
+            logger.warning(f"📡 [进度事件] Redis订阅中断，改用进程内事件和文件检查: {e}")
+        with self._listener_lock:
+            self._listener_failed_at = time.time()
+
+    def _handle_message(self, message: Dict[str, Any]):
+        channel = message.get("channel") or ""
+        try:
+            payload = json.loads(message.get("data") or "{}")
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self._origin:
+            return
+        self._notify(channel[len(PROGRESS_EVENT_CHANNEL_PREFIX):], payload.get("event") or {})
+
+
+_progress_event_bus = None
+_progress_event_bus_lock = threading.Lock()
+
+
+def get_progress_event_bus() -> ProgressEventBus:
+    """获取全局进度事件广播器"""
+    global _progress_event_bus
+    if _progress_event_bus is None:
+        with _progress_event_bus_lock:
+            if _progress_event_bus is None:
+                _progress_event_bus = ProgressEventBus()
+    return _progress_event_bus
@@ -26,20 +26,9 @@ class RedisSessionManager:
             if redis_enabled != 'true':
                 return False
 
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-            
-            # 创建Redis连接
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password,
-                db=redis_db,
+            # 从进程共享的连接池获取Redis客户端（REDIS_*环境变量配置）
+            from tradingagents.config.connection_registry import get_connection_registry
+            self.redis_client = get_connection_registry().get_redis_client(
                 decode_responses=True,
                 socket_timeout=5,
                 socket_connect_timeout=5
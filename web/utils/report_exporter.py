@@ -26,6 +26,13 @@ except ImportError:
     MONGODB_REPORT_AVAILABLE = False
     mongodb_report_manager = None
 
+# 导入文件系统分析结果目录索引
+try:
+    from web.utils.results_catalog import extract_decision, get_results_catalog, modular_analysis_id
+    RESULTS_CATALOG_AVAILABLE = True
+except ImportError:
+    RESULTS_CATALOG_AVAILABLE = False
+
 # 配置日志 - 确保输出到stdout以便Docker logs可见
 logging.basicConfig(
     level=logging.INFO,
@@ -791,6 +798,28 @@ def save_modular_reports_to_results_dir(results: Dict[str, Any], stock_symbol: s
             json.dump(metadata, f, ensure_ascii=False, indent=2)
 
         logger.info(f"✅ 保存分析元数据: {metadata_file}")
+
+        # 同步更新文件系统目录索引
+        if RESULTS_CATALOG_AVAILABLE and saved_files:
+            final_decision = state.get('final_trade_decision')
+            summary = ""
+            if isinstance(final_decision, str):
+                summary = final_decision[:200].replace('#', '').replace('*', '').strip()
+                if len(final_decision) > 200:
+                    summary += "..."
+            get_results_catalog().upsert({
+                'analysis_id': modular_analysis_id(stock_symbol, analysis_date),
+                'stock_symbol': stock_symbol,
+                'analysis_date': analysis_date,
+                'timestamp': datetime.now().timestamp(),
+                'analysts': metadata['analysts'],
+                'research_depth': metadata['research_depth'],
+                'status': 'completed',
+                'decision': extract_decision(decision or final_decision),
+                'summary': summary,
+                'reports_dir': str(reports_dir),
+                'report_files': saved_files,
+            })
         logger.info(f"✅ 分模块报告保存完成，共保存 {len(saved_files)} 个文件")
         logger.info(f"📁 保存目录: {os.path.normpath(str(reports_dir))}")
 
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+文件系统分析结果目录索引
+MongoDB不可用时，历史结果页面从SQLite目录中列出和过滤分析结果，
+只有打开详情时才读取报告正文，避免每次页面重绘都遍历并读取所有报告文件。
+
+目录在 save_analysis_result / save_modular_reports_to_results_dir 写入时同步更新，
+其他进程（如CLI）写入的报告目录由 sync_directories() 增量补录。
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+
+CATALOG_FILENAME = "results_catalog.db"
+
+# 非分析结果的JSON文件
+_SKIP_JSON_FILES = {"favorites.json", "tags.json"}
+
+_DECISION_PATTERN = re.compile(r"(买入|卖出|持有|BUY|SELL|HOLD)", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_id TEXT PRIMARY KEY,
+    stock_symbol TEXT NOT NULL,
+    analysis_date TEXT,
+    timestamp REAL NOT NULL,
+    analysts TEXT,
+    research_depth INTEGER,
+    status TEXT,
+    decision TEXT,
+    summary TEXT,
+    performance TEXT,
+    result_file TEXT,
+    reports_dir TEXT,
+    report_files TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_symbol ON analyses (stock_symbol, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_result_file ON analyses (result_file);
+CREATE INDEX IF NOT EXISTS idx_analyses_reports_dir ON analyses (reports_dir);
+"""
+
+
+def _escape_like(value: str) -> str:
+    """转义LIKE通配符"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _make_summary(content: str) -> str:
+    """取最终决策报告前200个字符作为摘要（与原文件系统加载逻辑一致）"""
+    summary = content[:200].replace('#', '').replace('*', '').strip()
+    if len(content) > 200:
+        summary += "..."
+    return summary
+
+
+def extract_decision(decision: Any) -> Optional[str]:
+    """从决策字典或最终决策文本中提取交易动作"""
+    if isinstance(decision, dict):
+        action = decision.get('action')
+        return str(action) if action else None
+    if isinstance(decision, str):
+        match = _DECISION_PATTERN.search(decision)
+        return match.group(1).upper() if match else None
+    return None
+
+
+def modular_analysis_id(stock_symbol: str, date_str: str) -> str:
+    """分模块报告目录对应的分析ID（与历史版本生成规则一致，保持标签和收藏可用）"""
+    try:
+        timestamp = datetime.strptime(date_str, '%Y-%m-%d').timestamp()
+    except ValueError:
+        timestamp = datetime.now().timestamp()
+    return f"{stock_symbol}_{date_str}_{int(timestamp)}"
+
+
+class ResultsCatalog:
+    """基于SQLite的分析结果目录"""
+
+    # sync_directories() 的最小间隔（秒）
+    SYNC_INTERVAL = 30
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_sync = 0.0
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 每次操作使用独立连接，Streamlit脚本线程之间不共享连接；
+        # 事务结束时提交或回滚，并关闭连接（sqlite3连接自身的上下文管理器不会关闭连接）
+        with closing(sqlite3.connect(self.db_path, timeout=10)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    # ==================== 写入 ====================
+
+    def upsert(self, entry: Dict[str, Any]) -> bool:
+        """写入或更新一条目录记录"""
+        try:
+            timestamp = entry.get('timestamp') or time.time()
+            analysis_date = entry.get('analysis_date') or datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+            row = (
+                entry['analysis_id'],
+                entry.get('stock_symbol', ''),
+                analysis_date,
+                float(timestamp),
+                json.dumps(entry.get('analysts') or [], ensure_ascii=False),
+                int(entry.get('research_depth') or 1),
+                entry.get('status', 'completed'),
+                entry.get('decision'),
+                entry.get('summary', '') or '',
+                json.dumps(entry.get('performance') or {}, ensure_ascii=False, default=str),
+                entry.get('result_file'),
+                entry.get('reports_dir'),
+                json.dumps(entry.get('report_files') or {}, ensure_ascii=False),
+            )
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO analyses (analysis_id, stock_symbol, analysis_date, timestamp, "
+                    "analysts, research_depth, status, decision, summary, performance, result_file, "
+                    "reports_dir, report_files) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ 分析结果目录写入失败: {e}")
+            return False
+
+    def add_result_file(self, result_file: Path, result: Optional[Dict[str, Any]] = None) -> bool:
+        """从Web界面保存的分析结果JSON建立目录记录（已有结果内容时不再读取文件）"""
+        if result is None:
+            with open(result_file, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        if not result.get('analysis_id'):
+            return False
+
+        full_data = result.get('full_data') or {}
+        decision = full_data.get('decision') if isinstance(full_data, dict) else None
+        return self.upsert({
+            'analysis_id': result['analysis_id'],
+            'stock_symbol': result.get('stock_symbol', ''),
+            'timestamp': result.get('timestamp'),
+            'analysts': result.get('analysts', []),
+            'research_depth': result.get('research_depth', 1),
+            'status': result.get('status', 'completed'),
+            'decision': extract_decision(decision),
+            'summary': result.get('summary', '') if isinstance(result.get('summary'), str) else '',
+            'performance': result.get('performance', {}),
+            'result_file': str(result_file),
+        })
+
+    def add_reports_dir(self, stock_symbol: str, date_dir: Path) -> bool:
+        """从分模块报告目录（<股票>/<日期>/reports/*.md）建立目录记录，只读取最终决策和元数据"""
+        reports_dir = date_dir / "reports"
+        report_files = {report_file.stem: str(report_file) for report_file in reports_dir.glob("*.md")}
+        if not report_files:
+            return False
+
+        date_str = date_dir.name
+        summary = ""
+        decision = None
+        final_file = report_files.get('final_trade_decision')
+        if final_file:
+            try:
+                with open(final_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                summary = _make_summary(content)
+                decision = extract_decision(content)
+            except Exception:
+                pass
+
+        # 优先使用元数据中的研究深度和分析师，否则按报告数量推断
+        research_depth = 3 if len(report_files) >= 5 else 2 if len(report_files) >= 3 else 1
+        analysts = ['market', 'fundamentals', 'trader']
+        metadata_file = date_dir / "analysis_metadata.json"
+        if metadata_file.exists():
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                research_depth = metadata.get('research_depth', 1)
+                analysts = metadata.get('analysts', analysts)
+            except Exception:
+                pass
+
+        analysis_id = modular_analysis_id(stock_symbol, date_str)
+        return self.upsert({
+            'analysis_id': analysis_id,
+            'stock_symbol': stock_symbol,
+            'analysis_date': date_str,
+            'timestamp': int(analysis_id.rsplit('_', 1)[-1]),
+            'analysts': analysts,
+            'research_depth': research_depth,
+            'status': 'completed',
+            'decision': decision,
+            'summary': summary,
+            'reports_dir': str(reports_dir),
+            'report_files': report_files,
+        })
+
+    def sync_directories(self, results_json_dir: Optional[Path] = None,
+                         report_roots: Iterable[Path] = (), force: bool = False) -> int:
+        """
+        增量补录尚未进入目录的结果文件和报告目录，返回新增记录数
+
+        已登记的文件只做目录遍历，不读取内容；两次同步之间至少间隔 SYNC_INTERVAL 秒。
+        """
+        now = time.time()
+        if not force and now - self._last_sync < self.SYNC_INTERVAL:
+            return 0
+        self._last_sync = now
+
+        with self._connect() as conn:
+            known_files = {row[0] for row in conn.execute(
+                "SELECT result_file FROM analyses WHERE result_file IS NOT NULL")}
+            known_dirs = {row[0] for row in conn.execute(
+                "SELECT reports_dir FROM analyses WHERE reports_dir IS NOT NULL")}
+
+        added = 0
+        if results_json_dir and Path(results_json_dir).exists():
+            for result_file in Path(results_json_dir).glob("*.json"):
+                if result_file.name in _SKIP_JSON_FILES or str(result_file) in known_files:
+                    continue
+                try:
+                    added += int(self.add_result_file(result_file))
+                except Exception as e:
+                    logger.warning(f"⚠️ 分析结果文件登记失败 {result_file.name}: {e}")
+
+        for root in report_roots:
+            root = Path(root)
+            if not root.exists():
+                continue
+            for stock_dir in root.iterdir():
+                if not stock_dir.is_dir():
+                    continue
+                for date_dir in stock_dir.iterdir():
+                    reports_dir = date_dir / "reports"
+                    if str(reports_dir) in known_dirs or not reports_dir.is_dir():
+                        continue
+                    try:
+                        added += int(self.add_reports_dir(stock_dir.name, date_dir))
+                    except Exception as e:
+                        logger.warning(f"⚠️ 报告目录登记失败 {date_dir}: {e}")
+
+        if added:
+            logger.info(f"📇 分析结果目录补录 {added} 条记录")
+        return added
+
+    def remove_missing(self) -> int:
+        """删除源文件已不存在的目录记录，返回删除数"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT analysis_id, result_file, reports_dir FROM analyses").fetchall()
+            missing = [row['analysis_id'] for row in rows
+                       if not os.path.exists(row['result_file'] or row['reports_dir'] or '')]
+            conn.executemany("DELETE FROM analyses WHERE analysis_id = ?", [(i,) for i in missing])
+        return len(missing)
+
+    # ==================== 查询 ====================
+
+    def query(self, start_date=None, end_date=None, stock_symbol: Optional[str] = None,
+              analyst_type: Optional[str] = None, search_text: Optional[str] = None,
+              analysis_ids: Optional[Iterable[str]] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """按条件查询目录，按时间倒序返回列表条目（不含报告正文）"""
+        clauses, params = [], []
+
+        if start_date:
+            clauses.append("timestamp >= ?")
+            params.append(datetime.combine(start_date, datetime.min.time()).timestamp())
+        if end_date:
+            clauses.append("timestamp < ?")
+            params.append(datetime.combine(end_date + timedelta(days=1), datetime.min.time()).timestamp())
+        if stock_symbol:
+            clauses.append("UPPER(stock_symbol) LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(stock_symbol.upper())}%")
+        if analyst_type:
+            clauses.append("analysts LIKE ? ESCAPE '\\'")
+            params.append(f'%{_escape_like(json.dumps(analyst_type, ensure_ascii=False))}%')
+        if search_text:
+            pattern = f"%{_escape_like(search_text.lower())}%"
+            clauses.append("(LOWER(stock_symbol) LIKE ? ESCAPE '\\' OR LOWER(summary) LIKE ? ESCAPE '\\' "
+                           "OR LOWER(analysts) LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern, pattern])
+        if analysis_ids is not None:
+            analysis_ids = list(analysis_ids)
+            if not analysis_ids:
+                return []
+            clauses.append(f"analysis_id IN ({', '.join('?' * len(analysis_ids))})")
+            params.extend(analysis_ids)
+
+        sql = "SELECT * FROM analyses"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(int(limit))
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._to_list_item(row) for row in rows]
+
+    def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """按分析ID获取目录记录"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM analyses WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return self._to_list_item(row) if row else None
+
+    @staticmethod
+    def _to_list_item(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'analysis_id': row['analysis_id'],
+            'timestamp': row['timestamp'],
+            'analysis_date': row['analysis_date'],
+            'stock_symbol': row['stock_symbol'],
+            'analysts': json.loads(row['analysts'] or '[]'),
+            'research_depth': row['research_depth'],
+            'status': row['status'],
+            'decision': row['decision'],
+            'summary': row['summary'],
+            'performance': json.loads(row['performance'] or '{}'),
+            'result_file': row['result_file'],
+            'report_files': json.loads(row['report_files'] or '{}'),
+            'source': 'file_system',
+        }
+
+    # ==================== 按需加载正文 ====================
+
+    @staticmethod
+    def load_details(item: Dict[str, Any]) -> Dict[str, Any]:
+        """读取目录条目对应的报告正文，返回 {'reports': {...}} 或 {'full_data': {...}}"""
+        details = {}
+        report_files = item.get('report_files') or {}
+        if report_files:
+            reports = {}
+            for report_name, file_path in report_files.items():
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        reports[report_name] = f.read()
+                except Exception as e:
+                    logger.warning(f"⚠️ 读取报告文件失败 {file_path}: {e}")
+            details['reports'] = reports
+
+        result_file = item.get('result_file')
+        if result_file:
+            try:
+                with open(result_file, 'r', encoding='utf-8') as f:
+                    details['full_data'] = json.load(f).get('full_data', {})
+            except Exception as e:
+                logger.warning(f"⚠️ 读取分析结果文件失败 {result_file}: {e}")
+        return details
+
+
+def load_result_details(item: Dict[str, Any], mongodb_manager=None,
+                        catalog: Optional[ResultsCatalog] = None) -> Dict[str, Any]:
+    """
+    按analysis_id加载历史结果列表条目的报告正文
+
+    MongoDB条目从数据库读取完整文档；文件系统条目缺少文件路径时先从目录按ID取回记录。
+    返回 {'reports': {...}} 和/或 {'full_data': {...}}，无法加载时返回空字典。
+    """
+    source = item.get('source')
+    analysis_id = item.get('analysis_id')
+    if source == 'mongodb':
+        detail = mongodb_manager.get_report_by_id(analysis_id) if mongodb_manager and analysis_id else None
+        return {'reports': (detail or {}).get('reports', {})}
+    if source == 'file_system':
+        entry = item
+        if not (item.get('report_files') or item.get('result_file')) and analysis_id:
+            entry = (catalog or get_results_catalog()).get(analysis_id) or item
+        return ResultsCatalog.load_details(entry)
+    return {}
+
+
+def export_full_results(results: Iterable[Dict[str, Any]], mongodb_manager=None,
+                        catalog: Optional[ResultsCatalog] = None) -> str:
+    """导出完整数据JSON：列表条目不含报告正文，逐条按analysis_id加载详情后再序列化"""
+    exported = []
+    for result in results:
+        item = dict(result)
+        if not (item.get('reports') or item.get('full_data')):
+            item.update(load_result_details(item, mongodb_manager, catalog))
+        exported.append(item)
+    return json.dumps(exported, ensure_ascii=False, indent=2, default=str)
+
+
+_results_catalog = None
+_results_catalog_lock = threading.Lock()
+
+
+def get_results_catalog(db_path: Optional[str] = None) -> ResultsCatalog:
+    """获取全局分析结果目录实例（默认位于Web分析结果目录下）"""
+    global _results_catalog
+    if _results_catalog is None:
+        with _results_catalog_lock:
+            if _results_catalog is None:
+                if db_path is None:
+                    web_dir = Path(__file__).parent.parent
+                    db_path = web_dir / "data" / "analysis_results" / CATALOG_FILENAME
+                _results_catalog = ResultsCatalog(db_path)
+    return _results_catalog
@@ -1,22 +1,21 @@
 """
 用户操作行为记录器
-记录用户在系统中的各种操作行为，并保存到独立的日志文件中
+记录用户在系统中的各种操作行为，写入带索引的活动存储（见 activity_store）
 """
 
-import json
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import streamlit as st
 from dataclasses import dataclass, asdict
-import threading
-import os
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('user_activity')
 
+from web.utils.activity_store import SOURCE_ACTIVITY, ActivityStore, aggregate_counters, get_activity_store
+
 @dataclass
 class UserActivity:
     """用户活动记录"""
@@ -41,9 +40,6 @@ class UserActivityLogger:
         self.activity_dir = Path(__file__).parent.parent / "data" / "user_activities"
         self.activity_dir.mkdir(parents=True, exist_ok=True)
         
-        # 线程锁，确保文件写入安全
-        self._lock = threading.Lock()
-        
         # 活动类型定义
         self.activity_types = {
             "auth": "认证相关",
@@ -58,11 +54,10 @@ class UserActivityLogger:
         logger.info(f"✅ 用户活动记录器初始化完成")
         logger.info(f"📁 活动记录目录: {self.activity_dir}")
     
-    def _get_activity_file_path(self, date: str = None) -> Path:
-        """获取活动记录文件路径"""
-        if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
-        return self.activity_dir / f"user_activities_{date}.jsonl"
+    @property
+    def store(self) -> ActivityStore:
+        """活动存储（首次使用时创建，避免导入模块时探测数据库）"""
+        return get_activity_store()
     
     def _get_session_id(self) -> str:
         """获取会话ID"""
@@ -141,21 +136,8 @@ class UserActivityLogger:
             logger.error(f"❌ 记录用户活动失败: {e}")
     
     def _write_activity(self, activity: UserActivity) -> None:
-        """写入活动记录到文件"""
-        with self._lock:
-            try:
-                activity_file = self._get_activity_file_path()
-                
-                # 转换为JSON格式
-                activity_dict = asdict(activity)
-                activity_dict['datetime'] = datetime.fromtimestamp(activity.timestamp).isoformat()
-                
-                # 追加写入JSONL格式
-                with open(activity_file, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps(activity_dict, ensure_ascii=False) + '\n')
-                
-            except Exception as e:
-                logger.error(f"❌ 写入活动记录失败: {e}")
+        """追加活动记录到存储"""
+        self.store.append(asdict(activity), SOURCE_ACTIVITY)
     
     def log_login(self, username: str, success: bool, error_message: str = None) -> None:
         """记录登录活动"""
@@ -241,9 +223,10 @@ class UserActivityLogger:
                           start_date: datetime = None,
                           end_date: datetime = None,
                           action_type: str = None,
-                          limit: int = 100) -> List[Dict[str, Any]]:
+                          limit: int = 100,
+                          offset: int = 0) -> List[Dict[str, Any]]:
         """
-        获取用户活动记录
+        获取用户活动记录（在存储端过滤和分页）
         
         Args:
             username: 用户名过滤
@@ -251,130 +234,88 @@ class UserActivityLogger:
             end_date: 结束日期  
             action_type: 活动类型过滤
             limit: 返回记录数限制
+            offset: 跳过的记录数（分页）
             
         Returns:
-            活动记录列表
+            活动记录列表（按时间倒序）
         """
-        activities = []
-        
         try:
-            # 确定要查询的日期范围
-            if start_date is None:
-                start_date = datetime.now() - timedelta(days=7)  # 默认查询最近7天
-            if end_date is None:
-                end_date = datetime.now()
-            
-            # 遍历日期范围内的所有文件
-            current_date = start_date.date()
-            end_date_only = end_date.date()
-            
-            while current_date <= end_date_only:
-                date_str = current_date.strftime("%Y-%m-%d")
-                activity_file = self._get_activity_file_path(date_str)
-                
-                if activity_file.exists():
-                    activities.extend(self._read_activities_from_file(
-                        activity_file, username, action_type, start_date, end_date
-                    ))
-                
-                current_date += timedelta(days=1)
-            
-            # 按时间戳倒序排序
-            activities.sort(key=lambda x: x['timestamp'], reverse=True)
-            
-            # 应用限制
-            return activities[:limit]
-            
+            start_date, end_date = self._default_range(start_date, end_date)
+            return self.store.query(
+                start_time=start_date.timestamp(),
+                end_time=end_date.timestamp(),
+                username=username,
+                action_type=action_type,
+                source=SOURCE_ACTIVITY,
+                limit=limit,
+                offset=offset
+            )
         except Exception as e:
             logger.error(f"❌ 获取用户活动记录失败: {e}")
             return []
     
-    def _read_activities_from_file(self, file_path: Path, username: str = None,
-                                 action_type: str = None, start_date: datetime = None,
-                                 end_date: datetime = None) -> List[Dict[str, Any]]:
-        """从文件读取活动记录"""
-        activities = []
-        
+    def count_user_activities(self, username: str = None,
+                              start_date: datetime = None,
+                              end_date: datetime = None,
+                              action_type: str = None) -> int:
+        """统计符合条件的活动记录数（用于分页）"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        activity = json.loads(line.strip())
-                        
-                        # 应用过滤条件
-                        if username and activity.get('username') != username:
-                            continue
-                        
-                        if action_type and activity.get('action_type') != action_type:
-                            continue
-                        
-                        activity_time = datetime.fromtimestamp(activity['timestamp'])
-                        if start_date and activity_time < start_date:
-                            continue
-                        if end_date and activity_time > end_date:
-                            continue
-                        
-                        activities.append(activity)
-                        
+            start_date, end_date = self._default_range(start_date, end_date)
+            return self.store.count(
+                start_time=start_date.timestamp(),
+                end_time=end_date.timestamp(),
+                username=username,
+                action_type=action_type,
+                source=SOURCE_ACTIVITY
+            )
         except Exception as e:
-            logger.error(f"❌ 读取活动文件失败 {file_path}: {e}")
-        
-        return activities
+            logger.error(f"❌ 统计用户活动记录失败: {e}")
+            return 0
+    
+    @staticmethod
+    def _default_range(start_date: datetime = None, end_date: datetime = None):
+        """默认查询最近7天；传入日期（date）时覆盖当天全天"""
+        if start_date is None:
+            start_date = datetime.now() - timedelta(days=7)
+        elif not isinstance(start_date, datetime):
+            start_date = datetime.combine(start_date, datetime.min.time())
+        if end_date is None:
+            end_date = datetime.now()
+        elif not isinstance(end_date, datetime):
+            end_date = datetime.combine(end_date, datetime.max.time())
+        return start_date, end_date
     
-    def get_activity_statistics(self, days: int = 7) -> Dict[str, Any]:
+    def get_activity_statistics(self, days: int = 7,
+                                start_date: datetime = None,
+                                end_date: datetime = None,
+                                username: str = None,
+                                action_type: str = None) -> Dict[str, Any]:
         """
-        获取活动统计信息
+        获取活动统计信息（读取按天聚合的计数，不扫描明细记录）
         
         Args:
-            days: 统计天数
+            days: 统计天数（未指定start_date时使用）
+            start_date: 开始日期（按天统计，包含当天）
+            end_date: 结束日期（包含当天）
+            username: 用户名过滤
+            action_type: 活动类型过滤
             
         Returns:
             统计信息字典
         """
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        activities = self.get_user_activities(
-            start_date=start_date,
-            end_date=end_date,
-            limit=10000  # 获取更多记录用于统计
-        )
-        
-        # 统计分析
-        stats = {
-            "total_activities": len(activities),
-            "unique_users": len(set(a['username'] for a in activities)),
-            "activity_types": {},
-            "daily_activities": {},
-            "user_activities": {},
-            "success_rate": 0,
-            "average_duration": 0
-        }
-        
-        # 按类型统计
-        for activity in activities:
-            action_type = activity.get('action_type', 'unknown')
-            stats["activity_types"][action_type] = stats["activity_types"].get(action_type, 0) + 1
-            
-            # 按用户统计
-            username = activity.get('username', 'unknown')
-            stats["user_activities"][username] = stats["user_activities"].get(username, 0) + 1
-            
-            # 按日期统计
-            date_str = datetime.fromtimestamp(activity['timestamp']).strftime('%Y-%m-%d')
-            stats["daily_activities"][date_str] = stats["daily_activities"].get(date_str, 0) + 1
-        
-        # 成功率统计
-        successful_activities = sum(1 for a in activities if a.get('success', True))
-        if activities:
-            stats["success_rate"] = successful_activities / len(activities) * 100
-        
-        # 平均耗时统计
-        durations = [a.get('duration_ms', 0) for a in activities if a.get('duration_ms')]
-        if durations:
-            stats["average_duration"] = sum(durations) / len(durations)
-        
-        return stats
+        end_date = end_date or datetime.now()
+        start_date = start_date or end_date - timedelta(days=days)
+        try:
+            return self.store.statistics(
+                start_day=start_date,
+                end_day=end_date,
+                username=username,
+                action_type=action_type,
+                source=SOURCE_ACTIVITY
+            )
+        except Exception as e:
+            logger.error(f"❌ 获取活动统计失败: {e}")
+            return aggregate_counters([])
     
     def cleanup_old_activities(self, days_to_keep: int = 90) -> int:
         """
@@ -384,23 +325,22 @@ class UserActivityLogger:
             days_to_keep: 保留天数
             
         Returns:
-            删除的文件数量
+            删除的记录数量
         """
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
         deleted_count = 0
         
         try:
+            deleted_count = self.store.delete_before(cutoff_date.timestamp())
+            logger.info(f"🗑️ 删除 {deleted_count} 条旧活动记录")
+            
+            # 已导入存储的旧版日志文件一并删除
             for activity_file in self.activity_dir.glob("user_activities_*.jsonl"):
-                # 从文件名提取日期
                 try:
                     date_str = activity_file.stem.replace("user_activities_", "")
-                    file_date = datetime.strptime(date_str, "%Y-%m-%d")
-                    
-                    if file_date < cutoff_date:
+                    if datetime.strptime(date_str, "%Y-%m-%d") < cutoff_date:
                         activity_file.unlink()
-                        deleted_count += 1
-                        logger.info(f"🗑️ 删除旧活动记录: {activity_file.name}")
-                        
+                        logger.info(f"🗑️ 删除旧活动记录文件: {activity_file.name}")
                 except ValueError:
                     # 文件名格式不正确，跳过
                     continue
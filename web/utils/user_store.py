@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+用户与点数存储
+AuthManager 和会员管理页面通过该存储读写用户信息，点数扣减为原子的“检查并扣减”操作，
+并发分析不会丢失更新，也不会读到写了一半的文件。
+
+- file（默认）：users.json，按文件修改时间校验内存缓存，只有文件变化时才重新解析；
+  写入在进程锁 + 文件锁内完成，先写临时文件再原子替换
+- sqlite：web/config/users.db，点数扣减为单条条件UPDATE
+- mongodb：users 集合，点数扣减为带条件的 find_one_and_update
+
+sqlite/mongodb 后端首次创建时从 users.json 导入已有用户，之后以数据库为准。
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from tradingagents.config.env_utils import parse_str_env
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('auth')
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+@contextmanager
+def _file_lock(lock_path: Path):
+    """跨进程排他锁（POSIX使用flock，Windows使用msvcrt.locking）"""
+    with open(lock_path, "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class UserStore:
+    """用户存储接口，点数相关方法返回操作后的点数，失败返回None"""
+
+    backend = "base"
+
+    def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def list_users(self) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def create_user(self, username: str, info: Dict[str, Any]) -> bool:
+        """创建用户，用户已存在时返回False"""
+        raise NotImplementedError
+
+    def update_user(self, username: str, fields: Dict[str, Any]) -> bool:
+        """更新用户的部分字段，用户不存在时返回False"""
+        raise NotImplementedError
+
+    def delete_user(self, username: str) -> bool:
+        raise NotImplementedError
+
+    def set_points(self, username: str, points: int) -> Optional[int]:
+        raise NotImplementedError
+
+    def add_points(self, username: str, delta: int) -> Optional[int]:
+        """增减点数，结果不低于0"""
+        raise NotImplementedError
+
+    def try_deduct(self, username: str, amount: int) -> Optional[int]:
+        """点数足够时原子扣减并返回剩余点数，用户不存在或点数不足返回None"""
+        raise NotImplementedError
+
+    def ensure_defaults(self, default_users: Dict[str, Dict[str, Any]]) -> bool:
+        """存储为空时写入默认用户，返回是否写入"""
+        raise NotImplementedError
+
+
+class JsonUserStore(UserStore):
+    """基于users.json的用户存储"""
+
+    backend = "file"
+
+    def __init__(self, users_file: Path):
+        self.users_file = Path(users_file)
+        self.lock_file = self.users_file.with_name(self.users_file.name + ".lock")
+        self._lock = threading.RLock()
+        self._cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._cache_key: Optional[Tuple] = None
+        self.stats = {"reads": 0, "parses": 0, "writes": 0}
+
+    def _stat_key(self) -> Optional[Tuple]:
+        try:
+            stat = os.stat(self.users_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _users(self) -> Dict[str, Dict[str, Any]]:
+        """返回缓存的用户字典（调用方不得修改），文件变化时重新解析"""
+        key = self._stat_key()
+        with self._lock:
+            self.stats["reads"] += 1
+            if self._cache is not None and key == self._cache_key:
+                return self._cache
+            if key is None:
+                users = {}
+            else:
+                try:
+                    with open(self.users_file, 'r', encoding='utf-8') as f:
+                        users = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.error(f"❌ 加载用户配置失败: {e}")
+                    return self._cache or {}
+                self.stats["parses"] += 1
+            self._cache, self._cache_key = users, key
+            return users
+
+    def _mutate(self, change: Callable[[Dict[str, Dict[str, Any]]], Tuple[bool, Any]]):
+        """
+        在进程锁和文件锁内执行读-改-写
+
+        change(users) 返回 (是否需要写入, 返回值)；写入先落到临时文件再原子替换，
+        失败时缓存保持不变。
+        """
+        with self._lock:
+            self.users_file.parent.mkdir(parents=True, exist_ok=True)
+            with _file_lock(self.lock_file):
+                users = copy.deepcopy(self._users())
+                changed, result = change(users)
+                if changed:
+                    self._write(users)
+                return result
+
+    def _write(self, users: Dict[str, Dict[str, Any]]):
+        fd, tmp_path = tempfile.mkstemp(prefix=".users_", suffix=".tmp", dir=str(self.users_file.parent))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(users, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.users_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.stats["writes"] += 1
+        self._cache, self._cache_key = users, self._stat_key()
+
+    def get_user(self, username):
+        info = self._users().get(username)
+        return copy.deepcopy(info) if info is not None else None
+
+    def list_users(self):
+        return copy.deepcopy(self._users())
+
+    def create_user(self, username, info):
+        def change(users):
+            if username in users:
+                return False, False
+            users[username] = dict(info)
+            return True, True
+        return self._mutate(change)
+
+    def update_user(self, username, fields):
+        def change(users):
+            if username not in users:
+                return False, False
+            users[username].update(fields)
+            return True, True
+        return self._mutate(change)
+
+    def delete_user(self, username):
+        def change(users):
+            return (True, True) if users.pop(username, None) is not None else (False, False)
+        return self._mutate(change)
+
+    def set_points(self, username, points):
+        return self._change_points(username, lambda current: int(max(0, points)))
+
+    def add_points(self, username, delta):
+        return self._change_points(username, lambda current: int(max(0, current + int(delta))))
+
+    def try_deduct(self, username, amount):
+        return self._change_points(username, lambda current: current - amount if current >= amount else None)
+
+    def _change_points(self, username, compute: Callable[[int], Optional[int]]) -> Optional[int]:
+        def change(users):
+            info = users.get(username)
+            if info is None:
+                return False, None
+            points = compute(int(info.get("points", 0)))
+            if points is None:
+                return False, None
+            info["points"] = points
+            return True, points
+        return self._mutate(change)
+
+    def ensure_defaults(self, default_users):
+        def change(users):
+            if users or self.users_file.exists():
+                return False, False
+            users.update(default_users)
+            return True, True
+        return self._mutate(change)
+
+
+class SQLiteUserStore(UserStore):
+    """基于SQLite的用户存储，点数单独成列以便条件更新"""
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: Path, seed_file: Optional[Path] = None):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, "
+                         "points INTEGER NOT NULL DEFAULT 0, data TEXT NOT NULL)")
+        _seed_from_file(self, seed_file)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 事务结束时提交或回滚，并关闭连接（sqlite3连接自身的上下文管理器不会关闭连接）
+        with closing(sqlite3.connect(self.db_path, timeout=10)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    @staticmethod
+    def _row_to_info(row) -> Dict[str, Any]:
+        info = json.loads(row[2])
+        info["points"] = row[1]
+        return info
+
+    @staticmethod
+    def _split(info: Dict[str, Any]) -> Tuple[int, str]:
+        data = {k: v for k, v in info.items() if k != "points"}
+        return int(info.get("points", 0)), json.dumps(data, ensure_ascii=False)
+
+    def get_user(self, username):
+        with self._connect() as conn:
+            row = conn.execute("SELECT username, points, data FROM users WHERE username = ?", (username,)).fetchone()
+        return self._row_to_info(row) if row else None
+
+    def list_users(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT username, points, data FROM users ORDER BY rowid").fetchall()
+        return {row[0]: self._row_to_info(row) for row in rows}
+
+    def create_user(self, username, info):
+        points, data = self._split(info)
+        with self._connect() as conn:
+            return conn.execute("INSERT OR IGNORE INTO users (username, points, data) VALUES (?, ?, ?)",
+                                (username, points, data)).rowcount == 1
+
+    def update_user(self, username, fields):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT username, points, data FROM users WHERE username = ?", (username,)).fetchone()
+            if row is None:
+                return False
+            info = self._row_to_info(row)
+            info.update(fields)
+            points, data = self._split(info)
+            conn.execute("UPDATE users SET points = ?, data = ? WHERE username = ?", (points, data, username))
+            return True
+
+    def delete_user(self, username):
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM users WHERE username = ?", (username,)).rowcount == 1
+
+    def _update_points(self, sql: str, params: Tuple, username: str) -> Optional[int]:
+        with self._connect() as conn:
+            if conn.execute(sql, params).rowcount != 1:
+                return None
+            return conn.execute("SELECT points FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+    def set_points(self, username, points):
+        return self._update_points("UPDATE users SET points = ? WHERE username = ?",
+                                   (int(max(0, points)), username), username)
+
+    def add_points(self, username, delta):
+        return self._update_points("UPDATE users SET points = MAX(0, points + ?) WHERE username = ?",
+                                   (int(delta), username), username)
+
+    def try_deduct(self, username, amount):
+        return self._update_points("UPDATE users SET points = points - ? WHERE username = ? AND points >= ?",
+                                   (int(amount), username, int(amount)), username)
+
+    def ensure_defaults(self, default_users):
+        if self.list_users():
+            return False
+        for username, info in default_users.items():
+            self.create_user(username, info)
+        return True
+
+
+class MongoUserStore(UserStore):
+    """基于MongoDB的用户存储（文档 _id 为用户名）"""
+
+    backend = "mongodb"
+
+    def __init__(self, database, seed_file: Optional[Path] = None):
+        self.collection = database["users"]
+        _seed_from_file(self, seed_file)
+
+    @staticmethod
+    def _to_info(doc) -> Dict[str, Any]:
+        return {k: v for k, v in doc.items() if k != "_id"}
+
+    def get_user(self, username):
+        doc = self.collection.find_one({"_id": username})
+        return self._to_info(doc) if doc else None
+
+    def list_users(self):
+        return {doc["_id"]: self._to_info(doc) for doc in self.collection.find()}
+
+    def create_user(self, username, info):
+        from pymongo.errors import DuplicateKeyError
+        try:
+            self.collection.insert_one({**info, "_id": username, "points": int(info.get("points", 0))})
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def update_user(self, username, fields):
+        return self.collection.update_one({"_id": username}, {"$set": fields}).matched_count == 1
+
+    def delete_user(self, username):
+        return self.collection.delete_one({"_id": username}).deleted_count == 1
+
+    def _points_after(self, query: Dict[str, Any], update: Dict[str, Any]) -> Optional[int]:
+        from pymongo import ReturnDocument
+        doc = self.collection.find_one_and_update(query, update, projection={"points": 1},
+                                                  return_document=ReturnDocument.AFTER)
+        return int(doc["points"]) if doc else None
+
+    def set_points(self, username, points):
+        return self._points_after({"_id": username}, {"$set": {"points": int(max(0, points))}})
+
+    def add_points(self, username, delta):
+        delta = int(delta)
+        if delta >= 0:
+            return self._points_after({"_id": username}, {"$inc": {"points": delta}})
+        points = self._points_after({"_id": username, "points": {"$gte": -delta}}, {"$inc": {"points": delta}})
+        if points is None:
+            # 点数不足时清零
+            points = self._points_after({"_id": username, "points": {"$lt": -delta}}, {"$set": {"points": 0}})
+        return points
+
+    def try_deduct(self, username, amount):
+        amount = int(amount)
+        return self._points_after({"_id": username, "points": {"$gte": amount}}, {"$inc": {"points": -amount}})
+
+    def ensure_defaults(self, default_users):
+        if self.collection.count_documents({}, limit=1):
+            return False
+        for username, info in default_users.items():
+            self.create_user(username, info)
+        return True
+
+
+def update_user_with_points(store: UserStore, username: str, fields: Dict[str, Any], points_delta: int = 0) -> bool:
+    """
+    更新用户资料并按增量调整点数
+
+    点数只以增量经 add_points 原子调整，不写入表单加载时读到的绝对值，
+    避免覆盖表单打开期间其他会话扣减或充值的点数；增量为0时不修改点数。
+    """
+    fields = {k: v for k, v in fields.items() if k != "points"}
+    if fields and not store.update_user(username, fields):
+        return False
+    points_delta = int(points_delta)
+    if points_delta == 0:
+        return fields != {} or store.get_user(username) is not None
+    return store.add_points(username, points_delta) is not None
+
+
+def _seed_from_file(store: UserStore, seed_file: Optional[Path]):
+    """数据库后端为空时从users.json导入已有用户"""
+    if not seed_file or not Path(seed_file).exists() or store.list_users():
+        return
+    try:
+        with open(seed_file, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+        for username, info in users.items():
+            store.create_user(username, info)
+        logger.info(f"📥 已从 {seed_file} 导入 {len(users)} 个用户到{store.backend}用户存储")
+    except Exception as e:
+        logger.error(f"❌ 导入用户配置失败: {e}")
+
+
+def create_user_store(users_file: Path, backend: str = "file") -> UserStore:
+    """创建用户存储，数据库后端不可用时回退到users.json"""
+    users_file = Path(users_file)
+    if backend == "sqlite":
+        return SQLiteUserStore(users_file.with_suffix(".db"), seed_file=users_file)
+    if backend == "mongodb":
+        try:
+            from tradingagents.config.database_manager import get_database_manager
+            manager = get_database_manager()
+            if manager.is_mongodb_available():
+                return MongoUserStore(manager.get_mongodb_database(), seed_file=users_file)
+        except Exception as e:
+            logger.debug(f"用户存储获取MongoDB失败: {e}")
+        logger.warning("⚠️ MongoDB不可用，用户存储回退到users.json")
+    return JsonUserStore(users_file)
+
+
+_user_stores: Dict[str, UserStore] = {}
+_user_stores_lock = threading.Lock()
+
+
+def get_user_store(users_file: Path) -> UserStore:
+    """获取共享的用户存储（同一文件只创建一次，共享内存缓存和锁），后端由 AUTH_USER_STORE_BACKEND 指定"""
+    key = str(Path(users_file).resolve())
+    with _user_stores_lock:
+        if key not in _user_stores:
+            _user_stores[key] = create_user_store(users_file, parse_str_env("AUTH_USER_STORE_BACKEND", "file"))
+        return _user_stores[key]